@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Pauta, Asset, TrendMonitor, 
-    WebInsight, IAModelUsage, ContentMetrics
+    WebInsight, IAModelUsage, IAUsageDaily, ContentMetrics
 )
 # NOTA: Post foi movido para apps.posts.admin
 
@@ -95,6 +95,30 @@ class IAModelUsageAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(IAUsageDaily)
+class IAUsageDailyAdmin(admin.ModelAdmin):
+    list_display = ['date', 'organization', 'provider', 'model', 'operation', 'calls',
+                   'error_calls', 'tokens_total', 'cost_usd', 'latency_p50_seconds',
+                   'latency_p95_seconds']
+    list_filter = ['provider', 'operation', 'organization', 'date']
+    date_hierarchy = 'date'
+    list_select_related = ['organization']
+    readonly_fields = ['organization', 'date', 'provider', 'model', 'operation', 'calls',
+                      'error_calls', 'tokens_input', 'tokens_output', 'tokens_total',
+                      'cost_usd', 'latency_p50_seconds', 'latency_p95_seconds',
+                      'last_usage_id', 'updated_at']
+    
+    def get_queryset(self, request):
+        # Inclui rollups de registros legados sem organização
+        return IAUsageDaily._base_manager.all()
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(ContentMetrics)
 class ContentMetricsAdmin(admin.ModelAdmin):
     list_display = ['content', 'creation_duration_seconds', 'approval_duration_seconds',
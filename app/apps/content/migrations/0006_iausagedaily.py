@@ -0,0 +1,47 @@
+# Generated by Django 4.2.8 on 2026-10-18 01:12
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_search_config'),
+        ('content', '0005_pauta_optional_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IAUsageDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('provider', models.CharField(max_length=20, verbose_name='Provider')),
+                ('model', models.CharField(max_length=50, verbose_name='Modelo')),
+                ('operation', models.CharField(max_length=50, verbose_name='Operação')),
+                ('calls', models.PositiveIntegerField(default=0, verbose_name='Chamadas')),
+                ('error_calls', models.PositiveIntegerField(default=0, verbose_name='Chamadas com Erro')),
+                ('tokens_input', models.BigIntegerField(default=0, verbose_name='Tokens Input')),
+                ('tokens_output', models.BigIntegerField(default=0, verbose_name='Tokens Output')),
+                ('tokens_total', models.BigIntegerField(default=0, verbose_name='Tokens Total')),
+                ('cost_usd', models.DecimalField(decimal_places=6, default=Decimal('0.000000'), max_digits=14, verbose_name='Custo (USD)')),
+                ('latency_p50_seconds', models.DecimalField(blank=True, decimal_places=3, max_digits=8, null=True, verbose_name='Latência p50 (s)')),
+                ('latency_p95_seconds', models.DecimalField(blank=True, decimal_places=3, max_digits=8, null=True, verbose_name='Latência p95 (s)')),
+                ('last_usage_id', models.BigIntegerField(default=0, verbose_name='Último Uso Processado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('organization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ia_usage_daily', to='core.organization', verbose_name='Organização')),
+            ],
+            options={
+                'verbose_name': 'Uso de IA (Diário)',
+                'verbose_name_plural': 'Uso de IA (Diário)',
+                'ordering': ['-date', 'provider', 'model', 'operation'],
+                'indexes': [
+                    models.Index(fields=['organization', 'date'], name='content_iau_organiz_0a8de4_idx'),
+                    models.Index(fields=['date'], name='content_iau_date_c8fea5_idx'),
+                    models.Index(fields=['last_usage_id'], name='content_iau_last_us_69f059_idx'),
+                ],
+            },
+        ),
+    ]
@@ -477,6 +477,73 @@ class IAModelUsage(models.Model):
         return f"{self.provider}/{self.model} - {self.operation} - {self.cost_usd} USD"
 
 
+class IAUsageDaily(models.Model):
+    """
+    Rollup diário de IAModelUsage (organização × provider × modelo × operação)
+    Recalculado incrementalmente por UsageRollupService (task periódica)
+    """
+    organization = models.ForeignKey(
+        'core.Organization',
+        on_delete=models.CASCADE,
+        related_name='ia_usage_daily',
+        null=True,
+        blank=True,
+        verbose_name='Organização'
+    )
+    date = models.DateField(verbose_name='Data')
+    provider = models.CharField(max_length=20, verbose_name='Provider')
+    model = models.CharField(max_length=50, verbose_name='Modelo')
+    operation = models.CharField(max_length=50, verbose_name='Operação')
+    
+    # Volume
+    calls = models.PositiveIntegerField(default=0, verbose_name='Chamadas')
+    error_calls = models.PositiveIntegerField(default=0, verbose_name='Chamadas com Erro')
+    tokens_input = models.BigIntegerField(default=0, verbose_name='Tokens Input')
+    tokens_output = models.BigIntegerField(default=0, verbose_name='Tokens Output')
+    tokens_total = models.BigIntegerField(default=0, verbose_name='Tokens Total')
+    cost_usd = models.DecimalField(
+        max_digits=14,
+        decimal_places=6,
+        default=Decimal('0.000000'),
+        verbose_name='Custo (USD)'
+    )
+    
+    # Latência (execution_time_seconds)
+    latency_p50_seconds = models.DecimalField(
+        max_digits=8,
+        decimal_places=3,
+        null=True,
+        blank=True,
+        verbose_name='Latência p50 (s)'
+    )
+    latency_p95_seconds = models.DecimalField(
+        max_digits=8,
+        decimal_places=3,
+        null=True,
+        blank=True,
+        verbose_name='Latência p95 (s)'
+    )
+    
+    # Maior IAModelUsage.id incluído (marca d'água do refresh incremental)
+    last_usage_id = models.BigIntegerField(default=0, verbose_name='Último Uso Processado')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+    
+    objects = OrganizationScopedManager()
+    
+    class Meta:
+        verbose_name = 'Uso de IA (Diário)'
+        verbose_name_plural = 'Uso de IA (Diário)'
+        ordering = ['-date', 'provider', 'model', 'operation']
+        indexes = [
+            models.Index(fields=['organization', 'date']),
+            models.Index(fields=['date']),
+            models.Index(fields=['last_usage_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.provider}/{self.model} - {self.operation}: {self.calls} chamadas"
+
+
 class ContentMetrics(models.Model):
     """
     Métricas do ciclo de vida do conteúdo
@@ -0,0 +1,7 @@
+"""
+Content services package
+"""
+from .usage_accounting import UsageAccountingService
+from .usage_rollup import UsageRollupService
+
+__all__ = ['UsageAccountingService', 'UsageRollupService']
@@ -0,0 +1,310 @@
+"""
+Usage Accounting Service - Registro write-behind de uso de IA
+
+Substitui IAModelUsage.objects.create() por chamada + dois SUM sobre
+IAModelUsage ao final de cada geração por:
+- record(): evento serializado numa lista Redis (RPUSH, sem query)
+- flush(): task periódica consome a lista em lotes, grava com bulk_create
+  e soma custo/tokens em ContentMetrics com um UPDATE ... F() por conteúdo
+- Se o Redis estiver indisponível, o evento é gravado na hora (mesmo caminho
+  do flush, lote de um)
+- Lote que falha (ex: FK para post/usuário removido antes do flush) é gravado
+  evento a evento; eventos que continuam falhando voltam ao buffer com contador
+  de tentativas e, após IA_USAGE_MAX_ATTEMPTS, vão para a dead-letter
+  (ia_usage:dead) sem travar os próximos flushes
+"""
+
+import json
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class UsageAccountingService:
+    """
+    Uso:
+        UsageAccountingService.record(
+            user_id=pauta.user_id, area_id=pauta.area_id, organization_id=pauta.organization_id,
+            provider='openai', model=result['model'], operation='pauta',
+            tokens_input=..., tokens_output=..., tokens_total=..., cost_usd=...,
+            started_at=started_at, completed_at=timezone.now(),
+        )
+        UsageAccountingService.flush()  # task flush_ia_usage
+    """
+
+    BUFFER_KEY = 'ia_usage:buffer'
+    DEAD_KEY = 'ia_usage:dead'
+    SKIPPED_KEY = 'ia_usage:skipped'
+
+    # Banco indisponível: o lote inteiro volta ao buffer sem contar tentativa
+    TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+    # Retira lote do início do buffer (atômico entre flushes concorrentes);
+    # eventos que não puderam ser gravados voltam ao buffer com LPUSH
+    TAKE_SCRIPT = """
+        local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+        if #items > 0 then
+            redis.call('LTRIM', KEYS[1], #items, -1)
+        end
+        return items
+    """
+
+    @staticmethod
+    def _get_redis():
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    # ============================================
+    # REGISTRO
+    # ============================================
+
+    @staticmethod
+    def _event(
+        provider: str,
+        model: str,
+        operation: str,
+        user_id: int,
+        area_id: Optional[int],
+        organization_id: Optional[int] = None,
+        content_id: Optional[int] = None,
+        tokens_input: int = 0,
+        tokens_output: int = 0,
+        tokens_total: int = 0,
+        cost_usd=0,
+        started_at=None,
+        completed_at=None,
+        status: str = 'success',
+        error_message: str = '',
+    ) -> Dict:
+        completed_at = completed_at or timezone.now()
+        started_at = started_at or completed_at
+        return {
+            'provider': provider,
+            'model': model or '',
+            'operation': operation,
+            'user_id': user_id,
+            'area_id': area_id,
+            'organization_id': organization_id,
+            'content_id': content_id,
+            'tokens_input': int(tokens_input or 0),
+            'tokens_output': int(tokens_output or 0),
+            'tokens_total': int(tokens_total or 0),
+            'cost_usd': str(Decimal(str(cost_usd or 0)).quantize(Decimal('0.000001'))),
+            'started_at': started_at.isoformat(),
+            'completed_at': completed_at.isoformat(),
+            'status': status,
+            'error_message': error_message or '',
+        }
+
+    @classmethod
+    def record(cls, **fields) -> None:
+        """
+        Registra uso de IA (gravação adiada para o próximo flush)
+
+        Args:
+            **fields: Ver _event (provider, model, operation, user_id, area_id,
+                      organization_id, content_id, tokens_*, cost_usd,
+                      started_at, completed_at, status, error_message)
+        """
+        event = cls._event(**fields)
+        try:
+            cls._get_redis().rpush(cls.BUFFER_KEY, json.dumps(event))
+        except Exception as e:
+            logger.warning(f"[IA_USAGE] Redis indisponível ({e}); gravando uso direto no banco")
+            cls._write([event])
+
+    # ============================================
+    # GRAVAÇÃO EM LOTE
+    # ============================================
+
+    @staticmethod
+    def _build(event: Dict):
+        from apps.content.models import IAModelUsage
+
+        started_at = parse_datetime(event['started_at'])
+        completed_at = parse_datetime(event['completed_at'])
+        return IAModelUsage(
+            organization_id=event['organization_id'],
+            user_id=event['user_id'],
+            area_id=event['area_id'],
+            content_id=event['content_id'],
+            provider=event['provider'],
+            model=event['model'][:50],
+            operation=event['operation'],
+            tokens_input=event['tokens_input'],
+            tokens_output=event['tokens_output'],
+            tokens_total=event['tokens_total'],
+            cost_usd=Decimal(event['cost_usd']),
+            execution_time_seconds=Decimal(
+                str(round(max(0.0, (completed_at - started_at).total_seconds()), 3))
+            ),
+            started_at=started_at,
+            completed_at=completed_at,
+            status=event['status'],
+            error_message=event['error_message'],
+        )
+
+    @classmethod
+    def _write(cls, events: List[Dict]) -> Dict:
+        """
+        Grava eventos (bulk_create) e soma totais em ContentMetrics
+
+        Returns:
+            dict: {'written': registros IAModelUsage criados,
+                   'skipped': eventos sem usuário/área (só somados em ContentMetrics)}
+        """
+        from apps.content.models import IAModelUsage, ContentMetrics
+
+        rows = []
+        skipped = 0
+        totals = defaultdict(lambda: [Decimal('0'), 0])
+        for event in events:
+            if event['content_id']:
+                totals[event['content_id']][0] += Decimal(event['cost_usd'])
+                totals[event['content_id']][1] += event['tokens_total']
+
+            if not event['user_id'] or not event['area_id']:
+                # Schema exige usuário e área: não há como persistir o detalhe
+                skipped += 1
+                logger.warning(
+                    f"[IA_USAGE] Evento sem usuário/área não gravado em IAModelUsage: "
+                    f"operation={event['operation']} provider={event['provider']} "
+                    f"organization={event['organization_id']} content={event['content_id']} "
+                    f"user={event['user_id']} area={event['area_id']} cost_usd={event['cost_usd']}"
+                )
+                continue
+            rows.append(cls._build(event))
+
+        with transaction.atomic():
+            IAModelUsage.objects.bulk_create(rows, batch_size=500)
+
+            # Totais incrementais: um UPDATE por conteúdo, sem re-agregar IAModelUsage
+            for content_id, (cost, tokens) in totals.items():
+                ContentMetrics.objects.filter(content_id=content_id).update(
+                    total_cost_usd=F('total_cost_usd') + cost,
+                    total_tokens=F('total_tokens') + tokens,
+                    updated_at=timezone.now(),
+                )
+
+        if skipped:
+            try:
+                cls._get_redis().incrby(cls.SKIPPED_KEY, skipped)
+            except Exception:
+                pass
+
+        return {'written': len(rows), 'skipped': skipped}
+
+    @classmethod
+    def _write_each(cls, events: List[Dict], retry: List[Dict], dead: List[Dict], stats: Dict) -> None:
+        """
+        Grava evento a evento (isola o evento inválido de um lote que falhou)
+
+        Eventos com erro vão para `retry` (tentativas < IA_USAGE_MAX_ATTEMPTS)
+        ou `dead`. Erro transitório de banco é propagado; os eventos ainda não
+        gravados vão para `retry` sem contar tentativa.
+        """
+        max_attempts = getattr(settings, 'IA_USAGE_MAX_ATTEMPTS', 3)
+        for index, event in enumerate(events):
+            try:
+                result = cls._write([event])
+            except cls.TRANSIENT_ERRORS:
+                retry.extend(events[index:])
+                raise
+            except Exception as e:
+                event['_attempts'] = event.get('_attempts', 0) + 1
+                event['_error'] = str(e)[:500]
+                if event['_attempts'] >= max_attempts:
+                    dead.append(event)
+                    logger.error(
+                        f"[IA_USAGE] Evento movido para dead-letter após {event['_attempts']} "
+                        f"tentativa(s): operation={event['operation']} content={event['content_id']} "
+                        f"user={event['user_id']}: {e}"
+                    )
+                else:
+                    retry.append(event)
+                    logger.warning(
+                        f"[IA_USAGE] Evento falhou (tentativa {event['_attempts']}/{max_attempts}), "
+                        f"volta ao buffer: {e}"
+                    )
+                continue
+            stats['written'] += result['written']
+            stats['skipped'] += result['skipped']
+
+    @classmethod
+    def flush(cls, batch_size: Optional[int] = None) -> Dict:
+        """
+        Descarrega o buffer Redis para o banco em lotes
+
+        Returns:
+            dict: {'written', 'skipped', 'retried', 'dead'}
+        """
+        batch_size = batch_size or getattr(settings, 'IA_USAGE_FLUSH_BATCH_SIZE', 500)
+        conn = cls._get_redis()
+        stats = {'written': 0, 'skipped': 0, 'retried': 0, 'dead': 0}
+        retry: List[Dict] = []
+        dead: List[Dict] = []
+
+        try:
+            while True:
+                items = conn.eval(cls.TAKE_SCRIPT, 1, cls.BUFFER_KEY, batch_size)
+                if not items:
+                    break
+
+                events = []
+                for item in items:
+                    try:
+                        events.append(json.loads(item))
+                    except ValueError:
+                        logger.error(f"[IA_USAGE] Evento inválido movido para dead-letter: {item[:200]!r}")
+                        conn.rpush(cls.DEAD_KEY, item)
+                        stats['dead'] += 1
+
+                try:
+                    result = cls._write(events)
+                    stats['written'] += result['written']
+                    stats['skipped'] += result['skipped']
+                except cls.TRANSIENT_ERRORS:
+                    # Banco indisponível: lote volta ao início do buffer para o próximo ciclo
+                    if events:
+                        conn.lpush(cls.BUFFER_KEY, *reversed([json.dumps(event) for event in events]))
+                    raise
+                except Exception as e:
+                    logger.warning(f"[IA_USAGE] Lote de {len(events)} evento(s) falhou ({e}); gravando evento a evento")
+                    cls._write_each(events, retry, dead, stats)
+
+                if len(items) < batch_size:
+                    break
+        finally:
+            # Devolvidos só ao final: não são retentados de novo no mesmo flush
+            if retry:
+                conn.lpush(cls.BUFFER_KEY, *reversed([json.dumps(event) for event in retry]))
+                stats['retried'] = len(retry)
+            if dead:
+                conn.rpush(cls.DEAD_KEY, *[json.dumps(event) for event in dead])
+                stats['dead'] += len(dead)
+
+        if any(stats.values()):
+            logger.info(
+                f"[IA_USAGE] {stats['written']} registros de uso gravados, {stats['skipped']} sem usuário/área, "
+                f"{stats['retried']} para nova tentativa, {stats['dead']} em dead-letter"
+            )
+        return stats
+
+    @classmethod
+    def pending(cls) -> int:
+        """Eventos aguardando flush"""
+        return cls._get_redis().llen(cls.BUFFER_KEY)
+
+    @classmethod
+    def dead_letters(cls) -> int:
+        """Eventos em dead-letter (ia_usage:dead)"""
+        return cls._get_redis().llen(cls.DEAD_KEY)
@@ -0,0 +1,235 @@
+"""
+Usage Rollup Service - Rollups diários de IAModelUsage
+
+Relatórios de custo/tokens por período liam IAModelUsage inteiro. Agora:
+- IAUsageDaily guarda um registro por organização × provider × modelo × operação × dia
+  (chamadas, erros, tokens, custo, latência p50/p95)
+- refresh(): recalcula apenas os dias com registros novos (id acima da marca
+  d'água) + ontem/hoje, que ainda podem receber registros do flush write-behind
+- query(): consultas por intervalo de datas usam o índice (organization, date)
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Aggregate, Count, FloatField, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class Percentile(Aggregate):
+    """PERCENTILE_CONT(fração) WITHIN GROUP (ORDER BY expr) - PostgreSQL"""
+
+    function = 'PERCENTILE_CONT'
+    name = 'Percentile'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+class UsageRollupService:
+    """
+    Uso:
+        UsageRollupService.refresh()                          # task periódica
+        UsageRollupService.rebuild(date_from, date_to)        # reprocessamento manual
+        UsageRollupService.query(organization_id, date_from, date_to)
+    """
+
+    SUM_FIELDS = ('calls', 'error_calls', 'tokens_input', 'tokens_output', 'tokens_total', 'cost_usd')
+
+    # Dias recentes sempre recalculados (registros do flush podem chegar
+    # com id menor que a marca d'água de outra transação já confirmada)
+    SETTLE_DAYS = 2
+
+    @staticmethod
+    def _usage_queryset():
+        from apps.content.models import IAModelUsage
+        # Inclui registros legados sem organização
+        return IAModelUsage._base_manager.all()
+
+    @staticmethod
+    def _rollup_queryset():
+        from apps.content.models import IAUsageDaily
+        return IAUsageDaily._base_manager.all()
+
+    @staticmethod
+    def _day_range(day):
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.combine(day, time.min), tz)
+        return start, start + timedelta(days=1)
+
+    # ============================================
+    # REFRESH
+    # ============================================
+
+    @classmethod
+    def rebuild_day(cls, day) -> int:
+        """
+        Recalcula os rollups de um dia (substitui os existentes)
+
+        Returns:
+            int: Rollups gravados
+        """
+        from apps.content.models import IAUsageDaily
+
+        start, end = cls._day_range(day)
+        groups = (
+            cls._usage_queryset()
+            .filter(started_at__gte=start, started_at__lt=end)
+            .order_by()
+            .values('organization_id', 'provider', 'model', 'operation')
+            .annotate(
+                calls=Count('id'),
+                error_calls=Count('id', filter=~Q(status='success')),
+                sum_tokens_input=Sum('tokens_input'),
+                sum_tokens_output=Sum('tokens_output'),
+                sum_tokens_total=Sum('tokens_total'),
+                sum_cost_usd=Sum('cost_usd'),
+                p50=Percentile('execution_time_seconds', 0.5),
+                p95=Percentile('execution_time_seconds', 0.95),
+                max_id=Max('id'),
+            )
+        )
+
+        def seconds(value):
+            return None if value is None else Decimal(str(round(value, 3)))
+
+        rows = [
+            IAUsageDaily(
+                organization_id=group['organization_id'],
+                date=day,
+                provider=group['provider'],
+                model=group['model'],
+                operation=group['operation'],
+                calls=group['calls'],
+                error_calls=group['error_calls'],
+                tokens_input=group['sum_tokens_input'] or 0,
+                tokens_output=group['sum_tokens_output'] or 0,
+                tokens_total=group['sum_tokens_total'] or 0,
+                cost_usd=group['sum_cost_usd'] or Decimal('0'),
+                latency_p50_seconds=seconds(group['p50']),
+                latency_p95_seconds=seconds(group['p95']),
+                last_usage_id=group['max_id'],
+            )
+            for group in groups
+        ]
+
+        with transaction.atomic():
+            cls._rollup_queryset().filter(date=day).delete()
+            IAUsageDaily.objects.bulk_create(rows, batch_size=500)
+
+        return len(rows)
+
+    @classmethod
+    def rebuild(cls, date_from, date_to) -> Dict:
+        """
+        Recalcula todos os dias do intervalo (inclusive)
+
+        Returns:
+            dict: {'days', 'rows'}
+        """
+        days = rows = 0
+        day = date_from
+        while day <= date_to:
+            rows += cls.rebuild_day(day)
+            days += 1
+            day += timedelta(days=1)
+        return {'days': days, 'rows': rows}
+
+    @classmethod
+    def refresh(cls) -> Dict:
+        """
+        Refresh incremental: dias com IAModelUsage acima da marca d'água + dias recentes
+
+        Returns:
+            dict: {'days', 'rows', 'watermark'}
+        """
+        watermark = cls._rollup_queryset().aggregate(value=Max('last_usage_id'))['value'] or 0
+
+        tz = timezone.get_current_timezone()
+        days = set(
+            cls._usage_queryset()
+            .filter(id__gt=watermark)
+            .annotate(day=TruncDate('started_at', tzinfo=tz))
+            .order_by()
+            .values_list('day', flat=True)
+            .distinct()
+        )
+        today = timezone.localdate()
+        days.update(today - timedelta(days=offset) for offset in range(cls.SETTLE_DAYS))
+
+        rows = 0
+        for day in sorted(days):
+            rows += cls.rebuild_day(day)
+
+        logger.info(f"[IA_ROLLUP] {len(days)} dia(s) recalculados, {rows} rollups (marca d'água {watermark})")
+        return {'days': len(days), 'rows': rows, 'watermark': watermark}
+
+    # ============================================
+    # CONSULTA
+    # ============================================
+
+    @classmethod
+    def query(
+        cls,
+        organization_id: Optional[int],
+        date_from,
+        date_to,
+        group_by: Iterable[str] = ('date', 'provider', 'model', 'operation'),
+    ) -> Dict:
+        """
+        Rollups do intervalo (inclusive), agrupados pelas colunas pedidas
+
+        Args:
+            organization_id: Organização (None = todas, uso administrativo)
+            group_by: Subconjunto de date/organization/provider/model/operation
+
+        Returns:
+            dict: {'rows': [...], 'totals': {...}}
+            Latência só é exata no grão diário completo; em agrupamentos mais
+            amplos é reportado o maior p50/p95 diário do grupo.
+        """
+        queryset = cls._rollup_queryset().filter(date__gte=date_from, date__lte=date_to)
+        if organization_id is not None:
+            queryset = queryset.filter(organization_id=organization_id)
+
+        group_by = list(group_by)
+        sums = {field: Sum(field) for field in cls.SUM_FIELDS}
+        rows = (
+            queryset
+            .order_by()
+            .values(*group_by)
+            .annotate(
+                **{f'total_{field}': aggregate for field, aggregate in sums.items()},
+                latency_p50_seconds=Max('latency_p50_seconds'),
+                latency_p95_seconds=Max('latency_p95_seconds'),
+            )
+            .order_by(*group_by)
+        )
+
+        def serialize(values):
+            row = {}
+            for key, value in values.items():
+                key = key.replace('total_', '', 1) if key.startswith('total_') else key
+                if isinstance(value, Decimal):
+                    value = float(value)
+                elif hasattr(value, 'isoformat'):
+                    value = value.isoformat()
+                row[key] = value
+            return row
+
+        totals = queryset.aggregate(**sums)
+        return {
+            'rows': [serialize(row) for row in rows],
+            'totals': {
+                field: float(value) if isinstance(value, Decimal) else (value or 0)
+                for field, value in totals.items()
+            },
+        }
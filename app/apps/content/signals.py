@@ -2,18 +2,23 @@
 Signals para auto-incremento de QuotaUsageDaily
 
 Incrementa contadores diários quando Pauta/Post/VideoAvatar são criados.
-Segue padrão estabelecido na aplicação anterior.
+Os incrementos são atômicos no Redis (QuotaCounterService) e descarregados
+em lote para QuotaUsageDaily pela task flush_quota_counters. Como o Redis
+não participa da transação, o incremento só é feito após o commit
+(criação revertida não consome quota).
+
+Também invalida as estatísticas do dashboard quando trends mudam.
 """
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from django.core.cache import cache
-from decimal import Decimal
 import logging
 
-from apps.content.models import Pauta, VideoAvatar
+from apps.content.models import Pauta, VideoAvatar, TrendMonitor
 from apps.posts.models import Post
-from apps.core.models import QuotaUsageDaily
+from apps.core.services.quota_counter import QuotaCounterService
+from apps.core.services.dashboard_stats import DashboardStatsService
 
 logger = logging.getLogger(__name__)
 
@@ -35,34 +40,22 @@ def increment_pauta_quota(sender, instance, created, **kwargs):
         logger.warning(f'[PAUTA] Pauta #{instance.id} criada sem organization - quota não incrementada')
         return
     
-    try:
-        # Get or create do registro do dia
-        usage, created_usage = QuotaUsageDaily.objects.get_or_create(
-            organization=instance.organization,
-            date=timezone.now().date(),
-            defaults={
-                'pautas_requested': 0,
-                'posts_created': 0,
-                'videos_created': 0,
-                'cost_usd': Decimal('0.0000')
-            }
-        )
-        
-        # Incrementar contador
-        usage.pautas_requested += 1
-        usage.save(update_fields=['pautas_requested', 'updated_at'])
-        
-        logger.info(
-            f'[PAUTA] Quota atualizada: {usage.pautas_used}/{instance.organization.quota_pautas_dia} '
-            f'(Pauta #{instance.id}, Org: {instance.organization.name})'
-        )
-        
-        # Limpar cache de quota
-        cache_key = f'quota_usage_{instance.organization.id}_{timezone.now().date()}'
-        cache.delete(cache_key)
-        
-    except Exception as e:
-        logger.error(f'[PAUTA] Erro ao incrementar quota para Pauta #{instance.id}: {e}')
+    day = timezone.now().date()
+    
+    def increment():
+        try:
+            # Incremento atômico (Redis)
+            pautas_requested = QuotaCounterService.increment(instance.organization, 'pautas_requested', day=day)
+            
+            logger.info(
+                f'[PAUTA] Quota atualizada: {pautas_requested}/{instance.organization.quota_pautas_dia} '
+                f'(Pauta #{instance.id}, Org: {instance.organization.name})'
+            )
+            
+        except Exception as e:
+            logger.error(f'[PAUTA] Erro ao incrementar quota para Pauta #{instance.id}: {e}')
+    
+    transaction.on_commit(increment)
 
 
 @receiver(post_save, sender=Post)
@@ -79,36 +72,22 @@ def increment_post_quota(sender, instance, created, **kwargs):
         logger.warning(f'[POST] Post #{instance.id} criado sem organization - quota não incrementada')
         return
     
-    try:
-        # Get or create do registro do dia
-        usage, created_usage = QuotaUsageDaily.objects.get_or_create(
-            organization=instance.organization,
-            date=timezone.now().date(),
-            defaults={
-                'pautas_requested': 0,
-                'posts_created': 0,
-                'videos_created': 0,
-                'cost_usd': Decimal('0.0000')
-            }
-        )
-        
-        # Incrementar contador
-        usage.posts_created += 1
-        usage.save(update_fields=['posts_created', 'updated_at'])
-        
-        posts_month = instance.organization.get_posts_this_month()
-        logger.info(
-            f'[POST] Quota atualizada: {usage.posts_used}/{instance.organization.quota_posts_dia} '
-            f'(mês: {posts_month}/{instance.organization.quota_posts_mes}) '
-            f'(Post #{instance.id}, Org: {instance.organization.name})'
-        )
-        
-        # Limpar cache de quota
-        cache_key = f'quota_usage_{instance.organization.id}_{timezone.now().date()}'
-        cache.delete(cache_key)
-        
-    except Exception as e:
-        logger.error(f'[POST] Erro ao incrementar quota para Post #{instance.id}: {e}')
+    day = timezone.now().date()
+    
+    def increment():
+        try:
+            # Incremento atômico (Redis)
+            posts_created = QuotaCounterService.increment(instance.organization, 'posts_created', day=day)
+            
+            logger.info(
+                f'[POST] Quota atualizada: {posts_created}/{instance.organization.quota_posts_dia} '
+                f'(Post #{instance.id}, Org: {instance.organization.name})'
+            )
+            
+        except Exception as e:
+            logger.error(f'[POST] Erro ao incrementar quota para Post #{instance.id}: {e}')
+    
+    transaction.on_commit(increment)
 
 
 @receiver(post_save, sender=VideoAvatar)
@@ -125,31 +104,26 @@ def increment_video_quota(sender, instance, created, **kwargs):
         logger.warning(f'[VIDEO] VideoAvatar #{instance.id} criado sem organization - quota não incrementada')
         return
     
-    try:
-        # Get or create do registro do dia
-        usage, created_usage = QuotaUsageDaily.objects.get_or_create(
-            organization=instance.organization,
-            date=timezone.now().date(),
-            defaults={
-                'pautas_requested': 0,
-                'posts_created': 0,
-                'videos_created': 0,
-                'cost_usd': Decimal('0.0000')
-            }
-        )
-        
-        # Incrementar contador
-        usage.videos_created += 1
-        usage.save(update_fields=['videos_created', 'updated_at'])
-        
-        logger.info(
-            f'[VIDEO] Quota atualizada: vídeos={usage.videos_created} '
-            f'(VideoAvatar #{instance.id}, Org: {instance.organization.name})'
-        )
-        
-        # Limpar cache de quota (se implementado para vídeos)
-        cache_key = f'quota_usage_{instance.organization.id}_{timezone.now().date()}'
-        cache.delete(cache_key)
-        
-    except Exception as e:
-        logger.error(f'[VIDEO] Erro ao incrementar quota para VideoAvatar #{instance.id}: {e}')
+    day = timezone.now().date()
+    
+    def increment():
+        try:
+            # Incremento atômico (Redis)
+            videos_created = QuotaCounterService.increment(instance.organization, 'videos_created', day=day)
+            
+            logger.info(
+                f'[VIDEO] Quota atualizada: vídeos={videos_created} '
+                f'(VideoAvatar #{instance.id}, Org: {instance.organization.name})'
+            )
+            
+        except Exception as e:
+            logger.error(f'[VIDEO] Erro ao incrementar quota para VideoAvatar #{instance.id}: {e}')
+    
+    transaction.on_commit(increment)
+
+
+@receiver(post_save, sender=TrendMonitor)
+@receiver(post_delete, sender=TrendMonitor)
+def invalidate_dashboard_stats_trend(sender, instance, **kwargs):
+    """Trend alterada: descarta trends recentes em cache do dashboard"""
+    DashboardStatsService.invalidate(instance.organization_id)
@@ -5,18 +5,21 @@ Tasks assíncronas para geração de conteúdo
 import logging
 from celery import shared_task
 from django.utils import timezone
-from django.db import models
 from datetime import datetime
 
 from apps.content.models import (
-    Pauta, IAModelUsage, ContentMetrics, TrendMonitor
+    Pauta, ContentMetrics, TrendMonitor
 )
+from apps.content.services import UsageAccountingService, UsageRollupService
 from apps.posts.models import Post
 from apps.knowledge.models import KnowledgeBase
+from apps.knowledge.services import BrandContextService
+from apps.core.services.image_ingest import ImageIngestService
 from apps.utils.ai_openai import openai_manager
 from apps.utils.ai_gemini import gemini_manager
 from apps.utils.ai_perplexity import perplexity_manager
-from apps.utils.cache import get_cached_ai_response, cache_ai_response
+from apps.utils.ai_concurrency import ai_orchestrator
+from apps.utils.ai_cache import ai_cache
 from apps.utils.s3 import upload_to_s3
 
 logger = logging.getLogger(__name__)
@@ -40,61 +43,69 @@ def generate_pauta_task(self, pauta_id):
         
         logger.info(f"Iniciando geração de pauta #{pauta_id}")
         
-        # 1. Obter contexto da Base de Conhecimento
-        try:
-            kb = KnowledgeBase.objects.first()
-            if not kb:
-                raise Exception("Base de Conhecimento não encontrada")
-            
-            kb_context = f"""
-Empresa: {kb.nome_empresa}
-Missão: {kb.missao}
-Visão: {kb.visao}
-Valores: {kb.valores}
-Posicionamento: {kb.posicionamento}
-Tom de Voz Externo: {kb.tom_voz_externo}
-Público Externo: {kb.publico_externo}
-"""
-        except Exception as e:
-            logger.warning(f"Erro ao obter Base de Conhecimento: {e}")
-            kb_context = "Contexto não disponível"
-        
-        # 2. Pesquisa web com Perplexity (se disponível)
+        # 1. Pesquisa web com Perplexity (se disponível), disparada em paralelo
+        # com a montagem do contexto. Cache single-flight: pautas simultâneas
+        # com o mesmo tema fazem uma única chamada ao provider
         research_data = None
+        research_future = None
         if pauta.theme:
-            cache_key_params = {
+            research_params = {
                 'theme': pauta.theme,
                 'audience': pauta.target_audience,
                 'objective': pauta.objective
             }
-            
-            research_data = get_cached_ai_response('perplexity', 'research', cache_key_params)
-            
-            if not research_data:
-                logger.info("Realizando pesquisa web com Perplexity")
-                research_result = perplexity_manager.research_for_pauta(
+            research_future = ai_orchestrator.submit(
+                'perplexity',
+                ai_cache.get_or_compute,
+                'perplexity',
+                'research',
+                research_params,
+                lambda: perplexity_manager.research_for_pauta(
                     pauta.theme,
                     pauta.target_audience,
                     pauta.objective
                 )
+            )
+        
+        # 2. Obter contexto da Base de Conhecimento
+        kb_context = BrandContextService.format_context(
+            BrandContextService.get_for_organization(pauta.organization_id),
+            [
+                ('Empresa', 'nome_empresa'),
+                ('Missão', 'missao'),
+                ('Visão', 'visao'),
+                ('Valores', 'valores'),
+                ('Posicionamento', 'posicionamento'),
+                ('Tom de Voz Externo', 'tom_voz_externo'),
+                ('Público Externo', 'publico_externo'),
+            ]
+        )
+        
+        # Resultado da pesquisa (timeout do provider: sem pesquisa, a geração segue sem ela)
+        if research_future:
+            started_at = timezone.now()
+            research_result = ai_orchestrator.result(research_future)
+            
+            if research_result['success']:
+                research_data = research_result
                 
-                if research_result['success']:
-                    research_data = research_result
-                    cache_ai_response('perplexity', 'research', cache_key_params, research_data)
-                    
-                    # Registrar uso de IA
-                    IAModelUsage.objects.create(
-                        user=pauta.user,
-                        area=pauta.area,
+                # Registrar uso de IA (apenas chamadas reais ao provider)
+                if not research_result.get('cached'):
+                    logger.info("Pesquisa web realizada com Perplexity")
+                    UsageAccountingService.record(
+                        user_id=pauta.user_id,
+                        area_id=pauta.area_id,
+                        organization_id=pauta.organization_id,
                         provider='perplexity',
                         model=research_result['model'],
                         operation='web_research',
                         tokens_total=research_result.get('tokens_total', 0),
                         cost_usd=0.0,  # Calcular custo real
-                        started_at=timezone.now(),
-                        completed_at=timezone.now(),
-                        status='completed'
+                        started_at=started_at,
+                        completed_at=timezone.now()
                     )
+            else:
+                logger.warning(f"Pesquisa web indisponível para pauta #{pauta_id}: {research_result.get('error')}")
         
         # 3. Geração de pauta com OpenAI
         cache_key_params = {
@@ -102,44 +113,48 @@ Público Externo: {kb.publico_externo}
             'audience': pauta.target_audience,
             'objective': pauta.objective,
             'context': pauta.additional_context,
-            'kb_hash': hash(kb_context)
+            'kb_digest': ai_cache.digest(kb_context)
         }
         
-        pauta_result = get_cached_ai_response('openai', 'generate_pauta', cache_key_params)
-        
-        if not pauta_result:
-            logger.info("Gerando pauta com OpenAI GPT-4")
-            
-            # Enriquecer prompt com pesquisa
-            research_context = ""
-            if research_data and research_data.get('answer'):
-                research_context = f"\n\nPesquisa Web Recente:\n{research_data['answer']}"
-            
-            pauta_result = openai_manager.generate_pauta(
+        # Enriquecer prompt com pesquisa
+        research_context = ""
+        if research_data and research_data.get('answer'):
+            research_context = f"\n\nPesquisa Web Recente:\n{research_data['answer']}"
+        
+        started_at = timezone.now()
+        pauta_result = ai_cache.get_or_compute(
+            'openai',
+            'generate_pauta',
+            cache_key_params,
+            organization_id=pauta.organization_id,
+            compute=lambda: ai_orchestrator.result(ai_orchestrator.submit(
+                'openai',
+                openai_manager.generate_pauta,
                 theme=pauta.theme,
                 audience=pauta.target_audience,
                 objective=pauta.objective,
                 knowledge_base_context=kb_context + research_context
-            )
+            ))
+        )
+        
+        if pauta_result['success'] and not pauta_result.get('cached'):
+            logger.info("Pauta gerada com OpenAI GPT-4")
             
-            if pauta_result['success']:
-                cache_ai_response('openai', 'generate_pauta', cache_key_params, pauta_result)
-                
-                # Registrar uso de IA
-                IAModelUsage.objects.create(
-                    user=pauta.user,
-                    area=pauta.area,
-                    provider='openai',
-                    model=pauta_result['model'],
-                    operation='generate_pauta',
-                    tokens_input=pauta_result['tokens_input'],
-                    tokens_output=pauta_result['tokens_output'],
-                    tokens_total=pauta_result['tokens_total'],
-                    cost_usd=pauta_result['tokens_total'] * 0.00003,  # Custo aproximado GPT-4
-                    started_at=timezone.now(),
-                    completed_at=timezone.now(),
-                    status='completed'
-                )
+            # Registrar uso de IA
+            UsageAccountingService.record(
+                user_id=pauta.user_id,
+                area_id=pauta.area_id,
+                organization_id=pauta.organization_id,
+                provider='openai',
+                model=pauta_result['model'],
+                operation='pauta',
+                tokens_input=pauta_result['tokens_input'],
+                tokens_output=pauta_result['tokens_output'],
+                tokens_total=pauta_result['tokens_total'],
+                cost_usd=pauta_result['tokens_total'] * 0.00003,  # Custo aproximado GPT-4
+                started_at=started_at,
+                completed_at=timezone.now()
+            )
         
         # 4. Processar resultado e atualizar pauta
         if pauta_result and pauta_result['success']:
@@ -189,6 +204,48 @@ Público Externo: {kb.publico_externo}
         raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
 
 
+def _store_post_image(content, image_result, image_started_at):
+    """
+    Aplica ao post o resultado da geração de imagem (DALL-E): copia para o
+    S3 e registra o uso de IA. Não salva o post.
+    """
+    if image_result['success']:
+        content.image_prompt = image_result['revised_prompt']
+        content.ia_model_image = image_result['model']
+        
+        # URL do DALL-E é temporária: copiar para o S3 em streaming
+        try:
+            ingested = ImageIngestService.ingest_url(
+                image_result['url'],
+                content.organization_id,
+                original_name=f"post-{content.id}"
+            )
+            content.image_s3_key = ingested['s3_key']
+            content.image_s3_url = ingested['s3_url']
+            content.image_width = ingested['width'] or 1024
+            content.image_height = ingested['height'] or 1024
+        except Exception as e:
+            logger.error(f"Erro ao enviar imagem do post #{content.id} para S3: {e}")
+            content.image_s3_url = image_result['url']
+            content.image_width = 1024
+            content.image_height = 1024
+        
+        # Registrar uso de IA (imagem)
+        UsageAccountingService.record(
+            user_id=content.user_id,
+            area_id=content.area_id,
+            organization_id=content.organization_id,
+            content_id=content.id,
+            provider='openai',
+            model=content.ia_model_image,
+            operation='post_image',
+            tokens_total=0,  # DALL-E não usa tokens
+            cost_usd=0.04,  # Custo fixo DALL-E 3 standard 1024x1024
+            started_at=image_started_at,
+            completed_at=timezone.now()
+        )
+
+
 @shared_task(bind=True, max_retries=3)
 def generate_post_task(self, content_id, provider='openai'):
     """
@@ -209,108 +266,105 @@ def generate_post_task(self, content_id, provider='openai'):
         logger.info(f"Iniciando geração de post #{content_id} com {provider}")
         
         # Iniciar métricas
-        metrics, _ = ContentMetrics.objects.get_or_create(content=content)
-        metrics.creation_started_at = timezone.now()
-        metrics.save()
+        # (existe antes do primeiro flush do uso de IA, que soma os totais nela)
+        now = timezone.now()
+        metrics, created = ContentMetrics.objects.get_or_create(
+            content=content,
+            defaults={
+                'creation_started_at': now,
+                'creation_completed_at': now,
+                'creation_duration_seconds': 0,
+            }
+        )
+        if not created:
+            metrics.creation_started_at = now
+            metrics.save(update_fields=['creation_started_at', 'updated_at'])
         
         # 1. Obter contexto da Base de Conhecimento
-        try:
-            kb = KnowledgeBase.objects.first()
-            kb_context = f"""
-Empresa: {kb.nome_empresa}
-Tom de Voz: {kb.tom_voz_externo}
-Público: {kb.publico_externo}
-Palavras Recomendadas: {kb.palavras_recomendadas}
-Palavras a Evitar: {kb.palavras_evitar}
-"""
-        except:
-            kb_context = "Contexto não disponível"
+        kb_context = BrandContextService.format_context(
+            BrandContextService.get_for_organization(content.organization_id),
+            [
+                ('Empresa', 'nome_empresa'),
+                ('Tom de Voz', 'tom_voz_externo'),
+                ('Público', 'publico_externo'),
+                ('Palavras Recomendadas', 'palavras_recomendadas'),
+                ('Palavras a Evitar', 'palavras_evitar'),
+            ]
+        )
         
         # 2. Obter conteúdo da pauta (se existir)
         pauta_content = ""
         if content.pauta:
             pauta_content = f"{content.pauta.title}\n\n{content.pauta.description}"
         
-        # 3. Gerar legenda
-        if provider == 'openai':
-            caption_result = openai_manager.generate_caption(
-                pauta_content=pauta_content,
-                social_network=content.social_network,
-                knowledge_base_context=kb_context
-            )
-            content.ia_model_text = caption_result.get('model', 'gpt-4')
-        else:  # gemini
-            caption_result = gemini_manager.generate_caption(
-                pauta_content=pauta_content,
-                social_network=content.social_network,
-                knowledge_base_context=kb_context
+        # 3. Disparar legenda e imagem em paralelo (independentes entre si)
+        caption_manager = openai_manager if provider == 'openai' else gemini_manager
+        caption_started_at = timezone.now()
+        caption_future = ai_orchestrator.submit(
+            provider,
+            caption_manager.generate_caption,
+            pauta_content=pauta_content,
+            social_network=content.social_network,
+            knowledge_base_context=kb_context
+        )
+        
+        # Imagem sempre com DALL-E 3
+        # (retentativa reaproveita a imagem já gerada e cobrada na tentativa anterior)
+        image_future = None
+        if content.has_image and not (self.request.retries and content.image_s3_url):
+            # Criar prompt de imagem
+            image_prompt = f"Create a professional social media image for {content.social_network}. Theme: {pauta_content[:200]}"
+            
+            # Otimizar prompt com Gemini (opcional, enquanto a legenda é gerada)
+            if provider == 'gemini':
+                optimized = ai_orchestrator.result(ai_orchestrator.submit(
+                    'gemini', gemini_manager.generate_image_description, image_prompt
+                ))
+                if optimized['success']:
+                    image_prompt = optimized['optimized_prompt']
+            
+            image_started_at = timezone.now()
+            image_future = ai_orchestrator.submit(
+                'openai',
+                openai_manager.generate_image,
+                prompt=image_prompt,
+                size="1024x1024",
+                quality="standard"
             )
-            content.ia_model_text = caption_result.get('model', 'gemini-pro')
+        
+        # 4. Legenda
+        caption_result = ai_orchestrator.result(caption_future)
+        content.ia_model_text = caption_result.get('model') or ('gpt-4' if provider == 'openai' else 'gemini-pro')
         
         if not caption_result['success']:
+            if image_future:
+                # Imagem já foi cobrada: guardar antes de falhar para a retentativa reaproveitar
+                _store_post_image(content, ai_orchestrator.result(image_future), image_started_at)
+                content.save()
             raise Exception(f"Erro ao gerar legenda: {caption_result.get('error')}")
         
         content.caption = caption_result['text']
         
         # Registrar uso de IA (texto)
-        IAModelUsage.objects.create(
-            user=content.user,
-            area=content.area,
-            content=content,
+        UsageAccountingService.record(
+            user_id=content.user_id,
+            area_id=content.area_id,
+            organization_id=content.organization_id,
+            content_id=content.id,
             provider=provider,
             model=content.ia_model_text,
-            operation='generate_caption',
+            operation='post_text',
             tokens_input=caption_result.get('tokens_input', 0),
             tokens_output=caption_result.get('tokens_output', 0),
             tokens_total=caption_result.get('tokens_total', 0),
             cost_usd=caption_result.get('tokens_total', 0) * 0.00003,
-            started_at=timezone.now(),
-            completed_at=timezone.now(),
-            status='completed'
+            started_at=caption_started_at,
+            completed_at=timezone.now()
         )
         
-        # 4. Gerar imagem (sempre com DALL-E 3)
-        if content.has_image:
-            # Criar prompt de imagem
-            image_prompt = f"Create a professional social media image for {content.social_network}. Theme: {pauta_content[:200]}"
-            
-            # Otimizar prompt com Gemini (opcional)
-            if provider == 'gemini':
-                optimized = gemini_manager.generate_image_description(image_prompt)
-                if optimized['success']:
-                    image_prompt = optimized['optimized_prompt']
-            
-            # Gerar imagem com DALL-E 3
-            image_result = openai_manager.generate_image(
-                prompt=image_prompt,
-                size="1024x1024",
-                quality="standard"
-            )
-            
-            if image_result['success']:
-                content.image_prompt = image_result['revised_prompt']
-                content.ia_model_image = image_result['model']
-                
-                # Download e upload para S3 (simplificado - implementar download real)
-                # Por enquanto, apenas salvar URL temporária
-                content.image_s3_url = image_result['url']
-                content.image_width = 1024
-                content.image_height = 1024
-                
-                # Registrar uso de IA (imagem)
-                IAModelUsage.objects.create(
-                    user=content.user,
-                    area=content.area,
-                    content=content,
-                    provider='openai',
-                    model=content.ia_model_image,
-                    operation='generate_image',
-                    tokens_total=0,  # DALL-E não usa tokens
-                    cost_usd=0.04,  # Custo fixo DALL-E 3 standard 1024x1024
-                    started_at=timezone.now(),
-                    completed_at=timezone.now(),
-                    status='completed'
-                )
+        # Imagem
+        if image_future:
+            _store_post_image(content, ai_orchestrator.result(image_future), image_started_at)
         
         # 5. Finalizar
         content.status = 'draft'
@@ -322,19 +376,11 @@ Palavras a Evitar: {kb.palavras_evitar}
             metrics.creation_completed_at - metrics.creation_started_at
         ).total_seconds()
         
-        # Calcular custo total
-        total_cost = IAModelUsage.objects.filter(content=content).aggregate(
-            total=models.Sum('cost_usd')
-        )['total'] or 0
-        metrics.total_cost_usd = total_cost
-        
-        # Calcular tokens total
-        total_tokens = IAModelUsage.objects.filter(content=content).aggregate(
-            total=models.Sum('tokens_total')
-        )['total'] or 0
-        metrics.total_tokens = total_tokens
-        
-        metrics.save()
+        # Custo e tokens totais são somados pelo flush do uso de IA (F()),
+        # não sobrescrever aqui
+        metrics.save(update_fields=[
+            'creation_completed_at', 'creation_duration_seconds', 'updated_at'
+        ])
         
         logger.info(f"Post #{content_id} gerado com sucesso")
         
@@ -382,15 +428,18 @@ def monitor_trends_task():
             logger.warning("Nenhuma palavra-chave configurada para monitoramento")
             return {'success': False, 'error': 'Sem palavras-chave'}
         
+        keywords = keywords[:10]  # Limitar a 10 por execução
+        
+        # Pesquisar tendências com Perplexity (todas as palavras em paralelo)
+        results = ai_orchestrator.map(
+            'perplexity',
+            perplexity_manager.get_trending_topics,
+            [{'industry': keyword, 'region': 'Brasil'} for keyword in keywords]
+        )
+        
         trends_created = 0
         
-        for keyword in keywords[:10]:  # Limitar a 10 por execução
-            # Pesquisar tendências com Perplexity
-            result = perplexity_manager.get_trending_topics(
-                industry=keyword,
-                region="Brasil"
-            )
-            
+        for keyword, result in zip(keywords, results):
             if result['success']:
                 # Criar registro de trend
                 trend = TrendMonitor.objects.create(
@@ -404,6 +453,8 @@ def monitor_trends_task():
                 
                 trends_created += 1
                 logger.info(f"Trend criado: {keyword}")
+            else:
+                logger.warning(f"Falha ao pesquisar trend '{keyword}': {result.get('error')}")
         
         logger.info(f"Monitoramento concluído: {trends_created} trends criados")
         
@@ -420,21 +471,54 @@ def monitor_trends_task():
 @shared_task
 def cleanup_old_cache_task():
     """
-    Task periódica para limpeza de cache antigo
-    Executada semanalmente
+    Task periódica de manutenção do cache de IA
+    Remove entradas expiradas do índice, sem acesso recente (LRU) e acima
+    do orçamento de bytes por namespace e total
     """
     try:
-        from apps.utils.cache import cache_manager
+        from apps.utils.cache_maintenance import AICacheMaintenance
         
         logger.info("Iniciando limpeza de cache")
         
-        # Limpar cache de IA com mais de 30 dias
-        # Implementação depende do backend Redis
+        result = AICacheMaintenance.run()
+        report = AICacheMaintenance.report()
+        
+        for row in report['namespaces'][:10]:
+            logger.info(f"Cache IA {row['namespace']}: {row['entries']} entradas, {row['bytes']} bytes")
         
         logger.info("Limpeza de cache concluída")
         
-        return {'success': True}
+        return {
+            'success': True,
+            **result,
+            'total_bytes': report['total_bytes'],
+        }
         
     except Exception as e:
         logger.error(f"Erro na limpeza de cache: {e}")
         return {'success': False, 'error': str(e)}
+
+
+@shared_task
+def flush_ia_usage_task():
+    """
+    Task periódica que descarrega o buffer de uso de IA (Redis)
+    para IAModelUsage em lote e soma custo/tokens em ContentMetrics.
+    Deve ser executada a cada minuto via Celery Beat.
+    """
+    result = UsageAccountingService.flush()
+    return (
+        f"Registros de uso de IA gravados: {result['written']} "
+        f"(sem usuário/área: {result['skipped']}, retentativa: {result['retried']}, "
+        f"dead-letter: {result['dead']})"
+    )
+
+
+@shared_task
+def refresh_ia_usage_rollups_task():
+    """
+    Task periódica que atualiza os rollups diários de uso de IA (IAUsageDaily)
+    Recalcula só os dias com registros novos + ontem/hoje
+    """
+    result = UsageRollupService.refresh()
+    return f"Rollups de uso de IA: {result['days']} dia(s), {result['rows']} registros"
@@ -1,3 +1,54 @@
+"""
+Testes dos signals de quota (apps.content.signals)
+
+O incremento no Redis não participa da transação: só pode acontecer
+depois do commit de quem criou o Post/Pauta/VideoAvatar.
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.test import TestCase
 
-# Create your tests here.
+from apps.core.models import Organization
+from apps.posts.models import Post
+
+User = get_user_model()
+
+
+class QuotaSignalTestCase(TestCase):
+    """Criação revertida não consome quota"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organization.objects.create(name='Org Quota', slug='org-quota', is_active=True)
+        cls.user = User.objects.create_user(
+            username='quota',
+            email='quota@test.com',
+            password='test123',
+            organization=cls.org,
+        )
+
+    def _create_post(self):
+        return Post.objects.create(
+            organization=self.org, user=self.user, social_network='instagram', status='draft',
+        )
+
+    @mock.patch('apps.content.signals.QuotaCounterService.increment')
+    def test_rolled_back_create_does_not_increment(self, increment):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self._create_post()
+                    raise RuntimeError('rollback')
+
+        increment.assert_not_called()
+
+    @mock.patch('apps.content.signals.QuotaCounterService.increment')
+    def test_committed_create_increments_after_commit(self, increment):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_post()
+            increment.assert_not_called()
+
+        increment.assert_called_once()
+        self.assertEqual(increment.call_args.args, (self.org, 'posts_created'))
@@ -11,4 +11,5 @@ urlpatterns = [
     path('pautas/nova/', views.pauta_create, name='pauta_create'),
     # NOTA: Rotas de posts movidas para apps.posts.urls
     path('trends/', views.trends_list, name='trends'),
+    path('ia-usage/rollups/', views.ia_usage_rollups, name='ia_usage_rollups'),
 ]
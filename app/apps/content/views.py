@@ -1,9 +1,16 @@
+from datetime import timedelta
+
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from apps.core.decorators import require_organization
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_http_methods
+from apps.core.decorators import require_organization, superuser_or_organization
 from .models import Pauta, TrendMonitor
+from .services import UsageRollupService
 from apps.posts.models import Post
 
 
@@ -53,3 +60,65 @@ def trends_list(request):
     
     context = {'trends': trends}
     return render(request, 'content/trends_list.html', context)
+
+
+IA_USAGE_GROUP_FIELDS = ('date', 'organization', 'provider', 'model', 'operation')
+IA_USAGE_MAX_DAYS = 400
+
+
+@login_required
+@superuser_or_organization
+@require_http_methods(["GET"])
+def ia_usage_rollups(request):
+    """
+    Custo/tokens de IA por período (rollups diários) em JSON
+
+    Query params:
+        start, end: YYYY-MM-DD (padrão: últimos 30 dias)
+        group_by: lista separada por vírgula (date, organization, provider, model, operation)
+        organization: ID da organização (somente superuser; omitido = todas)
+    """
+    today = timezone.localdate()
+    try:
+        date_to = parse_date(request.GET.get('end', '')) or today
+        date_from = parse_date(request.GET.get('start', '')) or date_to - timedelta(days=29)
+    except ValueError:
+        # Formato válido, data inexistente (ex: 2026-02-30)
+        return JsonResponse({'success': False, 'message': 'Data inválida'}, status=400)
+    if date_from > date_to:
+        return JsonResponse({'success': False, 'message': 'Data inicial maior que a final'}, status=400)
+    if (date_to - date_from).days >= IA_USAGE_MAX_DAYS:
+        return JsonResponse({
+            'success': False,
+            'message': f'Intervalo máximo de {IA_USAGE_MAX_DAYS} dias'
+        }, status=400)
+
+    group_by = [
+        field.strip() for field in request.GET.get('group_by', 'date,provider,model,operation').split(',')
+        if field.strip()
+    ]
+    invalid = [field for field in group_by if field not in IA_USAGE_GROUP_FIELDS]
+    if invalid or not group_by:
+        return JsonResponse({
+            'success': False,
+            'message': f'group_by inválido; use {", ".join(IA_USAGE_GROUP_FIELDS)}'
+        }, status=400)
+
+    # CRÍTICO: usuários comuns só veem a própria organization
+    if request.user.is_superuser:
+        organization_id = request.GET.get('organization') or None
+        if organization_id is not None and not str(organization_id).isdigit():
+            return JsonResponse({'success': False, 'message': 'organization inválida'}, status=400)
+    else:
+        organization_id = request.organization.id
+
+    result = UsageRollupService.query(organization_id, date_from, date_to, group_by)
+
+    return JsonResponse({
+        'success': True,
+        'start': date_from.isoformat(),
+        'end': date_to.isoformat(),
+        'group_by': group_by,
+        'rows': result['rows'],
+        'totals': result['totals'],
+    })
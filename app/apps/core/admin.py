@@ -4,7 +4,8 @@ from django.contrib import messages
 from django.utils import timezone
 from .models import (
     User, Area, AuditLog, SystemConfig, PlanTemplate,
-    Organization, QuotaUsageDaily, QuotaAdjustment, QuotaAlert
+    Organization, QuotaUsageDaily, QuotaAdjustment, QuotaAlert, WebhookDispatch,
+    EmailOutbox
 )
 
 
@@ -548,3 +549,65 @@ class QuotaAlertAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(WebhookDispatch)
+class WebhookDispatchAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'source', 'organization', 'status', 'attempts',
+        'response_status', 'next_attempt_at', 'created_at', 'sent_at'
+    ]
+    list_filter = ['status', 'source']
+    search_fields = ['idempotency_key', 'organization__name', 'last_error']
+    readonly_fields = [
+        'idempotency_key', 'source', 'url', 'payload', 'headers', 'organization',
+        'status', 'attempts', 'next_attempt_at', 'response_status', 'response_body',
+        'last_error', 'sent_at', 'created_at', 'updated_at'
+    ]
+    date_hierarchy = 'created_at'
+    actions = ['requeue_dispatches']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def requeue_dispatches(self, request, queryset):
+        """🔁 Reenviar webhooks (dead-letter/pendentes)"""
+        from apps.core.services.webhook_dispatcher import WebhookDispatcher
+        count = WebhookDispatcher.requeue(queryset)
+        self.message_user(
+            request,
+            f'{count} webhook(s) reagendado(s) para envio.',
+            messages.SUCCESS
+        )
+    requeue_dispatches.short_description = "🔁 Reenviar webhooks"
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'source', 'subject', 'organization', 'status', 'attempts',
+        'next_attempt_at', 'created_at', 'sent_at'
+    ]
+    list_filter = ['status', 'source']
+    search_fields = ['subject', 'to', 'organization__name', 'last_error']
+    readonly_fields = [
+        'source', 'subject', 'from_email', 'to', 'body_text', 'body_html',
+        'organization', 'status', 'attempts', 'next_attempt_at', 'last_error',
+        'sent_at', 'created_at', 'updated_at'
+    ]
+    date_hierarchy = 'created_at'
+    actions = ['requeue_emails']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def requeue_emails(self, request, queryset):
+        """🔁 Reenviar emails (dead-letter/com falha)"""
+        from apps.core.services.email_outbox import EmailOutboxService
+        count = EmailOutboxService.requeue(queryset)
+        self.message_user(
+            request,
+            f'{count} email(s) reagendado(s) para envio.',
+            messages.SUCCESS
+        )
+    requeue_emails.short_description = "🔁 Reenviar emails"
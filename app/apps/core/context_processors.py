@@ -28,13 +28,12 @@ def tenant_context(request):
     # ETAPA 5: Adicionar status de onboarding ao contexto
     # Disponível em todos os templates (incluindo sidebar)
     if request.user.is_authenticated:
-        from apps.knowledge.models import KnowledgeBase
+        from apps.core.services.tenant_state import TenantStateService
         try:
-            org = getattr(request, 'organization', None)
-            kb = KnowledgeBase.objects.filter(organization=org).first()
-            context['kb_onboarding_completed'] = kb.onboarding_completed if kb else False
-            context['kb_suggestions_reviewed'] = kb.suggestions_reviewed if kb else False
-            context['kb_compilation_status'] = kb.compilation_status if kb else None
+            state = TenantStateService.for_request(request)
+            context['kb_onboarding_completed'] = state.onboarding_completed
+            context['kb_suggestions_reviewed'] = state.suggestions_reviewed
+            context['kb_compilation_status'] = state.compilation_status
         except Exception:
             context['kb_onboarding_completed'] = False
             context['kb_suggestions_reviewed'] = False
@@ -1,13 +1,15 @@
 """
 Sistema de Emails - IAMKT
 Funções para envio de emails transacionais e notificações
+
+Os emails são gravados na outbox (EmailOutbox) e enviados pela task
+send_email_outbox após o commit; quem chama não espera o SMTP.
 """
-from django.core.mail import send_mail, EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.conf import settings
-from django.utils.html import strip_tags
 import logging
 
+from apps.core.services.email_outbox import EmailOutboxService
+
 logger = logging.getLogger(__name__)
 
 
@@ -49,23 +51,19 @@ def send_registration_confirmation(user, organization):
         'organization_name': organization.name,
     }
     
-    # Renderizar template HTML
-    html_message = render_to_string('emails/registration_confirmation.html', context)
-    plain_message = strip_tags(html_message)
-    
     try:
-        send_mail(
+        EmailOutboxService.enqueue_template(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
+            to=[user.email],
+            template='emails/registration_confirmation.html',
+            context=context,
+            source='core.registration_confirmation',
+            organization=organization,
         )
-        logger.info(f'Email de confirmação enviado para: {user.email}')
+        logger.info(f'Email de confirmação enfileirado para: {user.email}')
         return True
     except Exception as e:
-        logger.error(f'Erro ao enviar email de confirmação para {user.email}: {str(e)}')
+        logger.error(f'Erro ao enfileirar email de confirmação para {user.email}: {str(e)}')
         return False
 
 
@@ -97,23 +95,19 @@ def send_registration_notification(user, organization):
         'admin_url': f"{settings.SITE_URL}/admin/core/organization/{organization.id}/change/",
     }
     
-    # Renderizar template HTML
-    html_message = render_to_string('emails/registration_notification.html', context)
-    plain_message = strip_tags(html_message)
-    
     try:
-        send_mail(
+        EmailOutboxService.enqueue_template(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=recipients,
-            html_message=html_message,
-            fail_silently=False,
+            to=recipients,
+            template='emails/registration_notification.html',
+            context=context,
+            source='core.registration_notification',
+            organization=organization,
         )
-        logger.info(f'Email de notificação enviado para: {", ".join(recipients)}')
+        logger.info(f'Email de notificação enfileirado para: {", ".join(recipients)}')
         return True
     except Exception as e:
-        logger.error(f'Erro ao enviar email de notificação: {str(e)}')
+        logger.error(f'Erro ao enfileirar email de notificação: {str(e)}')
         return False
 
 
@@ -142,23 +136,19 @@ def send_organization_approved_email(organization):
         'quota_posts_mes': organization.quota_posts_mes,
     }
     
-    # Renderizar template HTML
-    html_message = render_to_string('emails/organization_approved.html', context)
-    plain_message = strip_tags(html_message)
-    
     try:
-        send_mail(
+        EmailOutboxService.enqueue_template(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
+            to=[user.email],
+            template='emails/organization_approved.html',
+            context=context,
+            source='core.organization_approved',
+            organization=organization,
         )
-        logger.info(f'Email de aprovação enviado para: {user.email} (org: {organization.name})')
+        logger.info(f'Email de aprovação enfileirado para: {user.email} (org: {organization.name})')
         return True
     except Exception as e:
-        logger.error(f'Erro ao enviar email de aprovação para {user.email}: {str(e)}')
+        logger.error(f'Erro ao enfileirar email de aprovação para {user.email}: {str(e)}')
         return False
 
 
@@ -193,23 +183,19 @@ def send_organization_suspended_email(organization):
         'support_email': 'suporte@aisuites.com.br',
     }
     
-    # Renderizar template HTML
-    html_message = render_to_string('emails/organization_suspended.html', context)
-    plain_message = strip_tags(html_message)
-    
     try:
-        send_mail(
+        EmailOutboxService.enqueue_template(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
+            to=[user.email],
+            template='emails/organization_suspended.html',
+            context=context,
+            source='core.organization_suspended',
+            organization=organization,
         )
-        logger.info(f'Email de suspensão enviado para: {user.email} (org: {organization.name})')
+        logger.info(f'Email de suspensão enfileirado para: {user.email} (org: {organization.name})')
         return True
     except Exception as e:
-        logger.error(f'Erro ao enviar email de suspensão para {user.email}: {str(e)}')
+        logger.error(f'Erro ao enfileirar email de suspensão para {user.email}: {str(e)}')
         return False
 
 
@@ -234,21 +220,17 @@ def send_organization_reactivated_email(organization):
         'login_url': f"{settings.SITE_URL}/login/",
     }
     
-    # Renderizar template HTML
-    html_message = render_to_string('emails/organization_reactivated.html', context)
-    plain_message = strip_tags(html_message)
-    
     try:
-        send_mail(
+        EmailOutboxService.enqueue_template(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
+            to=[user.email],
+            template='emails/organization_reactivated.html',
+            context=context,
+            source='core.organization_reactivated',
+            organization=organization,
         )
-        logger.info(f'Email de reativação enviado para: {user.email} (org: {organization.name})')
+        logger.info(f'Email de reativação enfileirado para: {user.email} (org: {organization.name})')
         return True
     except Exception as e:
-        logger.error(f'Erro ao enviar email de reativação para {user.email}: {str(e)}')
+        logger.error(f'Erro ao enfileirar email de reativação para {user.email}: {str(e)}')
         return False
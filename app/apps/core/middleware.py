@@ -3,10 +3,22 @@ IAMKT - Tenant Isolation Middleware
 
 Detecta a organization do usuário logado e disponibiliza no request.
 Garante que todas as views tenham acesso à organization atual.
+Também abre o contexto de observabilidade (request ID e tempos) do request
+e faz o profiling amostrado por view.
 """
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
 from django.utils.deprecation import MiddlewareMixin
 from django.http import HttpResponseForbidden
-from apps.core.models import Organization
+from apps.core.observability import current_context, end_request, start_request
+from apps.core.services.request_profiler import QueryStats, RequestProfilerService
+from apps.core.services.tenant_state import TenantStateService
+
+request_logger = logging.getLogger('apps.core.requests')
+profiling_logger = logging.getLogger('apps.core.profiling')
 
 
 class TenantMiddleware(MiddlewareMixin):
@@ -46,9 +58,10 @@ class TenantMiddleware(MiddlewareMixin):
         if not request.user.is_authenticated:
             return None
         
-        # Buscar organization do usuário
-        if hasattr(request.user, 'organization') and request.user.organization:
-            request.organization = request.user.organization
+        # Buscar organization do usuário (estado do tenant carregado uma vez por request)
+        state = TenantStateService.for_request(request)
+        if state.organization:
+            request.organization = state.organization
         else:
             # Usuário sem organization - bloquear acesso
             # (exceto para superusers que podem acessar admin)
@@ -119,3 +132,115 @@ class TenantIsolationMiddleware(MiddlewareMixin):
             '/health/',
         ]
         return any(path.startswith(url) for url in public_urls)
+
+
+class RequestContextMiddleware:
+    """
+    Middleware de observabilidade por request.
+    
+    Funcionalidades:
+    1. Request ID (X-Request-ID do proxy ou gerado), propagado aos logs e à resposta
+    2. Contexto para span() medir fases da view (validate, save, render...)
+    3. Um evento 'request' estruturado ao final, com duração total e spans
+    """
+    
+    # Sem evento de timing (arquivos estáticos e health check)
+    SKIP_PATHS = ('/static/', '/media/', '/health/')
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        context, token = start_request(request.META.get('HTTP_X_REQUEST_ID'))
+        request.request_id = context.request_id
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            response['X-Request-ID'] = context.request_id
+            return response
+        finally:
+            if not request.path.startswith(self.SKIP_PATHS):
+                user = getattr(request, 'user', None)
+                request_logger.info(
+                    f"{request.method} {request.path} {status} {context.elapsed_ms:.1f}ms",
+                    extra={
+                        'event': 'request',
+                        'method': request.method,
+                        'path': request.path,
+                        'status': status,
+                        'duration_ms': round(context.elapsed_ms, 2),
+                        'spans': context.spans_ms(),
+                        'user_id': user.pk if user is not None and user.is_authenticated else None,
+                        'organization_id': getattr(getattr(request, 'organization', None), 'pk', None),
+                    },
+                )
+            end_request(token)
+
+
+class ProfilingMiddleware:
+    """
+    Middleware de profiling por view (amostrado ou por organização).
+    
+    Funcionalidades:
+    1. Conta queries e tempo de banco da view
+    2. Soma cache (hits/misses), HTTP externo e templates via observability
+    3. Header Server-Timing para o DevTools do navegador
+    4. Amostra agregada no Redis (RequestProfilerService) para a página do admin
+    
+    Deve vir depois do TenantMiddleware (usa request.organization).
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        context = current_context()
+        if context is None or not RequestProfilerService.should_profile(request):
+            return self.get_response(request)
+        
+        # Spans/contadores anteriores (middlewares acima) ficam fora da amostra
+        spans_before = dict(context.spans)
+        counters_before = dict(context.counters)
+        started = time.perf_counter()
+        
+        queries = QueryStats()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        
+        def span_ms(name):
+            return round((context.spans.get(name, 0.0) - spans_before.get(name, 0.0)) * 1000, 2)
+        
+        def counter(name):
+            return context.counters.get(name, 0) - counters_before.get(name, 0)
+        
+        metrics = {
+            'total_ms': round((time.perf_counter() - started) * 1000, 2),
+            'queries': queries.count,
+            'db_ms': round(queries.seconds * 1000, 2),
+            'cache_hits': counter('cache_hits'),
+            'cache_misses': counter('cache_misses'),
+            'cache_ms': span_ms('cache'),
+            'http_ms': span_ms('http'),
+            'template_ms': span_ms('template'),
+        }
+        
+        response['Server-Timing'] = ', '.join([
+            f"total;dur={metrics['total_ms']}",
+            f"db;dur={metrics['db_ms']};desc=\"{metrics['queries']} queries\"",
+            f"cache;dur={metrics['cache_ms']};desc=\"{metrics['cache_hits']} hits/{metrics['cache_misses']} misses\"",
+            f"http;dur={metrics['http_ms']}",
+            f"template;dur={metrics['template_ms']}",
+        ])
+        
+        view = RequestProfilerService.view_name(request)
+        RequestProfilerService.record(view, metrics)
+        
+        if (metrics['queries'] >= getattr(settings, 'PROFILING_QUERY_WARNING', 50)
+                or metrics['total_ms'] >= getattr(settings, 'PROFILING_SLOW_MS', 1000)):
+            profiling_logger.warning(
+                f"🐢 [PROFILING] {view}: {metrics['total_ms']}ms, {metrics['queries']} queries",
+                extra={'event': 'slow_request', 'view': view, **metrics},
+            )
+        
+        return response
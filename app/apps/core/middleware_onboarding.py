@@ -3,9 +3,13 @@ IAMKT - Onboarding Required Middleware
 
 Restringe acesso ao sistema até que o onboarding seja concluído.
 """
+import logging
+
 from django.utils.deprecation import MiddlewareMixin
 from django.shortcuts import redirect
 
+logger = logging.getLogger(__name__)
+
 
 class OnboardingRequiredMiddleware(MiddlewareMixin):
     """
@@ -42,45 +46,35 @@ class OnboardingRequiredMiddleware(MiddlewareMixin):
         
         # Verificar onboarding
         organization = getattr(request, 'organization', None)
-        print(f"🔍 [MIDDLEWARE] Path: {request.path} | Organization: {organization}", flush=True)
         
         if organization:
-            from apps.knowledge.models import KnowledgeBase
+            from apps.core.services.tenant_state import TenantStateService
             
             try:
-                kb = KnowledgeBase.objects.filter(organization=organization).first()
-                print(f"🔍 [MIDDLEWARE] KB encontrado: {kb is not None}", flush=True)
+                state = TenantStateService.for_request(request)
                 
-                if kb:
-                    print(f"🔍 [MIDDLEWARE] Onboarding completo: {kb.onboarding_completed}", flush=True)
-                    print(f"🔍 [MIDDLEWARE] Sugestões revisadas: {kb.suggestions_reviewed}", flush=True)
-                    
+                if state.has_knowledge_base:
                     # FLUXO 1: Onboarding não concluído - apenas Base de Conhecimento
-                    if not kb.onboarding_completed:
+                    if not state.onboarding_completed:
                         if not request.path.startswith('/knowledge/'):
-                            print(f"🔄 [MIDDLEWARE] FLUXO 1: Redirecionando para Base de Conhecimento", flush=True)
+                            logger.debug(f"🔄 [MIDDLEWARE] FLUXO 1: Redirecionando para Base de Conhecimento")
                             return redirect('knowledge:view')
                     
                     # FLUXO 2: Onboarding completo mas sugestões não revisadas - apenas Perfil
-                    elif kb.onboarding_completed and not kb.suggestions_reviewed:
+                    elif state.onboarding_completed and not state.suggestions_reviewed:
                         # Permitir acesso apenas a /knowledge/perfil/ e URLs permitidas
                         if not request.path.startswith('/knowledge/perfil'):
-                            print(f"🔄 [MIDDLEWARE] FLUXO 2: Redirecionando para Perfil (Edição)", flush=True)
+                            logger.debug(f"🔄 [MIDDLEWARE] FLUXO 2: Redirecionando para Perfil (Edição)")
                             return redirect('knowledge:perfil_view')
-                        else:
-                            print(f"✅ [MIDDLEWARE] FLUXO 2: Permitindo acesso a Perfil", flush=True)
                     
                     # FLUXO 3: Onboarding completo e sugestões revisadas - acesso total
                     else:
                         # Redirecionar apenas a raiz para dashboard
                         if request.path == '/':
-                            print(f"🔄 [MIDDLEWARE] FLUXO 3: Redirecionando raiz para Dashboard", flush=True)
+                            logger.debug(f"🔄 [MIDDLEWARE] FLUXO 3: Redirecionando raiz para Dashboard")
                             return redirect('core:dashboard')
-                        else:
-                            print(f"✅ [MIDDLEWARE] FLUXO 3: Permitindo acesso a {request.path}", flush=True)
             except Exception as e:
                 # Em caso de erro, permitir acesso (fail-safe)
-                print(f"❌ [MIDDLEWARE] Erro: {e}", flush=True)
-                pass
+                logger.error(f"❌ [MIDDLEWARE] Erro: {e}")
         
         return None
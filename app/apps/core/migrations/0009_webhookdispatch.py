@@ -0,0 +1,41 @@
+# Generated by Django 4.2.8 on 2026-10-18 00:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_alter_quotaadjustment_post'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookDispatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('idempotency_key', models.CharField(help_text='Chave de idempotência (enviada no header Idempotency-Key)', max_length=120, unique=True, verbose_name='Chave de Idempotência')),
+                ('source', models.CharField(db_index=True, help_text='Origem do envio (ex: posts.gerar_post)', max_length=60, verbose_name='Origem')),
+                ('url', models.URLField(max_length=500, verbose_name='URL')),
+                ('payload', models.JSONField(default=dict, verbose_name='Payload')),
+                ('headers', models.JSONField(blank=True, default=dict, verbose_name='Headers')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('sent', 'Enviado'), ('failed', 'Falhou (retentando)'), ('dead', 'Dead-letter')], default='pending', max_length=10, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='HTTP Status')),
+                ('response_body', models.TextField(blank=True, verbose_name='Resposta')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+                ('organization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='webhook_dispatches', to='core.organization', verbose_name='Organização')),
+            ],
+            options={
+                'verbose_name': 'Envio de Webhook',
+                'verbose_name_plural': 'Envios de Webhooks',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='core_webhoo_status_5a1353_idx'), models.Index(fields=['organization', '-created_at'], name='core_webhoo_organiz_6a0a99_idx')],
+            },
+        ),
+    ]
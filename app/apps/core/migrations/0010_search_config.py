@@ -0,0 +1,57 @@
+import logging
+
+from django.db import migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+CONFIG = 'portuguese_unaccent'
+
+
+def create_search_config(apps, schema_editor):
+    """
+    Configuração de text search 'portuguese_unaccent' (português + unaccent)
+
+    Criada apenas se a extensão unaccent estiver disponível; caso contrário
+    a busca usa a configuração 'portuguese' padrão (SearchService.get_config).
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_ts_config WHERE cfgname = %s", [CONFIG])
+        if cursor.fetchone():
+            return
+
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'unaccent'")
+        if not cursor.fetchone():
+            logger.warning("[MIGRATION] unaccent indisponível: busca usará a configuração 'portuguese'")
+            return
+
+        try:
+            with transaction.atomic(using=connection.alias):
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+                cursor.execute(f'CREATE TEXT SEARCH CONFIGURATION {CONFIG} (COPY = portuguese)')
+                cursor.execute(
+                    f'ALTER TEXT SEARCH CONFIGURATION {CONFIG} '
+                    f'ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem'
+                )
+        except Exception as e:
+            logger.warning(f"[MIGRATION] Não foi possível criar {CONFIG} ({e}): busca usará 'portuguese'")
+
+
+def drop_search_config(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP TEXT SEARCH CONFIGURATION IF EXISTS {CONFIG}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_webhookdispatch'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_config, drop_search_config),
+    ]
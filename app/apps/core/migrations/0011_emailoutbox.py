@@ -0,0 +1,41 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_search_config'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('source', models.CharField(db_index=True, help_text='Origem do email (ex: core.organization_approved)', max_length=60, verbose_name='Origem')),
+                ('subject', models.CharField(max_length=255, verbose_name='Assunto')),
+                ('from_email', models.CharField(max_length=254, verbose_name='Remetente')),
+                ('to', models.JSONField(default=list, verbose_name='Destinatários')),
+                ('body_text', models.TextField(verbose_name='Corpo (texto)')),
+                ('body_html', models.TextField(blank=True, verbose_name='Corpo (HTML)')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('sent', 'Enviado'), ('failed', 'Falhou (retentando)'), ('dead', 'Dead-letter')], default='pending', max_length=10, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Não enviar antes deste horário (retentativa ou lote em andamento)', verbose_name='Próxima Tentativa')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+                ('organization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='email_outbox', to='core.organization', verbose_name='Organização')),
+            ],
+            options={
+                'verbose_name': 'Email (Outbox)',
+                'verbose_name_plural': 'Emails (Outbox)',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='core_emailo_status_a125e4_idx'), models.Index(fields=['organization', '-created_at'], name='core_emailo_organiz_5f1738_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.8 on 2026-10-18 01:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='webhookdispatch',
+            name='core_webhoo_status_5a1353_idx',
+        ),
+        migrations.AddField(
+            model_name='webhookdispatch',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Não enviar antes deste horário (retentativa ou lease do envio em andamento)', verbose_name='Próxima Tentativa'),
+        ),
+        migrations.AlterField(
+            model_name='webhookdispatch',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendente'), ('sending', 'Enviando'), ('sent', 'Enviado'), ('failed', 'Falhou (retentando)'), ('dead', 'Dead-letter')], default='pending', max_length=10, verbose_name='Status'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookdispatch',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='core_webhoo_status_042f78_idx'),
+        ),
+    ]
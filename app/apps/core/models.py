@@ -582,28 +582,14 @@ class Organization(TimeStampedModel):
         super().save(*args, **kwargs)
     
     def get_quota_usage_today(self):
-        """Retorna uso de quotas de hoje (com cache por 1 minuto)"""
-        from django.core.cache import cache
+        """Retorna uso de quotas de hoje (contadores atômicos no Redis)"""
+        from apps.core.services.quota_counter import QuotaCounterService
         
-        cache_key = f'quota_usage_{self.id}_{timezone.now().date()}'
-        usage = cache.get(cache_key)
-        
-        if usage is None:
-            try:
-                usage_obj = QuotaUsageDaily.objects.get(
-                    organization=self,
-                    date=timezone.now().date()
-                )
-                usage = {
-                    'pautas_used': usage_obj.pautas_used,
-                    'posts_used': usage_obj.posts_used,
-                }
-            except QuotaUsageDaily.DoesNotExist:
-                usage = {'pautas_used': 0, 'posts_used': 0}
-            
-            cache.set(cache_key, usage, 60)  # Cache por 1 minuto
-        
-        return usage
+        counters = QuotaCounterService.get_usage(self.id)
+        return {
+            'pautas_used': max(0, counters['pautas_requested'] + counters['pautas_adjustments']),
+            'posts_used': max(0, counters['posts_created'] + counters['posts_adjustments']),
+        }
     
     def get_billing_cycle_start(self):
         """
@@ -659,23 +645,10 @@ class Organization(TimeStampedModel):
         return next_reset
     
     def get_posts_this_month(self):
-        """Conta posts criados no ciclo mensal atual"""
-        from django.db.models import Sum
-        
-        cycle_start = self.get_billing_cycle_start()
-        
-        total = QuotaUsageDaily.objects.filter(
-            organization=self,
-            date__gte=cycle_start.date()
-        ).aggregate(total=Sum('posts_created'))['total'] or 0
-        
-        adjustments = QuotaAdjustment.objects.filter(
-            organization=self,
-            resource_type='post_monthly',
-            created_at__gte=cycle_start
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        """Conta posts criados no ciclo mensal atual (rollup do ciclo no Redis)"""
+        from apps.core.services.quota_counter import QuotaCounterService
         
-        return max(0, total + adjustments)
+        return QuotaCounterService.get_cycle_usage(self, 'posts_created')
     
     @property
     def has_pautas_module(self):
@@ -777,16 +750,10 @@ class Organization(TimeStampedModel):
     
     def get_video_quota_usage_today(self):
         """Retorna uso de quota de vídeos hoje"""
-        today = timezone.now().date()
-        usage = QuotaUsageDaily.objects.filter(
-            organization=self,
-            date=today
-        ).first()
-        
-        if not usage:
-            return {'videos_used': 0}
+        from apps.core.services.quota_counter import QuotaCounterService
         
-        return {'videos_used': usage.videos_created or 0}
+        counters = QuotaCounterService.get_usage(self.id)
+        return {'videos_used': counters['videos_created']}
     
     def get_videos_this_month(self):
         """Conta vídeos criados neste ciclo de billing"""
@@ -1069,3 +1036,137 @@ class PautaAuditLog(TimeStampedModel):
         elif self.organization:
             return f"{self.get_action_display()} · {self.organization.name} · {user_email}"
         return f"{self.get_action_display()} · {user_email}"
+
+
+class WebhookDispatch(TimeStampedModel):
+    """
+    Outbox de webhooks de saída (N8N).
+    
+    Views apenas enfileiram o payload; a task dispatch_webhook envia pelo
+    worker Celery com retentativas exponenciais. Durante o envio o registro
+    fica como 'sending' com lease (next_attempt_at), o que impede duas tasks
+    de enviarem o mesmo webhook. Após esgotar as tentativas o registro fica
+    como 'dead' (dead-letter) para reenvio manual no admin.
+    """
+    
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pendente'
+        SENDING = 'sending', 'Enviando'
+        SENT = 'sent', 'Enviado'
+        FAILED = 'failed', 'Falhou (retentando)'
+        DEAD = 'dead', 'Dead-letter'
+    
+    idempotency_key = models.CharField(
+        max_length=120,
+        unique=True,
+        help_text="Chave de idempotência (enviada no header Idempotency-Key)",
+        verbose_name='Chave de Idempotência'
+    )
+    source = models.CharField(
+        max_length=60,
+        db_index=True,
+        help_text="Origem do envio (ex: posts.gerar_post)",
+        verbose_name='Origem'
+    )
+    url = models.URLField(max_length=500, verbose_name='URL')
+    payload = models.JSONField(default=dict, verbose_name='Payload')
+    headers = models.JSONField(default=dict, blank=True, verbose_name='Headers')
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='webhook_dispatches',
+        null=True,
+        blank=True,
+        verbose_name='Organização'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Status'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Não enviar antes deste horário (retentativa ou lease do envio em andamento)",
+        verbose_name='Próxima Tentativa'
+    )
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name='HTTP Status')
+    response_body = models.TextField(blank=True, verbose_name='Resposta')
+    last_error = models.TextField(blank=True, verbose_name='Último Erro')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Enviado em')
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Envio de Webhook'
+        verbose_name_plural = 'Envios de Webhooks'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['organization', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.source} · {self.get_status_display()} · {self.idempotency_key}"
+
+
+class EmailOutbox(TimeStampedModel):
+    """
+    Outbox de emails transacionais.
+    
+    As funções de apps.core.emails (e notificações de posts) apenas gravam a
+    mensagem; a task send_email_outbox envia em lotes por uma única conexão
+    SMTP, respeitando EMAIL_OUTBOX_RATE_PER_MINUTE. Falhas são retentadas com
+    backoff até EMAIL_OUTBOX_MAX_RETRIES; depois o registro fica como 'dead'.
+    """
+    
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pendente'
+        SENT = 'sent', 'Enviado'
+        FAILED = 'failed', 'Falhou (retentando)'
+        DEAD = 'dead', 'Dead-letter'
+    
+    source = models.CharField(
+        max_length=60,
+        db_index=True,
+        help_text="Origem do email (ex: core.organization_approved)",
+        verbose_name='Origem'
+    )
+    subject = models.CharField(max_length=255, verbose_name='Assunto')
+    from_email = models.CharField(max_length=254, verbose_name='Remetente')
+    to = models.JSONField(default=list, verbose_name='Destinatários')
+    body_text = models.TextField(verbose_name='Corpo (texto)')
+    body_html = models.TextField(blank=True, verbose_name='Corpo (HTML)')
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='email_outbox',
+        null=True,
+        blank=True,
+        verbose_name='Organização'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Status'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Não enviar antes deste horário (retentativa ou lote em andamento)",
+        verbose_name='Próxima Tentativa'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Último Erro')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Enviado em')
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Email (Outbox)'
+        verbose_name_plural = 'Emails (Outbox)'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['organization', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.source} · {self.get_status_display()} · {', '.join(self.to)}"
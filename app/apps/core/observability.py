@@ -0,0 +1,198 @@
+"""
+IAMKT - Observabilidade (logging estruturado e tempos por request)
+
+- Request ID por request (header X-Request-ID do proxy ou gerado) em contextvar,
+  incluído em todo log emitido durante o request
+- span(): mede fases do request (validate, save, n8n_dispatch, http, template...);
+  o RequestContextMiddleware emite um único evento 'request' com os tempos
+- Logs DEBUG amostrados por request (LOG_DEBUG_SAMPLE_RATE): um request
+  amostrado loga todos os seus payloads, os demais nenhum
+- JsonFormatter + AsyncStreamHandler: eventos em JSON, escritos no stdout por
+  uma thread (QueueListener), sem bloquear o worker no pipe
+- count(): contadores do request (cache_hits, cache_misses...), usados pelo
+  ProfilingMiddleware junto com os spans
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+_request_context: ContextVar[Optional['RequestContext']] = ContextVar('request_context', default=None)
+
+
+def _debug_sample_rate() -> float:
+    from django.conf import settings
+    return getattr(settings, 'LOG_DEBUG_SAMPLE_RATE', 0.0)
+
+
+class RequestContext:
+    """Estado de observabilidade de um request (ID, início, spans, amostragem)"""
+
+    def __init__(self, request_id: str, sampled: bool):
+        self.request_id = request_id
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+
+    def add_span(self, name: str, seconds: float) -> None:
+        # Fases repetidas no mesmo request são somadas
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def spans_ms(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 2) for name, seconds in self.spans.items()}
+
+
+# ============================================
+# CONTEXTO
+# ============================================
+
+def start_request(request_id: Optional[str] = None):
+    """
+    Abre o contexto de um request
+
+    Returns:
+        tuple: (RequestContext, token para end_request)
+    """
+    context = RequestContext(
+        request_id=(request_id or uuid.uuid4().hex)[:64],
+        sampled=random.random() < _debug_sample_rate(),
+    )
+    return context, _request_context.set(context)
+
+
+def end_request(token) -> None:
+    _request_context.reset(token)
+
+
+def current_context() -> Optional[RequestContext]:
+    return _request_context.get()
+
+
+def get_request_id() -> Optional[str]:
+    context = _request_context.get()
+    return context.request_id if context else None
+
+
+def debug_sampled() -> bool:
+    """Payloads DEBUG devem ser logados neste request?"""
+    context = _request_context.get()
+    if context is None:
+        return random.random() < _debug_sample_rate()
+    return context.sampled
+
+
+def count(name: str, value: int = 1) -> None:
+    """Incrementa contador do request atual (sem request: ignorado)"""
+    context = _request_context.get()
+    if context is not None:
+        context.counters[name] = context.counters.get(name, 0) + value
+
+
+@contextmanager
+def span(name: str):
+    """
+    Mede uma fase do request
+
+    Uso:
+        with span('save'):
+            KnowledgeBaseService.save_all_blocks(...)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        context = _request_context.get()
+        if context is not None:
+            context.add_span(name, time.perf_counter() - started)
+
+
+def log_payload(logger: logging.Logger, message: str, **payload) -> None:
+    """
+    Loga payload volumoso em DEBUG, apenas em requests amostrados
+
+    Uso:
+        log_payload(logger, '[PERFIL_APPLY] Payload recebido', data=data)
+    """
+    if logger.isEnabledFor(logging.DEBUG) and debug_sampled():
+        logger.debug(message, extra={'payload': payload})
+
+
+# ============================================
+# LOGGING (usado em sistema/settings/logging_config.py)
+# ============================================
+
+class RequestIdFilter(logging.Filter):
+    """Adiciona request_id aos registros"""
+
+    def filter(self, record):
+        record.request_id = get_request_id() or '-'
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Descarta registros DEBUG de requests não amostrados"""
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or debug_sampled()
+
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha: ts, level, logger, message, request_id + extras"""
+
+    # Atributos padrão do LogRecord (o restante veio via extra=)
+    RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+    def format(self, record):
+        event = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None) or get_request_id()
+        if request_id and request_id != '-':
+            event['request_id'] = request_id
+        for key, value in vars(record).items():
+            if key not in self.RESERVED and not key.startswith('_'):
+                event[key] = value
+        if record.exc_info:
+            event['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class AsyncStreamHandler(QueueHandler):
+    """
+    Formata no thread do request e escreve no stream por uma thread dedicada
+
+    O worker não espera a escrita no pipe do stdout; o QueueListener é
+    encerrado (com flush) no atexit e recriado nos processos filhos
+    (workers do gunicorn/Celery herdam o handler, mas não a thread).
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.target = logging.StreamHandler(stream or sys.stdout)
+        self._start_listener()
+        os.register_at_fork(after_in_child=self._start_listener)
+
+    def _start_listener(self):
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+        atexit.register(self.listener.stop)
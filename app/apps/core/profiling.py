@@ -0,0 +1,53 @@
+"""
+IAMKT - Backends instrumentados para o profiling por request
+
+Configurados em settings (CACHES / TEMPLATES); fora de um request, ou em
+requests não amostrados, apenas somam contadores em memória.
+- InstrumentedRedisCache: hits/misses e tempo das leituras de cache
+- ProfiledDjangoTemplates: tempo de renderização de templates
+"""
+
+from django.template.backends.django import DjangoTemplates, Template
+from django_redis.cache import RedisCache
+
+from apps.core.observability import count, span
+
+_MISSING = object()
+
+
+class InstrumentedRedisCache(RedisCache):
+    """RedisCache que registra hits/misses no contexto do request"""
+
+    def get(self, key, default=None, version=None, client=None):
+        with span('cache'):
+            value = super().get(key, default=_MISSING, version=version, client=client)
+        if value is _MISSING:
+            count('cache_misses')
+            return default
+        count('cache_hits')
+        return value
+
+    def get_many(self, keys, *args, **kwargs):
+        keys = list(keys)
+        with span('cache'):
+            values = super().get_many(keys, *args, **kwargs)
+        count('cache_hits', len(values))
+        count('cache_misses', len(keys) - len(values))
+        return values
+
+
+class ProfiledTemplate(Template):
+
+    def render(self, context=None, request=None):
+        with span('template'):
+            return super().render(context, request)
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates com tempo de render no span 'template'"""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name).template, self)
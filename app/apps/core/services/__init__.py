@@ -1,4 +1,13 @@
 from .s3_service import S3Service
 from .image_processor import ImageProcessor
+from .quota_counter import QuotaCounterService
+from .webhook_dispatcher import WebhookDispatcher
+from .tenant_state import TenantState, TenantStateService
+from .dashboard_stats import DashboardStatsService
+from .quota_alerts import QuotaAlertService
+from .search import SearchService
+from .image_ingest import ImageIngestService
+from .request_profiler import RequestProfilerService
+from .email_outbox import EmailOutboxService
 
-__all__ = ['S3Service', 'ImageProcessor']
+__all__ = ['S3Service', 'ImageProcessor', 'QuotaCounterService', 'WebhookDispatcher', 'TenantState', 'TenantStateService', 'DashboardStatsService', 'QuotaAlertService', 'SearchService', 'ImageIngestService', 'RequestProfilerService', 'EmailOutboxService']
@@ -0,0 +1,174 @@
+"""
+Dashboard Stats - contadores do dashboard com agregação condicional e cache por organização
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardStatsService:
+    """
+    Estatísticas da organização exibidas no dashboard
+
+    - Contadores de pautas e posts com Count(filter=Q(...)): uma query por tabela
+    - Últimas atividades e trends junto no mesmo cache por organização,
+      invalidado pelos signals de Post, Pauta e TrendMonitor
+    - Quotas (QuotaUsageDaily do dia e do mês) numa única agregação, sem cache
+      (os contadores são descarregados do Redis por update em lote)
+
+    Uso:
+        stats = DashboardStatsService.get_stats(request.organization)
+        quota = DashboardStatsService.get_quota_info(request.organization)
+    """
+
+    CACHE_KEY = 'dashboard_stats:{org_id}'
+
+    @staticmethod
+    def _ttl():
+        return getattr(settings, 'DASHBOARD_STATS_CACHE_TTL', 300)
+
+    # ============================================
+    # ESTATÍSTICAS DA ORGANIZAÇÃO (CACHE)
+    # ============================================
+
+    @classmethod
+    def get_stats(cls, organization):
+        """
+        Contadores, últimas atividades e trends da organização
+
+        Returns:
+            dict: {
+                'pautas_total', 'pautas_pendentes',
+                'posts_total', 'posts_draft', 'posts_aprovados',
+                'atividades_recentes': [{'tipo', 'titulo', 'data', 'status'}],
+                'trends_recentes': [TrendMonitor],
+            }
+        """
+        key = cls.CACHE_KEY.format(org_id=organization.id)
+        stats = cache.get(key)
+        if stats is None:
+            stats = cls.compute(organization)
+            cache.set(key, stats, cls._ttl())
+        return stats
+
+    @staticmethod
+    def compute(organization):
+        """Calcula estatísticas direto do banco"""
+        from apps.content.models import TrendMonitor
+        from apps.pautas.models import Pauta
+        from apps.posts.models import Post
+
+        pautas = Pauta.objects.filter(organization=organization).aggregate(
+            total=Count('id'),
+            pendentes=Count('id', filter=Q(status='requested')),
+        )
+        posts = Post.objects.filter(organization=organization).aggregate(
+            total=Count('id'),
+            draft=Count('id', filter=Q(status='draft')),
+            aprovados=Count('id', filter=Q(status='approved')),
+        )
+
+        # Atividades recentes: últimas pautas e posts
+        atividades = [
+            {
+                'tipo': 'pauta',
+                'titulo': pauta['title'],
+                'data': pauta['created_at'],
+                'status': pauta['status'],
+            }
+            for pauta in Pauta.objects.filter(organization=organization).order_by(
+                '-created_at'
+            ).values('title', 'created_at', 'status')[:3]
+        ]
+        for post in Post.objects.filter(organization=organization).only(
+            'id', 'social_network', 'created_at', 'status'
+        ).order_by('-created_at')[:3]:
+            atividades.append({
+                'tipo': 'post',
+                'titulo': f"Post para {post.get_social_network_display()}",
+                'data': post.created_at,
+                'status': post.status,
+            })
+
+        atividades.sort(key=lambda x: x['data'], reverse=True)
+
+        trends = list(TrendMonitor.objects.filter(
+            organization=organization,
+            is_active=True
+        ).order_by('-created_at')[:5])
+
+        return {
+            'pautas_total': pautas['total'],
+            'pautas_pendentes': pautas['pendentes'],
+            'posts_total': posts['total'],
+            'posts_draft': posts['draft'],
+            'posts_aprovados': posts['aprovados'],
+            'atividades_recentes': atividades[:5],
+            'trends_recentes': trends,
+        }
+
+    @classmethod
+    def invalidate(cls, organization_id):
+        """Descarta estatísticas em cache da organização"""
+        if not organization_id:
+            return
+        key = cls.CACHE_KEY.format(org_id=organization_id)
+        # Remove já e após o commit (leituras concorrentes com valor antigo)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    # ============================================
+    # QUOTAS
+    # ============================================
+
+    @staticmethod
+    def get_quota_info(organization):
+        """
+        Uso de quota do dia e do mês numa única query
+
+        Returns:
+            dict: Formato consumido por dashboard.html (quota_info)
+        """
+        from apps.core.models import QuotaUsageDaily
+
+        today = timezone.now().date()
+        usage = QuotaUsageDaily.objects.filter(
+            organization=organization,
+            date__gte=today.replace(day=1),
+            date__lte=today
+        ).aggregate(
+            pautas_hoje=Sum('pautas_requested', filter=Q(date=today)),
+            posts_hoje=Sum('posts_created', filter=Q(date=today)),
+            total_posts=Sum('posts_created'),
+            total_cost=Sum('cost_usd')
+        )
+
+        pautas_hoje = usage['pautas_hoje'] or 0
+        posts_hoje = usage['posts_hoje'] or 0
+        posts_mes = usage['total_posts'] or 0
+        org = organization
+
+        return {
+            # Quotas diárias
+            'pautas_hoje': pautas_hoje,
+            'pautas_dia_max': org.quota_pautas_dia,
+            'pautas_dia_percentual': (pautas_hoje / org.quota_pautas_dia * 100) if org.quota_pautas_dia > 0 else 0,
+
+            'posts_hoje': posts_hoje,
+            'posts_dia_max': org.quota_posts_dia,
+            'posts_dia_percentual': (posts_hoje / org.quota_posts_dia * 100) if org.quota_posts_dia > 0 else 0,
+
+            # Quotas mensais
+            'posts_mes': posts_mes,
+            'posts_mes_max': org.quota_posts_mes,
+            'posts_mes_percentual': (posts_mes / org.quota_posts_mes * 100) if org.quota_posts_mes > 0 else 0,
+
+            # Custo mensal (apenas tracking, sem limite)
+            'cost_mes': float(usage['total_cost'] or 0),
+        }
@@ -0,0 +1,328 @@
+"""
+Email Outbox - Envio assíncrono de emails transacionais
+
+Features:
+- Outbox em banco (EmailOutbox): quem envia apenas grava a mensagem e retorna
+- Task send_email_outbox agendada após o commit (debounce no Redis: vários
+  emails do mesmo request/ação do admin viram um único lote)
+- Lotes enviados por uma única conexão SMTP (aberta uma vez por lote)
+- Rate limit global por minuto (EMAIL_OUTBOX_RATE_PER_MINUTE) no Redis
+- Retentativa com backoff exponencial; dead-letter após EMAIL_OUTBOX_MAX_RETRIES
+  (destinatário recusado vai direto para dead-letter)
+"""
+
+import logging
+import smtplib
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from apps.core.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutboxService:
+    """
+    Uso:
+        EmailOutboxService.enqueue_template(
+            subject='Sua conta IAMKT foi aprovada!', to=[user.email],
+            template='emails/organization_approved.html', context={...},
+            source='core.organization_approved', organization=organization,
+        )
+        EmailOutboxService.send_pending()  # task send_email_outbox
+    """
+
+    SCHEDULED_KEY = 'email_outbox:scheduled'
+    RATE_KEY = 'email_outbox:rate:{minute}'
+
+    # Registros reservados por um lote não são pegos por outro worker
+    # enquanto o envio estiver em andamento
+    LEASE_SECONDS = 300
+
+    # Reserva até ARGV[1] envios dentro do limite ARGV[2] do minuto atual
+    TAKE_SCRIPT = """
+        local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+        local take = math.min(tonumber(ARGV[1]), tonumber(ARGV[2]) - used)
+        if take <= 0 then
+            return 0
+        end
+        redis.call('INCRBY', KEYS[1], take)
+        redis.call('EXPIRE', KEYS[1], 120)
+        return take
+    """
+
+    @staticmethod
+    def _get_redis():
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    # ============================================
+    # ENFILEIRAMENTO
+    # ============================================
+
+    @classmethod
+    def enqueue(
+        cls,
+        subject: str,
+        to: Iterable[str],
+        body_text: str,
+        body_html: str = '',
+        source: str = '',
+        organization=None,
+        from_email: Optional[str] = None,
+    ) -> EmailOutbox:
+        """
+        Grava email na outbox e agenda o envio após o commit
+
+        Returns:
+            EmailOutbox
+        """
+        email = EmailOutbox.objects.create(
+            source=source,
+            subject=subject[:255],
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(to),
+            body_text=body_text,
+            body_html=body_html,
+            organization=organization,
+        )
+        transaction.on_commit(cls.schedule)
+        logger.info(f"[EMAIL_OUTBOX] Enfileirado #{email.id} ({source}) para {', '.join(email.to)}")
+        return email
+
+    @classmethod
+    def enqueue_template(cls, subject, to, template, context, source, organization=None) -> EmailOutbox:
+        """Renderiza template HTML (texto = HTML sem tags) e enfileira"""
+        html_message = render_to_string(template, context)
+        return cls.enqueue(
+            subject=subject,
+            to=to,
+            body_text=strip_tags(html_message),
+            body_html=html_message,
+            source=source,
+            organization=organization,
+        )
+
+    @classmethod
+    def schedule(cls, countdown: Optional[int] = None) -> None:
+        """
+        Agenda a task de envio (uma por janela de debounce)
+
+        Falha do broker fica para a task periódica send-email-outbox.
+        """
+        from apps.core.tasks import send_email_outbox
+
+        debounce = getattr(settings, 'EMAIL_OUTBOX_DEBOUNCE_SECONDS', 2)
+        try:
+            if not cls._get_redis().set(cls.SCHEDULED_KEY, 1, nx=True, ex=debounce + 30):
+                return
+        except Exception as e:
+            logger.warning(f"[EMAIL_OUTBOX] Redis indisponível para debounce ({e}); agendando mesmo assim")
+
+        try:
+            send_email_outbox.apply_async(countdown=debounce if countdown is None else countdown)
+        except Exception as e:
+            logger.error(f"[EMAIL_OUTBOX] Erro ao agendar envio: {e}")
+
+    # ============================================
+    # ENVIO
+    # ============================================
+
+    @classmethod
+    def retry_delay(cls, attempt: int) -> int:
+        """Backoff exponencial: EMAIL_OUTBOX_RETRY_DELAY * 2^(tentativa-1)"""
+        base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+        return base * (2 ** max(attempt - 1, 0))
+
+    @classmethod
+    def _take_rate(cls, wanted: int) -> int:
+        """Envios liberados pelo rate limit no minuto atual"""
+        rate = getattr(settings, 'EMAIL_OUTBOX_RATE_PER_MINUTE', 120)
+        if not rate:
+            return wanted
+        key = cls.RATE_KEY.format(minute=int(timezone.now().timestamp() // 60))
+        try:
+            return int(cls._get_redis().eval(cls.TAKE_SCRIPT, 1, key, wanted, rate))
+        except Exception as e:
+            logger.warning(f"[EMAIL_OUTBOX] Redis indisponível para rate limit ({e}); enviando sem limite")
+            return wanted
+
+    @classmethod
+    def _give_back_rate(cls, unused: int) -> None:
+        if unused <= 0 or not getattr(settings, 'EMAIL_OUTBOX_RATE_PER_MINUTE', 120):
+            return
+        key = cls.RATE_KEY.format(minute=int(timezone.now().timestamp() // 60))
+        try:
+            cls._get_redis().decrby(key, unused)
+        except Exception:
+            pass
+
+    @classmethod
+    def _claim(cls, limit: int):
+        """Reserva até `limit` emails prontos (SKIP LOCKED entre workers)"""
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status__in=[EmailOutbox.Status.PENDING, EmailOutbox.Status.FAILED],
+                    next_attempt_at__lte=now,
+                )
+                .order_by('next_attempt_at', 'id')[:limit]
+            )
+            if emails:
+                EmailOutbox.objects.filter(id__in=[email.id for email in emails]).update(
+                    attempts=F('attempts') + 1,
+                    next_attempt_at=now + timedelta(seconds=cls.LEASE_SECONDS),
+                    updated_at=now,
+                )
+        for email in emails:
+            email.attempts += 1
+        return emails
+
+    @staticmethod
+    def _message(email: EmailOutbox, connection) -> EmailMultiAlternatives:
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body_text,
+            from_email=email.from_email,
+            to=email.to,
+            connection=connection,
+        )
+        if email.body_html:
+            message.attach_alternative(email.body_html, 'text/html')
+        return message
+
+    @classmethod
+    def send_batch(cls, batch_size: Optional[int] = None) -> Dict:
+        """
+        Envia um lote de emails prontos por uma única conexão SMTP
+
+        Returns:
+            dict: {'claimed', 'sent', 'failed', 'dead', 'rate_limited'}
+        """
+        batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+        max_retries = getattr(settings, 'EMAIL_OUTBOX_MAX_RETRIES', 5)
+        result = {'claimed': 0, 'sent': 0, 'failed': 0, 'dead': 0, 'rate_limited': False}
+
+        allowed = cls._take_rate(batch_size)
+        if allowed <= 0:
+            result['rate_limited'] = True
+            return result
+
+        emails = cls._claim(allowed)
+        cls._give_back_rate(allowed - len(emails))
+        result['claimed'] = len(emails)
+        # Limite cortou o lote e ainda pode haver emails prontos
+        result['rate_limited'] = allowed < batch_size and len(emails) == allowed
+        if not emails:
+            return result
+
+        errors = {}
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            logger.error(f"[EMAIL_OUTBOX] Erro ao conectar no servidor de email: {e}")
+            errors = {email.id: (str(e), False) for email in emails}
+        else:
+            try:
+                for email in emails:
+                    try:
+                        # Conexão já aberta: send_messages reaproveita (não fecha) a sessão SMTP
+                        if not connection.send_messages([cls._message(email, connection)]):
+                            errors[email.id] = ('Servidor não aceitou a mensagem', False)
+                    except smtplib.SMTPRecipientsRefused as e:
+                        errors[email.id] = (str(e), True)
+                    except Exception as e:
+                        errors[email.id] = (str(e), False)
+            finally:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+        now = timezone.now()
+        for email in emails:
+            email.updated_at = now
+            if email.id not in errors:
+                email.status = EmailOutbox.Status.SENT
+                email.sent_at = now
+                email.last_error = ''
+                result['sent'] += 1
+                continue
+
+            error, permanent = errors[email.id]
+            email.last_error = error[:2000]
+            if permanent or email.attempts > max_retries:
+                email.status = EmailOutbox.Status.DEAD
+                result['dead'] += 1
+                logger.error(
+                    f"[EMAIL_OUTBOX] Dead-letter #{email.id} ({email.source}) após "
+                    f"{email.attempts} tentativa(s): {error}"
+                )
+            else:
+                email.status = EmailOutbox.Status.FAILED
+                email.next_attempt_at = now + timedelta(seconds=cls.retry_delay(email.attempts))
+                result['failed'] += 1
+                logger.warning(
+                    f"[EMAIL_OUTBOX] Falha #{email.id} ({email.source}), tentativa "
+                    f"{email.attempts}/{max_retries + 1}: {error}"
+                )
+
+        EmailOutbox.objects.bulk_update(
+            emails, ['status', 'sent_at', 'last_error', 'next_attempt_at', 'updated_at']
+        )
+        logger.info(
+            f"[EMAIL_OUTBOX] Lote: {result['sent']} enviado(s), {result['failed']} falha(s), "
+            f"{result['dead']} dead-letter"
+        )
+        return result
+
+    @classmethod
+    def send_pending(cls) -> Dict:
+        """
+        Envia lotes até esvaziar a outbox ou atingir o rate limit
+
+        Returns:
+            dict: Totais + 'retry_in' (segundos até o próximo minuto, se limitado)
+        """
+        try:
+            # Novos enfileiramentos a partir daqui agendam outra execução
+            cls._get_redis().delete(cls.SCHEDULED_KEY)
+        except Exception:
+            pass
+
+        batch_size = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+        totals = {'sent': 0, 'failed': 0, 'dead': 0, 'retry_in': None}
+        while True:
+            result = cls.send_batch(batch_size)
+            for key in ('sent', 'failed', 'dead'):
+                totals[key] += result[key]
+            if result['rate_limited']:
+                totals['retry_in'] = 60 - timezone.now().second
+                break
+            if result['claimed'] < batch_size:
+                break
+        return totals
+
+    @classmethod
+    def requeue(cls, queryset) -> int:
+        """Reenvia registros (dead-letter ou com falha) zerando tentativas"""
+        count = queryset.exclude(status=EmailOutbox.Status.SENT).update(
+            status=EmailOutbox.Status.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        if count:
+            transaction.on_commit(cls.schedule)
+        return count
@@ -0,0 +1,252 @@
+"""
+Image Ingest Service - Envio de imagens para o S3 em streaming
+
+- Lê a origem (URL remota ou arquivo) em chunks, sem carregar a imagem inteira
+- Multipart upload em partes de IMAGE_INGEST_PART_SIZE (PUT simples se couber em uma parte)
+- Dimensões (cabeçalho via ImageFile.Parser) e SHA-256 calculados durante o envio
+- Cliente S3 compartilhado (S3Service._get_s3_client), sem boto3.client por upload
+"""
+
+import hashlib
+import logging
+import os
+import time
+
+import httpx
+from PIL import Image, ImageFile
+from django.conf import settings
+
+from .s3_service import S3Service
+
+logger = logging.getLogger(__name__)
+
+
+class ImageProbe:
+    """Acumula SHA-256 e identifica formato/dimensões pelos primeiros bytes"""
+
+    def __init__(self):
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.width = None
+        self.height = None
+        self.format = None
+        self._parser = ImageFile.Parser()
+
+    def feed(self, chunk):
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+        if self._parser is None:
+            return
+        try:
+            self._parser.feed(chunk)
+        except Exception:
+            # Formato não reconhecido pelo parser incremental
+            self._parser = None
+            return
+        image = self._parser.image
+        if image is not None:
+            self.width, self.height = image.size
+            self.format = image.format
+            self._parser = None
+
+    @property
+    def content_type(self):
+        return Image.MIME.get(self.format) if self.format else None
+
+
+class ImageIngestService:
+    """
+    Uso:
+        result = ImageIngestService.ingest_url(url, organization_id)
+        result = ImageIngestService.ingest_file(post_image.image_file, organization_id)
+        result['s3_key'], result['s3_url'], result['width'], result['height'], result['sha256']
+    """
+
+    # Mesmo formato das chaves já gravadas pelo upload do admin
+    KEY_TEMPLATE = 'org-{org_id}/posts/generated/{timestamp}-{name}.{ext}'
+
+    CHUNK_SIZE = 256 * 1024
+    MIN_PART_SIZE = 5 * 1024 * 1024  # Mínimo do S3 (exceto última parte)
+
+    @staticmethod
+    def _part_size():
+        return max(
+            getattr(settings, 'IMAGE_INGEST_PART_SIZE', 8 * 1024 * 1024),
+            ImageIngestService.MIN_PART_SIZE
+        )
+
+    @staticmethod
+    def _max_bytes():
+        return getattr(settings, 'IMAGE_INGEST_MAX_BYTES', 30 * 1024 * 1024)
+
+    # ============================================
+    # UPLOAD
+    # ============================================
+
+    @classmethod
+    def upload_stream(cls, chunks, organization_id, original_name, content_type=None):
+        """
+        Envia chunks para o S3 (multipart quando maior que uma parte)
+
+        Args:
+            chunks: Iterável de bytes
+            organization_id: ID da organização (prefixo da chave)
+            original_name: Nome de origem (compõe a chave)
+            content_type: MIME informado pela origem (o formato detectado tem prioridade)
+
+        Returns:
+            dict: {'s3_key', 's3_url', 'width', 'height', 'size', 'sha256', 'content_type'}
+
+        Raises:
+            ValueError: Origem não é imagem suportada ou excede IMAGE_INGEST_MAX_BYTES
+        """
+        s3_client = S3Service._get_s3_client()
+        part_size = cls._part_size()
+        max_bytes = cls._max_bytes()
+        probe = ImageProbe()
+
+        buffer = bytearray()
+        upload_id = None
+        s3_key = None
+        parts = []
+        extra_args = None
+
+        def start():
+            detected = probe.content_type or content_type
+            if not detected or not detected.startswith('image/'):
+                raise ValueError("Arquivo não é uma imagem válida")
+            name = os.path.splitext(os.path.basename(original_name or 'image'))[0] or 'image'
+            key = S3Service.generate_secure_filename(
+                original_name=name,
+                file_type=detected,
+                category='posts',
+                organization_id=organization_id,
+                template=cls.KEY_TEMPLATE,
+            )
+            args = {
+                'ContentType': detected,
+                'ServerSideEncryption': 'AES256',
+                'StorageClass': 'INTELLIGENT_TIERING',
+                'Metadata': {
+                    'original-name': os.path.basename(original_name or name),
+                    'organization-id': str(organization_id),
+                    'category': 'posts',
+                    'upload-timestamp': str(int(time.time() * 1000)),
+                },
+            }
+            return key, detected, args
+
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                probe.feed(chunk)
+                if probe.size > max_bytes:
+                    raise ValueError(f"Imagem excede o limite de {max_bytes} bytes")
+                buffer.extend(chunk)
+
+                if len(buffer) >= part_size:
+                    if upload_id is None:
+                        s3_key, content_type, extra_args = start()
+                        upload_id = s3_client.create_multipart_upload(
+                            Bucket=settings.AWS_BUCKET_NAME, Key=s3_key, **extra_args
+                        )['UploadId']
+                    parts.append(cls._upload_part(s3_client, s3_key, upload_id, len(parts) + 1, bytes(buffer)))
+                    buffer.clear()
+
+            if upload_id is None:
+                # Coube em uma parte: PUT simples
+                s3_key, content_type, extra_args = start()
+                s3_client.put_object(
+                    Bucket=settings.AWS_BUCKET_NAME, Key=s3_key, Body=bytes(buffer), **extra_args
+                )
+            else:
+                if buffer:
+                    parts.append(cls._upload_part(s3_client, s3_key, upload_id, len(parts) + 1, bytes(buffer)))
+                s3_client.complete_multipart_upload(
+                    Bucket=settings.AWS_BUCKET_NAME,
+                    Key=s3_key,
+                    UploadId=upload_id,
+                    MultipartUpload={'Parts': parts}
+                )
+        except Exception:
+            if upload_id is not None:
+                try:
+                    s3_client.abort_multipart_upload(
+                        Bucket=settings.AWS_BUCKET_NAME, Key=s3_key, UploadId=upload_id
+                    )
+                except Exception as e:
+                    logger.warning(f"[IMAGE_INGEST] Erro ao abortar multipart {s3_key}: {e}")
+            raise
+
+        if not probe.width:
+            logger.warning(f"[IMAGE_INGEST] Dimensões não identificadas: {s3_key}")
+
+        logger.info(
+            f"[IMAGE_INGEST] {s3_key}: {probe.size} bytes, {probe.width}x{probe.height}, "
+            f"{len(parts) or 1} parte(s)"
+        )
+
+        return {
+            's3_key': s3_key,
+            's3_url': S3Service.get_public_url(s3_key),
+            'width': probe.width,
+            'height': probe.height,
+            'size': probe.size,
+            'sha256': probe.sha256.hexdigest(),
+            'content_type': content_type,
+        }
+
+    @staticmethod
+    def _upload_part(s3_client, s3_key, upload_id, part_number, body):
+        response = s3_client.upload_part(
+            Bucket=settings.AWS_BUCKET_NAME,
+            Key=s3_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body
+        )
+        return {'ETag': response['ETag'], 'PartNumber': part_number}
+
+    # ============================================
+    # ORIGENS
+    # ============================================
+
+    @classmethod
+    def ingest_url(cls, url, organization_id, original_name=None, timeout=60.0):
+        """
+        Baixa imagem remota (ex: URL temporária do DALL-E) direto para o S3
+
+        Returns:
+            dict: Ver upload_stream
+        """
+        name = original_name or os.path.basename(httpx.URL(url).path) or 'generated'
+        with httpx.Client(timeout=timeout, follow_redirects=True) as client:
+            with client.stream('GET', url) as response:
+                response.raise_for_status()
+                content_type = response.headers.get('content-type', '').split(';')[0].strip() or None
+                return cls.upload_stream(
+                    response.iter_bytes(cls.CHUNK_SIZE),
+                    organization_id,
+                    name,
+                    content_type
+                )
+
+    @classmethod
+    def ingest_file(cls, file, organization_id, original_name=None, content_type=None):
+        """
+        Envia arquivo (FieldFile/UploadedFile) em chunks para o S3
+
+        Returns:
+            dict: Ver upload_stream
+        """
+        file.open('rb')
+        try:
+            return cls.upload_stream(
+                file.chunks(cls.CHUNK_SIZE),
+                organization_id,
+                original_name or file.name,
+                content_type
+            )
+        finally:
+            file.close()
@@ -39,6 +39,71 @@ class ImageProcessor:
         },
     }
     
+    @staticmethod
+    def _flatten_alpha(img: Image.Image) -> Image.Image:
+        """Compõe imagem RGBA sobre fundo branco (RGB)"""
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])  # Alpha channel como mask
+        return background
+    
+    @classmethod
+    def encode(cls, img: Image.Image, format_name: Optional[str] = None) -> bytes:
+        """
+        Codifica imagem já decodificada aplicando compressão do formato
+        
+        Args:
+            img: Imagem PIL (já carregada)
+            format_name: Formato de saída. Default: formato da imagem ou JPEG
+            
+        Returns:
+            Bytes da imagem comprimida
+        """
+        format_name = format_name or img.format or 'JPEG'
+        
+        # Converter RGBA para RGB se necessário (para JPEG)
+        if format_name == 'JPEG' and img.mode == 'RGBA':
+            img = cls._flatten_alpha(img)
+        
+        output = BytesIO()
+        save_kwargs = cls.COMPRESSION_SETTINGS.get(format_name, {})
+        img.save(output, format=format_name, **save_kwargs)
+        return output.getvalue()
+    
+    @classmethod
+    def encode_thumbnail(
+        cls,
+        img: Image.Image,
+        format_name: Optional[str] = None,
+        max_size: Optional[Tuple[int, int]] = None
+    ) -> bytes:
+        """
+        Gera thumbnail a partir de imagem já decodificada (sem alterar a original)
+        
+        Args:
+            img: Imagem PIL (já carregada)
+            format_name: Formato de saída. Default: formato da imagem ou JPEG
+            max_size: Tamanho máximo (width, height). Default: (800, 800)
+            
+        Returns:
+            Bytes da imagem thumbnail
+        """
+        if max_size is None:
+            max_size = cls.THUMBNAIL_MAX_SIZE
+        
+        format_name = format_name or img.format or 'JPEG'
+        
+        # Converter RGBA para RGB se necessário (para JPEG)
+        if img.mode == 'RGBA' and format_name != 'PNG':
+            thumb = cls._flatten_alpha(img)
+            format_name = 'JPEG'
+        else:
+            thumb = img.copy()
+        
+        # Criar thumbnail mantendo aspect ratio
+        thumb.thumbnail(max_size, Image.Resampling.LANCZOS)
+        
+        return cls.encode(thumb, format_name)
+    
     @classmethod
     def create_thumbnail(
         cls,
@@ -62,28 +127,14 @@ class ImageProcessor:
             max_size = cls.THUMBNAIL_MAX_SIZE
         
         try:
-            # Abrir imagem
             img = Image.open(BytesIO(image_data))
+            format_name = img.format
             
-            # Converter RGBA para RGB se necessário (para JPEG)
-            if img.mode == 'RGBA' and img.format != 'PNG':
-                # Criar fundo branco
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[3])  # Alpha channel como mask
-                img = background
+            # JPEG: decodificar já em escala reduzida
+            if format_name == 'JPEG':
+                img.draft(img.mode, max_size)
             
-            # Criar thumbnail mantendo aspect ratio
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # Salvar em buffer
-            output = BytesIO()
-            format_name = img.format or 'JPEG'
-            
-            # Aplicar configurações de compressão
-            save_kwargs = cls.COMPRESSION_SETTINGS.get(format_name, {})
-            img.save(output, format=format_name, **save_kwargs)
-            
-            return output.getvalue()
+            return cls.encode_thumbnail(img, format_name, max_size)
             
         except Exception as e:
             raise Exception(f"Erro ao criar thumbnail: {str(e)}")
@@ -108,24 +159,8 @@ class ImageProcessor:
             Exception: Se erro ao processar imagem
         """
         try:
-            # Abrir imagem
             img = Image.open(BytesIO(image_data))
-            
-            # Determinar formato
-            format_name = format_override or img.format or 'JPEG'
-            
-            # Converter RGBA para RGB se necessário (para JPEG)
-            if format_name == 'JPEG' and img.mode == 'RGBA':
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[3])
-                img = background
-            
-            # Salvar com compressão
-            output = BytesIO()
-            save_kwargs = cls.COMPRESSION_SETTINGS.get(format_name, {})
-            img.save(output, format=format_name, **save_kwargs)
-            
-            return output.getvalue()
+            return cls.encode(img, format_override or img.format)
             
         except Exception as e:
             raise Exception(f"Erro ao comprimir imagem: {str(e)}")
@@ -166,35 +201,46 @@ class ImageProcessor:
         cls,
         image_data: bytes,
         create_thumbnail: bool = True,
-        compress: bool = True
+        compress: bool = True,
+        hashes: Tuple[str, ...] = ()
     ) -> dict:
         """
-        Processa imagem para upload (thumbnail + compressão)
+        Processa imagem para upload (thumbnail + compressão) com uma única decodificação
         
         Args:
             image_data: Bytes da imagem original
             create_thumbnail: Se deve criar thumbnail
             compress: Se deve comprimir original
+            hashes: Hashes a calcular no mesmo passo ('phash', 'ahash', 'dhash')
             
         Returns:
             {
                 'original': bytes,          # Original (comprimido se compress=True)
                 'thumbnail': bytes,         # Thumbnail (se create_thumbnail=True)
                 'info': dict,               # Informações da imagem
+                'hashes': dict,             # Hashes calculados
             }
         """
-        result = {
-            'original': image_data,
-            'thumbnail': None,
-            'info': cls.get_image_info(image_data),
-        }
+        from apps.utils.image_analysis import analyze_image
         
-        # Comprimir original
-        if compress:
-            result['original'] = cls.compress_image(image_data)
+        analysis = analyze_image(
+            image_data,
+            hashes=hashes,
+            thumbnail=create_thumbnail,
+            compress=compress,
+            max_size_mb=None,
+            allowed_formats=None,
+        )
         
-        # Criar thumbnail
-        if create_thumbnail:
-            result['thumbnail'] = cls.create_thumbnail(image_data)
-        
-        return result
+        return {
+            'original': analysis['original'] if compress else image_data,
+            'thumbnail': analysis['thumbnail'],
+            'info': {
+                'width': analysis['width'],
+                'height': analysis['height'],
+                'format': analysis['format'],
+                'mode': analysis['mode'],
+                'size_bytes': analysis['size_bytes'],
+            },
+            'hashes': analysis['hashes'],
+        }
@@ -0,0 +1,323 @@
+"""
+Quota Alert Service - Avaliação em lote dos alertas de quota (80% / 100%)
+
+Substitui o laço por organização (get do uso do dia + SUM mensal +
+exists por alerta + send_mail síncrono) por:
+- Uma query para organizações com alertas habilitados
+- Uma query para o uso diário de todas elas desde o início de ciclo mais antigo
+- Uma query para os ajustes mensais (post_monthly)
+- Uma query para os alertas já enviados
+- Um bulk_create dos novos alertas
+- Envio de todos os emails por uma única conexão SMTP
+"""
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.models import Organization, QuotaUsageDaily, QuotaAdjustment, QuotaAlert
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaAlertService:
+    """
+    Uso:
+        result = QuotaAlertService.check_all()
+        result['sent'], result['failed']
+    """
+
+    # resource_type → (campo de quota em Organization, período)
+    RESOURCES = {
+        QuotaAlert.ResourceType.PAUTA_DAILY: ('quota_pautas_dia', 'daily'),
+        QuotaAlert.ResourceType.POST_DAILY: ('quota_posts_dia', 'daily'),
+        QuotaAlert.ResourceType.VIDEO_DAILY: ('quota_videos_dia', 'daily'),
+        QuotaAlert.ResourceType.POST_MONTHLY: ('quota_posts_mes', 'monthly'),
+        QuotaAlert.ResourceType.VIDEO_MONTHLY: ('quota_videos_mes', 'monthly'),
+    }
+
+    RESOURCE_NAMES = {
+        QuotaAlert.ResourceType.PAUTA_DAILY: 'Pautas Diárias',
+        QuotaAlert.ResourceType.POST_DAILY: 'Posts Diários',
+        QuotaAlert.ResourceType.VIDEO_DAILY: 'Vídeos Diários',
+        QuotaAlert.ResourceType.POST_MONTHLY: 'Posts Mensais',
+        QuotaAlert.ResourceType.VIDEO_MONTHLY: 'Vídeos Mensais',
+    }
+
+    ORG_FIELDS = (
+        'id', 'name', 'alert_email', 'alert_80_enabled', 'alert_100_enabled',
+        'billing_cycle_day', 'quota_pautas_dia', 'quota_posts_dia', 'quota_posts_mes',
+        'quota_videos_dia', 'quota_videos_mes',
+    )
+
+    # ============================================
+    # CARGA EM LOTE
+    # ============================================
+
+    @classmethod
+    def _load_organizations(cls):
+        return list(
+            Organization.objects.filter(is_active=True).filter(
+                Q(alert_80_enabled=True) | Q(alert_100_enabled=True)
+            ).only(*cls.ORG_FIELDS)
+        )
+
+    @staticmethod
+    def _load_usage(org_ids, since, today):
+        """
+        Uso diário de todas as organizações desde `since`
+
+        Returns:
+            dict: {org_id: {date: {'pautas', 'posts', 'posts_created', 'videos', 'videos_created'}}}
+        """
+        usage = defaultdict(dict)
+        rows = QuotaUsageDaily.objects.filter(
+            organization_id__in=org_ids,
+            date__gte=since,
+            date__lte=today
+        ).values_list(
+            'organization_id', 'date',
+            'pautas_requested', 'pautas_adjustments',
+            'posts_created', 'posts_adjustments',
+            'videos_created', 'videos_adjustments',
+        )
+        for org_id, day, pautas, pautas_adj, posts, posts_adj, videos, videos_adj in rows.iterator(chunk_size=2000):
+            usage[org_id][day] = {
+                'pautas': max(0, pautas + pautas_adj),
+                'posts': max(0, posts + posts_adj),
+                'posts_created': posts,
+                'videos': max(0, videos + videos_adj),
+                'videos_created': videos,
+            }
+        return usage
+
+    @staticmethod
+    def _load_monthly_adjustments(org_ids, since):
+        """
+        Ajustes mensais de posts
+
+        Returns:
+            dict: {org_id: [(created_at, amount)]}
+        """
+        adjustments = defaultdict(list)
+        rows = QuotaAdjustment.objects.filter(
+            organization_id__in=org_ids,
+            resource_type='post_monthly',
+            created_at__gte=since
+        ).values_list('organization_id', 'created_at', 'amount')
+        for org_id, created_at, amount in rows:
+            adjustments[org_id].append((created_at, amount))
+        return adjustments
+
+    @staticmethod
+    def _load_sent(org_ids, since):
+        """
+        Alertas já enviados
+
+        Returns:
+            dict: {(org_id, alert_type, resource_type): última data}
+        """
+        sent = {}
+        rows = QuotaAlert.objects.filter(
+            organization_id__in=org_ids,
+            date__gte=since
+        ).values_list('organization_id', 'alert_type', 'resource_type', 'date')
+        for org_id, alert_type, resource_type, day in rows:
+            key = (org_id, alert_type, resource_type)
+            if key not in sent or sent[key] < day:
+                sent[key] = day
+        return sent
+
+    # ============================================
+    # AVALIAÇÃO (EM MEMÓRIA)
+    # ============================================
+
+    @staticmethod
+    def _current_usage(daily, adjustments, cycle_start, today):
+        """
+        Uso atual por resource_type
+
+        Mensal segue o mesmo cálculo do rollup de ciclo (QuotaCounterService):
+        contadores diários do ciclo + ajustes post_monthly.
+        """
+        today_usage = daily.get(today, {})
+        cycle_days = [values for day, values in daily.items() if day >= cycle_start.date()]
+
+        posts_mes = sum(values['posts_created'] for values in cycle_days)
+        posts_mes += sum(amount for created_at, amount in adjustments if created_at >= cycle_start)
+
+        return {
+            QuotaAlert.ResourceType.PAUTA_DAILY: today_usage.get('pautas', 0),
+            QuotaAlert.ResourceType.POST_DAILY: today_usage.get('posts', 0),
+            QuotaAlert.ResourceType.VIDEO_DAILY: today_usage.get('videos', 0),
+            QuotaAlert.ResourceType.POST_MONTHLY: max(0, posts_mes),
+            QuotaAlert.ResourceType.VIDEO_MONTHLY: sum(values['videos'] for values in cycle_days),
+        }
+
+    @classmethod
+    def evaluate(cls, today=None):
+        """
+        Calcula alertas pendentes de envio
+
+        Returns:
+            list: [{'organization', 'alert_type', 'resource_type', 'current', 'limit'}]
+        """
+        today = today or timezone.now().date()
+        organizations = cls._load_organizations()
+        if not organizations:
+            return []
+
+        org_ids = [org.id for org in organizations]
+        cycle_starts = {org.id: org.get_billing_cycle_start() for org in organizations}
+        since = min(min(start.date() for start in cycle_starts.values()), today)
+
+        usage = cls._load_usage(org_ids, since, today)
+        adjustments = cls._load_monthly_adjustments(org_ids, min(cycle_starts.values()))
+        sent = cls._load_sent(org_ids, since)
+
+        pending = []
+        for org in organizations:
+            cycle_start = cycle_starts[org.id]
+            current = cls._current_usage(
+                usage.get(org.id, {}), adjustments.get(org.id, []), cycle_start, today
+            )
+
+            for resource_type, (quota_field, period) in cls.RESOURCES.items():
+                limit = getattr(org, quota_field) or 0
+                if limit <= 0:
+                    continue
+
+                percentage = current[resource_type] / limit * 100
+                if percentage >= 100 and org.alert_100_enabled:
+                    alert_type = QuotaAlert.AlertType.ALERT_100
+                elif percentage >= 80 and org.alert_80_enabled:
+                    alert_type = QuotaAlert.AlertType.ALERT_80
+                else:
+                    continue
+
+                # Diário: um alerta por dia; mensal: um alerta por ciclo
+                last_sent = sent.get((org.id, alert_type, resource_type))
+                period_start = today if period == 'daily' else cycle_start.date()
+                if last_sent and last_sent >= period_start:
+                    continue
+
+                pending.append({
+                    'organization': org,
+                    'alert_type': alert_type,
+                    'resource_type': resource_type,
+                    'current': current[resource_type],
+                    'limit': limit,
+                })
+
+        return pending
+
+    # ============================================
+    # EMAIL
+    # ============================================
+
+    @classmethod
+    def build_email(cls, alert, date, connection=None):
+        """Monta EmailMessage de alerta de quota"""
+        org = alert['organization']
+        threshold = int(alert['alert_type'])
+        alert_name = cls.RESOURCE_NAMES.get(alert['resource_type'], alert['resource_type'])
+        current = alert['current']
+        limit = alert['limit']
+        percentage = (current / limit * 100) if limit > 0 else 0
+
+        if threshold >= 100:
+            subject = f'⚠️ ALERTA: Quota de {alert_name} ESGOTADA - {org.name}'
+            status = 'ESGOTADA (100%)'
+            urgency = 'CRÍTICO'
+        else:
+            subject = f'⚠️ Alerta: Quota de {alert_name} em {threshold}% - {org.name}'
+            status = f'em {percentage:.1f}%'
+            urgency = 'ATENÇÃO'
+
+        message = f"""
+Olá,
+
+{urgency}: A quota de {alert_name} da organização {org.name} está {status}.
+
+Detalhes:
+- Tipo: {alert_name}
+- Uso atual: {int(current)}
+- Limite: {int(limit)}
+- Percentual: {percentage:.1f}%
+- Data: {date.strftime('%d/%m/%Y')}
+
+{'⚠️ A quota foi totalmente utilizada. Novas criações podem ser bloqueadas.' if threshold >= 100 else '⚠️ A quota está próxima do limite. Considere ajustar ou aguardar renovação.'}
+
+---
+Sistema IAMKT - Alertas de Quota
+        """.strip()
+
+        return EmailMessage(
+            subject=subject,
+            body=message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[org.alert_email or settings.DEFAULT_FROM_EMAIL],
+            connection=connection,
+        )
+
+    # ============================================
+    # EXECUÇÃO
+    # ============================================
+
+    @classmethod
+    def check_all(cls, today=None):
+        """
+        Avalia e envia todos os alertas pendentes
+
+        Returns:
+            dict: {'evaluated': int, 'sent': int, 'failed': int}
+        """
+        today = today or timezone.now().date()
+        pending = cls.evaluate(today)
+        if not pending:
+            return {'evaluated': 0, 'sent': 0, 'failed': 0}
+
+        delivered = []
+        failed = 0
+
+        # Uma conexão SMTP para todo o lote
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+            for alert in pending:
+                email = cls.build_email(alert, today, connection=connection)
+                try:
+                    email.send()
+                    delivered.append((alert, email.to[0]))
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"[QUOTA_ALERT] Erro ao enviar alerta para {alert['organization'].name}: {e}")
+        except Exception as e:
+            failed += len(pending) - len(delivered)
+            logger.error(f"[QUOTA_ALERT] Erro na conexão SMTP: {e}")
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+        QuotaAlert.objects.bulk_create(
+            [
+                QuotaAlert(
+                    organization=alert['organization'],
+                    alert_type=alert['alert_type'],
+                    resource_type=alert['resource_type'],
+                    date=today,
+                    sent_to=sent_to,
+                )
+                for alert, sent_to in delivered
+            ],
+            ignore_conflicts=True,
+        )
+
+        logger.info(f"[QUOTA_ALERT] {len(pending)} alertas avaliados: {len(delivered)} enviados, {failed} falhas")
+        return {'evaluated': len(pending), 'sent': len(delivered), 'failed': failed}
@@ -0,0 +1,546 @@
+"""
+Quota Counter Service - Contadores atômicos de quota no Redis
+
+Substitui o padrão get_or_create + "+= 1" + save() em QuotaUsageDaily,
+que perdia incrementos sob concorrência e custava 2-3 queries por objeto.
+
+Funcionamento:
+- Cada (organização, dia) tem um hash no Redis com os contadores do dia
+- Incrementos usam HINCRBY (atômico, sem lock de linha no PostgreSQL)
+- Na primeira escrita/leitura do dia o hash é semeado a partir do banco
+- Chaves alteradas entram num set "dirty" que a task
+  flush_quota_counters descarrega em lote para QuotaUsageDaily. O flush
+  soma ao banco apenas o delta ainda não descarregado ("<campo>:pending"),
+  sem sobrescrever incrementos feitos direto no banco pelo fallback
+- Posts também são acumulados num rollup por ciclo de faturamento
+  (billing_cycle_day), tornando a checagem de quota mensal uma leitura
+  de chave única em vez de dois SUM no banco
+- Se o Redis estiver indisponível, cai para UPDATE atômico com F()
+"""
+
+import logging
+from datetime import date as date_cls, timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaCounterService:
+    """
+    Service centralizado para contadores diários de quota
+    """
+
+    # Campos incrementados em tempo real
+    COUNTER_FIELDS = ('pautas_requested', 'posts_created', 'videos_created')
+
+    # Campos de ajuste manual (vêm do banco, apenas espelhados no Redis)
+    ADJUSTMENT_FIELDS = ('pautas_adjustments', 'posts_adjustments', 'videos_adjustments')
+
+    # Campos acumulados também no rollup do ciclo de faturamento
+    CYCLE_FIELDS = ('posts_created',)
+
+    KEY_PREFIX = 'quota:counter'
+    CYCLE_KEY_PREFIX = 'quota:cycle'
+    DIRTY_SET_KEY = 'quota:counter:dirty'
+    PENDING_SUFFIX = ':pending'
+
+    # Incremento diário + rollup do ciclo (apenas se já semeado) numa única
+    # operação atômica. Rollup ausente é recalculado na próxima leitura.
+    INCREMENT_SCRIPT = """
+        local value = redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+        redis.call('HINCRBY', KEYS[1], ARGV[1] .. ':pending', ARGV[2])
+        redis.call('EXPIRE', KEYS[1], ARGV[3])
+        redis.call('SADD', KEYS[3], ARGV[4])
+        if ARGV[5] == '1' and redis.call('EXISTS', KEYS[2]) == 1 then
+            redis.call('HINCRBY', KEYS[2], ARGV[1], ARGV[2])
+        end
+        return value
+    """
+
+    # Semeia o rollup do ciclo: soma contadores diários do Redis (quando
+    # existem) ou o valor do banco, mais os ajustes mensais
+    CYCLE_SEED_SCRIPT = """
+        local total = tonumber(ARGV[2])
+        for i = 2, #KEYS do
+            local value = redis.call('HGET', KEYS[i], ARGV[1])
+            if value then
+                total = total + tonumber(value)
+            else
+                total = total + tonumber(ARGV[i + 2])
+            end
+        end
+        redis.call('HSETNX', KEYS[1], ARGV[1], total)
+        redis.call('EXPIRE', KEYS[1], ARGV[3])
+        return redis.call('HGET', KEYS[1], ARGV[1])
+    """
+
+    # Retira (zera) os deltas pendentes dos campos ARGV para o flush
+    TAKE_PENDING_SCRIPT = """
+        local taken = {}
+        for i, field in ipairs(ARGV) do
+            local pending = tonumber(redis.call('HGET', KEYS[1], field .. ':pending') or '0')
+            if pending ~= 0 then
+                redis.call('HINCRBY', KEYS[1], field .. ':pending', -pending)
+            end
+            taken[i] = pending
+        end
+        return taken
+    """
+
+    # Após o flush: valor do hash = valor do banco + delta ainda pendente.
+    # Corrige divergências (ex: incrementos do fallback) e retorna os campos
+    # que mudaram. Chave expirada não é recriada (seria semeada sem ajustes).
+    RECONCILE_SCRIPT = """
+        local changed = {}
+        if redis.call('EXISTS', KEYS[1]) == 0 then
+            return changed
+        end
+        for i = 1, #ARGV, 2 do
+            local field = ARGV[i]
+            local pending = tonumber(redis.call('HGET', KEYS[1], field .. ':pending') or '0')
+            local value = tonumber(ARGV[i + 1]) + pending
+            if tonumber(redis.call('HGET', KEYS[1], field) or '0') ~= value then
+                redis.call('HSET', KEYS[1], field, value)
+                table.insert(changed, field)
+            end
+        end
+        return changed
+    """
+
+    # ============================================
+    # CHAVES / CONEXÃO
+    # ============================================
+
+    @classmethod
+    def _get_redis(cls):
+        """Retorna conexão Redis do cache default (django-redis)"""
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    @classmethod
+    def _ttl(cls) -> int:
+        return getattr(settings, 'QUOTA_COUNTER_TTL', 259200)  # 3 dias
+
+    @classmethod
+    def _key(cls, organization_id: int, day: date_cls) -> str:
+        return f"{cls.KEY_PREFIX}:{organization_id}:{day.isoformat()}"
+
+    @classmethod
+    def _cycle_ttl(cls) -> int:
+        return getattr(settings, 'QUOTA_CYCLE_ROLLUP_TTL', 3024000)  # 35 dias
+
+    @classmethod
+    def _cycle_key(cls, organization_id: int, cycle_start: date_cls) -> str:
+        return f"{cls.CYCLE_KEY_PREFIX}:{organization_id}:{cycle_start.isoformat()}"
+
+    @staticmethod
+    def _member(organization_id: int, day: date_cls) -> str:
+        return f"{organization_id}:{day.isoformat()}"
+
+    @staticmethod
+    def _parse_member(member) -> tuple:
+        if isinstance(member, bytes):
+            member = member.decode()
+        org_id, day = member.split(':', 1)
+        return int(org_id), date_cls.fromisoformat(day)
+
+    # ============================================
+    # SEED (banco → Redis)
+    # ============================================
+
+    @classmethod
+    def _load_from_db(cls, organization_id: int, day: date_cls) -> Dict[str, int]:
+        """Lê o registro do dia no banco (zeros se não existir)"""
+        from apps.core.models import QuotaUsageDaily
+
+        row = QuotaUsageDaily.objects.filter(
+            organization_id=organization_id,
+            date=day
+        ).values(*cls.COUNTER_FIELDS, *cls.ADJUSTMENT_FIELDS).first()
+
+        return row or {field: 0 for field in cls.COUNTER_FIELDS + cls.ADJUSTMENT_FIELDS}
+
+    @classmethod
+    def _seed(cls, conn, organization_id: int, day: date_cls) -> None:
+        """
+        Semeia o hash a partir do banco.
+
+        Usa HSETNX: se outro processo já semeou (ou incrementou), os valores
+        existentes são preservados.
+        """
+        key = cls._key(organization_id, day)
+        values = cls._load_from_db(organization_id, day)
+
+        pipe = conn.pipeline(transaction=True)
+        for field, value in values.items():
+            pipe.hsetnx(key, field, int(value or 0))
+        pipe.expire(key, cls._ttl())
+        pipe.execute()
+
+    # ============================================
+    # INCREMENTO
+    # ============================================
+
+    @classmethod
+    def increment(
+        cls,
+        organization,
+        field: str,
+        amount: int = 1,
+        day: Optional[date_cls] = None
+    ) -> Optional[int]:
+        """
+        Incrementa contador de forma atômica
+
+        Args:
+            organization: Instância de Organization
+            field: Um de COUNTER_FIELDS
+            amount: Quantidade a incrementar (padrão: 1)
+            day: Data do contador (padrão: hoje)
+
+        Returns:
+            Novo valor do contador, ou None se caiu no fallback do banco
+        """
+        if field not in cls.COUNTER_FIELDS:
+            raise ValueError(f"Campo de quota inválido: {field}")
+
+        organization_id = organization.id
+        day = day or timezone.now().date()
+        key = cls._key(organization_id, day)
+        cycle_key = cls._cycle_key(organization_id, organization.get_billing_cycle_start().date())
+
+        try:
+            conn = cls._get_redis()
+
+            if not conn.exists(key):
+                cls._seed(conn, organization_id, day)
+
+            script = conn.register_script(cls.INCREMENT_SCRIPT)
+            new_value = script(
+                keys=[key, cycle_key, cls.DIRTY_SET_KEY],
+                args=[
+                    field,
+                    amount,
+                    cls._ttl(),
+                    cls._member(organization_id, day),
+                    '1' if field in cls.CYCLE_FIELDS else '0',
+                ]
+            )
+
+            return int(new_value)
+
+        except Exception as e:
+            logger.error(f"[QUOTA] Redis indisponível, incrementando direto no banco: {e}")
+            cls._increment_db(organization_id, field, amount, day)
+            try:
+                # Hash do Redis ficou defasado: o próximo flush o reconcilia
+                cls._get_redis().sadd(cls.DIRTY_SET_KEY, cls._member(organization_id, day))
+            except Exception:
+                pass
+            return None
+
+    @classmethod
+    def _increment_db(cls, organization_id: int, field: str, amount: int, day: date_cls) -> None:
+        """Fallback: UPDATE atômico com F() (sem lost update)"""
+        from apps.core.models import QuotaUsageDaily
+
+        QuotaUsageDaily.objects.get_or_create(organization_id=organization_id, date=day)
+        QuotaUsageDaily.objects.filter(
+            organization_id=organization_id,
+            date=day
+        ).update(**{field: F(field) + amount, 'updated_at': timezone.now()})
+
+    # ============================================
+    # LEITURA
+    # ============================================
+
+    @classmethod
+    def get_usage(cls, organization_id: int, day: Optional[date_cls] = None) -> Dict[str, int]:
+        """
+        Retorna contadores + ajustes do dia
+
+        Returns:
+            {
+                'pautas_requested': int, 'posts_created': int, 'videos_created': int,
+                'pautas_adjustments': int, 'posts_adjustments': int, 'videos_adjustments': int,
+            }
+        """
+        day = day or timezone.now().date()
+        key = cls._key(organization_id, day)
+
+        try:
+            conn = cls._get_redis()
+            raw = conn.hgetall(key)
+
+            if not raw:
+                cls._seed(conn, organization_id, day)
+                raw = conn.hgetall(key)
+
+            values = {
+                (k.decode() if isinstance(k, bytes) else k): int(v)
+                for k, v in raw.items()
+            }
+        except Exception as e:
+            logger.error(f"[QUOTA] Redis indisponível, lendo uso do banco: {e}")
+            values = cls._load_from_db(organization_id, day)
+
+        return {
+            field: int(values.get(field) or 0)
+            for field in cls.COUNTER_FIELDS + cls.ADJUSTMENT_FIELDS
+        }
+
+    # ============================================
+    # ROLLUP DO CICLO DE FATURAMENTO
+    # ============================================
+
+    @classmethod
+    def _load_cycle_from_db(cls, organization, cycle_start, field: str) -> tuple:
+        """
+        Lê do banco os valores diários do ciclo e a soma dos ajustes mensais
+
+        Returns:
+            ({date: valor}, soma_ajustes)
+        """
+        from apps.core.models import QuotaUsageDaily, QuotaAdjustment
+
+        daily = dict(
+            QuotaUsageDaily.objects.filter(
+                organization=organization,
+                date__gte=cycle_start.date()
+            ).values_list('date', field)
+        )
+
+        adjustments = QuotaAdjustment.objects.filter(
+            organization=organization,
+            resource_type='post_monthly',
+            created_at__gte=cycle_start
+        ).aggregate(total=Sum('amount'))['total'] or 0
+
+        return daily, adjustments
+
+    @classmethod
+    def get_cycle_usage(cls, organization, field: str = 'posts_created') -> int:
+        """
+        Retorna uso acumulado no ciclo de faturamento atual
+
+        Leitura de uma única chave no Redis. Na primeira leitura do ciclo
+        (ou após invalidação) o rollup é recalculado a partir dos contadores
+        diários e dos ajustes mensais.
+
+        Args:
+            organization: Instância de Organization
+            field: Um de CYCLE_FIELDS
+
+        Returns:
+            Total do ciclo (contadores + ajustes), nunca negativo
+        """
+        if field not in cls.CYCLE_FIELDS:
+            raise ValueError(f"Campo sem rollup de ciclo: {field}")
+
+        cycle_start = organization.get_billing_cycle_start()
+        cycle_key = cls._cycle_key(organization.id, cycle_start.date())
+
+        try:
+            conn = cls._get_redis()
+            value = conn.hget(cycle_key, field)
+
+            if value is None:
+                daily, adjustments = cls._load_cycle_from_db(organization, cycle_start, field)
+
+                days = []
+                day = cycle_start.date()
+                today = timezone.now().date()
+                while day <= today:
+                    days.append(day)
+                    day += timedelta(days=1)
+
+                script = conn.register_script(cls.CYCLE_SEED_SCRIPT)
+                value = script(
+                    keys=[cycle_key] + [cls._key(organization.id, d) for d in days],
+                    args=[field, adjustments, cls._cycle_ttl()] + [int(daily.get(d) or 0) for d in days]
+                )
+
+            return max(0, int(value))
+
+        except Exception as e:
+            logger.error(f"[QUOTA] Redis indisponível, calculando ciclo no banco: {e}")
+            daily, adjustments = cls._load_cycle_from_db(
+                organization, organization.get_billing_cycle_start(), field
+            )
+            return max(0, sum(daily.values()) + adjustments)
+
+    @classmethod
+    def invalidate_cycle(cls, organization) -> None:
+        """
+        Descarta o rollup do ciclo atual (recalculado na próxima leitura).
+        Usado quando ajustes mensais (QuotaAdjustment) mudam.
+        """
+        cycle_key = cls._cycle_key(organization.id, organization.get_billing_cycle_start().date())
+
+        try:
+            cls._get_redis().delete(cycle_key)
+        except Exception as e:
+            logger.error(f"[QUOTA] Erro ao invalidar rollup do ciclo: {e}")
+
+    @classmethod
+    def invalidate_day(cls, organization_id: int, day: date_cls) -> None:
+        """
+        Descarta o hash do dia (semeado de novo na próxima leitura/escrita).
+        Usado quando o registro QuotaUsageDaily é removido.
+        """
+        try:
+            pipe = cls._get_redis().pipeline(transaction=True)
+            pipe.delete(cls._key(organization_id, day))
+            pipe.srem(cls.DIRTY_SET_KEY, cls._member(organization_id, day))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"[QUOTA] Erro ao invalidar contadores do dia: {e}")
+
+    @classmethod
+    def sync_adjustments(cls, usage) -> None:
+        """
+        Espelha ajustes manuais de um QuotaUsageDaily no hash do Redis.
+
+        Chamado quando o registro é editado (ex: admin), para que a leitura
+        via Redis reflita os novos ajustes sem esperar expiração. Contadores
+        editados no registro também são reconciliados (banco + delta pendente),
+        pois o rollup do ciclo é semeado a partir do hash diário.
+        """
+        key = cls._key(usage.organization_id, usage.date)
+
+        try:
+            conn = cls._get_redis()
+            if conn.exists(key):
+                conn.hset(key, mapping={
+                    field: int(getattr(usage, field) or 0)
+                    for field in cls.ADJUSTMENT_FIELDS
+                })
+                conn.register_script(cls.RECONCILE_SCRIPT)(
+                    keys=[key],
+                    args=[
+                        item
+                        for field in cls.COUNTER_FIELDS
+                        for item in (field, int(getattr(usage, field) or 0))
+                    ],
+                )
+        except Exception as e:
+            logger.error(f"[QUOTA] Erro ao sincronizar ajustes no Redis: {e}")
+
+    # ============================================
+    # FLUSH (Redis → banco)
+    # ============================================
+
+    @classmethod
+    def flush(cls, batch_size: Optional[int] = None) -> int:
+        """
+        Descarrega contadores alterados para QuotaUsageDaily em lote
+
+        Soma ao banco só os deltas pendentes (F() + delta), retirados do Redis
+        atomicamente: incrementos gravados direto no banco pelo fallback não
+        são sobrescritos. Em seguida o hash é reconciliado com o banco e, se
+        um campo do ciclo divergia, o rollup do ciclo é invalidado.
+
+        Args:
+            batch_size: Quantidade de chaves por lote (padrão: settings)
+
+        Returns:
+            Número de registros (organização, dia) com deltas gravados
+        """
+        from apps.core.models import Organization, QuotaUsageDaily
+
+        batch_size = batch_size or getattr(settings, 'QUOTA_COUNTER_FLUSH_BATCH_SIZE', 500)
+        conn = cls._get_redis()
+        take_pending = conn.register_script(cls.TAKE_PENDING_SCRIPT)
+        reconcile = conn.register_script(cls.RECONCILE_SCRIPT)
+        flushed = 0
+
+        while True:
+            members = conn.spop(cls.DIRTY_SET_KEY, batch_size)
+            if not members:
+                break
+
+            parsed = [cls._parse_member(m) for m in members]
+
+            pipe = conn.pipeline(transaction=False)
+            for organization_id, day in parsed:
+                take_pending(keys=[cls._key(organization_id, day)], args=cls.COUNTER_FIELDS, client=pipe)
+            results = pipe.execute()
+
+            deltas = {
+                (organization_id, day): dict(zip(cls.COUNTER_FIELDS, (int(v) for v in values)))
+                for (organization_id, day), values in zip(parsed, results)
+                if any(int(v) for v in values)
+            }
+            pending_condition = Q()
+            for organization_id, day in deltas:
+                pending_condition |= Q(organization_id=organization_id, date=day)
+            condition = Q()
+            for organization_id, day in parsed:
+                condition |= Q(organization_id=organization_id, date=day)
+
+            try:
+                with transaction.atomic():
+                    if deltas:
+                        QuotaUsageDaily.objects.bulk_create(
+                            [
+                                QuotaUsageDaily(organization_id=organization_id, date=day)
+                                for organization_id, day in deltas
+                            ],
+                            ignore_conflicts=True,
+                        )
+                        QuotaUsageDaily.objects.filter(pending_condition).update(
+                            updated_at=timezone.now(),
+                            **{
+                                field: F(field) + Case(
+                                    *[
+                                        When(organization_id=organization_id, date=day, then=Value(values[field]))
+                                        for (organization_id, day), values in deltas.items()
+                                        if values[field]
+                                    ],
+                                    default=Value(0),
+                                    output_field=IntegerField(),
+                                )
+                                for field in cls.COUNTER_FIELDS
+                            }
+                        )
+                    totals = list(
+                        QuotaUsageDaily.objects.filter(condition).values_list(
+                            'organization_id', 'date', *cls.COUNTER_FIELDS
+                        )
+                    )
+            except Exception:
+                # Devolver deltas e chaves para nova tentativa no próximo ciclo
+                pipe = conn.pipeline(transaction=False)
+                for (organization_id, day), values in deltas.items():
+                    key = cls._key(organization_id, day)
+                    for field, delta in values.items():
+                        if delta:
+                            pipe.hincrby(key, field + cls.PENDING_SUFFIX, delta)
+                pipe.sadd(cls.DIRTY_SET_KEY, *members)
+                pipe.execute()
+                raise
+
+            pipe = conn.pipeline(transaction=False)
+            for organization_id, day, *values in totals:
+                reconcile(
+                    keys=[cls._key(organization_id, day)],
+                    args=[item for pair in zip(cls.COUNTER_FIELDS, values) for item in pair],
+                    client=pipe,
+                )
+            changed = pipe.execute()
+
+            drifted = {
+                row[0] for row, fields in zip(totals, changed)
+                if any((f.decode() if isinstance(f, bytes) else f) in cls.CYCLE_FIELDS for f in fields)
+            }
+            for organization in Organization.objects.filter(id__in=drifted):
+                cls.invalidate_cycle(organization)
+
+            flushed += len(deltas)
+
+        return flushed
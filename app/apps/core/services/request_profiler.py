@@ -0,0 +1,186 @@
+"""
+Request Profiler Service - Métricas de performance por view
+
+Requests amostrados (PROFILING_SAMPLE_RATE) ou de organizações marcadas
+(PROFILING_ORGANIZATIONS) são medidos pelo ProfilingMiddleware:
+- queries e tempo de banco (connection.execute_wrapper)
+- hits/misses e tempo de cache, tempo de HTTP externo e de templates
+  (spans/contadores de apps.core.observability)
+
+Cada amostra vai para uma lista Redis limitada por view (um round trip
+com pipeline); summary() calcula p50/p95/p99 para a página do admin.
+"""
+
+import json
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """execute_wrapper que conta queries e soma o tempo de banco"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class RequestProfilerService:
+    """
+    Uso:
+        if RequestProfilerService.should_profile(request):
+            ...
+            RequestProfilerService.record('GET posts:list', metrics)
+        RequestProfilerService.summary()   # página do admin
+    """
+
+    VIEWS_KEY = 'profiling:views'
+    SAMPLES_KEY = 'profiling:samples:{view}'
+
+    # Amostras expiram se a view parar de ser amostrada
+    TTL_SECONDS = 7 * 24 * 3600
+
+    # Métricas da amostra (chave curta no Redis → nome exibido)
+    METRICS = {
+        't': 'total_ms',
+        'q': 'queries',
+        'db': 'db_ms',
+        'ch': 'cache_hits',
+        'cm': 'cache_misses',
+        'cache': 'cache_ms',
+        'http': 'http_ms',
+        'tpl': 'template_ms',
+    }
+    PERCENTILES = (50, 95, 99)
+
+    @staticmethod
+    def _get_redis():
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    # ============================================
+    # AMOSTRAGEM
+    # ============================================
+
+    @staticmethod
+    def should_profile(request) -> bool:
+        """Organização marcada ou sorteio pela taxa de amostragem"""
+        organization = getattr(request, 'organization', None)
+        if organization is not None and organization.pk in getattr(settings, 'PROFILING_ORGANIZATIONS', ()):
+            return True
+        rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        return rate > 0 and random.random() < rate
+
+    @staticmethod
+    def view_name(request) -> str:
+        match = getattr(request, 'resolver_match', None)
+        name = (match.view_name or match._func_path) if match else '<não resolvida>'
+        return f"{request.method} {name}"
+
+    # ============================================
+    # REGISTRO
+    # ============================================
+
+    @classmethod
+    def record(cls, view: str, metrics: Dict) -> None:
+        """
+        Grava amostra da view (falha no Redis apenas loga)
+
+        Args:
+            view: 'MÉTODO view_name'
+            metrics: Chaves de METRICS (valores numéricos)
+        """
+        sample = {key: metrics.get(name, 0) for key, name in cls.METRICS.items()}
+        sample['ts'] = int(time.time())
+        samples_key = cls.SAMPLES_KEY.format(view=view)
+        max_samples = getattr(settings, 'PROFILING_MAX_SAMPLES', 500)
+
+        try:
+            pipe = cls._get_redis().pipeline(transaction=False)
+            pipe.zincrby(cls.VIEWS_KEY, 1, view)
+            pipe.lpush(samples_key, json.dumps(sample, separators=(',', ':')))
+            pipe.ltrim(samples_key, 0, max_samples - 1)
+            pipe.expire(samples_key, cls.TTL_SECONDS)
+            pipe.expire(cls.VIEWS_KEY, cls.TTL_SECONDS)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"[PROFILING] Erro ao gravar amostra de {view}: {e}")
+
+    # ============================================
+    # CONSULTA
+    # ============================================
+
+    @staticmethod
+    def _percentile(values: List[float], percentile: int) -> float:
+        """Nearest-rank sobre valores já ordenados"""
+        if not values:
+            return 0
+        index = max(0, min(len(values) - 1, int(round(percentile / 100 * len(values))) - 1))
+        return values[index]
+
+    @classmethod
+    def summary(cls, limit: int = 100) -> List[Dict]:
+        """
+        Percentis por view (views mais amostradas primeiro, ordenadas por p95 total)
+
+        Returns:
+            list: [{'view', 'requests', 'samples', 'total_ms': {'p50', 'p95', 'p99'}, ...,
+                    'max_queries', 'cache_hit_ratio'}]
+        """
+        conn = cls._get_redis()
+        views = [
+            (view.decode() if isinstance(view, bytes) else view, int(total))
+            for view, total in conn.zrevrange(cls.VIEWS_KEY, 0, limit - 1, withscores=True)
+        ]
+        if not views:
+            return []
+
+        pipe = conn.pipeline(transaction=False)
+        for view, _ in views:
+            pipe.lrange(cls.SAMPLES_KEY.format(view=view), 0, -1)
+        raw_samples = pipe.execute()
+
+        rows = []
+        for (view, total), raw in zip(views, raw_samples):
+            samples = [json.loads(item) for item in raw]
+            if not samples:
+                continue
+
+            row = {'view': view, 'requests': total, 'samples': len(samples)}
+            for key, name in cls.METRICS.items():
+                values = sorted(sample.get(key, 0) for sample in samples)
+                row[name] = {f'p{p}': cls._percentile(values, p) for p in cls.PERCENTILES}
+
+            hits = sum(sample.get('ch', 0) for sample in samples)
+            lookups = hits + sum(sample.get('cm', 0) for sample in samples)
+            row['max_queries'] = max(sample.get('q', 0) for sample in samples)
+            row['cache_hit_ratio'] = round(hits / lookups, 3) if lookups else None
+            rows.append(row)
+
+        rows.sort(key=lambda row: row['total_ms']['p95'], reverse=True)
+        return rows
+
+    @classmethod
+    def reset(cls, view: Optional[str] = None) -> None:
+        """Remove amostras de uma view (ou de todas)"""
+        conn = cls._get_redis()
+        if view:
+            conn.delete(cls.SAMPLES_KEY.format(view=view))
+            conn.zrem(cls.VIEWS_KEY, view)
+            return
+        views = conn.zrange(cls.VIEWS_KEY, 0, -1)
+        keys = [cls.SAMPLES_KEY.format(view=v.decode() if isinstance(v, bytes) else v) for v in views]
+        conn.delete(cls.VIEWS_KEY, *keys)
@@ -9,14 +9,16 @@ Features:
 """
 
 import boto3
+import hashlib
 import secrets
 import time
 import re
 from datetime import datetime
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, Iterable
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from django.conf import settings
+from django.core.cache import cache
 from apps.core.utils.file_validators import FileValidator
 
 
@@ -42,6 +44,11 @@ class S3Service:
     PRESIGNED_URL_EXPIRATION = 300  # 5 minutos para upload
     DOWNLOAD_URL_EXPIRATION = 3600  # 1 hora para download/preview
     
+    # Cache de URLs de download (Redis): reaproveitada até pouco antes de expirar
+    DOWNLOAD_URL_CACHE_KEY = 'presigned:get:{digest}'
+    DOWNLOAD_URL_CACHE_MARGIN = 300  # Descartada 5 minutos antes de expirar
+    MAX_BATCH_KEYS = 100
+    
     _s3_client = None  # Cache do cliente S3
     
     # ============================================
@@ -55,7 +62,9 @@ class S3Service:
             config = Config(
                 region_name=settings.AWS_REGION,
                 signature_version='s3v4',
-                retries={'max_attempts': 3, 'mode': 'standard'}
+                retries={'max_attempts': 3, 'mode': 'standard'},
+                # Cliente compartilhado entre threads (uploads/presigned em paralelo)
+                max_pool_connections=getattr(settings, 'AWS_S3_MAX_POOL_CONNECTIONS', 20)
             )
             
             cls._s3_client = boto3.client(
@@ -297,6 +306,84 @@ class S3Service:
         except ClientError as e:
             raise Exception(f"Erro AWS ao gerar URL de download: {str(e)}")
     
+    @classmethod
+    def get_download_urls(
+        cls,
+        s3_keys: Iterable[str],
+        organization_id: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Presigned URLs de download em lote, com cache compartilhado
+        
+        Acesso da organização validado uma vez (prefixo) para todo o lote;
+        chaves já assinadas são lidas do cache com uma única consulta
+        (get_many) e as restantes são assinadas e gravadas juntas (set_many).
+        A mesma chave vista por vários usuários é assinada uma vez por
+        DOWNLOAD_URL_EXPIRATION - DOWNLOAD_URL_CACHE_MARGIN.
+        
+        Args:
+            s3_keys: Chaves no S3 (máximo MAX_BATCH_KEYS, duplicadas ignoradas)
+            organization_id: ID da organização do usuário
+            
+        Returns:
+            {
+                'urls': {s3_key: {'url': str, 'expires_in': int}},
+                'errors': {s3_key: str}  # Chaves de outra organização ou falha ao assinar
+            }
+            
+        Raises:
+            ValueError: Se o lote exceder MAX_BATCH_KEYS
+        """
+        keys = list(dict.fromkeys(key for key in s3_keys if key))
+        if len(keys) > cls.MAX_BATCH_KEYS:
+            raise ValueError(f"Máximo de {cls.MAX_BATCH_KEYS} arquivos por requisição")
+        
+        expected_prefix = f"org-{organization_id}/"
+        errors = {}
+        allowed = []
+        for s3_key in keys:
+            if s3_key.startswith(expected_prefix) and '..' not in s3_key:
+                allowed.append(s3_key)
+            else:
+                errors[s3_key] = 'Acesso negado'
+        
+        if not allowed:
+            return {'urls': {}, 'errors': errors}
+        
+        cache_keys = {
+            cls.DOWNLOAD_URL_CACHE_KEY.format(
+                digest=hashlib.sha1(s3_key.encode('utf-8')).hexdigest()
+            ): s3_key
+            for s3_key in allowed
+        }
+        
+        now = time.time()
+        urls = {}
+        for cache_key, entry in cache.get_many(list(cache_keys)).items():
+            expires_in = int(entry['expires_at'] - now)
+            if expires_in > cls.DOWNLOAD_URL_CACHE_MARGIN:
+                urls[cache_keys[cache_key]] = {'url': entry['url'], 'expires_in': expires_in}
+        
+        to_cache = {}
+        for cache_key, s3_key in cache_keys.items():
+            if s3_key in urls:
+                continue
+            try:
+                url = cls.generate_presigned_download_url(s3_key)
+            except Exception as e:
+                errors[s3_key] = str(e)
+                continue
+            urls[s3_key] = {'url': url, 'expires_in': cls.DOWNLOAD_URL_EXPIRATION}
+            to_cache[cache_key] = {'url': url, 'expires_at': now + cls.DOWNLOAD_URL_EXPIRATION}
+        
+        if to_cache:
+            cache.set_many(
+                to_cache,
+                timeout=cls.DOWNLOAD_URL_EXPIRATION - cls.DOWNLOAD_URL_CACHE_MARGIN
+            )
+        
+        return {'urls': urls, 'errors': errors}
+    
     @classmethod
     def delete_file(cls, s3_key: str) -> bool:
         """
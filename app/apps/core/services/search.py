@@ -0,0 +1,182 @@
+"""
+Search Service - Busca textual (PostgreSQL full-text) de pautas e posts
+
+- Coluna tsvector armazenada (search_vector) em cada model pesquisável,
+  atualizada no post_save e indexada com GIN
+- Configuração 'portuguese_unaccent' (stemming português + unaccent),
+  criada pela migration core/0010; sem a extensão unaccent usa 'portuguese'
+- Busca por prefixo ("camp" encontra "campanha"), ranking e trechos
+  destacados (<mark>) para as listagens
+"""
+
+import logging
+import re
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+logger = logging.getLogger(__name__)
+
+
+class SearchService:
+    """
+    Models pesquisáveis declaram SEARCH_FIELDS = (('campo', 'peso'), ...)
+    e um campo search_vector (SearchVectorField).
+
+    Uso:
+        queryset = SearchService.search(queryset, termo, highlight_fields=('title',))
+        for obj in queryset:
+            SearchService.render_highlight(obj.title_highlight)
+    """
+
+    CONFIG_UNACCENT = 'portuguese_unaccent'
+    CONFIG_FALLBACK = 'portuguese'
+
+    # Marcadores do ts_headline (escapados antes de virar <mark>)
+    HIGHLIGHT_START = '\x02'
+    HIGHLIGHT_STOP = '\x03'
+
+    TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+    MAX_TOKENS = 8
+
+    _config = None
+
+    # ============================================
+    # CONFIGURAÇÃO
+    # ============================================
+
+    @staticmethod
+    def is_available():
+        return connection.vendor == 'postgresql'
+
+    @classmethod
+    def get_config(cls):
+        """Configuração de text search (verificada uma vez por processo)"""
+        if cls._config is None:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1 FROM pg_ts_config WHERE cfgname = %s', [cls.CONFIG_UNACCENT])
+                    cls._config = cls.CONFIG_UNACCENT if cursor.fetchone() else cls.CONFIG_FALLBACK
+            except Exception as e:
+                logger.warning(f"[SEARCH] Erro ao verificar configuração de busca: {e}")
+                return cls.CONFIG_FALLBACK
+        return cls._config
+
+    # ============================================
+    # VETOR (INDEXAÇÃO)
+    # ============================================
+
+    @classmethod
+    def build_vector(cls, weighted_fields):
+        """
+        Expressão tsvector ponderada
+
+        Args:
+            weighted_fields: Sequência de (campo, peso 'A'-'D')
+        """
+        config = cls.get_config()
+        vector = None
+        for field, weight in weighted_fields:
+            part = SearchVector(field, weight=weight, config=config)
+            vector = part if vector is None else vector + part
+        return vector
+
+    @classmethod
+    def update_vector(cls, instance, update_fields=None):
+        """
+        Atualiza search_vector da instância (chamado no post_save)
+
+        Ignora saves parciais que não tocam campos pesquisáveis.
+        """
+        if not cls.is_available():
+            return
+
+        fields = [field for field, _ in instance.SEARCH_FIELDS]
+        if update_fields is not None and not set(update_fields) & set(fields):
+            return
+
+        type(instance)._base_manager.filter(pk=instance.pk).update(
+            search_vector=cls.build_vector(instance.SEARCH_FIELDS)
+        )
+
+    # ============================================
+    # CONSULTA
+    # ============================================
+
+    @classmethod
+    def build_query(cls, term):
+        """
+        SearchQuery com prefixo em cada termo ("a & b:*")
+
+        Returns:
+            SearchQuery|None: None se o termo não tiver palavras
+        """
+        tokens = cls.TOKEN_RE.findall(term or '')[:cls.MAX_TOKENS]
+        if not tokens:
+            return None
+        raw = ' & '.join(f"{token}:*" for token in tokens)
+        return SearchQuery(raw, search_type='raw', config=cls.get_config())
+
+    @classmethod
+    def search(cls, queryset, term, highlight_fields=(), extra_q=None):
+        """
+        Filtra queryset pelo termo, anotando search_rank e <campo>_highlight
+
+        Args:
+            queryset: QuerySet de model com SEARCH_FIELDS/search_vector
+            term: Texto digitado pelo usuário
+            highlight_fields: Campos com trecho destacado
+            extra_q: Q adicional combinado com OR (ex: busca por ID)
+
+        Returns:
+            QuerySet (ordem original preservada; use search_rank para relevância)
+        """
+        model = queryset.model
+
+        if not cls.is_available():
+            condition = Q()
+            for field, _ in model.SEARCH_FIELDS:
+                condition |= Q(**{f'{field}__icontains': term})
+            if extra_q is not None:
+                condition |= extra_q
+            return queryset.filter(condition)
+
+        query = cls.build_query(term)
+        if query is None:
+            return queryset.filter(extra_q) if extra_q is not None else queryset.none()
+
+        condition = Q(search_vector=query)
+        if extra_q is not None:
+            condition |= extra_q
+
+        queryset = queryset.filter(condition).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+        config = cls.get_config()
+        for field in highlight_fields:
+            queryset = queryset.annotate(**{
+                f'{field}_highlight': SearchHeadline(
+                    field,
+                    query,
+                    config=config,
+                    start_sel=cls.HIGHLIGHT_START,
+                    stop_sel=cls.HIGHLIGHT_STOP,
+                    max_words=35,
+                    min_words=15,
+                    highlight_all=(field == 'title'),
+                )
+            })
+
+        return queryset
+
+    @classmethod
+    def render_highlight(cls, text):
+        """Trecho do ts_headline seguro para HTML (<mark> nos termos encontrados)"""
+        if not text:
+            return ''
+        html = escape(text).replace(cls.HIGHLIGHT_START, '<mark>').replace(cls.HIGHLIGHT_STOP, '</mark>')
+        return mark_safe(html)
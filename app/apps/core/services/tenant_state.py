@@ -0,0 +1,179 @@
+"""
+Tenant State - estado do tenant carregado uma única vez por request
+
+Organization e flags de onboarding da Knowledge Base ficam em cache curto
+por organização (invalidado nos signals de Organization e KnowledgeBase) e
+são memorizados no request, compartilhados por TenantMiddleware,
+OnboardingRequiredMiddleware, decorators e tenant_context.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class TenantState:
+    """Estado do tenant no request atual"""
+
+    __slots__ = (
+        'organization', 'kb_id', 'onboarding_completed', 'suggestions_reviewed',
+        'compilation_status', 'completude_percentual',
+    )
+
+    def __init__(self, organization=None, kb_id=None, onboarding_completed=False,
+                 suggestions_reviewed=False, compilation_status=None, completude_percentual=0):
+        self.organization = organization
+        self.kb_id = kb_id
+        self.onboarding_completed = onboarding_completed
+        self.suggestions_reviewed = suggestions_reviewed
+        self.compilation_status = compilation_status
+        self.completude_percentual = completude_percentual
+
+    @property
+    def has_knowledge_base(self):
+        return self.kb_id is not None
+
+
+class TenantStateService:
+    """
+    Loader do estado do tenant (organization + onboarding da KB)
+
+    Uso:
+        state = TenantStateService.for_request(request)
+        state.organization, state.onboarding_completed, ...
+    """
+
+    ORG_KEY = 'tenant_state:org:{org_id}'
+    KB_KEY = 'tenant_state:kb:{org_id}'
+
+    REQUEST_ATTR = '_tenant_state'
+
+    # Marcador de "organização sem KB" (None não é cacheável)
+    NO_KB = {'kb_id': None}
+
+    @staticmethod
+    def _ttl():
+        return getattr(settings, 'TENANT_STATE_CACHE_TTL', 60)
+
+    # ============================================
+    # LEITURA
+    # ============================================
+
+    @classmethod
+    def get_organization(cls, organization_id):
+        """
+        Organization por ID (cache curto)
+
+        Returns:
+            Organization|None
+        """
+        from apps.core.models import Organization
+
+        if not organization_id:
+            return None
+
+        key = cls.ORG_KEY.format(org_id=organization_id)
+        organization = cache.get(key)
+        if organization is None:
+            organization = Organization.objects.filter(id=organization_id).first()
+            if organization is not None:
+                cache.set(key, organization, cls._ttl())
+        return organization
+
+    @classmethod
+    def get_kb_state(cls, organization_id):
+        """
+        Flags de onboarding da KB da organização (cache curto)
+
+        Returns:
+            dict: {'kb_id', 'onboarding_completed', 'suggestions_reviewed',
+                   'compilation_status', 'completude_percentual'}
+                  ou {'kb_id': None} se a organização não tiver KB
+        """
+        from apps.knowledge.models import KnowledgeBase
+
+        if not organization_id:
+            return cls.NO_KB
+
+        key = cls.KB_KEY.format(org_id=organization_id)
+        state = cache.get(key)
+        if state is None:
+            row = KnowledgeBase.objects.filter(organization_id=organization_id).values(
+                'id', 'onboarding_completed', 'suggestions_reviewed',
+                'compilation_status', 'completude_percentual'
+            ).first()
+            if row:
+                state = {
+                    'kb_id': row['id'],
+                    'onboarding_completed': row['onboarding_completed'],
+                    'suggestions_reviewed': row['suggestions_reviewed'],
+                    'compilation_status': row['compilation_status'],
+                    'completude_percentual': row['completude_percentual'],
+                }
+            else:
+                state = cls.NO_KB
+            cache.set(key, state, cls._ttl())
+        return state
+
+    @classmethod
+    def for_request(cls, request):
+        """
+        Estado do tenant do request (carregado uma vez e memorizado no request)
+
+        A organization carregada também é atribuída a request.user.organization,
+        evitando a query lazy do ForeignKey nas views.
+
+        Returns:
+            TenantState
+        """
+        state = getattr(request, cls.REQUEST_ATTR, None)
+        if state is not None:
+            return state
+
+        state = TenantState()
+        user = getattr(request, 'user', None)
+
+        if user is not None and user.is_authenticated:
+            organization_id = getattr(user, 'organization_id', None)
+            organization = cls.get_organization(organization_id)
+
+            if organization is not None:
+                user.organization = organization
+                kb_state = cls.get_kb_state(organization.id)
+                state = TenantState(
+                    organization=organization,
+                    kb_id=kb_state['kb_id'],
+                    onboarding_completed=kb_state.get('onboarding_completed', False),
+                    suggestions_reviewed=kb_state.get('suggestions_reviewed', False),
+                    compilation_status=kb_state.get('compilation_status'),
+                    completude_percentual=kb_state.get('completude_percentual') or 0,
+                )
+
+        setattr(request, cls.REQUEST_ATTR, state)
+        return state
+
+    # ============================================
+    # INVALIDAÇÃO
+    # ============================================
+
+    @staticmethod
+    def _delete(key):
+        # Remove já (leituras na mesma transação) e após o commit
+        # (leituras concorrentes que recarregaram o valor antigo)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    @classmethod
+    def invalidate_organization(cls, organization_id):
+        """Organization alterada/removida"""
+        if organization_id:
+            cls._delete(cls.ORG_KEY.format(org_id=organization_id))
+
+    @classmethod
+    def invalidate_kb(cls, organization_id):
+        """KB da organização alterada/removida"""
+        if organization_id:
+            cls._delete(cls.KB_KEY.format(org_id=organization_id))
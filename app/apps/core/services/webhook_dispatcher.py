@@ -0,0 +1,301 @@
+"""
+Webhook Dispatcher - Envio assíncrono de webhooks de saída (N8N)
+
+Features:
+- Outbox em banco (WebhookDispatch): a view apenas enfileira e retorna
+- Envio pelo worker Celery com requests.Session compartilhada (keep-alive)
+- Retentativa exponencial em erros transitórios (timeout, conexão, 429, 5xx)
+- Chave de idempotência por envio (header Idempotency-Key)
+- Dead-letter após esgotar tentativas (reenvio manual pelo admin)
+- Envio em andamento fica como 'sending' com lease (next_attempt_at): tasks
+  duplicadas (fila atrasada + requeue periódico) não enviam duas vezes
+"""
+
+import logging
+import random
+import threading
+import uuid
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.core.models import WebhookDispatch
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentDispatchError(Exception):
+    """Erro não transitório (ex: HTTP 4xx): não adianta retentar"""
+    pass
+
+
+class WebhookDispatcher:
+    """
+    Service centralizado para webhooks de saída
+
+    Uso:
+        WebhookDispatcher.enqueue(
+            url=settings.N8N_WEBHOOK_GERAR_POST,
+            payload=n8n_payload,
+            source='posts.gerar_post',
+            idempotency_key=f'gerar_post:{post.id}',
+            organization=post.organization,
+        )
+    """
+
+    RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+    # Status que podem ser reservados para envio (quando next_attempt_at venceu)
+    CLAIMABLE_STATUS = (
+        WebhookDispatch.Status.PENDING,
+        WebhookDispatch.Status.FAILED,
+        WebhookDispatch.Status.SENDING,
+    )
+
+    # Lease do envio em andamento: depois disso o worker é considerado perdido
+    LEASE_SECONDS = 300
+
+    # Segredo não é persistido na outbox: substituído no momento do envio
+    SECRET_PLACEHOLDER = '{N8N_WEBHOOK_SECRET}'
+
+    _local = threading.local()
+
+    # ============================================
+    # SESSÃO HTTP (POOL)
+    # ============================================
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        """requests.Session por thread/processo, com pool de conexões keep-alive"""
+        session = getattr(cls._local, 'session', None)
+        if session is None:
+            pool_size = getattr(settings, 'N8N_HTTP_POOL_SIZE', 10)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            cls._local.session = session
+        return session
+
+    @staticmethod
+    def default_headers():
+        """Headers padrão de autenticação do N8N"""
+        return {
+            'Content-Type': 'application/json',
+            'X-Webhook-Secret': WebhookDispatcher.SECRET_PLACEHOLDER,
+        }
+
+    # ============================================
+    # ENFILEIRAMENTO
+    # ============================================
+
+    @classmethod
+    def enqueue(cls, url, payload, source, idempotency_key=None, organization=None, headers=None):
+        """
+        Registra webhook na outbox e agenda envio após o commit
+
+        Chamadas repetidas com a mesma idempotency_key não geram novo envio.
+
+        Args:
+            url: URL do webhook
+            payload: dict serializável em JSON
+            source: Origem do envio (ex: 'posts.gerar_post')
+            idempotency_key: Chave única do envio (padrão: UUID)
+            organization: Organization (opcional)
+            headers: Headers HTTP (padrão: default_headers()); use
+                     SECRET_PLACEHOLDER no lugar de N8N_WEBHOOK_SECRET
+
+        Returns:
+            WebhookDispatch
+        """
+        idempotency_key = idempotency_key or f"{source}:{uuid.uuid4().hex}"
+
+        try:
+            with transaction.atomic():
+                dispatch = WebhookDispatch.objects.create(
+                    idempotency_key=idempotency_key,
+                    source=source,
+                    url=url,
+                    payload=payload,
+                    headers=headers if headers is not None else cls.default_headers(),
+                    organization=organization,
+                )
+        except IntegrityError:
+            dispatch = WebhookDispatch.objects.get(idempotency_key=idempotency_key)
+            logger.info(f"[WEBHOOK] Envio já registrado ({idempotency_key}) - status {dispatch.status}")
+            return dispatch
+
+        transaction.on_commit(lambda: cls.schedule(dispatch.id))
+        logger.info(f"[WEBHOOK] Enfileirado #{dispatch.id} ({source}, {idempotency_key})")
+        return dispatch
+
+    @staticmethod
+    def schedule(dispatch_id, countdown=None):
+        """Agenda a task de envio (falha do broker fica para requeue_pending_webhooks)"""
+        from apps.core.tasks import dispatch_webhook
+        try:
+            dispatch_webhook.apply_async(args=[dispatch_id], countdown=countdown)
+        except Exception as e:
+            logger.error(f"[WEBHOOK] Erro ao agendar envio #{dispatch_id}: {e}")
+
+    # ============================================
+    # ENVIO
+    # ============================================
+
+    @classmethod
+    def retry_delay(cls, attempt):
+        """Backoff exponencial com jitter: N8N_RETRY_DELAY * 2^(tentativa-1)"""
+        base = getattr(settings, 'N8N_RETRY_DELAY', 5)
+        return base * (2 ** max(attempt - 1, 0)) + random.uniform(0, base)
+
+    @classmethod
+    def send(cls, dispatch):
+        """
+        Envia o webhook (chamado pelo worker)
+
+        Raises:
+            PermanentDispatchError: Erro não transitório
+            requests.RequestException: Erro transitório (retentar)
+        """
+        headers = {
+            name: settings.N8N_WEBHOOK_SECRET if value == cls.SECRET_PLACEHOLDER else value
+            for name, value in (dispatch.headers or {}).items()
+        }
+        headers['Idempotency-Key'] = dispatch.idempotency_key
+
+        response = cls._get_session().post(
+            dispatch.url,
+            json=dispatch.payload,
+            headers=headers,
+            timeout=settings.N8N_WEBHOOK_TIMEOUT,
+        )
+
+        dispatch.response_status = response.status_code
+        dispatch.response_body = response.text[:5000]
+
+        if response.status_code in cls.RETRYABLE_STATUS:
+            raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+        if response.status_code >= 400:
+            raise PermanentDispatchError(f"HTTP {response.status_code}: {response.text[:500]}")
+
+        return response
+
+    @classmethod
+    def process(cls, dispatch_id, max_retries):
+        """
+        Processa um envio da outbox
+
+        Returns:
+            float|None: Segundos até a próxima tentativa, ou None se finalizado
+        """
+        dispatch = cls._claim(dispatch_id)
+        if dispatch is None:
+            return None
+        if dispatch.attempts > max_retries + 1:
+            # Lease expirou sem resposta do worker em todas as tentativas
+            cls._dead_letter(dispatch, dispatch.last_error or 'Envio interrompido (lease expirado)')
+            return None
+
+        try:
+            cls.send(dispatch)
+        except PermanentDispatchError as e:
+            cls._dead_letter(dispatch, str(e))
+            return None
+        except requests.RequestException as e:
+            if dispatch.attempts > max_retries:
+                cls._dead_letter(dispatch, str(e))
+                return None
+            delay = cls.retry_delay(dispatch.attempts)
+            dispatch.status = WebhookDispatch.Status.FAILED
+            dispatch.last_error = str(e)
+            dispatch.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            dispatch.save(update_fields=[
+                'status', 'last_error', 'next_attempt_at', 'response_status', 'response_body', 'updated_at'
+            ])
+            logger.warning(
+                f"[WEBHOOK] Falha #{dispatch.id} ({dispatch.source}), tentativa "
+                f"{dispatch.attempts}/{max_retries + 1}: {e} - nova tentativa em {delay:.0f}s"
+            )
+            return delay
+
+        dispatch.status = WebhookDispatch.Status.SENT
+        dispatch.sent_at = timezone.now()
+        dispatch.last_error = ''
+        dispatch.save(update_fields=['status', 'sent_at', 'last_error', 'response_status', 'response_body', 'updated_at'])
+        logger.info(f"[WEBHOOK] Enviado #{dispatch.id} ({dispatch.source}) em {dispatch.attempts} tentativa(s)")
+        return None
+
+    @classmethod
+    def _claim(cls, dispatch_id):
+        """
+        Reserva o envio: status 'sending' + lease, tentativa contada
+
+        Returns:
+            WebhookDispatch|None: None se finalizado, em envio por outro
+            worker (lease vigente) ou aguardando backoff
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            dispatch = (
+                WebhookDispatch.objects.select_for_update()
+                .filter(id=dispatch_id, status__in=cls.CLAIMABLE_STATUS, next_attempt_at__lte=now)
+                .first()
+            )
+            if dispatch is None:
+                return None
+            dispatch.status = WebhookDispatch.Status.SENDING
+            dispatch.attempts += 1
+            dispatch.next_attempt_at = now + timedelta(seconds=cls.LEASE_SECONDS)
+            dispatch.save(update_fields=['status', 'attempts', 'next_attempt_at', 'updated_at'])
+        return dispatch
+
+    @staticmethod
+    def _dead_letter(dispatch, error):
+        dispatch.status = WebhookDispatch.Status.DEAD
+        dispatch.last_error = error
+        dispatch.save(update_fields=['status', 'last_error', 'response_status', 'response_body', 'updated_at'])
+        logger.error(f"[WEBHOOK] Dead-letter #{dispatch.id} ({dispatch.source}) após {dispatch.attempts} tentativa(s): {error}")
+
+    @classmethod
+    def reschedule_expired(cls, grace_seconds=300):
+        """
+        Reagenda envios cujo prazo venceu há mais de `grace_seconds`
+        (broker indisponível no enfileiramento, worker perdido com lease
+        vencido, retentativa que não chegou). Tentativas são mantidas:
+        N8N_MAX_RETRIES continua levando o registro à dead-letter.
+        """
+        cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+        ids = list(
+            WebhookDispatch.objects.filter(status__in=cls.CLAIMABLE_STATUS, next_attempt_at__lt=cutoff)
+            .values_list('id', flat=True)
+        )
+        for dispatch_id in ids:
+            cls.schedule(dispatch_id)
+        return len(ids)
+
+    @classmethod
+    def requeue(cls, queryset):
+        """
+        Reenvio manual (admin): dead-letter/pendentes voltam com tentativas zeradas
+
+        Envios em andamento (lease vigente) não são alterados.
+        """
+        now = timezone.now()
+        ids = list(
+            queryset.exclude(status=WebhookDispatch.Status.SENT)
+            .exclude(status=WebhookDispatch.Status.SENDING, next_attempt_at__gt=now)
+            .values_list('id', flat=True)
+        )
+        WebhookDispatch.objects.filter(id__in=ids).update(
+            status=WebhookDispatch.Status.PENDING,
+            attempts=0,
+            next_attempt_at=now,
+            updated_at=now,
+        )
+        for dispatch_id in ids:
+            cls.schedule(dispatch_id)
+        return len(ids)
@@ -2,9 +2,10 @@
 Sistema de Signals para Organization
 Detecta mudanças e envia emails automaticamente
 """
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from .models import Organization
+from .models import Organization, QuotaUsageDaily, QuotaAdjustment
 from .emails import (
     send_organization_approved_email,
     send_organization_suspended_email,
@@ -86,3 +87,59 @@ def handle_organization_changes(sender, instance, created, **kwargs):
     # Limpar cache
     if instance.pk in _org_state_cache:
         del _org_state_cache[instance.pk]
+
+
+@receiver(post_save, sender=QuotaUsageDaily)
+def sync_quota_adjustments(sender, instance, **kwargs):
+    """
+    Espelha ajustes manuais (ex: edição no admin) nos contadores do Redis.
+    Flush em lote usa bulk_create e não dispara este signal.
+    """
+    from .services.quota_counter import QuotaCounterService
+    QuotaCounterService.sync_adjustments(instance)
+
+
+@receiver([post_save, post_delete], sender=QuotaUsageDaily)
+def invalidate_daily_cycle_rollup(sender, instance, **kwargs):
+    """
+    Registro diário editado/removido (ex: posts_created ou posts_adjustments
+    no admin): descarta o rollup do ciclo para que seja recalculado.
+    Flush em lote usa bulk_create/update e não dispara este signal.
+    """
+    from .services.quota_counter import QuotaCounterService
+    organization = instance.organization
+    deleted = kwargs.get('signal') is post_delete
+    organization_id, day = instance.organization_id, instance.date
+
+    def invalidate():
+        if deleted:
+            QuotaCounterService.invalidate_day(organization_id, day)
+        QuotaCounterService.invalidate_cycle(organization)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver([post_save, post_delete], sender=QuotaAdjustment)
+def invalidate_cycle_rollup(sender, instance, **kwargs):
+    """
+    Ajuste mensal de posts criado/alterado/removido: descarta o rollup do
+    ciclo de faturamento para que seja recalculado na próxima checagem.
+    """
+    if instance.resource_type != 'post_monthly':
+        return
+    
+    from .services.quota_counter import QuotaCounterService
+    organization = instance.organization
+    transaction.on_commit(lambda: QuotaCounterService.invalidate_cycle(organization))
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def invalidate_tenant_state(sender, instance, **kwargs):
+    """
+    Organização alterada/removida: descarta a organization em cache usada
+    pelo TenantMiddleware (e o estado de onboarding, se removida).
+    """
+    from .services.tenant_state import TenantStateService
+    TenantStateService.invalidate_organization(instance.pk)
+    if kwargs.get('signal') is post_delete:
+        TenantStateService.invalidate_kb(instance.pk)
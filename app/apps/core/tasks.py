@@ -1,278 +1,81 @@
 """
 IAMKT - Celery Tasks para Core
 
-Tasks assíncronas para monitoramento de quotas e envio de alertas.
+Tasks assíncronas para monitoramento de quotas, envio de alertas e da outbox de emails.
 """
 from celery import shared_task
-from django.core.mail import send_mail
 from django.utils import timezone
 from django.conf import settings
-from django.db.models import Sum
-from decimal import Decimal
 
-from apps.core.models import Organization, QuotaUsageDaily, QuotaAlert
+from apps.core.models import QuotaAlert
+from apps.core.services.email_outbox import EmailOutboxService
+from apps.core.services.quota_alerts import QuotaAlertService
+from apps.core.services.quota_counter import QuotaCounterService
+from apps.core.services.webhook_dispatcher import WebhookDispatcher
 
 
 @shared_task
-def check_quota_alerts():
+def flush_quota_counters():
     """
-    Task periódica que verifica uso de quotas e envia alertas.
-    Deve ser executada a cada hora via Celery Beat.
+    Task periódica que descarrega os contadores de quota do Redis
+    para QuotaUsageDaily em lote.
+    Deve ser executada a cada minuto via Celery Beat.
     """
-    today = timezone.now().date()
-    organizations = Organization.objects.filter(
-        is_active=True,
-        alert_enabled=True
-    )
-    
-    alerts_sent = 0
-    
-    for org in organizations:
-        # Verificar alertas diários
-        alerts_sent += check_daily_quota_alerts(org, today)
-        
-        # Verificar alertas mensais
-        alerts_sent += check_monthly_quota_alerts(org, today)
-    
-    return f"Alertas verificados: {alerts_sent} enviados"
-
-
-def check_daily_quota_alerts(org, today):
-    """Verificar alertas de quotas diárias (pautas e posts)"""
-    alerts_sent = 0
-    
-    # Buscar uso de hoje
-    try:
-        usage = QuotaUsageDaily.objects.get(organization=org, date=today)
-    except QuotaUsageDaily.DoesNotExist:
-        return 0
-    
-    # Verificar Pautas Diárias
-    if org.quota_pautas_dia > 0:
-        percentage = (usage.pautas_count / org.quota_pautas_dia) * 100
-        
-        if percentage >= 100 and org.alert_threshold_100:
-            if not alert_already_sent(org, 'pautas_dia', 100, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='pautas_dia',
-                    threshold=100,
-                    current=usage.pautas_count,
-                    limit=org.quota_pautas_dia,
-                    date=today
-                )
-                alerts_sent += 1
-        
-        elif percentage >= 80 and org.alert_threshold_80:
-            if not alert_already_sent(org, 'pautas_dia', 80, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='pautas_dia',
-                    threshold=80,
-                    current=usage.pautas_count,
-                    limit=org.quota_pautas_dia,
-                    date=today
-                )
-                alerts_sent += 1
-    
-    # Verificar Posts Diários
-    if org.quota_posts_dia > 0:
-        percentage = (usage.posts_count / org.quota_posts_dia) * 100
-        
-        if percentage >= 100 and org.alert_threshold_100:
-            if not alert_already_sent(org, 'posts_dia', 100, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='posts_dia',
-                    threshold=100,
-                    current=usage.posts_count,
-                    limit=org.quota_posts_dia,
-                    date=today
-                )
-                alerts_sent += 1
-        
-        elif percentage >= 80 and org.alert_threshold_80:
-            if not alert_already_sent(org, 'posts_dia', 80, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='posts_dia',
-                    threshold=80,
-                    current=usage.posts_count,
-                    limit=org.quota_posts_dia,
-                    date=today
-                )
-                alerts_sent += 1
-    
-    return alerts_sent
-
-
-def check_monthly_quota_alerts(org, today):
-    """Verificar alertas de quotas mensais (posts e custo)"""
-    alerts_sent = 0
-    
-    # Calcular uso do mês
-    first_day = today.replace(day=1)
-    usage_month = QuotaUsageDaily.objects.filter(
-        organization=org,
-        date__gte=first_day,
-        date__lte=today
-    ).aggregate(
-        total_posts=Sum('posts_count'),
-        total_cost=Sum('cost_usd')
-    )
-    
-    posts_mes = usage_month['total_posts'] or 0
-    cost_mes = float(usage_month['total_cost'] or 0)
-    
-    # Verificar Posts Mensais
-    if org.quota_posts_mes > 0:
-        percentage = (posts_mes / org.quota_posts_mes) * 100
-        
-        if percentage >= 100 and org.alert_threshold_100:
-            if not alert_already_sent(org, 'posts_mes', 100, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='posts_mes',
-                    threshold=100,
-                    current=posts_mes,
-                    limit=org.quota_posts_mes,
-                    date=today
-                )
-                alerts_sent += 1
-        
-        elif percentage >= 80 and org.alert_threshold_80:
-            if not alert_already_sent(org, 'posts_mes', 80, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='posts_mes',
-                    threshold=80,
-                    current=posts_mes,
-                    limit=org.quota_posts_mes,
-                    date=today
-                )
-                alerts_sent += 1
-    
-    # Verificar Custo Mensal
-    if org.quota_cost_mes_usd and org.quota_cost_mes_usd > 0:
-        percentage = (cost_mes / float(org.quota_cost_mes_usd)) * 100
-        
-        if percentage >= 100 and org.alert_threshold_100:
-            if not alert_already_sent(org, 'cost_mes', 100, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='cost_mes',
-                    threshold=100,
-                    current=cost_mes,
-                    limit=float(org.quota_cost_mes_usd),
-                    date=today
-                )
-                alerts_sent += 1
-        
-        elif percentage >= 80 and org.alert_threshold_80:
-            if not alert_already_sent(org, 'cost_mes', 80, today):
-                send_quota_alert(
-                    org=org,
-                    alert_type='cost_mes',
-                    threshold=80,
-                    current=cost_mes,
-                    limit=float(org.quota_cost_mes_usd),
-                    date=today
-                )
-                alerts_sent += 1
-    
-    return alerts_sent
+    flushed = QuotaCounterService.flush()
+    return f"Contadores de quota gravados: {flushed}"
 
 
-def alert_already_sent(org, alert_type, threshold, date):
-    """Verificar se alerta já foi enviado hoje para evitar duplicatas"""
-    return QuotaAlert.objects.filter(
-        organization=org,
-        alert_type=alert_type,
-        threshold_percentage=threshold,
-        sent_at__date=date
-    ).exists()
+@shared_task(bind=True, ignore_result=True, acks_late=True)
+def dispatch_webhook(self, dispatch_id):
+    """
+    Envia um webhook da outbox (WebhookDispatch).
+    Erros transitórios são retentados com backoff exponencial até
+    N8N_MAX_RETRIES; depois disso o registro vai para dead-letter.
+    """
+    max_retries = settings.N8N_MAX_RETRIES
+    delay = WebhookDispatcher.process(dispatch_id, max_retries=max_retries)
+    if delay is not None:
+        raise self.retry(countdown=delay, max_retries=None)
 
 
-def send_quota_alert(org, alert_type, threshold, current, limit, date):
-    """Enviar email de alerta de quota"""
-    
-    # Mapear tipos de alerta para nomes legíveis
-    alert_names = {
-        'pautas_dia': 'Pautas Diárias',
-        'posts_dia': 'Posts Diários',
-        'posts_mes': 'Posts Mensais',
-        'cost_mes': 'Custo Mensal (USD)'
-    }
-    
-    alert_name = alert_names.get(alert_type, alert_type)
-    percentage = (current / limit * 100) if limit > 0 else 0
-    
-    # Definir assunto e mensagem
-    if threshold >= 100:
-        subject = f'⚠️ ALERTA: Quota de {alert_name} ESGOTADA - {org.name}'
-        status = 'ESGOTADA (100%)'
-        urgency = 'CRÍTICO'
-    else:
-        subject = f'⚠️ Alerta: Quota de {alert_name} em {threshold}% - {org.name}'
-        status = f'em {percentage:.1f}%'
-        urgency = 'ATENÇÃO'
-    
-    # Formatar valores
-    if 'cost' in alert_type:
-        current_str = f'${current:.2f}'
-        limit_str = f'${limit:.2f}'
-    else:
-        current_str = str(int(current))
-        limit_str = str(int(limit))
-    
-    # Compor mensagem
-    message = f"""
-Olá,
+@shared_task
+def requeue_pending_webhooks():
+    """
+    Task periódica que reagenda envios com prazo (next_attempt_at/lease)
+    vencido há mais de 5 minutos (ex: broker indisponível no momento do
+    enfileiramento, worker perdido durante o envio). Mantém as tentativas.
+    """
+    requeued = WebhookDispatcher.reschedule_expired(grace_seconds=300)
+    return f"Webhooks reagendados: {requeued}"
 
-{urgency}: A quota de {alert_name} da organização {org.name} está {status}.
 
-Detalhes:
-- Tipo: {alert_name}
-- Uso atual: {current_str}
-- Limite: {limit_str}
-- Percentual: {percentage:.1f}%
-- Data: {date.strftime('%d/%m/%Y')}
+@shared_task(ignore_result=True)
+def send_email_outbox():
+    """
+    Envia os emails prontos da outbox (EmailOutbox) em lotes por uma
+    única conexão SMTP. Agendada após o commit de quem enfileirou e
+    também periodicamente via Celery Beat (retentativas com backoff).
+    Se o rate limit do minuto for atingido, reagenda para o próximo minuto.
+    """
+    result = EmailOutboxService.send_pending()
+    if result['retry_in']:
+        EmailOutboxService.schedule(countdown=result['retry_in'])
 
-{'⚠️ A quota foi totalmente utilizada. Novas criações podem ser bloqueadas.' if threshold >= 100 else '⚠️ A quota está próxima do limite. Considere ajustar ou aguardar renovação.'}
 
----
-Sistema IAMKT - Alertas de Quota
-    """.strip()
-    
-    # Email de destino
-    email_to = org.alert_email or settings.DEFAULT_FROM_EMAIL
+@shared_task
+def check_quota_alerts():
+    """
+    Task periódica que verifica uso de quotas e envia alertas.
+    Deve ser executada a cada hora via Celery Beat.
     
-    # Enviar email
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email_to],
-            fail_silently=False,
-        )
-        
-        # Registrar alerta enviado
-        QuotaAlert.objects.create(
-            organization=org,
-            alert_type=alert_type,
-            threshold_percentage=threshold,
-            current_usage=Decimal(str(current)),
-            quota_limit=Decimal(str(limit)),
-            email_sent_to=email_to
-        )
-        
-        return True
+    Avaliação em lote (QuotaAlertService): poucas queries para todas as
+    organizações e envio dos emails por uma única conexão SMTP.
+    """
+    # Contadores do Redis → QuotaUsageDaily antes de avaliar
+    QuotaCounterService.flush()
     
-    except Exception as e:
-        # Log do erro (em produção, usar logging adequado)
-        print(f"Erro ao enviar alerta para {org.name}: {e}")
-        return False
+    result = QuotaAlertService.check_all()
+    return f"Alertas verificados: {result['sent']} enviados, {result['failed']} falhas"
 
 
 @shared_task
@@ -282,5 +85,5 @@ def cleanup_old_quota_alerts(days=90):
     Manter apenas últimos 90 dias por padrão.
     """
     cutoff_date = timezone.now() - timezone.timedelta(days=days)
-    deleted_count = QuotaAlert.objects.filter(sent_at__lt=cutoff_date).delete()[0]
+    deleted_count = QuotaAlert.objects.filter(date__lt=cutoff_date.date()).delete()[0]
     return f"Alertas antigos removidos: {deleted_count}"
@@ -0,0 +1,42 @@
+"""
+Testes dos signals de QuotaUsageDaily
+
+Edição/remoção do registro diário (ex: admin) descarta o rollup do ciclo
+de faturamento, sempre após o commit.
+"""
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.core.models import Organization, QuotaUsageDaily
+from apps.core.services.quota_counter import QuotaCounterService
+
+
+@mock.patch.object(QuotaCounterService, 'sync_adjustments')
+@mock.patch.object(QuotaCounterService, 'invalidate_day')
+@mock.patch.object(QuotaCounterService, 'invalidate_cycle')
+class QuotaUsageDailySignalTestCase(TestCase):
+    """Rollup do ciclo invalidado ao alterar/remover QuotaUsageDaily"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organization.objects.create(name='Org Ciclo', slug='org-ciclo', is_active=True)
+
+    def test_edit_invalidates_cycle_after_commit(self, invalidate_cycle, invalidate_day, sync_adjustments):
+        with self.captureOnCommitCallbacks(execute=True):
+            QuotaUsageDaily.objects.create(organization=self.org, date=date(2026, 1, 10), posts_created=5)
+            invalidate_cycle.assert_not_called()
+
+        invalidate_cycle.assert_called_once_with(self.org)
+        invalidate_day.assert_not_called()
+
+    def test_delete_invalidates_day_and_cycle(self, invalidate_cycle, invalidate_day, sync_adjustments):
+        usage = QuotaUsageDaily.objects.create(organization=self.org, date=date(2026, 1, 10))
+        invalidate_cycle.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            usage.delete()
+
+        invalidate_day.assert_called_once_with(self.org.id, date(2026, 1, 10))
+        invalidate_cycle.assert_called_once_with(self.org)
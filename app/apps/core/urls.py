@@ -9,6 +9,7 @@ app_name = 'core'
 urlpatterns = [
     path('', views.home, name='home'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/stats/', views.dashboard_stats, name='dashboard_stats'),
     path('health/', views.health_check, name='health'),
     path('terms/', views.terms_view, name='terms'),
 ]
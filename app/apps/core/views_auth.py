@@ -7,6 +7,9 @@ from django.contrib import messages
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_protect
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 @never_cache
@@ -30,20 +33,20 @@ def login_view(request):
         user = authenticate(request, username=username, password=password)
         
         if user is not None:
-            print(f"🔍 [LOGIN] Usuário autenticado: {user.email}", flush=True)
+            logger.debug(f"🔍 [LOGIN] Usuário autenticado: {user.email}")
             
             # Verificar se usuário tem organização
             if not hasattr(user, 'organization') or user.organization is None:
-                print(f"❌ [LOGIN] Usuário sem organização: {user.email}", flush=True)
+                logger.error(f"❌ [LOGIN] Usuário sem organização: {user.email}")
                 messages.error(request, 'Sua conta não está associada a nenhuma organização. Entre em contato com o suporte.')
                 return render(request, 'auth/login.html')
             
             # Verificar status da organização
             org = user.organization
-            print(f"🔍 [LOGIN] Organização: {org.name} (id={org.id}, active={org.is_active})", flush=True)
+            logger.debug(f"🔍 [LOGIN] Organização: {org.name} (id={org.id}, active={org.is_active})")
             
             if not org.is_active:
-                print(f"❌ [LOGIN] Organização inativa: {org.name}", flush=True)
+                logger.error(f"❌ [LOGIN] Organização inativa: {org.name}")
                 if org.approved_at:
                     # Organização foi suspensa
                     messages.error(request, 'Sua organização está suspensa. Para mais detalhes, entre em contato com o suporte: suporte@aisuites.com.br')
@@ -54,7 +57,7 @@ def login_view(request):
             
             # Login bem-sucedido - organização ativa
             auth_login(request, user)
-            print(f"✅ [LOGIN] Login bem-sucedido: {user.email}", flush=True)
+            logger.info(f"✅ [LOGIN] Login bem-sucedido: {user.email}")
             
             # Sempre mostrar modal de boas-vindas no primeiro login da sessão
             # (a flag será setada no dashboard após exibir o modal)
@@ -62,15 +65,13 @@ def login_view(request):
             
             # Verificar se tem parâmetro 'next' na URL
             next_url = request.GET.get('next')
-            print(f"🔍 [LOGIN] Parâmetro 'next': {next_url}", flush=True)
+            logger.debug(f"🔍 [LOGIN] Parâmetro 'next': {next_url}")
             if next_url:
-                print(f"🔄 [LOGIN] Redirecionando para 'next': {next_url}", flush=True)
+                logger.debug(f"🔄 [LOGIN] Redirecionando para 'next': {next_url}")
                 return redirect(next_url)
             
             # Verificar onboarding e suggestions_reviewed para decidir redirecionamento
             from apps.knowledge.models import KnowledgeBase
-            import logging
-            logger = logging.getLogger(__name__)
             
             try:
                 kb = KnowledgeBase.objects.filter(organization=org).first()
@@ -82,38 +83,34 @@ def login_view(request):
                         nome_empresa=org.name
                     )
                     logger.info(f"✅ [LOGIN] KB criado automaticamente para {org.name}")
-                    print(f"✅ [LOGIN] KB criado automaticamente para {org.name}", flush=True)
-                
-                print(f"🔍 [LOGIN] KB encontrado: {kb is not None}", flush=True)
                 
                 if kb:
-                    print(f"🔍 [LOGIN] Onboarding completo: {kb.onboarding_completed}", flush=True)
-                    print(f"🔍 [LOGIN] Sugestões revisadas: {kb.suggestions_reviewed}", flush=True)
-                    print(f"🔍 [LOGIN] Analysis status: {kb.analysis_status}", flush=True)
+                    logger.debug(
+                        f"🔍 [LOGIN] KB {kb.id} - onboarding: {kb.onboarding_completed}, "
+                        f"sugestões revisadas: {kb.suggestions_reviewed}, análise: {kb.analysis_status}"
+                    )
                     
                     # FLUXO 1: Onboarding não concluído
                     if not kb.onboarding_completed:
-                        print(f"🔄 [LOGIN] FLUXO 1: Redirecionando para Base de Conhecimento", flush=True)
+                        logger.debug(f"🔄 [LOGIN] FLUXO 1: Redirecionando para Base de Conhecimento")
                         return redirect('knowledge:view')
                     
                     # FLUXO 2: Onboarding completo mas sugestões não revisadas
                     elif kb.onboarding_completed and not kb.suggestions_reviewed:
-                        print(f"🔄 [LOGIN] FLUXO 2: Redirecionando para Perfil (Edição)", flush=True)
+                        logger.debug(f"🔄 [LOGIN] FLUXO 2: Redirecionando para Perfil (Edição)")
                         return redirect('knowledge:perfil_view')
                     
                     # FLUXO 3: Onboarding completo e sugestões revisadas
                     else:
-                        print(f"� [LOGIN] FLUXO 3: Redirecionando para Dashboard", flush=True)
+                        logger.debug(f"🔄 [LOGIN] FLUXO 3: Redirecionando para Dashboard")
                         return redirect('core:dashboard')
                 else:
-                    print(f"🔍 [LOGIN] KB não encontrado, vai para dashboard", flush=True)
+                    logger.debug(f"🔍 [LOGIN] KB não encontrado, vai para dashboard")
             except Exception as e:
-                print(f"❌ [LOGIN] Erro ao verificar onboarding: {e}", flush=True)
-                import traceback
-                print(traceback.format_exc(), flush=True)
+                logger.exception(f"❌ [LOGIN] Erro ao verificar onboarding: {e}")
             
             # Padrão: redirecionar para dashboard
-            print(f"🔄 [LOGIN] REDIRECIONANDO PARA DASHBOARD (padrão)", flush=True)
+            logger.debug(f"🔄 [LOGIN] REDIRECIONANDO PARA DASHBOARD (padrão)")
             return redirect('core:dashboard')
         else:
             # Credenciais inválidas
@@ -253,16 +250,12 @@ def register_view(request):
             
             if not email_team_sent:
                 # Log interno, não mostrar ao usuário
-                import logging
-                logger = logging.getLogger(__name__)
                 logger.warning(f'Email de notificação não enviado para equipe - Cadastro: {email}')
             
             # 5. Redirecionar para página de sucesso
             return redirect('register_success')
             
         except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(f'Erro ao criar cadastro: {str(e)}')
             messages.error(request, 'Ocorreu um erro ao processar seu cadastro. Tente novamente.')
             
@@ -56,7 +56,7 @@ class KnowledgeBaseAdmin(admin.ModelAdmin):
     list_display = ['nome_empresa', 'completude_percentual', 'is_complete', 'analysis_status', 'updated_at']
     list_filter = ['analysis_status', 'is_complete']
     readonly_fields = [
-        'completude_percentual', 'is_complete', 'created_at', 'updated_at',
+        'completude_percentual', 'is_complete', 'completude_blocos', 'created_at', 'updated_at',
         'display_concorrentes', 'display_n8n_analysis', 'display_n8n_compilation',
         'analysis_revision_id', 'analysis_requested_at', 'analysis_completed_at',
         'compilation_requested_at', 'compilation_completed_at'
@@ -101,7 +101,7 @@ class KnowledgeBaseAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Status', {
-            'fields': ('completude_percentual', 'is_complete', 'last_updated_by', 'created_at', 'updated_at')
+            'fields': ('completude_percentual', 'is_complete', 'completude_blocos', 'last_updated_by', 'created_at', 'updated_at')
         }),
     )
     
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class KnowledgeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.knowledge'
+    
+    def ready(self):
+        """Importar signals quando app estiver pronto"""
+        import apps.knowledge.signals
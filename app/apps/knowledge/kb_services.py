@@ -2,12 +2,17 @@
 Knowledge Base - Service Layer
 Centraliza lógica de negócio para manter views limpas
 """
+import logging
 import re
 from typing import Dict, List, Optional, Tuple
 from django.db import transaction
 from django.contrib import messages
+from django.utils import timezone
 
-from .models import KnowledgeBase, ColorPalette, CustomFont, SocialNetwork
+from .models import KnowledgeBase, ColorPalette, CustomFont, SocialNetwork, Typography
+from .services.brand_context import BrandContextService
+
+logger = logging.getLogger(__name__)
 
 
 class ValidationError(Exception):
@@ -15,6 +20,32 @@ class ValidationError(Exception):
     pass
 
 
+def parse_indexed_fields(post, prefix: str) -> List[Dict]:
+    """
+    Agrupa campos indexados do POST por índice, em ordem numérica
+    Ex: cores[0][hex], cores[0][nome] -> [{'index': 0, 'hex': ..., 'nome': ...}]
+    """
+    items = {}
+    for key in post.keys():
+        if key.startswith(f'{prefix}['):
+            # Extrair índice e campo: cores[0][hex] -> index=0, field=hex
+            parts = key.replace(f'{prefix}[', '').replace(']', '').split('[')
+            if len(parts) == 2 and parts[0].isdigit():
+                index, field = parts
+                items.setdefault(int(index), {'index': int(index)})[field] = post.get(key)
+    return [items[index] for index in sorted(items)]
+
+
+def apply_changes(instance, values: Dict) -> bool:
+    """Atribui valores que diferem dos atuais. Returns: True se algo mudou"""
+    changed = False
+    for field, value in values.items():
+        if getattr(instance, field) != value:
+            setattr(instance, field, value)
+            changed = True
+    return changed
+
+
 class ColorService:
     """Serviço para gerenciar paleta de cores"""
     
@@ -121,44 +152,26 @@ class ColorService:
     @transaction.atomic
     def process_colors(request, kb: KnowledgeBase) -> Tuple[int, List[str]]:
         """
-        Processa e salva cores da paleta
+        Processa e salva cores da paleta (diff com as cores existentes)
+        
+        Cores são identificadas pelo nome (único por KB): existentes com
+        hex/ordem diferentes vão em um bulk_update, novas em um bulk_create
+        e as que saíram do formulário em um único DELETE.
         
         Args:
-            request: HttpRequest com POST data
+            request: HttpRequest com POST data - formato: cores[0][hex], cores[0][nome]
             kb: Instância KnowledgeBase
             
         Returns:
-            Tuple (colors_created, errors)
+            Tuple (colors_saved, errors)
         """
         errors = []
-        colors_created = 0
-        
-        # DEBUG: Verificar quais chaves estão no POST
-        post_keys = [k for k in request.POST.keys() if 'cor' in k.lower()]
-        print(f"🎨 DEBUG ColorService - POST keys com 'cor': {post_keys}", flush=True)
-        
-        # Limpar cores existentes
-        deleted_count = kb.colors.all().delete()
-        print(f"🗑️  Removidas {deleted_count[0] if deleted_count else 0} cores existentes", flush=True)
-        
-        # Processar novas cores - formato: cores[0][hex], cores[0][nome]
-        cores_dict = {}
-        for key in request.POST.keys():
-            if key.startswith('cores['):
-                # Extrair índice e campo: cores[0][hex] -> index=0, field=hex
-                parts = key.replace('cores[', '').replace(']', '').split('[')
-                if len(parts) == 2:
-                    index, field = parts
-                    if index not in cores_dict:
-                        cores_dict[index] = {}
-                    cores_dict[index][field] = request.POST.get(key)
-        
-        print(f"📊 DEBUG ColorService - cores_dict: {cores_dict}", flush=True)
-        
-        # Criar cores
-        for index, cor_data in sorted(cores_dict.items()):
-            hex_code = cor_data.get('hex', '').strip()
-            nome = cor_data.get('nome', '').strip()
+        existing = {color.name: color for color in kb.colors.all()}
+        
+        desired = {}
+        for cor_data in parse_indexed_fields(request.POST, 'cores'):
+            hex_code = (cor_data.get('hex') or '').strip()
+            nome = (cor_data.get('nome') or '').strip()
             
             # Validar dados básicos
             if not hex_code:
@@ -167,7 +180,6 @@ class ColorService:
             # Gerar nome automático se não fornecido
             if not nome:
                 nome = ColorService.generate_color_name(hex_code)
-                print(f"🎨 Nome automático gerado: {nome} para {hex_code}", flush=True)
             
             # Normalizar HEX
             hex_code = ColorService.normalize_hex_color(hex_code)
@@ -178,23 +190,39 @@ class ColorService:
                 errors.append(f'Cor "{nome}": {error_msg}')
                 continue
             
-            try:
-                ColorPalette.objects.create(
-                    knowledge_base=kb,
-                    name=nome,
-                    hex_code=hex_code,
-                    color_type='primary',
-                    order=int(index)
-                )
-                colors_created += 1
-                print(f"✅ Cor criada: {nome} ({hex_code})", flush=True)
-            except Exception as e:
-                error_msg = f'Erro ao salvar cor "{nome}": {str(e)}'
-                errors.append(error_msg)
-                print(f"❌ {error_msg}", flush=True)
-        
-        print(f"🎨 Total de cores criadas: {colors_created}", flush=True)
-        return colors_created, errors
+            if nome in desired:
+                errors.append(f'Cor "{nome}": nome repetido na paleta')
+                continue
+            
+            desired[nome] = {'hex_code': hex_code, 'color_type': 'primary', 'order': cor_data['index']}
+        
+        to_create, to_update = [], []
+        for nome, values in desired.items():
+            color = existing.pop(nome, None)
+            if color is None:
+                to_create.append(ColorPalette(knowledge_base=kb, name=nome, **values))
+            elif apply_changes(color, values):
+                to_update.append(color)
+        
+        if existing:
+            ColorPalette.objects.filter(id__in=[color.id for color in existing.values()]).delete()
+        if to_update:
+            ColorPalette.objects.bulk_update(to_update, ['hex_code', 'color_type', 'order'])
+        if to_create:
+            ColorPalette.objects.bulk_create(to_create)
+        
+        if existing or to_update or to_create:
+            # bulk_* não dispara signals
+            BrandContextService.invalidate(kb.id)
+        
+        # Completude do bloco 5 (gravada no save da KB)
+        kb.refresh_completude(blocks=[], related={'cores': bool(desired)})
+        
+        logger.debug(
+            f"🎨 [KB_SAVE] Cores da KB {kb.id}: {len(to_create)} criadas, "
+            f"{len(to_update)} atualizadas, {len(existing)} removidas"
+        )
+        return len(desired), errors
 
 
 class FontService:
@@ -232,81 +260,81 @@ class FontService:
     @transaction.atomic
     def process_fonts(request, kb: KnowledgeBase) -> Tuple[int, List[str]]:
         """
-        Processa e salva fontes usando Typography model
+        Processa e salva fontes usando Typography model (diff por uso)
+        
+        Uso é único por KB: tipografias existentes com fonte/peso/ordem
+        diferentes vão em um bulk_update, novas em um bulk_create e as que
+        saíram do formulário em um único DELETE.
         
         Args:
-            request: HttpRequest com POST data
+            request: HttpRequest com POST data - formato: fontes[0][tipo], fontes[0][nome_fonte], etc
             kb: Instância KnowledgeBase
             
         Returns:
-            Tuple (fonts_created, errors)
+            Tuple (fonts_saved, errors)
         """
-        from apps.knowledge.models import Typography
-        
         errors = []
-        fonts_created = 0
-        
-        # DEBUG: Verificar quais chaves estão no POST
-        post_keys = [k for k in request.POST.keys() if 'font' in k.lower()]
-        print(f"🔤 DEBUG FontService - POST keys com 'font': {post_keys}", flush=True)
-        
-        # Limpar tipografias existentes
-        deleted_count = kb.typography_settings.all().delete()
-        print(f"🗑️  Removidas {deleted_count[0] if deleted_count else 0} tipografias existentes", flush=True)
-        
-        # Processar novas fontes - formato: fontes[0][tipo], fontes[0][nome_fonte], etc
-        fontes_dict = {}
-        for key in request.POST.keys():
-            if key.startswith('fontes['):
-                # Extrair índice e campo: fontes[0][tipo] -> index=0, field=tipo
-                parts = key.replace('fontes[', '').replace(']', '').split('[')
-                if len(parts) == 2:
-                    index, field = parts
-                    if index not in fontes_dict:
-                        fontes_dict[index] = {}
-                    fontes_dict[index][field] = request.POST.get(key)
-        
-        print(f"📊 DEBUG FontService - fontes_dict: {fontes_dict}", flush=True)
-        
-        # Criar tipografias (Google Fonts ou Upload)
-        for index, fonte_data in sorted(fontes_dict.items()):
+        existing = {typography.usage: typography for typography in kb.typography_settings.all()}
+        
+        desired = {}
+        for fonte_data in parse_indexed_fields(request.POST, 'fontes'):
             tipo = fonte_data.get('tipo', 'GOOGLE')
-            nome_fonte = fonte_data.get('nome_fonte', '').strip()
-            uso = fonte_data.get('uso', '').strip()
-            variante = fonte_data.get('variante', '400').strip()
+            nome_fonte = (fonte_data.get('nome_fonte') or '').strip()
+            uso = (fonte_data.get('uso') or '').strip()
+            variante = (fonte_data.get('variante') or '400').strip()
+            
+            if tipo != 'GOOGLE' or not nome_fonte or not uso:
+                continue
             
-            print(f"🔍 Processando fonte {index}: tipo={tipo}, nome={nome_fonte}, uso={uso}, variante={variante}", flush=True)
+            # Validar nome da fonte
+            is_valid, error_msg = FontService.validate_google_font_name(nome_fonte)
+            if not is_valid:
+                errors.append(f'Fonte "{nome_fonte}": {error_msg}')
+                continue
             
-            if tipo == 'GOOGLE' and nome_fonte and uso:
-                # Validar nome da fonte
-                is_valid, error_msg = FontService.validate_google_font_name(nome_fonte)
-                if not is_valid:
-                    errors.append(f'Fonte "{nome_fonte}": {error_msg}')
-                    continue
-                
-                try:
-                    # Criar Typography com Google Font
-                    Typography.objects.create(
-                        knowledge_base=kb,
-                        usage=uso,  # TITULO, TEXTO, LEGENDA, etc
-                        font_source='google',
-                        google_font_name=nome_fonte,
-                        google_font_weight=variante,
-                        google_font_url=f'https://fonts.googleapis.com/css2?family={nome_fonte.replace(" ", "+")}:wght@{variante}',
-                        order=int(index),
-                        updated_by=request.user  # ✅ CORRIGIDO: Preencher updated_by
-                    )
-                    fonts_created += 1
-                    print(f"✅ Typography criada: {nome_fonte} (uso: {uso}, variante: {variante})", flush=True)
-                except Exception as e:
-                    error_msg = f'Erro ao salvar fonte "{nome_fonte}": {str(e)}'
-                    errors.append(error_msg)
-                    print(f"❌ {error_msg}", flush=True)
-            else:
-                print(f"⚠️  Fonte {index} ignorada: tipo={tipo}, nome={nome_fonte}, uso={uso}", flush=True)
-        
-        print(f"🔤 Total de tipografias criadas: {fonts_created}", flush=True)
-        return fonts_created, errors
+            if uso in desired:
+                errors.append(f'Fonte "{nome_fonte}": uso "{uso}" repetido')
+                continue
+            
+            desired[uso] = {
+                'font_source': 'google',
+                'google_font_name': nome_fonte,
+                'google_font_weight': variante,
+                'google_font_url': f'https://fonts.googleapis.com/css2?family={nome_fonte.replace(" ", "+")}:wght@{variante}',
+                'custom_font': None,
+                'order': fonte_data['index'],
+            }
+        
+        now = timezone.now()
+        to_create, to_update = [], []
+        for uso, values in desired.items():
+            typography = existing.pop(uso, None)
+            if typography is None:
+                to_create.append(Typography(knowledge_base=kb, usage=uso, updated_by=request.user, **values))
+            elif apply_changes(typography, values):
+                typography.updated_by = request.user
+                typography.updated_at = now
+                to_update.append(typography)
+        
+        if existing:
+            Typography.objects.filter(id__in=[typography.id for typography in existing.values()]).delete()
+        if to_update:
+            Typography.objects.bulk_update(to_update, [
+                'font_source', 'google_font_name', 'google_font_weight', 'google_font_url',
+                'custom_font', 'order', 'updated_by', 'updated_at'
+            ])
+        if to_create:
+            Typography.objects.bulk_create(to_create)
+        
+        if existing or to_update or to_create:
+            # bulk_* não dispara signals
+            BrandContextService.invalidate(kb.id)
+        
+        logger.debug(
+            f"🔤 [KB_SAVE] Tipografias da KB {kb.id}: {len(to_create)} criadas, "
+            f"{len(to_update)} atualizadas, {len(existing)} removidas"
+        )
+        return len(desired), errors
 
 
 class SocialNetworkService:
@@ -386,7 +414,7 @@ class SocialNetworkService:
     @transaction.atomic
     def process_social_networks(request, kb: KnowledgeBase) -> Tuple[int, List[str]]:
         """
-        Processa e salva redes sociais
+        Processa e salva redes sociais (diff por tipo de rede)
         
         Args:
             request: HttpRequest com POST data
@@ -406,39 +434,56 @@ class SocialNetworkService:
             'youtube': request.POST.get('social_youtube', ''),
         }
         
-        # Atualizar ou criar redes sociais
+        existing = {}
+        for network in kb.social_networks.filter(network_type__in=social_data.keys()).order_by('id'):
+            existing.setdefault(network.network_type, []).append(network)
+        
+        now = timezone.now()
+        to_create, to_update, to_delete = [], [], []
         for network_type, url in social_data.items():
             url = url.strip() if url else ''
+            current = existing.get(network_type, [])
             
-            if url:
-                # Validar URL
-                is_valid, error_msg = SocialNetworkService.validate_social_network_url(url, network_type)
-                if not is_valid:
-                    errors.append(f'{network_type.capitalize()}: {error_msg}')
-                    continue
-                
-                try:
-                    SocialNetwork.objects.update_or_create(
-                        knowledge_base=kb,
-                        network_type=network_type,
-                        defaults={
-                            'name': network_type.capitalize(),
-                            'url': url,
-                            'is_active': True
-                        }
-                    )
-                    networks_updated += 1
-                except Exception as e:
-                    errors.append(f'Erro ao salvar {network_type}: {str(e)}')
-            else:
+            if not url:
                 # Remover se URL estiver vazia
-                try:
-                    SocialNetwork.objects.filter(
-                        knowledge_base=kb,
-                        network_type=network_type
-                    ).delete()
-                except Exception as e:
-                    errors.append(f'Erro ao remover {network_type}: {str(e)}')
+                to_delete.extend(network.id for network in current)
+                continue
+            
+            # Validar URL (inválida: mantém o registro atual)
+            is_valid, error_msg = SocialNetworkService.validate_social_network_url(url, network_type)
+            if not is_valid:
+                errors.append(f'{network_type.capitalize()}: {error_msg}')
+                continue
+            
+            values = {'name': network_type.capitalize(), 'url': url, 'is_active': True}
+            networks_updated += 1
+            if not current:
+                to_create.append(SocialNetwork(knowledge_base=kb, network_type=network_type, **values))
+                continue
+            
+            # Um registro por tipo: duplicados legados são removidos
+            network = current[0]
+            to_delete.extend(duplicate.id for duplicate in current[1:])
+            if apply_changes(network, values):
+                network.updated_at = now
+                to_update.append(network)
+        
+        if to_delete:
+            SocialNetwork.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            SocialNetwork.objects.bulk_update(to_update, ['name', 'url', 'is_active', 'updated_at'])
+        if to_create:
+            SocialNetwork.objects.bulk_create(to_create)
+        
+        # Completude do bloco 6 (gravada no save da KB); redes de outros
+        # tipos só são consultadas se nenhuma das do formulário restou
+        deleted = set(to_delete)
+        has_social = bool(to_create) or any(
+            network.id not in deleted for networks in existing.values() for network in networks
+        )
+        if not has_social:
+            has_social = kb.social_networks.exists()
+        kb.refresh_completude(blocks=[], related={'redes_sociais': has_social})
         
         return networks_updated, errors
 
@@ -459,12 +504,10 @@ class KnowledgeBaseService:
         Returns:
             Tuple (success, errors)
         """
-        print("🚀 INÍCIO save_all_blocks", flush=True)
         all_errors = []
         
         # Validar todos os forms
         all_valid = all(form.is_valid() for form in forms.values())
-        print(f"📋 Forms válidos: {all_valid}", flush=True)
         
         if not all_valid:
             for block_name, form in forms.items():
@@ -476,39 +519,74 @@ class KnowledgeBaseService:
         
         try:
             with transaction.atomic():
-                # Salvar cada form
-                for block_name, form in forms.items():
-                    kb = form.save(commit=False)
-                    kb.last_updated_by = request.user
-                    kb.save()
-                
-                # Processar cores da paleta (Bloco 5)
-                colors_created, color_errors = ColorService.process_colors(request, kb)
-                if color_errors:
-                    all_errors.extend(color_errors)
-                
-                # Processar fontes
-                fonts_created, font_errors = FontService.process_fonts(request, kb)
-                all_errors.extend(font_errors)
-                
-                # Processar redes sociais
-                networks_updated, network_errors = SocialNetworkService.process_social_networks(request, kb)
-                all_errors.extend(network_errors)
-                
-                # Alterar status para 'processing' se ainda estiver 'pending'
-                if kb.analysis_status == 'pending':
-                    kb.analysis_status = 'processing'
-                    kb.save(update_fields=['analysis_status'])
-                    print(f"📊 Status alterado para 'processing'", flush=True)
+                KnowledgeBaseService.save_merged(request, kb, forms, all_errors)
             
             # Transação foi commitada com sucesso aqui
-            print(f"✅ save_all_blocks SUCESSO - Erros: {all_errors}", flush=True)
+            if all_errors:
+                logger.warning(f"⚠️ [KB_SAVE] KB {kb.id} salva com avisos: {all_errors}")
             return True, all_errors
             
         except Exception as e:
             error_msg = f'Erro ao salvar: {str(e)}'
             all_errors.append(error_msg)
-            print(f"❌ save_all_blocks ERRO: {error_msg}", flush=True)
-            import traceback
-            print(traceback.format_exc(), flush=True)
+            logger.exception(f"❌ [KB_SAVE] Erro ao salvar KB {kb.id}: {e}")
             return False, all_errors
+    
+    # Campos que a KB recalcula/gerencia sozinha (não entram no diff dos forms)
+    UNTRACKED_FIELDS = {'id', 'created_at', 'updated_at', *KnowledgeBase.COMPLETUDE_FIELDS}
+    
+    @staticmethod
+    def save_merged(request, kb: KnowledgeBase, forms: Dict, errors: List[str]) -> List[str]:
+        """
+        Aplica todos os forms (já válidos) em uma única instância e grava com um UPDATE
+        
+        - form.save(commit=False) em todos os blocos (mesma instância kb)
+        - Cores, fontes e redes sociais por diff antes da KB; status de
+          cores/redes sociais vai direto para a completude dos blocos 5 e 6
+        - save(update_fields=...) só com colunas alteradas + completude
+        
+        Returns:
+            list: Campos gravados
+        """
+        for form in forms.values():
+            merged = form.save(commit=False)
+            if merged is not kb:
+                raise ValueError('Forms dos blocos devem usar a mesma instância da KB')
+        
+        tracked = [
+            field for field in KnowledgeBase._meta.concrete_fields
+            if field.name not in KnowledgeBaseService.UNTRACKED_FIELDS
+        ]
+        original = KnowledgeBase._base_manager.filter(pk=kb.pk).values(
+            *[field.attname for field in tracked]
+        ).first() or {}
+        
+        kb.last_updated_by = request.user
+        
+        # Alterar status para 'processing' se ainda estiver 'pending'
+        if kb.analysis_status == 'pending':
+            kb.analysis_status = 'processing'
+        
+        changed = [
+            field.name for field in tracked
+            if getattr(kb, field.attname) != original.get(field.attname)
+        ]
+        
+        # Processar cores da paleta (Bloco 5)
+        colors_saved, color_errors = ColorService.process_colors(request, kb)
+        errors.extend(color_errors)
+        
+        # Processar fontes
+        fonts_saved, font_errors = FontService.process_fonts(request, kb)
+        errors.extend(font_errors)
+        
+        # Processar redes sociais
+        networks_updated, network_errors = SocialNetworkService.process_social_networks(request, kb)
+        errors.extend(network_errors)
+        
+        kb.refresh_completude()
+        update_fields = changed + list(KnowledgeBase.COMPLETUDE_FIELDS) + ['updated_at']
+        kb.save(update_fields=update_fields)
+        logger.info(f"💾 [KB_SAVE] KB {kb.id} salva - campos alterados: {changed}")
+        
+        return update_fields
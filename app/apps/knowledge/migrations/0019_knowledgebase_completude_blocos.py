@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0018_alter_knowledgebase_descricao_produto_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='knowledgebase',
+            name='completude_blocos',
+            field=models.JSONField(blank=True, default=dict, help_text='Status de cada bloco (bloco1..bloco7) e de cores/redes sociais; atualizado incrementalmente', verbose_name='Completude por Bloco'),
+        ),
+    ]
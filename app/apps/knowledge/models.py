@@ -216,6 +216,12 @@ class KnowledgeBase(models.Model):
         verbose_name='Base Completa',
         help_text='Indica se atende requisitos mínimos'
     )
+    completude_blocos = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Completude por Bloco',
+        help_text='Status de cada bloco (bloco1..bloco7) e de cores/redes sociais; atualizado incrementalmente'
+    )
     
     # ONBOARDING
     onboarding_completed = models.BooleanField(
@@ -364,73 +370,146 @@ class KnowledgeBase(models.Model):
     def __str__(self):
         return f"Base {self.organization.name} - {self.nome_empresa}"
     
+    # Campos que definem cada bloco da completude (blocos 5 e 6 também
+    # dependem de ColorPalette/SocialNetwork, cacheados em 'cores'/'redes_sociais')
+    COMPLETUDE_BLOCK_FIELDS = {
+        'bloco1': ('nome_empresa', 'missao', 'valores'),
+        'bloco2': ('publico_externo',),
+        'bloco3': ('posicionamento', 'diferenciais'),
+        'bloco4': ('tom_voz_externo', 'palavras_recomendadas', 'palavras_evitar'),
+        'bloco5': (),
+        'bloco6': ('site_institucional',),
+        'bloco7': ('fontes_confiaveis',),
+    }
+    COMPLETUDE_RELATED_BLOCKS = {'cores': 'bloco5', 'redes_sociais': 'bloco6'}
+    COMPLETUDE_FIELDS = ('completude_blocos', 'completude_percentual', 'is_complete')
+    
     def save(self, *args, **kwargs):
-        """Salvar e calcular completude"""
-        # Se já tem pk, calcular completude antes de salvar
-        if self.pk:
-            self.completude_percentual = self.calculate_completude()
-            self.is_complete = self.completude_percentual >= 70
+        """
+        Salvar e atualizar completude
         
-        # Salvar
-        super().save(*args, **kwargs)
+        Recalcula só os blocos afetados (todos os de campos em save completo,
+        os de update_fields em save parcial); status de cores/redes sociais
+        vem do cache mantido pelos signals, sem queries.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.refresh_completude()
+        else:
+            update_fields = set(update_fields)
+            blocks = [
+                block for block, fields in self.COMPLETUDE_BLOCK_FIELDS.items()
+                if update_fields & set(fields)
+            ]
+            if blocks and self.refresh_completude(blocks):
+                kwargs['update_fields'] = update_fields | set(self.COMPLETUDE_FIELDS)
         
-        # Se é novo (acabou de ganhar pk), calcular completude e atualizar
-        if not self.completude_percentual and self.pk:
-            self.completude_percentual = self.calculate_completude()
-            self.is_complete = self.completude_percentual >= 70
-            KnowledgeBase.objects.filter(pk=self.pk).update(
-                completude_percentual=self.completude_percentual,
-                is_complete=self.is_complete
-            )
+        super().save(*args, **kwargs)
     
-    def calculate_completude(self):
+    def _completude_related(self, fact):
+        """Existência de cores/redes sociais (query apenas na primeira vez)"""
+        if not self.pk:
+            return False
+        if fact == 'cores':
+            return self.colors.exists()
+        return self.social_networks.exists()
+    
+    def _completude_block(self, block, flags):
+        if block == 'bloco5':
+            # Mínimo: cores na paleta
+            return flags['cores']
+        if block == 'bloco6':
+            # Mínimo: site institucional OU pelo menos 1 rede social
+            return bool(self.site_institucional) or flags['redes_sociais']
+        return all(bool(getattr(self, field)) for field in self.COMPLETUDE_BLOCK_FIELDS[block])
+    
+    def refresh_completude(self, blocks=None, related=None):
         """
-        Calcula percentual de completude baseado em campos obrigatórios
-        Cada bloco tem peso igual (14.28% cada = 100/7)
-        Usa models relacionados (ColorPalette, CustomFont, SocialNetwork) ao invés de JSONFields legados
+        Atualiza status por bloco e completude_percentual (em memória)
+        
+        Args:
+            blocks: Blocos a recalcular (None = todos os baseados em campos);
+                    blocos ainda sem status são sempre calculados
+            related: Status conhecidos de models relacionados, ex: {'cores': True}
+        
+        Returns:
+            bool: True se algum campo de completude mudou
         """
-        score = 0
-        total_blocks = 7
+        flags = dict(self.completude_blocos or {})
+        blocks = set(self.COMPLETUDE_BLOCK_FIELDS if blocks is None else blocks)
         
-        # BLOCO 1: Identidade (3 campos essenciais)
-        bloco1_fields = [self.nome_empresa, self.missao, self.valores]
-        if all(bloco1_fields):
-            score += 1
+        for fact, block in self.COMPLETUDE_RELATED_BLOCKS.items():
+            if related and fact in related:
+                flags[fact] = bool(related[fact])
+                blocks.add(block)
+            elif fact not in flags:
+                flags[fact] = self._completude_related(fact)
         
-        # BLOCO 2: Público (1 campo essencial)
-        if self.publico_externo:
-            score += 1
+        blocks.update(block for block in self.COMPLETUDE_BLOCK_FIELDS if block not in flags)
+        for block in blocks:
+            flags[block] = self._completude_block(block, flags)
         
-        # BLOCO 3: Posicionamento (2 campos essenciais)
-        bloco3_fields = [self.posicionamento, self.diferenciais]
-        if all(bloco3_fields):
-            score += 1
+        # Cada bloco tem peso igual (14.28% cada = 100/7)
+        score = sum(1 for block in self.COMPLETUDE_BLOCK_FIELDS if flags[block])
+        percentual = int((score / len(self.COMPLETUDE_BLOCK_FIELDS)) * 100)
         
-        # BLOCO 4: Tom de Voz (3 campos essenciais)
-        bloco4_fields = [
-            self.tom_voz_externo,
-            len(self.palavras_recomendadas or []) > 0,
-            len(self.palavras_evitar or []) > 0
-        ]
-        if all(bloco4_fields):
-            score += 1
+        changed = (
+            flags != (self.completude_blocos or {})
+            or percentual != self.completude_percentual
+            or self.is_complete != (percentual >= 70)
+        )
+        self.completude_blocos = flags
+        self.completude_percentual = percentual
+        self.is_complete = percentual >= 70
+        return changed
+    
+    def calculate_completude(self):
+        """
+        Calcula percentual de completude baseado em campos obrigatórios
+        Recálculo completo: consulta ColorPalette/SocialNetwork novamente
+        """
+        self.refresh_completude(related={
+            fact: self._completude_related(fact) for fact in self.COMPLETUDE_RELATED_BLOCKS
+        })
+        return self.completude_percentual
+    
+    @classmethod
+    def update_related_completude(cls, kb_id, fact, value, instance=None):
+        """
+        Atualiza status de cores/redes sociais e o bloco correspondente
+        (chamado pelos signals de ColorPalette e SocialNetwork)
         
-        # BLOCO 5: Identidade Visual (usa models relacionados)
-        # Mínimo: 2 cores na paleta
-        if self.colors.exists():
-            score += 1
+        Grava apenas completude_blocos/percentual/is_complete, sem save().
+        
+        Args:
+            kb_id: ID da KnowledgeBase
+            fact: 'cores' ou 'redes_sociais'
+            value: Se existe ao menos um registro
+            instance: KnowledgeBase já carregada (mantida em sincronia)
         
-        # BLOCO 6: Sites e Redes (usa SocialNetwork model)
-        # Mínimo: site institucional OU pelo menos 1 rede social
-        has_social = self.site_institucional or self.social_networks.exists()
-        if has_social:
-            score += 1
+        Returns:
+            bool: True se a completude mudou
+        """
+        kb = instance
+        if kb is None:
+            kb = cls._base_manager.filter(pk=kb_id).only(
+                'organization_id', 'site_institucional', *cls.COMPLETUDE_FIELDS,
+                *[field for fields in cls.COMPLETUDE_BLOCK_FIELDS.values() for field in fields]
+            ).first()
+            if kb is None:
+                return False
         
-        # BLOCO 7: Dados (1 campo essencial)
-        if len(self.fontes_confiaveis or []) > 0:
-            score += 1
+        if (kb.completude_blocos or {}).get(fact) == bool(value):
+            return False
+        if not kb.refresh_completude(blocks=[], related={fact: value}):
+            return False
         
-        return int((score / total_blocks) * 100)
+        cls._base_manager.filter(pk=kb_id).update(
+            completude_blocos=kb.completude_blocos,
+            completude_percentual=kb.completude_percentual,
+            is_complete=kb.is_complete,
+        )
+        return True
     
     # ========================================
     # HELPER METHODS - ANÁLISE N8N
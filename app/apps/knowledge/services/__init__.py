@@ -2,5 +2,6 @@
 Knowledge services package
 """
 from .n8n_service import N8NService
+from .brand_context import BrandContextService
 
-__all__ = ['N8NService']
+__all__ = ['N8NService', 'BrandContextService']
@@ -0,0 +1,233 @@
+"""
+Snapshot de contexto de marca da Knowledge Base
+Usado por todos os builders de payload (N8N e IA) sem reconsultar o banco
+"""
+import json
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class BrandContextService:
+    """
+    Snapshot versionado e cacheado do contexto de marca de uma Knowledge Base
+
+    O snapshot (identidade, tom de voz, paleta, tipografia, logos, referências
+    e marketing_input_summary já extraído de n8n_compilation) é montado uma vez
+    e guardado em cache sob uma chave que inclui a versão da KB. Signals da KB e
+    dos models relacionados incrementam a versão, tornando o snapshot anterior
+    inacessível (inclusive builds concorrentes iniciados antes da alteração).
+
+    Uso:
+        snapshot = BrandContextService.get_for_organization(post.organization)
+        snapshot['paleta'], snapshot['marketing_input_summary'], ...
+    """
+
+    VERSION_KEY = 'brand_context_version:{kb_id}'
+    SNAPSHOT_KEY = 'brand_context:{kb_id}:v{version}'
+    ORG_KEY = 'brand_context_kb:{org_id}'
+
+    SNAPSHOT_TTL = 60 * 60 * 24  # 24h (invalidação é feita pelos signals)
+
+    # ============================================
+    # LEITURA
+    # ============================================
+
+    @classmethod
+    def _get_version(cls, kb_id):
+        key = cls.VERSION_KEY.format(kb_id=kb_id)
+        version = cache.get(key)
+        if version is None:
+            # Versão inicial baseada em timestamp: nunca reaproveita chaves antigas
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def get_snapshot(cls, kb_id):
+        """
+        Retorna snapshot da Knowledge Base (monta e cacheia se necessário)
+
+        Args:
+            kb_id: ID da KnowledgeBase
+
+        Returns:
+            dict|None: Snapshot ou None se a KB não existir
+        """
+        version = cls._get_version(kb_id)
+        key = cls.SNAPSHOT_KEY.format(kb_id=kb_id, version=version)
+
+        snapshot = cache.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        snapshot = cls.build(kb_id)
+        if snapshot is None:
+            return None
+
+        snapshot['version'] = version
+        cache.set(key, snapshot, cls.SNAPSHOT_TTL)
+        cache.set(cls.ORG_KEY.format(org_id=snapshot['organization_id']), kb_id, cls.SNAPSHOT_TTL)
+        logger.info(f"[BRAND_CONTEXT] Snapshot montado: KB #{kb_id} v{version}")
+        return snapshot
+
+    @classmethod
+    def get_for_organization(cls, organization):
+        """
+        Snapshot da Knowledge Base da organização
+
+        Args:
+            organization: Organization ou ID
+
+        Returns:
+            dict|None
+        """
+        from apps.knowledge.models import KnowledgeBase
+
+        if organization is None:
+            return None
+
+        org_id = getattr(organization, 'id', organization)
+        kb_id = cache.get(cls.ORG_KEY.format(org_id=org_id))
+
+        if kb_id is None:
+            kb_id = KnowledgeBase.objects.filter(
+                organization_id=org_id
+            ).values_list('id', flat=True).first()
+            if kb_id is None:
+                return None
+
+        return cls.get_snapshot(kb_id)
+
+    # ============================================
+    # MONTAGEM
+    # ============================================
+
+    @staticmethod
+    def parse_marketing_summary(n8n_compilation):
+        """Extrai marketing_input_summary de n8n_compilation (dict ou JSON string)"""
+        if not n8n_compilation:
+            return ''
+        if isinstance(n8n_compilation, dict):
+            return n8n_compilation.get('marketing_input_summary', '') or ''
+        if isinstance(n8n_compilation, str):
+            try:
+                return json.loads(n8n_compilation).get('marketing_input_summary', '') or ''
+            except Exception:
+                return n8n_compilation
+        return ''
+
+    @classmethod
+    def build(cls, kb_id):
+        """
+        Monta snapshot a partir do banco
+
+        Returns:
+            dict|None
+        """
+        from apps.knowledge.models import KnowledgeBase
+
+        kb = KnowledgeBase.objects.filter(id=kb_id).prefetch_related(
+            'colors', 'typography_settings__custom_font', 'logos', 'reference_images'
+        ).first()
+        if not kb:
+            return None
+
+        paleta = [
+            {'nome': cor.name, 'hex': cor.hex_code, 'tipo': cor.color_type}
+            for cor in kb.colors.all()
+        ]
+
+        tipografia = []
+        for font in kb.typography_settings.all():
+            font_entry = {
+                'uso': font.usage,
+                'origem': font.font_source,
+            }
+            if font.font_source == 'google':
+                font_entry['nome'] = font.google_font_name
+                font_entry['peso'] = font.google_font_weight
+                font_entry['url'] = font.google_font_url
+            elif font.custom_font:
+                font_entry['nome'] = font.custom_font.name
+            tipografia.append(font_entry)
+
+        return {
+            'kb_id': kb.id,
+            'organization_id': kb.organization_id,
+            'nome_empresa': kb.nome_empresa or '',
+            'missao': kb.missao or '',
+            'visao': kb.visao or '',
+            'valores': kb.valores or '',
+            'posicionamento': kb.posicionamento or '',
+            'publico_externo': kb.publico_externo or '',
+            'tom_voz_externo': kb.tom_voz_externo or '',
+            'tom_voz_interno': kb.tom_voz_interno or '',
+            'palavras_recomendadas': kb.palavras_recomendadas or [],
+            'palavras_evitar': kb.palavras_evitar or [],
+            'palavras_chave_trends': kb.palavras_chave_trends or [],
+            'marketing_input_summary': cls.parse_marketing_summary(kb.n8n_compilation),
+            'paleta': paleta,
+            'tipografia': tipografia,
+            'logos': [logo.s3_url for logo in kb.logos.all() if logo.s3_url],
+            'referencias': [ref.s3_url for ref in kb.reference_images.all() if ref.s3_url],
+        }
+
+    # ============================================
+    # CONTEXTO TEXTUAL (PROMPTS DE IA)
+    # ============================================
+
+    @staticmethod
+    def format_context(snapshot, fields):
+        """
+        Formata contexto textual para prompts de IA
+
+        Args:
+            snapshot: Snapshot (ou None)
+            fields: Lista de (rótulo, chave do snapshot)
+
+        Returns:
+            str
+        """
+        if not snapshot:
+            return "Contexto não disponível"
+
+        lines = []
+        for label, key in fields:
+            value = snapshot.get(key, '')
+            if isinstance(value, list):
+                value = ', '.join(str(item) for item in value)
+            lines.append(f"{label}: {value}")
+        return '\n' + '\n'.join(lines) + '\n'
+
+    # ============================================
+    # INVALIDAÇÃO
+    # ============================================
+
+    @classmethod
+    def forget_organization(cls, organization_id):
+        """Remove mapeamento organização → KB (ex: KB removida)"""
+        cache.delete(cls.ORG_KEY.format(org_id=organization_id))
+
+    @classmethod
+    def invalidate(cls, kb_id):
+        """Incrementa versão da KB (após commit da transação)"""
+        if not kb_id:
+            return
+
+        def _bump():
+            key = cls.VERSION_KEY.format(kb_id=kb_id)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Sem versão registrada: nenhum snapshot em cache
+                pass
+            except Exception as e:
+                logger.warning(f"[BRAND_CONTEXT] Erro ao invalidar KB #{kb_id}: {e}")
+                cache.delete(key)
+
+        transaction.on_commit(_bump)
@@ -11,6 +11,7 @@ import requests
 from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
+from apps.core.observability import span
 import logging
 
 logger = logging.getLogger(__name__)
@@ -176,12 +177,13 @@ class N8NService:
                         f"KB: {kb_instance.id}, Org: {kb_instance.organization_id}"
                     )
                     
-                    response = requests.post(
-                        settings.N8N_WEBHOOK_FUNDAMENTOS,
-                        json=payload,
-                        headers=headers,
-                        timeout=settings.N8N_WEBHOOK_TIMEOUT
-                    )
+                    with span('http'):
+                        response = requests.post(
+                            settings.N8N_WEBHOOK_FUNDAMENTOS,
+                            json=payload,
+                            headers=headers,
+                            timeout=settings.N8N_WEBHOOK_TIMEOUT
+                        )
                     
                     if response.status_code == 200:
                         # KB já foi atualizada antes do envio
@@ -357,12 +359,13 @@ class N8NService:
                         f"KB: {kb_instance.id}, Org: {kb_instance.organization_id}, Fluxo: {flow_type}"
                     )
                     
-                    response = requests.post(
-                        webhook_url,
-                        json=payload,
-                        headers=headers,
-                        timeout=settings.N8N_WEBHOOK_TIMEOUT
-                    )
+                    with span('http'):
+                        response = requests.post(
+                            webhook_url,
+                            json=payload,
+                            headers=headers,
+                            timeout=settings.N8N_WEBHOOK_TIMEOUT
+                        )
                     
                     if response.status_code == 200:
                         logger.info(
@@ -0,0 +1,107 @@
+"""
+Signals da Base de Conhecimento
+
+- Mantém o índice de hashes perceptuais (ImageHashIndex) sincronizado
+  com ReferenceImage, de forma incremental.
+- Invalida o snapshot de contexto de marca (BrandContextService) quando a
+  KB ou seus models relacionados mudam.
+- Invalida o estado de onboarding do tenant (TenantStateService) quando a
+  KB muda.
+- Mantém a completude dos blocos 5 e 6 quando cores/redes sociais mudam,
+  sem recalcular os demais blocos.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+import logging
+
+from apps.knowledge.models import (
+    KnowledgeBase, ColorPalette, Typography, Logo, ReferenceImage, CustomFont, SocialNetwork
+)
+from apps.core.services.tenant_state import TenantStateService
+from apps.knowledge.services.brand_context import BrandContextService
+from apps.utils.image_hash_index import schedule_index_update
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=ReferenceImage)
+def index_reference_image(sender, instance, **kwargs):
+    """Inclui/atualiza hash da imagem no índice de similaridade da KB"""
+    schedule_index_update(instance.knowledge_base_id, instance.id, hex_hash=instance.perceptual_hash)
+
+
+@receiver(post_delete, sender=ReferenceImage)
+def unindex_reference_image(sender, instance, **kwargs):
+    """Remove hash da imagem do índice de similaridade da KB"""
+    schedule_index_update(instance.knowledge_base_id, instance.id, removed=True)
+
+
+@receiver(post_save, sender=KnowledgeBase)
+def invalidate_brand_context_kb(sender, instance, **kwargs):
+    """KB alterada: nova versão do snapshot de contexto de marca"""
+    BrandContextService.invalidate(instance.id)
+    TenantStateService.invalidate_kb(instance.organization_id)
+
+
+@receiver(post_delete, sender=KnowledgeBase)
+def forget_brand_context_kb(sender, instance, **kwargs):
+    """KB removida: invalida snapshot e mapeamento da organização"""
+    BrandContextService.invalidate(instance.id)
+    BrandContextService.forget_organization(instance.organization_id)
+    TenantStateService.invalidate_kb(instance.organization_id)
+
+
+@receiver(post_save, sender=ColorPalette)
+@receiver(post_delete, sender=ColorPalette)
+@receiver(post_save, sender=Typography)
+@receiver(post_delete, sender=Typography)
+@receiver(post_save, sender=Logo)
+@receiver(post_delete, sender=Logo)
+@receiver(post_save, sender=ReferenceImage)
+@receiver(post_delete, sender=ReferenceImage)
+@receiver(post_save, sender=CustomFont)
+@receiver(post_delete, sender=CustomFont)
+def invalidate_brand_context_related(sender, instance, **kwargs):
+    """Paleta, tipografia, logos, referências ou fontes alteradas"""
+    BrandContextService.invalidate(instance.knowledge_base_id)
+
+
+def _update_related_completude(instance, fact, exists):
+    # KB já carregada junto do relacionado (ex: update_or_create(knowledge_base=kb))
+    # é atualizada em memória para um save() posterior não gravar status antigo
+    kb = instance._state.fields_cache.get('knowledge_base')
+    if KnowledgeBase.update_related_completude(instance.knowledge_base_id, fact, exists(), instance=kb):
+        organization_id = kb.organization_id if kb else KnowledgeBase._base_manager.filter(
+            pk=instance.knowledge_base_id
+        ).values_list('organization_id', flat=True).first()
+        TenantStateService.invalidate_kb(organization_id)
+
+
+@receiver(post_save, sender=ColorPalette)
+def completude_color_saved(sender, instance, **kwargs):
+    """Cor criada/alterada: bloco 5 tem ao menos uma cor"""
+    _update_related_completude(instance, 'cores', lambda: True)
+
+
+@receiver(post_delete, sender=ColorPalette)
+def completude_color_deleted(sender, instance, **kwargs):
+    """Cor removida: bloco 5 depende de ainda existir alguma cor"""
+    _update_related_completude(
+        instance, 'cores',
+        lambda: ColorPalette.objects.filter(knowledge_base_id=instance.knowledge_base_id).exists()
+    )
+
+
+@receiver(post_save, sender=SocialNetwork)
+def completude_social_saved(sender, instance, **kwargs):
+    """Rede social criada/alterada: bloco 6 tem ao menos uma rede"""
+    _update_related_completude(instance, 'redes_sociais', lambda: True)
+
+
+@receiver(post_delete, sender=SocialNetwork)
+def completude_social_deleted(sender, instance, **kwargs):
+    """Rede social removida: bloco 6 depende de site ou de outra rede"""
+    _update_related_completude(
+        instance, 'redes_sociais',
+        lambda: SocialNetwork.objects.filter(knowledge_base_id=instance.knowledge_base_id).exists()
+    )
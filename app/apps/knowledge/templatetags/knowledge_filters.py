@@ -3,8 +3,10 @@ Template filters customizados para Knowledge Base
 """
 from django import template
 import json
+import logging
 
 register = template.Library()
+logger = logging.getLogger(__name__)
 
 
 @register.filter(name='to_json')
@@ -84,7 +86,7 @@ def fonts_to_json(queryset):
         
         return json.dumps(fonts_list, ensure_ascii=False)
     except Exception as e:
-        print(f"❌ Erro em fonts_to_json: {str(e)}", flush=True)
+        logger.error(f"❌ Erro em fonts_to_json: {str(e)}")
         return '[]'
 
 
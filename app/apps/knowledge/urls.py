@@ -36,6 +36,7 @@ urlpatterns = [
     
     # Upload S3 - View Genérica de Preview (seguindo guia)
     path('preview-url/', views_upload.get_preview_url, name='preview_url'),
+    path('preview-urls/', views_upload.get_preview_urls, name='preview_urls'),
     
     # Upload S3 - Logos
     path('logo/upload-url/', views_upload.generate_logo_upload_url, name='logo_upload_url'),
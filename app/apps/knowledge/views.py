@@ -7,6 +7,7 @@ from django.views.decorators.cache import never_cache
 from django.db import transaction
 from django.utils import timezone
 import json
+import logging
 
 from .models import (
     KnowledgeBase, InternalSegment, ColorPalette, SocialNetwork, 
@@ -23,12 +24,11 @@ from .forms import (
 from .kb_services import KnowledgeBaseService
 from .services.n8n_service import N8NService
 from apps.utils.s3 import upload_to_s3, get_signed_url
-from apps.utils.image_hash import (
-    calculate_perceptual_hash, 
-    find_similar_images_in_queryset,
-    get_image_dimensions,
-    validate_image_file
-)
+from apps.utils.image_analysis import analyze_image, ImageAnalysisError
+from apps.utils.image_hash import find_similar_reference_image
+from apps.core.observability import log_payload, span
+
+logger = logging.getLogger(__name__)
 
 
 @never_cache
@@ -225,7 +225,11 @@ def knowledge_save_block(request, block_number):
             'message': 'Bloco inválido'
         }, status=400)
     
-    # Processar form
+    # Processar form (is_valid já copia os campos do form para a instância:
+    # guardar valores atuais para restaurar os campos que não vieram no POST)
+    original_values = {name: getattr(kb, name) for name in form_class._meta.fields}
+    if block_number == 2:
+        original_values['segmentos_internos'] = kb.segmentos_internos
     form = form_class(request.POST, instance=kb)
     
     if form.is_valid():
@@ -235,9 +239,23 @@ def knowledge_save_block(request, block_number):
                 kb = form.save(commit=False)
                 kb.last_updated_by = request.user
                 
+                # Só os campos enviados e alterados são gravados; os demais
+                # voltam ao valor atual (ex: concorrentes fora do POST do bloco 6)
+                posted_fields = {
+                    name for name in form.changed_data
+                    if name in request.POST and name in form._meta.fields
+                }
+                if block_number == 2 and 'segmentos_internos_text' in form.changed_data \
+                        and 'segmentos_internos_text' in request.POST:
+                    posted_fields.add('segmentos_internos')
+                for name, value in original_values.items():
+                    if name not in posted_fields:
+                        setattr(kb, name, value)
+                
                 # Processar campo site_institucional_domain (Bloco 6)
-                if block_number == 6:
+                if block_number == 6 and 'site_institucional_domain' in request.POST:
                     site_domain = request.POST.get('site_institucional_domain', '').strip()
+                    posted_fields.add('site_institucional')
                     if site_domain:
                         # Adicionar https:// se não estiver presente
                         if not site_domain.startswith(('http://', 'https://')):
@@ -246,7 +264,8 @@ def knowledge_save_block(request, block_number):
                             kb.site_institucional = site_domain
                     else:
                         kb.site_institucional = ''
-                    
+                
+                if block_number == 6:
                     # Processar campos de redes sociais (social_*_domain)
                     social_fields = {
                         'social_instagram_domain': 'instagram',
@@ -276,41 +295,31 @@ def knowledge_save_block(request, block_number):
                                 }
                             )
                 
-                kb.save()
-                
-                # Registrar no histórico (simplificado)
-                # TODO: Implementar log detalhado de mudanças
-                
-                # Processar concorrentes do Bloco 6
-                concorrentes_raw = request.POST.get('concorrentes', '[]')
-                logger.debug(f"🔍 DEBUG Concorrentes - Raw POST data: {concorrentes_raw}")
-                logger.debug(f"🔍 DEBUG Concorrentes - POST keys: {list(request.POST.keys())}")
-                
-                try:
-                    concorrentes_list = json.loads(concorrentes_raw) if concorrentes_raw else []
-                    logger.debug(f"🔍 DEBUG Concorrentes - Parsed JSON: {concorrentes_list}")
-                    logger.debug(f"🔍 DEBUG Concorrentes - Type: {type(concorrentes_list)}, Length: {len(concorrentes_list)}")
-                except json.JSONDecodeError as e:
-                    logger.error(f"❌ Erro ao parsear concorrentes JSON: {e}")
-                    concorrentes_list = []
-                
-                # Validar estrutura
-                if not isinstance(concorrentes_list, list):
-                    logger.warning(f"⚠️  Concorrentes não é uma lista: {type(concorrentes_list)}")
-                    concorrentes_list = []
+                # Campos gravados: os enviados e alterados + extras processados acima
+                update_fields = posted_fields | {'last_updated_by', 'updated_at'}
                 
-                logger.debug(f"✅ DEBUG Concorrentes - Validados: {concorrentes_list}")
-                
-                # Verificar valor ANTES de salvar
-                logger.debug(f"🔍 DEBUG KB ANTES - concorrentes: {kb.concorrentes}")
-                
-                kb.concorrentes = concorrentes_list
-                kb.save()
+                # Processar concorrentes do Bloco 6 (só quando enviados: os
+                # demais blocos não podem apagar a lista)
+                if 'concorrentes' in request.POST:
+                    concorrentes_raw = request.POST.get('concorrentes') or '[]'
+                    try:
+                        concorrentes_list = json.loads(concorrentes_raw)
+                    except json.JSONDecodeError as e:
+                        logger.error(f"❌ Erro ao parsear concorrentes JSON: {e}")
+                        concorrentes_list = []
+                    
+                    # Validar estrutura
+                    if not isinstance(concorrentes_list, list):
+                        logger.warning(f"⚠️  Concorrentes não é uma lista: {type(concorrentes_list)}")
+                        concorrentes_list = []
+                    
+                    kb.concorrentes = concorrentes_list
+                    update_fields.add('concorrentes')
                 
-                # Verificar valor DEPOIS de salvar
-                kb.refresh_from_db()
-                logger.debug(f"💾 DEBUG KB DEPOIS - concorrentes: {kb.concorrentes}")
-                logger.debug(f"💾 DEBUG Concorrentes - Salvos no KB (id={kb.id})")
+                # Um único UPDATE (completude dos blocos alterados incluída pelo save;
+                # redes sociais acima já atualizaram o bloco 6 via signal)
+                kb.save(update_fields=update_fields)
+                logger.debug(f"💾 KB {kb.id} bloco {block_number} salvo: {sorted(update_fields)}")
                 
                 return JsonResponse({
                     'success': True,
@@ -366,7 +375,9 @@ def knowledge_save_all(request):
     validation_errors = []
     
     for block_name, form in forms.items():
-        if not form.is_valid():
+        with span('validate'):
+            valid = form.is_valid()
+        if not valid:
             all_valid = False
             block_number = block_name.replace('block', '')
             block_titles = {
@@ -414,35 +425,29 @@ def knowledge_save_all(request):
     # Não precisa mais de processamento manual aqui
     
     # Se validação passou, usar Service Layer para salvar
-    print("🔄 Chamando KnowledgeBaseService.save_all_blocks...", flush=True)
-    success, errors = KnowledgeBaseService.save_all_blocks(request, kb, forms)
-    print(f"🔄 save_all_blocks retornou: success={success}, errors={errors}", flush=True)
+    with span('save'):
+        success, errors = KnowledgeBaseService.save_all_blocks(request, kb, forms)
     
     if success:
         # ========================================
         # ENVIAR PARA N8N: Análise de Fundamentos
         # ========================================
-        print("=" * 80, flush=True)
-        print("📤 [N8N] INICIANDO ENVIO DE DADOS", flush=True)
-        print(f"📤 [N8N] KB ID: {kb.id}", flush=True)
-        print(f"📤 [N8N] Organização: {kb.organization.name} (ID: {kb.organization_id})", flush=True)
-        print(f"📤 [N8N] Onboarding completo: {kb.onboarding_completed}", flush=True)
-        print(f"📤 [N8N] Status atual: {kb.analysis_status}", flush=True)
+        logger.debug(
+            f"📤 [N8N] Enviando fundamentos - KB {kb.id}, org {kb.organization_id}, "
+            f"onboarding: {kb.onboarding_completed}, status: {kb.analysis_status}"
+        )
         
         try:
-            n8n_result = N8NService.send_fundamentos(kb)
-            print(f"📤 [N8N] Resultado: {n8n_result}", flush=True)
+            with span('n8n_dispatch'):
+                n8n_result = N8NService.send_fundamentos(kb)
             
             if n8n_result.get('success'):
-                print(f"✅ [N8N] SUCESSO! Revision ID: {n8n_result.get('revision_id')}", flush=True)
+                logger.info(f"✅ [N8N] Fundamentos enviados - KB {kb.id}, revision {n8n_result.get('revision_id')}")
             else:
-                print(f"⚠️ [N8N] FALHA! Erro: {n8n_result.get('error')}", flush=True)
+                logger.warning(f"⚠️ [N8N] Falha ao enviar fundamentos - KB {kb.id}: {n8n_result.get('error')}")
         except Exception as e:
-            print(f"❌ [N8N] EXCEÇÃO: {str(e)}", flush=True)
-            import traceback
-            print(traceback.format_exc(), flush=True)
+            logger.exception(f"❌ [N8N] Exceção ao enviar fundamentos - KB {kb.id}: {e}")
         
-        print("=" * 80, flush=True)
         # Não bloquear o fluxo se N8N falhar
         
         # ========================================
@@ -455,22 +460,18 @@ def knowledge_save_all(request):
             kb.onboarding_completed_at = timezone.now()
             kb.onboarding_completed_by = request.user
             kb.save(update_fields=['onboarding_completed', 'onboarding_completed_at', 'onboarding_completed_by'])
-            print(f"🔄 [REDIRECT] Primeira vez - redirecionando para perfil_view", flush=True)
             messages.success(request, '🎉 Base de Conhecimento salva com sucesso! Redirecionando para análise...')
         else:
-            print(f"🔄 [REDIRECT] Atualização - redirecionando para perfil_view", flush=True)
             messages.success(request, '✅ Base de Conhecimento atualizada com sucesso! Redirecionando para análise...')
         
         # Redirecionar SEMPRE para Perfil da Empresa após salvar
-        print(f"🔄 [REDIRECT] Executando redirect('knowledge:perfil_view')", flush=True)
         return redirect('knowledge:perfil_view')
     else:
         # Mostrar erros críticos
-        print(f"❌ Salvamento falhou, adicionando mensagens de erro", flush=True)
+        logger.warning(f"❌ [KB_SAVE_ALL] Salvamento da KB {kb.id} falhou: {errors}")
         for error in errors:
             messages.error(request, error)
     
-    print("🔄 Redirecionando para knowledge:view", flush=True)
     return redirect('knowledge:view')
 
 
@@ -490,18 +491,22 @@ def knowledge_upload_image(request):
             if not kb:
                 return JsonResponse({'success': False, 'message': 'Base de conhecimento não encontrada'}, status=404)
             
-            # Validar imagem
-            is_valid, error_msg = validate_image_file(image_file, max_size_mb=10)
-            if not is_valid:
+            # Validar e analisar imagem (uma única decodificação)
+            try:
+                analysis = analyze_image(image_file, hashes=('phash',), max_size_mb=10)
+            except ImageAnalysisError as e:
                 return JsonResponse({
                     'success': False,
-                    'message': error_msg
+                    'message': str(e)
                 }, status=400)
             
-            # Verificar similaridade
-            is_similar, similar_img, diff = find_similar_images_in_queryset(
-                image_file,
-                ReferenceImage.objects.filter(knowledge_base=kb),
+            perceptual_hash = analysis['hashes']['phash']
+            width, height = analysis['width'], analysis['height']
+            
+            # Verificar similaridade (índice vetorizado da KB)
+            is_similar, similar_img, diff = find_similar_reference_image(
+                perceptual_hash,
+                kb.id,
                 threshold=10
             )
             
@@ -517,10 +522,6 @@ def knowledge_upload_image(request):
                     }
                 }, status=400)
             
-            # Calcular hash e dimensões
-            perceptual_hash = calculate_perceptual_hash(image_file)
-            width, height = get_image_dimensions(image_file)
-            
             # Upload para S3
             s3_key = f'knowledge/reference_images/{kb.id}/{image_file.name}'
             result = upload_to_s3(
@@ -681,41 +682,37 @@ def perfil_view(request):
     Página "Perfil da Empresa" - Exibe análise N8N e permite aceitar/rejeitar sugestões
     Estados: pending, processing, completed, compiling, compiled, error
     """
-    print(f"🔍 [PERFIL_VIEW] Iniciando view", flush=True)
-    
     # Buscar KnowledgeBase da organization
     try:
         kb = KnowledgeBase.objects.for_request(request).first()
-        print(f"🔍 [PERFIL_VIEW] KB encontrado: {kb is not None}", flush=True)
     except Exception as e:
-        print(f"❌ [PERFIL_VIEW] Erro ao buscar KB: {e}", flush=True)
+        logger.error(f"❌ [PERFIL_VIEW] Erro ao buscar KB: {e}")
         kb = None
     
     if not kb:
         messages.error(request, 'Base de Conhecimento não encontrada.')
         return redirect('knowledge:view')
     
-    print(f"🔍 [PERFIL_VIEW] Onboarding completo: {kb.onboarding_completed}", flush=True)
-    
     # Determinar estado atual
     analysis_status = kb.analysis_status
-    print(f"🔍 [PERFIL_VIEW] Status da análise: {analysis_status}", flush=True)
+    logger.debug(
+        f"🔍 [PERFIL_VIEW] KB {kb.id} - status: {analysis_status}, "
+        f"onboarding: {kb.onboarding_completed}, sugestões revisadas: {kb.suggestions_reviewed}"
+    )
     
     # ESTADO 4: Modo Edição (Análise Completa)
     if analysis_status == 'completed' and kb.n8n_analysis:
-        print(f"🔍 [PERFIL_VIEW] Entrando no processamento de análise completa", flush=True)
         # Processar dados da análise N8N
         payload = kb.n8n_analysis.get('payload', [])
-        print(f"🔍 [PERFIL_VIEW] Payload type: {type(payload)}, length: {len(payload) if isinstance(payload, list) else 'N/A'}", flush=True)
         
         if not payload or len(payload) == 0:
-            print(f"❌ [PERFIL_VIEW] Payload vazio ou inválido", flush=True)
+            logger.warning(f"❌ [PERFIL_VIEW] Payload da análise vazio ou inválido - KB {kb.id}")
             messages.error(request, 'Dados de análise inválidos.')
             return redirect('knowledge:view')
         
         # Extrair campos analisados (payload[0] contém todos os campos)
         campos_raw = payload[0] if isinstance(payload, list) else {}
-        print(f"🔍 [PERFIL_VIEW] campos_raw keys: {list(campos_raw.keys())[:5] if campos_raw else 'vazio'}...", flush=True)
+        log_payload(logger, f"🔍 [PERFIL_VIEW] Campos da análise - KB {kb.id}", campos=list(campos_raw.keys()))
         
         # Mapeamento: nome em português do payload N8N → nome em inglês (usado no frontend)
         # IMPORTANTE: Payload N8N usa nomes em português com underscore
@@ -1085,8 +1082,7 @@ def perfil_view(request):
                 'campos': campos_bloco
             })
         
-        print(f"🔍 [PERFIL_VIEW] Total de blocos processados: {len(blocos_analise)}", flush=True)
-        print(f"🔍 [PERFIL_VIEW] Stats: {stats}", flush=True)
+        logger.debug(f"🔍 [PERFIL_VIEW] {len(blocos_analise)} blocos processados - stats: {stats}")
         
         from apps.knowledge.models import Logo
         primary_logo = Logo.objects.filter(
@@ -1105,8 +1101,6 @@ def perfil_view(request):
             'primary_logo': primary_logo,
         }
         
-        print(f" [PERFIL_VIEW] Contexto criado - onboarding: {context['kb_onboarding_completed']}, suggestions: {context['kb_suggestions_reviewed']}", flush=True)
-        
         return render(request, 'knowledge/perfil.html', context)
     
     # Outros estados: apenas passar status
@@ -1117,8 +1111,6 @@ def perfil_view(request):
         'kb_suggestions_reviewed': kb.suggestions_reviewed if kb else False
     }
     
-    print(f"✅ [PERFIL_VIEW] Contexto criado (outros estados) - onboarding: {context['kb_onboarding_completed']}, suggestions: {context['kb_suggestions_reviewed']}", flush=True)
-    
     return render(request, 'knowledge/perfil.html', context)
 
 
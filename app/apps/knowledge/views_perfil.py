@@ -13,6 +13,7 @@ import json
 
 from apps.knowledge.models import KnowledgeBase, ColorPalette
 from apps.knowledge.services.n8n_service import N8NService
+from apps.core.observability import log_payload, span
 import logging
 
 logger = logging.getLogger(__name__)
@@ -40,8 +41,10 @@ def perfil_apply_suggestions(request):
         accepted_suggestions = data.get('accepted_suggestions', [])
         edited_fields = data.get('edited_fields', {})
         
-        print(f"📝 [PERFIL_APPLY] Sugestões aceitas: {accepted_suggestions}", flush=True)
-        print(f"✏️ [PERFIL_APPLY] Campos editados: {list(edited_fields.keys())}", flush=True)
+        log_payload(
+            logger, f"📝 [PERFIL_APPLY] Payload recebido - KB {kb.id}",
+            accepted_suggestions=accepted_suggestions, edited_fields=list(edited_fields.keys()),
+        )
         
         # PERMITIR envio mesmo sem alterações (para enviar dados atuais ao N8N)
         # if not accepted_suggestions and not edited_fields:
@@ -72,7 +75,7 @@ def perfil_apply_suggestions(request):
             'competitors': 'concorrentes',
         }
         
-        with transaction.atomic():
+        with span('save'), transaction.atomic():
             updated_fields = []
             fields_for_reevaluation = []  # Campos que precisam ser reavaliados (editados + aceitos)
             
@@ -102,7 +105,6 @@ def perfil_apply_suggestions(request):
                             }
                         )
                         # NÃO adicionar a updated_fields (SocialNetwork é modelo separado)
-                        print(f"✅ [PERFIL_APPLY] Rede social editada: {network_type} = {url}", flush=True)
                     continue
                 
                 # Tratamento especial para concorrentes (JSON)
@@ -112,9 +114,8 @@ def perfil_apply_suggestions(request):
                         if isinstance(competitors_list, list):
                             kb.concorrentes = competitors_list
                             updated_fields.append('concorrentes')
-                            print(f"✅ [PERFIL_APPLY] Concorrentes editados: {len(competitors_list)} item(ns)", flush=True)
                     except json.JSONDecodeError as e:
-                        print(f"❌ [PERFIL_APPLY] Erro ao parsear concorrentes: {e}", flush=True)
+                        logger.warning(f"❌ [PERFIL_APPLY] Erro ao parsear concorrentes: {e}")
                     continue
                 
                 if model_field and hasattr(kb, model_field):
@@ -127,28 +128,23 @@ def perfil_apply_suggestions(request):
                     setattr(kb, model_field, new_value)
                     updated_fields.append(model_field)
                     fields_for_reevaluation.append(field_en)  # Adicionar à lista de reavaliação
-                    print(f"✅ [PERFIL_APPLY] Campo editado: {field_en} → {model_field} = {new_value}", flush=True)
             
             # 2. APLICAR SUGESTÕES ACEITAS (buscar do JSON N8N)
             if accepted_suggestions and kb.n8n_analysis:
                 payload = kb.n8n_analysis.get('payload', [])
                 if payload and len(payload) > 0:
                     campos_raw = payload[0]
-                    print(f"📝 [PERFIL_APPLY] Payload keys: {list(campos_raw.keys())[:10]}", flush=True)
                     
                     for field_en in accepted_suggestions:
                         # Pular se já foi editado manualmente
                         if field_en in edited_fields:
-                            print(f"⏭️ [PERFIL_APPLY] Pulando {field_en} (já editado)", flush=True)
                             continue
                         
                         model_field = field_to_model.get(field_en)
                         if not model_field or not hasattr(kb, model_field):
-                            print(f"⚠️ [PERFIL_APPLY] Campo {field_en} não mapeado ou não existe no modelo", flush=True)
+                            logger.warning(f"⚠️ [PERFIL_APPLY] Campo {field_en} não mapeado ou não existe no modelo")
                             continue
                         
-                        print(f"🔄 [PERFIL_APPLY] Processando: {field_en} → {model_field}", flush=True)
-                        
                         # Buscar sugestão no payload (tentar vários nomes possíveis)
                         sugestao = None
                         for possible_key in [field_en, model_field]:
@@ -158,11 +154,10 @@ def perfil_apply_suggestions(request):
                                     # Buscar 'sugestao' (após merge) ou 'sugestao_do_agente_iamkt' (primeira análise)
                                     sugestao = campo_data.get('sugestao', campo_data.get('sugestao_do_agente_iamkt'))
                                     if sugestao:
-                                        print(f"✅ [PERFIL_APPLY] Sugestão encontrada em '{possible_key}'", flush=True)
                                         break
                         
                         if not sugestao:
-                            print(f"⚠️ [PERFIL_APPLY] Nenhuma sugestão encontrada para {field_en}", flush=True)
+                            logger.warning(f"⚠️ [PERFIL_APPLY] Nenhuma sugestão encontrada para {field_en} - KB {kb.id}")
                             continue
                         
                         # Converter lista em string se necessário
@@ -173,14 +168,10 @@ def perfil_apply_suggestions(request):
                         setattr(kb, model_field, sugestao)
                         updated_fields.append(model_field)
                         fields_for_reevaluation.append(field_en)  # Adicionar à lista de reavaliação
-                        print(f"✅ [PERFIL_APPLY] Sugestão aplicada: {field_en} → {model_field}", flush=True)
             
             # 2.1 GUARDAR TODOS OS CAMPOS PARA REAVALIAÇÃO (editados + aceitos)
             if fields_for_reevaluation:
                 kb.accepted_suggestion_fields = fields_for_reevaluation
-                print(f"📋 [PERFIL_APPLY] Campos para reavaliação: {fields_for_reevaluation}", flush=True)
-                print(f"   └─ Editados manualmente: {[f for f in fields_for_reevaluation if f in edited_fields]}", flush=True)
-                print(f"   └─ Sugestões aceitas: {[f for f in fields_for_reevaluation if f in accepted_suggestions]}", flush=True)
             
             # 3. MARCAR COMO REVISADO
             fields_to_save = updated_fields.copy()  # Campos editados/aceitos
@@ -189,7 +180,6 @@ def perfil_apply_suggestions(request):
                 kb.suggestions_reviewed_at = timezone.now()
                 kb.suggestions_reviewed_by = request.user
                 fields_to_save.extend(['suggestions_reviewed', 'suggestions_reviewed_at', 'suggestions_reviewed_by'])
-                print(f"✅ [PERFIL_APPLY] Primeira revisão de sugestões marcada", flush=True)
             
             # Adicionar accepted_suggestion_fields à lista de campos para salvar
             if fields_for_reevaluation:
@@ -198,27 +188,26 @@ def perfil_apply_suggestions(request):
             # 4. SALVAR ALTERAÇÕES (especificar campos para garantir persistência)
             if fields_to_save:
                 kb.save(update_fields=fields_to_save)
-                print(f"✅ [PERFIL_APPLY] Total de campos atualizados: {len(updated_fields)}", flush=True)
-                print(f"✅ [PERFIL_APPLY] Campos salvos: {updated_fields}", flush=True)
-                print(f"💾 [PERFIL_APPLY] Dados salvos no banco (KB id={kb.id})", flush=True)
+                logger.info(
+                    f"💾 [PERFIL_APPLY] KB {kb.id} salva - campos: {updated_fields}, "
+                    f"reavaliação: {fields_for_reevaluation}"
+                )
         
         # 5. ENVIAR PARA N8N (fora da transação)
         # Se houver campos para reavaliar, enviar para fundamentos primeiro
         # Senão, enviar direto para compilação
         if fields_for_reevaluation:
-            print(f"🔄 [PERFIL_APPLY] Enviando para FUNDAMENTOS (reavaliação de {len(fields_for_reevaluation)} campos)", flush=True)
-            
             # Resetar compilation_status para pending (vai recompilar após fundamentos)
             kb.compilation_status = 'pending'
             kb.save(update_fields=['compilation_status'])
-            print(f"🔄 [PERFIL_APPLY] compilation_status resetado para 'pending'", flush=True)
             
-            n8n_result = N8NService.send_fundamentos(kb)
+            with span('n8n_dispatch'):
+                n8n_result = N8NService.send_fundamentos(kb)
             flow_type = 'fundamentos_reevaluation'
         else:
-            print(f"🔄 [PERFIL_APPLY] Enviando para COMPILAÇÃO (sem reavaliação)", flush=True)
             has_accepted = len(accepted_suggestions) > 0
-            n8n_result = N8NService.send_for_compilation(kb, has_accepted)
+            with span('n8n_dispatch'):
+                n8n_result = N8NService.send_for_compilation(kb, has_accepted)
             flow_type = n8n_result.get('flow_type', 'compilation')
         
         if not n8n_result['success']:
@@ -245,7 +234,7 @@ def perfil_apply_suggestions(request):
         }, status=400)
     
     except Exception as e:
-        print(f"❌ [PERFIL_APPLY] Erro: {e}", flush=True)
+        logger.exception(f"❌ [PERFIL_APPLY] Erro: {e}")
         return JsonResponse({
             'success': False,
             'error': str(e)
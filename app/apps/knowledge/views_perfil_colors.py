@@ -9,9 +9,12 @@ from django.http import JsonResponse
 from django.db import transaction
 from django.db import models
 import json
+import logging
 
 from apps.knowledge.models import KnowledgeBase, ColorPalette
 
+logger = logging.getLogger(__name__)
+
 
 @never_cache
 @login_required
@@ -59,7 +62,7 @@ def perfil_add_color(request):
                 order=max_order + 1
             )
             
-            print(f"✅ [PERFIL_ADD_COLOR] Cor adicionada: {hex_code} (ID: {color.id})", flush=True)
+            logger.info(f"✅ [PERFIL_ADD_COLOR] Cor adicionada: {hex_code} (ID: {color.id})")
             
             return JsonResponse({
                 'success': True,
@@ -74,9 +77,7 @@ def perfil_add_color(request):
             'error': 'Dados inválidos'
         }, status=400)
     except Exception as e:
-        print(f"❌ [PERFIL_ADD_COLOR] Erro: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ [PERFIL_ADD_COLOR] Erro: {e}")
         return JsonResponse({
             'success': False,
             'error': f'Erro interno: {str(e)}'
@@ -114,7 +115,7 @@ def perfil_remove_color(request):
             hex_code = color.hex_code
             color.delete()
             
-            print(f"✅ [PERFIL_REMOVE_COLOR] Cor removida: {hex_code} (ID: {color_id})", flush=True)
+            logger.info(f"✅ [PERFIL_REMOVE_COLOR] Cor removida: {hex_code} (ID: {color_id})")
             
             return JsonResponse({
                 'success': True,
@@ -133,9 +134,7 @@ def perfil_remove_color(request):
             'error': 'Dados inválidos'
         }, status=400)
     except Exception as e:
-        print(f"❌ [PERFIL_REMOVE_COLOR] Erro: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ [PERFIL_REMOVE_COLOR] Erro: {e}")
         return JsonResponse({
             'success': False,
             'error': f'Erro interno: {str(e)}'
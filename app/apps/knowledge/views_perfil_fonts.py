@@ -9,8 +9,12 @@ from django.http import JsonResponse
 from django.db import transaction
 from django.db import models
 import json
+import logging
 
 from apps.knowledge.models import KnowledgeBase, Typography, CustomFont
+from apps.core.observability import log_payload
+
+logger = logging.getLogger(__name__)
 
 
 @never_cache
@@ -23,12 +27,12 @@ def perfil_add_font(request):
     """
     try:
         data = json.loads(request.body)
-        print(f"🔍 [PERFIL_ADD_FONT] Payload recebido: {data}", flush=True)
+        log_payload(logger, "🔍 [PERFIL_ADD_FONT] Payload recebido", data=data)
         
         font_source = data.get('font_source', 'google')
         usage = data.get('usage', '').strip()
         
-        print(f"🔍 [PERFIL_ADD_FONT] font_source={font_source}, usage={usage}", flush=True)
+        logger.debug(f"🔍 [PERFIL_ADD_FONT] font_source={font_source}, usage={usage}")
         
         if not usage:
             return JsonResponse({
@@ -76,7 +80,7 @@ def perfil_add_font(request):
                     updated_by=request.user
                 )
                 
-                print(f"✅ [PERFIL_ADD_FONT] Fonte Google adicionada: {google_font_name} (ID: {font.id})", flush=True)
+                logger.info(f"✅ [PERFIL_ADD_FONT] Fonte Google adicionada: {google_font_name} (ID: {font.id})")
                 
             else:  # upload
                 custom_font_id = data.get('custom_font_id')
@@ -106,7 +110,7 @@ def perfil_add_font(request):
                     updated_by=request.user
                 )
                 
-                print(f"✅ [PERFIL_ADD_FONT] Fonte Upload adicionada: {custom_font.name} (ID: {font.id})", flush=True)
+                logger.info(f"✅ [PERFIL_ADD_FONT] Fonte Upload adicionada: {custom_font.name} (ID: {font.id})")
             
             return JsonResponse({
                 'success': True,
@@ -120,9 +124,7 @@ def perfil_add_font(request):
             'error': 'Dados inválidos'
         }, status=400)
     except Exception as e:
-        print(f"❌ [PERFIL_ADD_FONT] Erro: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ [PERFIL_ADD_FONT] Erro: {e}")
         return JsonResponse({
             'success': False,
             'error': f'Erro interno: {str(e)}'
@@ -160,7 +162,7 @@ def perfil_remove_font(request):
             usage = font.usage
             font.delete()
             
-            print(f"✅ [PERFIL_REMOVE_FONT] Fonte removida: {usage} (ID: {font_id})", flush=True)
+            logger.info(f"✅ [PERFIL_REMOVE_FONT] Fonte removida: {usage} (ID: {font_id})")
             
             return JsonResponse({
                 'success': True,
@@ -179,9 +181,7 @@ def perfil_remove_font(request):
             'error': 'Dados inválidos'
         }, status=400)
     except Exception as e:
-        print(f"❌ [PERFIL_REMOVE_FONT] Erro: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ [PERFIL_REMOVE_FONT] Erro: {e}")
         return JsonResponse({
             'success': False,
             'error': f'Erro interno: {str(e)}'
@@ -50,14 +50,16 @@ def get_preview_url(request):
         organization = request.organization
         S3Service.validate_organization_access(s3_key, organization.id)
         
-        # Gerar Presigned URL
-        preview_url = S3Service.generate_presigned_download_url(s3_key)
+        # Presigned URL (reaproveitada do cache enquanto válida)
+        result = S3Service.get_download_urls([s3_key], organization.id)
+        if s3_key not in result['urls']:
+            raise Exception(result['errors'].get(s3_key))
         
         return JsonResponse({
             'success': True,
             'data': {
-                'previewUrl': preview_url,
-                'expiresIn': S3Service.DOWNLOAD_URL_EXPIRATION
+                'previewUrl': result['urls'][s3_key]['url'],
+                'expiresIn': result['urls'][s3_key]['expires_in']
             }
         })
         
@@ -73,6 +75,64 @@ def get_preview_url(request):
         }, status=500)
 
 
+@login_required
+@require_http_methods(["POST"])
+def get_preview_urls(request):
+    """
+    Presigned URLs de preview em lote (uma requisição para vários arquivos)
+    
+    POST JSON:
+        - s3_keys: Lista de chaves no S3 (máximo S3Service.MAX_BATCH_KEYS)
+    
+    Returns:
+        {
+            'success': bool,
+            'data': {
+                'urls': {s3_key: {'previewUrl': str, 'expiresIn': int}},
+                'errors': {s3_key: str}
+            }
+        }
+    """
+    try:
+        data = json.loads(request.body or '{}')
+        s3_keys = data.get('s3_keys')
+        
+        if not isinstance(s3_keys, list) or not all(isinstance(key, str) for key in s3_keys):
+            return JsonResponse({
+                'success': False,
+                'error': 'Parâmetro s3_keys (lista) obrigatório'
+            }, status=400)
+        
+        result = S3Service.get_download_urls(s3_keys, request.organization.id)
+        
+        return JsonResponse({
+            'success': True,
+            'data': {
+                'urls': {
+                    s3_key: {'previewUrl': entry['url'], 'expiresIn': entry['expires_in']}
+                    for s3_key, entry in result['urls'].items()
+                },
+                'errors': result['errors']
+            }
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'JSON inválido'
+        }, status=400)
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': 'Erro ao gerar URLs de preview'
+        }, status=500)
+
+
 # ============================================
 # UPLOAD DE LOGOS
 # ============================================
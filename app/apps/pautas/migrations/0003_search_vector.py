@@ -0,0 +1,42 @@
+# Generated by Django 4.2.8 on 2026-10-18 00:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def backfill_search_vector(apps, schema_editor):
+    """Preenche search_vector dos registros existentes (mesma expressão do SearchService)"""
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_ts_config WHERE cfgname = 'portuguese_unaccent'")
+        config = 'portuguese_unaccent' if cursor.fetchone() else 'portuguese'
+        cursor.execute(
+            f"UPDATE pautas_pauta SET search_vector = "
+            f"setweight(to_tsvector('{config}'::regconfig, COALESCE(title, '')), 'A') || "
+            f"setweight(to_tsvector('{config}'::regconfig, COALESCE(content, '')), 'B')"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pautas', '0002_alter_pauta_rede_social'),
+        ('core', '0010_search_config'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pauta',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pauta',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='pautas_pauta_search_gin'),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 import uuid
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth import get_user_model
 from apps.core.models import Organization
 
@@ -112,6 +114,10 @@ class Pauta(models.Model):
         verbose_name="Histórico de Auditoria"
     )
     
+    # Busca textual (SearchService): atualizado no post_save
+    search_vector = SearchVectorField(null=True, editable=False)
+    SEARCH_FIELDS = (('title', 'A'), ('content', 'B'))
+    
     class Meta:
         verbose_name = "Pauta"
         verbose_name_plural = "Pautas"
@@ -120,6 +126,7 @@ class Pauta(models.Model):
             models.Index(fields=['organization', '-created_at']),
             models.Index(fields=['status', 'rede_social']),
             models.Index(fields=['knowledge_base']),
+            GinIndex(fields=['search_vector'], name='pautas_pauta_search_gin'),
         ]
     
     def __str__(self):
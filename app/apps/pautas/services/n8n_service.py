@@ -1,10 +1,11 @@
 import json
 import uuid
-import requests
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from apps.knowledge.models import KnowledgeBase
+from apps.knowledge.services import BrandContextService
+from apps.core.services import WebhookDispatcher
 
 User = get_user_model()
 
@@ -34,10 +35,9 @@ class PautaN8NService:
             # 1. Gerar audit_log_id (simulado - implementar sistema real)
             audit_log_id = uuid.uuid4().hex[:8]
             
-            # 2. Buscar marketing_input_summary do n8n_compilation
-            marketing_input_summary = ''
-            if knowledge_base.n8n_compilation and isinstance(knowledge_base.n8n_compilation, dict):
-                marketing_input_summary = knowledge_base.n8n_compilation.get('marketing_input_summary', '')
+            # 2. Buscar marketing_input_summary do snapshot de marca (cache versionado)
+            brand = BrandContextService.get_snapshot(knowledge_base.id)
+            marketing_input_summary = brand['marketing_input_summary'] if brand else ''
             
             # 3. Montar payload seguindo formato exato
             payload = {
@@ -45,7 +45,7 @@ class PautaN8NService:
                 "usuario": user.email,
                 "rede": rede_social,
                 "tema": tema,
-                "organization_id": knowledge_base.organization.id,
+                "organization_id": knowledge_base.organization_id,
                 "audit_log_id": audit_log_id,
                 "knowledge_base": {
                     "kb_id": knowledge_base.id,
@@ -56,36 +56,25 @@ class PautaN8NService:
                 "executionMode": "production"
             }
             
-            # 3. Enviar para N8N
-            response = requests.post(
-                PautaN8NService.ENDPOINT_ENVIO,
-                json=payload,
-                headers={
-                    'Content-Type': 'application/json',
-                },
-                timeout=30
+            # 3. Enfileirar envio para N8N (worker Celery, com retentativas)
+            dispatch = WebhookDispatcher.enqueue(
+                url=PautaN8NService.ENDPOINT_ENVIO,
+                payload=payload,
+                source='pautas.send_pauta_request',
+                idempotency_key=f'send_pauta_request:{knowledge_base.organization.id}:{audit_log_id}',
+                organization=knowledge_base.organization,
+                headers={'Content-Type': 'application/json'},
             )
             
-            if response.status_code == 200:
-                return {
-                    'success': True,
-                    'data': {
-                        'payload_sent': payload,
-                        'response': response.json() if response.content else {},
-                        'audit_log_id': audit_log_id
-                    }
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': f'Erro N8N: {response.status_code} - {response.text}'
-                }
-                
-        except requests.exceptions.RequestException as e:
             return {
-                'success': False,
-                'error': f'Erro de conexão N8N: {str(e)}'
+                'success': True,
+                'data': {
+                    'payload_sent': payload,
+                    'dispatch_id': dispatch.id,
+                    'audit_log_id': audit_log_id
+                }
             }
+                
         except Exception as e:
             return {
                 'success': False,
@@ -1,7 +1,9 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from .models import Pauta
+from apps.core.services.dashboard_stats import DashboardStatsService
+from apps.core.services.search import SearchService
 
 
 @receiver(pre_save, sender=Pauta)
@@ -39,3 +41,16 @@ def pauta_pre_save(sender, instance, **kwargs):
                     
         except Pauta.DoesNotExist:
             pass  # Nova instância, não faz nada
+
+
+@receiver(post_save, sender=Pauta)
+@receiver(post_delete, sender=Pauta)
+def invalidate_dashboard_stats_pauta(sender, instance, **kwargs):
+    """Pauta criada/alterada/removida: descarta estatísticas do dashboard"""
+    DashboardStatsService.invalidate(instance.organization_id)
+
+
+@receiver(post_save, sender=Pauta)
+def update_pauta_search_vector(sender, instance, update_fields=None, **kwargs):
+    """Atualiza vetor de busca textual (título e conteúdo)"""
+    SearchService.update_vector(instance, update_fields)
@@ -8,13 +8,13 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
 from django.contrib import messages
-from django.db.models import Q
 from django.utils import timezone
 from django.views.decorators.clickjacking import xframe_options_sameorigin
 
 from .models import Pauta
 from .forms import PautaCreateForm, PautaEditForm
 from .services.n8n_service import PautaN8NService
+from apps.core.services.search import SearchService
 from apps.knowledge.models import KnowledgeBase
 
 User = get_user_model()
@@ -60,19 +60,30 @@ def pautas_list_view(request):
     if data_fim:
         queryset = queryset.filter(created_at__date__lte=data_fim)
     
-    # Filtro por busca (título ou conteúdo)
+    # Filtro por busca (full-text em título e conteúdo, por relevância)
     search = request.GET.get('search')
     if search:
-        queryset = queryset.filter(
-            Q(title__icontains=search) | Q(content__icontains=search)
-        )
+        queryset = SearchService.search(queryset, search, highlight_fields=('title', 'content'))
+        if SearchService.is_available():
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        else:
+            queryset = queryset.order_by('-created_at')
+    else:
+        queryset = queryset.order_by('-created_at')
     
-    # Ordenação e paginação
-    queryset = queryset.order_by('-created_at')
+    # Paginação
     paginator = Paginator(queryset, 5)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    # Trechos destacados da busca (HTML seguro)
+    if search:
+        for pauta in page_obj:
+            pauta.title_snippet = SearchService.render_highlight(getattr(pauta, 'title_highlight', ''))
+            content_highlight = getattr(pauta, 'content_highlight', '')
+            if SearchService.HIGHLIGHT_START in (content_highlight or ''):
+                pauta.content_snippet = SearchService.render_highlight(content_highlight)
+    
     context = {
         'page_obj': page_obj,
         'knowledge_base': knowledge_base,
@@ -81,6 +92,7 @@ def pautas_list_view(request):
             'status': status,
             'data_inicio': data_inicio,
             'data_fim': data_fim,
+            'search': search,
         },
         'rede_choices': Pauta.REDE_SOCIAL_CHOICES,
         'status_choices': Pauta.STATUS_CHOICES,
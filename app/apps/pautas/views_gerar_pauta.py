@@ -9,8 +9,8 @@ from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
 from django.urls import reverse
-import requests
 from apps.core.models import Organization
+from apps.core.services import WebhookDispatcher
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
@@ -45,13 +45,12 @@ def gerar_pauta_n8n(request):
         # Obter marketing_input_summary da base estratégica
         marketing_input_summary = ''
         try:
-            from apps.knowledge.models import KnowledgeBase
+            from apps.knowledge.services import BrandContextService
             
-            kb = KnowledgeBase.objects.filter(organization=organization).first()
+            brand = BrandContextService.get_for_organization(organization)
+            if brand:
+                marketing_input_summary = brand['marketing_input_summary']
             
-            if kb and kb.n8n_compilation and isinstance(kb.n8n_compilation, dict):
-                marketing_input_summary = kb.n8n_compilation.get('marketing_input_summary', '')
-                        
         except Exception as e:
             logger.error(f"Erro ao obter marketing_input_summary: {str(e)}")
         
@@ -80,30 +79,25 @@ def gerar_pauta_n8n(request):
         
         headers = {
             'Content-Type': 'application/json',
-            'X-INTERNAL-TOKEN': settings.N8N_WEBHOOK_SECRET,
+            'X-INTERNAL-TOKEN': WebhookDispatcher.SECRET_PLACEHOLDER,
             'User-Agent': 'IAMKT-Pautas/1.0'
         }
         
-        response = requests.post(
-            webhook_url,
-            json=payload,
+        # Enfileirar envio (worker Celery, com retentativas)
+        dispatch = WebhookDispatcher.enqueue(
+            url=webhook_url,
+            payload=payload,
+            source='pautas.gerar_pauta_n8n',
+            organization=organization,
             headers=headers,
-            timeout=settings.N8N_WEBHOOK_TIMEOUT
         )
         
-        if response.status_code == 200:
-            logger.info(f"N8N response: {response.status_code} - {response.text}")
-            return JsonResponse({
-                'success': True,
-                'message': 'Pauta enviada para processamento com sucesso!',
-                'data': payload
-            })
-        else:
-            logger.error(f"N8N error: {response.status_code} - {response.text}")
-            return JsonResponse({
-                'success': False,
-                'error': f'Erro ao enviar para N8N: {response.status_code}'
-            }, status=500)
+        logger.info(f"Pauta enfileirada para N8N (envio #{dispatch.id})")
+        return JsonResponse({
+            'success': True,
+            'message': 'Pauta enviada para processamento com sucesso!',
+            'data': payload
+        })
             
     except json.JSONDecodeError:
         return JsonResponse({
@@ -111,13 +105,6 @@ def gerar_pauta_n8n(request):
             'error': 'JSON inválido'
         }, status=400)
         
-    except requests.RequestException as e:
-        logger.error(f"Erro de conexão com N8N: {str(e)}")
-        return JsonResponse({
-            'success': False,
-            'error': 'Erro de conexão com o serviço de processamento'
-        }, status=500)
-        
     except Exception as e:
         logger.error(f"Erro inesperado: {str(e)}")
         return JsonResponse({
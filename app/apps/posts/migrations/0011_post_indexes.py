@@ -0,0 +1,76 @@
+# Generated by Django 4.2.8 on 2026-10-18 00:54
+
+import logging
+
+from django.db import migrations, models, transaction
+
+logger = logging.getLogger(__name__)
+
+TRGM_INDEX = 'posts_post_title_trgm_idx'
+
+
+def create_title_trigram_index(apps, schema_editor):
+    """
+    Índice GIN trigram em UPPER(title) para title__icontains (PostgreSQL)
+
+    Criado apenas se a extensão pg_trgm estiver disponível no servidor;
+    caso contrário a busca continua funcionando sem o índice.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if not cursor.fetchone():
+            logger.warning(f"[MIGRATION] pg_trgm indisponível: {TRGM_INDEX} não criado")
+            return
+
+        try:
+            with transaction.atomic(using=connection.alias):
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except Exception as e:
+            logger.warning(f"[MIGRATION] Sem permissão para criar pg_trgm ({e}): {TRGM_INDEX} não criado")
+            return
+
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON posts_post '
+            f'USING gin (UPPER(title) gin_trgm_ops)'
+        )
+
+
+def drop_title_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {TRGM_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_populate_postformat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['organization', '-created_at'], name='posts_post_organiz_97197e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['organization', 'status'], name='posts_post_organiz_aa4279_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('thread_id', ''), _negated=True), fields=['thread_id'], name='posts_post_thread_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postchangerequest',
+            index=models.Index(fields=['post', 'change_type', 'is_initial'], name='posts_postc_post_id_832886_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postimage',
+            index=models.Index(fields=['post', 'order'], name='posts_posti_post_id_41c1fd_idx'),
+        ),
+        migrations.RunPython(create_title_trigram_index, drop_title_trigram_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.8 on 2026-10-18 00:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def backfill_search_vector(apps, schema_editor):
+    """Preenche search_vector dos registros existentes (mesma expressão do SearchService)"""
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_ts_config WHERE cfgname = 'portuguese_unaccent'")
+        config = 'portuguese_unaccent' if cursor.fetchone() else 'portuguese'
+        cursor.execute(
+            f"UPDATE posts_post SET search_vector = "
+            f"setweight(to_tsvector('{config}'::regconfig, COALESCE(title, '')), 'A') || "
+            f"setweight(to_tsvector('{config}'::regconfig, COALESCE(subtitle, '')), 'B') || "
+            f"setweight(to_tsvector('{config}'::regconfig, COALESCE(caption, '')), 'C')"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_indexes'),
+        ('core', '0010_search_config'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='posts_post_search_gin'),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from apps.core.models import User, Area
 from apps.core.managers import OrganizationScopedManager
 
@@ -261,6 +263,10 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
     
+    # Busca textual (SearchService): atualizado no post_save
+    search_vector = SearchVectorField(null=True, editable=False)
+    SEARCH_FIELDS = (('title', 'A'), ('subtitle', 'B'), ('caption', 'C'))
+    
     # Manager com filtro automático por organization
     objects = OrganizationScopedManager()
     
@@ -274,6 +280,18 @@ class Post(models.Model):
             models.Index(fields=['area', '-created_at']),
             models.Index(fields=['status']),
             models.Index(fields=['social_network']),
+            # Listagem/feed e dashboard por organização
+            models.Index(fields=['organization', '-created_at']),
+            models.Index(fields=['organization', 'status']),
+            # Callback do N8N busca por thread_id (apenas posts com thread)
+            models.Index(
+                fields=['thread_id'],
+                name='posts_post_thread_id_idx',
+                condition=~models.Q(thread_id=''),
+            ),
+            # Busca por título (title__icontains) usa índice trigram
+            # em UPPER(title), criado na migration 0011 quando pg_trgm existe
+            GinIndex(fields=['search_vector'], name='posts_post_search_gin'),
         ]
     
     def __str__(self):
@@ -334,6 +352,9 @@ class PostImage(models.Model):
         verbose_name = 'Imagem do Post'
         verbose_name_plural = 'Imagens do Post'
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['post', 'order']),
+        ]
     
     def __str__(self):
         return f"Imagem {self.order} - Post #{self.post.id}"
@@ -384,6 +405,10 @@ class PostChangeRequest(models.Model):
         verbose_name = 'Solicitação de Alteração'
         verbose_name_plural = 'Solicitações de Alteração'
         ordering = ['-created_at']
+        indexes = [
+            # Contagem de alterações de imagem/texto por post (feed, revisões)
+            models.Index(fields=['post', 'change_type', 'is_initial']),
+        ]
     
     def __str__(self):
         tipo = self.get_change_type_display()
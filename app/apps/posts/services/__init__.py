@@ -0,0 +1,7 @@
+"""
+Posts services package
+"""
+from .feed_service import PostFeedService
+from .n8n_callback import PostCallbackService
+
+__all__ = ['PostFeedService', 'PostCallbackService']
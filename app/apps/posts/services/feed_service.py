@@ -0,0 +1,261 @@
+"""
+Feed de Posts - paginação por cursor e ETag por organização
+"""
+import base64
+import hashlib
+import logging
+import time
+from datetime import date, datetime, time as time_cls, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.core.services.search import SearchService
+from apps.posts.models import Post, PostImage
+
+logger = logging.getLogger(__name__)
+
+
+class PostFeedService:
+    """
+    Serviço do feed JSON de posts
+
+    - Keyset pagination (created_at, id) em vez de OFFSET
+    - Contagem de alterações de imagem anotada em SQL (sem query por post)
+    - Versão do feed por organização (incrementada nos signals de Post,
+      PostImage e PostChangeRequest) usada para ETag sem consultar o banco
+    """
+
+    VERSION_KEY = 'posts_feed_version:{org_id}'
+
+    # Campos necessários para serializar o post
+    FEED_FIELDS = (
+        'id', 'organization_id', 'title', 'subtitle', 'caption', 'hashtags', 'cta',
+        'image_prompt', 'status', 'social_network', 'formats', 'is_carousel',
+        'image_count', 'created_at', 'has_image',
+    )
+
+    @classmethod
+    def _page_size(cls, limit):
+        default = getattr(settings, 'POSTS_FEED_PAGE_SIZE', 50)
+        maximum = getattr(settings, 'POSTS_FEED_MAX_PAGE_SIZE', 200)
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            return default
+        return max(1, min(limit, maximum))
+
+    # ============================================
+    # VERSÃO / ETAG
+    # ============================================
+
+    @classmethod
+    def get_version(cls, organization_id):
+        """Versão atual do feed da organização (cria se não existir)"""
+        key = cls.VERSION_KEY.format(org_id=organization_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def bump_version(cls, organization_id):
+        """Invalida ETags do feed da organização"""
+        key = cls.VERSION_KEY.format(org_id=organization_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Chave inexistente: próxima leitura cria nova versão
+            pass
+        except Exception as e:
+            logger.warning(f"[POSTS_FEED] Erro ao incrementar versão (org {organization_id}): {e}")
+            cache.delete(key)
+
+    @classmethod
+    def compute_etag(cls, organization_id, params):
+        """
+        ETag do feed: versão da organização + parâmetros da janela
+
+        Args:
+            organization_id: ID da organização
+            params: QueryDict/dict com cursor, limit e filtros
+        """
+        parts = [str(organization_id), str(cls.get_version(organization_id))]
+        for name in ('cursor', 'limit', 'status', 'data', 'search'):
+            parts.append(f"{name}={params.get(name, '')}")
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    # ============================================
+    # CURSOR
+    # ============================================
+
+    @staticmethod
+    def encode_cursor(post):
+        raw = f"{post.created_at.isoformat()}|{post.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Returns:
+            tuple: (created_at, id) ou None se inválido
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            created_at, post_id = raw.rsplit('|', 1)
+            return datetime.fromisoformat(created_at), int(post_id)
+        except Exception:
+            return None
+
+    # ============================================
+    # CONSULTA
+    # ============================================
+
+    @staticmethod
+    def filter_posts(organization, filters=None, highlight=False):
+        """
+        Posts da organização com os filtros da página (data, status, busca)
+
+        Args:
+            organization: Organization
+            filters: dict com 'data', 'status', 'search'
+            highlight: Se deve anotar title_highlight (busca textual)
+        """
+        filters = filters or {}
+
+        posts = Post.objects.filter(organization=organization)
+
+        if filters.get('data'):
+            # Intervalo do dia (no fuso local) em vez de created_at__date,
+            # para usar o índice (organization, -created_at)
+            day = filters['data']
+            if not isinstance(day, date):
+                try:
+                    day = parse_date(str(day))
+                except ValueError:
+                    day = None
+            if day:
+                start = timezone.make_aware(datetime.combine(day, time_cls.min))
+                posts = posts.filter(created_at__gte=start, created_at__lt=start + timedelta(days=1))
+            else:
+                posts = posts.none()
+
+        status = filters.get('status')
+        if status and status != 'all':
+            posts = posts.filter(status=status)
+
+        search = filters.get('search')
+        if search:
+            posts = SearchService.search(
+                posts,
+                search,
+                highlight_fields=('title',) if highlight else (),
+                extra_q=Q(id=int(search)) if search.isdigit() else None,
+            )
+
+        return posts
+
+    @classmethod
+    def get_queryset(cls, organization, filters=None):
+        """
+        Posts filtrados com imagens pré-carregadas e contagem de
+        alterações de imagem anotada
+        """
+        return cls.filter_posts(organization, filters, highlight=True).only(*cls.FEED_FIELDS).annotate(
+            image_changes=Count(
+                'change_requests',
+                filter=Q(change_requests__change_type='image', change_requests__is_initial=False)
+            )
+        ).prefetch_related(
+            Prefetch(
+                'images',
+                queryset=PostImage.objects.only('id', 'post_id', 's3_key', 'order').order_by('order')
+            )
+        ).order_by('-created_at', '-id')
+
+    @staticmethod
+    def serialize(post):
+        """Serializa post no formato consumido por posts.js"""
+        imagens_keys = [img.s3_key for img in post.images.all() if img.s3_key]
+
+        # Calcular imageStatus baseado no status do post e se tem imagens
+        if post.status == 'image_generating':
+            image_status = 'generating'
+        elif post.status == 'image_ready' or (imagens_keys and post.status in ['approved', 'pending']):
+            image_status = 'ready'
+        else:
+            image_status = 'none'
+
+        return {
+            'id': post.id,
+            'title': post.title or '',
+            'subtitle': post.subtitle or '',
+            'caption': post.caption or '',
+            'hashtags': list(post.hashtags) if post.hashtags else [],
+            'cta': post.cta or '',
+            'image_prompt': post.image_prompt or '',
+            'status': post.status,
+            'social_network': post.social_network,
+            'rede': post.social_network,
+            'formats': list(post.formats) if post.formats else [],
+            'carrossel': bool(post.is_carousel),
+            'qtdImagens': int(post.image_count) if post.is_carousel else 1,
+            'created_at': post.created_at.isoformat() if post.created_at else '',
+            'has_image': bool(post.has_image),
+            'imagens': imagens_keys,
+            'imageStatus': image_status,
+            'imageChanges': getattr(post, 'image_changes', 0),
+            'revisoesRestantes': 3,
+            'titleHighlight': SearchService.render_highlight(getattr(post, 'title_highlight', '')),
+        }
+
+    @classmethod
+    def get_page(cls, organization, filters=None, cursor=None, limit=None, with_total=True):
+        """
+        Retorna uma janela do feed
+
+        Args:
+            organization: Organization
+            filters: dict com 'data', 'status', 'search'
+            cursor: Cursor opaco retornado pela página anterior
+            limit: Quantidade de posts (limitada a POSTS_FEED_MAX_PAGE_SIZE)
+            with_total: Se deve incluir total de posts (uma query COUNT)
+
+        Returns:
+            dict: {'results': [...], 'next_cursor': str|None, 'total': int|None}
+        """
+        page_size = cls._page_size(limit)
+        queryset = cls.get_queryset(organization, filters)
+
+        total = None
+        if with_total:
+            total = cls.filter_posts(organization, filters).count()
+
+        if cursor:
+            position = cls.decode_cursor(cursor)
+            if position:
+                created_at, post_id = position
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id)
+                )
+
+        posts = list(queryset[:page_size + 1])
+        has_more = len(posts) > page_size
+        posts = posts[:page_size]
+
+        results = []
+        for post in posts:
+            try:
+                results.append(cls.serialize(post))
+            except Exception as e:
+                logger.warning(f"[POSTS_FEED] Erro ao serializar Post #{post.id}: {e}")
+
+        return {
+            'results': results,
+            'next_cursor': cls.encode_cursor(posts[-1]) if has_more else None,
+            'total': total,
+        }
@@ -0,0 +1,260 @@
+"""
+Post Callback Service - Aplicação em lote dos resultados do N8N nos Posts
+
+- Aceita lista de resultados (N8N pode agrupar vários posts num único callback)
+- Uma transação para o lote: Posts buscados em uma query (select_for_update)
+  e imagens de todos os posts em outra
+- Imagens por diff (chave S3): bulk_create das novas, bulk_update das que mudaram
+  de URL/ordem e um DELETE para as que saíram
+- Post salvo com update_fields apenas das colunas alteradas
+"""
+
+import logging
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from django.db import transaction
+from django.db.models import Q
+
+from apps.posts.models import Post, PostImage
+
+logger = logging.getLogger(__name__)
+
+
+class PostCallbackService:
+    """
+    Uso:
+        results = PostCallbackService.apply_batch(items)
+        # [{'index': 0, 'success': True, 'post': {...}}, {'index': 1, 'success': False, 'error': '...'}]
+    """
+
+    MAX_BATCH_SIZE = 200
+
+    # (campo do Post, chaves aceitas no payload - português e inglês)
+    TEXT_FIELDS = (
+        ('title', ('titulo', 'title')),
+        ('subtitle', ('subtitulo', 'subtitle')),
+        ('caption', ('legenda', 'caption')),
+        # CTA - nunca null (campo obrigatório no banco)
+        ('cta', ('cta', 'cta_text')),
+        ('image_prompt', ('descricaoImagem', 'image_prompt', 'visual_brief')),
+    )
+
+    # ============================================
+    # NORMALIZAÇÃO
+    # ============================================
+
+    @staticmethod
+    def _s3_key(image):
+        """s3_key explícita ou derivada do path da URL"""
+        return image.get('s3_key') or urlparse(image.get('url', '')).path.lstrip('/')
+
+    @classmethod
+    def _normalize_images(cls, images):
+        normalized = []
+        for image in images:
+            if isinstance(image, dict) and image.get('url'):
+                normalized.append({'url': image['url'], 's3_key': cls._s3_key(image)})
+            elif isinstance(image, str) and image:
+                normalized.append({'url': image, 's3_key': cls._s3_key({'url': image})})
+        return normalized
+
+    @staticmethod
+    def _as_int(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    # ============================================
+    # DIFF
+    # ============================================
+
+    @classmethod
+    def _apply_fields(cls, post, data):
+        """
+        Aplica campos do payload no post
+
+        Returns:
+            set: Campos efetivamente alterados
+        """
+        changed = set()
+
+        def set_field(field, value):
+            if getattr(post, field) != value:
+                setattr(post, field, value)
+                changed.add(field)
+
+        for field, keys in cls.TEXT_FIELDS:
+            if any(key in data for key in keys):
+                set_field(field, next((data[key] for key in keys if data.get(key)), '') or '')
+
+        if 'hashtags' in data:
+            set_field('hashtags', data['hashtags'] if isinstance(data['hashtags'], list) else [])
+
+        # Thread ID: salvar se o post ainda não tiver
+        thread_id = data.get('thread_id')
+        if thread_id:
+            if not post.thread_id:
+                set_field('thread_id', thread_id)
+            elif post.thread_id != thread_id:
+                logger.warning(
+                    f"⚠️ [N8N_POST_CALLBACK] Thread ID diferente no post {post.id} - "
+                    f"Atual: {post.thread_id}, Recebido: {thread_id}"
+                )
+
+        # Status: usar o enviado; senão, 'generating' → 'pending'
+        if 'status' in data:
+            set_field('status', data['status'])
+        elif post.status == 'generating':
+            set_field('status', 'pending')
+
+        return changed
+
+    @staticmethod
+    def _diff_images(post, existing, incoming):
+        """
+        Compara imagens atuais e recebidas pela chave S3
+
+        Returns:
+            tuple: (para criar, para atualizar, ids para remover)
+        """
+        by_key = defaultdict(list)
+        for image in existing:
+            by_key[image.s3_key].append(image)
+
+        to_create, to_update = [], []
+        for order, image in enumerate(incoming):
+            matches = by_key.get(image['s3_key'])
+            if image['s3_key'] and matches:
+                current = matches.pop(0)
+                if current.s3_url != image['url'] or current.order != order:
+                    current.s3_url = image['url']
+                    current.order = order
+                    to_update.append(current)
+            else:
+                to_create.append(PostImage(post=post, s3_url=image['url'], s3_key=image['s3_key'], order=order))
+
+        to_delete = [image.id for images in by_key.values() for image in images]
+        return to_create, to_update, to_delete
+
+    # ============================================
+    # LOTE
+    # ============================================
+
+    @classmethod
+    def apply_batch(cls, items):
+        """
+        Aplica resultados do N8N em uma única transação
+
+        Args:
+            items: Lista de dicts (post_id ou thread_id + campos do post)
+
+        Returns:
+            list: Resultado por item, na ordem recebida
+        """
+        results = [None] * len(items)
+        post_ids, thread_ids = set(), set()
+        for index, data in enumerate(items):
+            if not isinstance(data, dict) or not (data.get('post_id') or data.get('thread_id')):
+                results[index] = {'index': index, 'success': False, 'error': 'post_id ou thread_id obrigatório'}
+                continue
+            if data.get('post_id'):
+                post_id = cls._as_int(data['post_id'])
+                if post_id is None:
+                    results[index] = {'index': index, 'success': False, 'error': 'post_id inválido'}
+                    continue
+                post_ids.add(post_id)
+            else:
+                thread_ids.add(data['thread_id'])
+
+        with transaction.atomic():
+            posts = list(
+                Post.objects.select_for_update()
+                .filter(Q(id__in=post_ids) | Q(thread_id__in=thread_ids))
+                .order_by('id')
+            )
+            by_id = {post.id: post for post in posts}
+            by_thread = {post.thread_id: post for post in posts if post.thread_id}
+
+            images = defaultdict(list)
+            for image in PostImage.objects.filter(post__in=posts).order_by('order', 'created_at'):
+                images[image.post_id].append(image)
+
+            changed = defaultdict(set)
+            incoming_images = {}
+
+            for index, data in enumerate(items):
+                if results[index] is not None:
+                    continue
+
+                post_id = data.get('post_id')
+                post = by_id.get(cls._as_int(post_id)) if post_id else by_thread.get(data.get('thread_id'))
+                if post is None:
+                    logger.error(
+                        f"❌ [N8N_POST_CALLBACK] Post não encontrado - post_id: {post_id}, "
+                        f"thread_id: {data.get('thread_id')}"
+                    )
+                    results[index] = {'index': index, 'success': False, 'error': 'Post não encontrado'}
+                    continue
+
+                changed[post.id] |= cls._apply_fields(post, data)
+
+                incoming = cls._normalize_images(data['imagens']) if isinstance(data.get('imagens'), list) else []
+                if incoming:
+                    # Mesmo post repetido no lote: vale a última lista de imagens
+                    incoming_images[post.id] = incoming
+
+                results[index] = {'index': index, 'success': True, 'post': post}
+
+            to_create, to_update, to_delete = [], [], []
+            for post_id, incoming in incoming_images.items():
+                post = by_id[post_id]
+                created, updated, deleted = cls._diff_images(post, images[post_id], incoming)
+                to_create.extend(created)
+                to_update.extend(updated)
+                to_delete.extend(deleted)
+
+                # Campos principais do post = primeira imagem
+                for field, value in (
+                    ('image_s3_url', incoming[0]['url']),
+                    ('image_s3_key', incoming[0]['s3_key']),
+                    ('has_image', True),
+                ):
+                    if getattr(post, field) != value:
+                        setattr(post, field, value)
+                        changed[post_id].add(field)
+
+                if created or updated or deleted:
+                    # Save do post invalida feed/ETag (bulk não dispara signals)
+                    changed[post_id].add('updated_at')
+
+                logger.debug(
+                    f"✏️ [N8N_POST_CALLBACK] Post {post_id}: {len(created)} imagem(ns) nova(s), "
+                    f"{len(updated)} atualizada(s), {len(deleted)} removida(s)"
+                )
+
+            if to_delete:
+                PostImage.objects.filter(id__in=to_delete).delete()
+            if to_update:
+                PostImage.objects.bulk_update(to_update, ['s3_url', 'order'])
+            if to_create:
+                PostImage.objects.bulk_create(to_create)
+
+            for post in posts:
+                fields = changed.get(post.id)
+                if fields:
+                    post.save(update_fields=sorted(fields | {'updated_at'}))
+
+        for result in results:
+            post = result.pop('post', None)
+            if post is not None:
+                result['post'] = {
+                    'id': post.id,
+                    'status': post.status,
+                    'titulo': post.title,
+                    'has_image': post.has_image,
+                    'updated_fields': sorted(changed.get(post.id, ())),
+                }
+
+        return results
@@ -1,7 +1,11 @@
-from django.db.models.signals import pre_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import Post, PostImage
+from .models import Post, PostImage, PostChangeRequest
+from .services.feed_service import PostFeedService
 from apps.core.services import S3Service
+from apps.core.services.dashboard_stats import DashboardStatsService
+from apps.core.services.search import SearchService
 from PIL import Image
 import boto3
 import os
@@ -90,59 +94,45 @@ def upload_image_to_s3(sender, instance, **kwargs):
             # Não bloquear o salvamento, apenas logar o erro
 
 
-@receiver(pre_save, sender=PostImage)
+@receiver(post_save, sender=PostImage)
 def upload_post_image_to_s3(sender, instance, **kwargs):
     """
-    Signal executado ANTES de salvar um PostImage.
-    Se image_file foi preenchido, faz upload para S3 e atualiza campos relacionados.
+    Signal executado APÓS salvar um PostImage.
+    Se image_file foi preenchido, agenda o envio para S3 (streaming, cliente
+    compartilhado) em task Celery, fora do request. A task atualiza s3_key,
+    s3_url e dimensões e limpa image_file.
     """
     if instance.image_file and instance.image_file.name:
-        try:
-            # Abrir imagem para obter dimensões
-            img = Image.open(instance.image_file)
-            instance.width = img.width
-            instance.height = img.height
-            
-            # Gerar nome do arquivo
-            file_name = os.path.basename(instance.image_file.name)
-            timestamp = int(time.time() * 1000)
-            
-            # Gerar chave S3
-            s3_key = f"org-{instance.post.organization.id}/posts/generated/{timestamp}-{file_name}"
-            
-            # Upload direto para S3 usando boto3
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION
-            )
-            
-            # Fazer upload
-            instance.image_file.seek(0)
-            s3_client.put_object(
-                Bucket=settings.AWS_BUCKET_NAME,
-                Key=s3_key,
-                Body=instance.image_file.read(),
-                ContentType=instance.image_file.file.content_type or 'image/jpeg',
-                ServerSideEncryption='AES256',
-                StorageClass='INTELLIGENT_TIERING',
-                Metadata={
-                    'original-name': file_name,
-                    'organization-id': str(instance.post.organization.id),
-                    'category': 'posts',
-                    'upload-timestamp': str(timestamp)
-                }
-            )
-            
-            # Atualizar campos do model
-            instance.s3_key = s3_key
-            instance.s3_url = S3Service.get_public_url(s3_key)
-            
-            # Limpar o campo image_file após upload
-            instance.image_file = None
-            
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Erro ao fazer upload de PostImage para S3: {str(e)}", exc_info=True)
+        from .tasks import ingest_post_image_task
+        post_image_id = instance.pk
+        transaction.on_commit(lambda: ingest_post_image_task.delay(post_image_id))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=PostImage)
+@receiver(post_delete, sender=PostImage)
+@receiver(post_save, sender=PostChangeRequest)
+@receiver(post_delete, sender=PostChangeRequest)
+def bump_posts_feed_version(sender, instance, **kwargs):
+    """
+    Invalida ETag do feed de posts da organização após alterações
+    em Post, PostImage ou PostChangeRequest.
+    """
+    post = instance if sender is Post else getattr(instance, 'post', None)
+    organization_id = getattr(post, 'organization_id', None)
+    if organization_id:
+        transaction.on_commit(lambda: PostFeedService.bump_version(organization_id))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_dashboard_stats_post(sender, instance, **kwargs):
+    """Post criado/alterado/removido: descarta estatísticas do dashboard"""
+    DashboardStatsService.invalidate(instance.organization_id)
+
+
+@receiver(post_save, sender=Post)
+def update_post_search_vector(sender, instance, update_fields=None, **kwargs):
+    """Atualiza vetor de busca textual (título, subtítulo e legenda)"""
+    SearchService.update_vector(instance, update_fields)
@@ -0,0 +1,53 @@
+"""
+IAMKT - Celery Tasks de Posts
+Upload das imagens de PostImage para o S3 fora do request
+"""
+import logging
+
+from celery import shared_task
+
+from apps.core.services.image_ingest import ImageIngestService
+from apps.posts.models import PostImage
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def ingest_post_image_task(self, post_image_id):
+    """
+    Envia image_file do PostImage (upload do admin, em media/temp) para o S3
+    em streaming e atualiza chave, URL e dimensões
+
+    Args:
+        post_image_id: ID do PostImage
+    """
+    post_image = PostImage.objects.select_related('post').filter(id=post_image_id).first()
+    if post_image is None or not post_image.image_file:
+        return {'success': False, 'error': 'Sem arquivo pendente'}
+
+    temp_file = post_image.image_file
+    temp_name = temp_file.name
+
+    try:
+        result = ImageIngestService.ingest_file(temp_file, post_image.post.organization_id)
+    except ValueError as e:
+        logger.error(f"[POST_IMAGE] Arquivo inválido no PostImage #{post_image_id}: {e}")
+        return {'success': False, 'error': str(e)}
+    except Exception as e:
+        logger.error(f"[POST_IMAGE] Erro ao enviar PostImage #{post_image_id} para S3: {e}")
+        raise self.retry(exc=e, countdown=30 * (2 ** self.request.retries))
+
+    post_image.s3_key = result['s3_key']
+    post_image.s3_url = result['s3_url']
+    post_image.width = result['width']
+    post_image.height = result['height']
+    post_image.image_file = None
+    post_image.save(update_fields=['s3_key', 's3_url', 'width', 'height', 'image_file'])
+
+    # Arquivo temporário não é mais necessário
+    try:
+        temp_file.storage.delete(temp_name)
+    except Exception as e:
+        logger.warning(f"[POST_IMAGE] Erro ao remover temporário {temp_name}: {e}")
+
+    return {'success': True, 's3_key': result['s3_key']}
@@ -1,3 +1,236 @@
-from django.test import TestCase
+"""
+Testes de plano de execução (EXPLAIN) das queries de Posts
 
-# Create your tests here.
+Executa as views/consultas mais acessadas com enable_seqscan desligado e
+falha se o plano ainda tiver Seq Scan nas tabelas de posts, ou seja, se
+alguma query deixou de ter índice utilizável (regressão de índice).
+"""
+import json
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.core.models import Organization
+from apps.core.services.dashboard_stats import DashboardStatsService
+from apps.knowledge.models import KnowledgeBase
+from apps.posts.models import Post, PostImage, PostChangeRequest
+
+User = get_user_model()
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'EXPLAIN (FORMAT JSON) requer PostgreSQL')
+class PostQueryPlanTestCase(TestCase):
+    """Regressão de índices: nenhuma query quente pode cair em Seq Scan"""
+
+    TABLES = ('posts_post', 'posts_postimage', 'posts_postchangerequest', 'pautas_pauta')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organization.objects.create(name='Org Plano', slug='org-plano', is_active=True)
+        cls.user = User.objects.create_user(
+            username='plano',
+            email='plano@test.com',
+            password='test123',
+            organization=cls.org,
+        )
+        KnowledgeBase.objects.create(
+            organization=cls.org,
+            nome_empresa='Org Plano',
+            onboarding_completed=True,
+            suggestions_reviewed=True,
+        )
+
+        posts = Post.objects.bulk_create([
+            Post(
+                organization=cls.org,
+                user=cls.user,
+                title=f'Post {i}',
+                social_network='instagram',
+                status='pending' if i % 2 else 'draft',
+                thread_id=f'thread-{i}' if i % 3 else '',
+            )
+            for i in range(20)
+        ])
+        PostImage.objects.bulk_create([
+            PostImage(post=post, s3_key=f'posts/{post.id}.png', order=0) for post in posts
+        ])
+        PostChangeRequest.objects.bulk_create([
+            PostChangeRequest(post=post, change_type='image', is_initial=False, message='x')
+            for post in posts[:5]
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    # ============================================
+    # HELPERS
+    # ============================================
+
+    def _seq_scans(self, plan):
+        """Relações com Seq Scan no plano (recursivo)"""
+        found = []
+        if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in self.TABLES:
+            found.append(plan['Relation Name'])
+        for child in plan.get('Plans', []):
+            found.extend(self._seq_scans(child))
+        return found
+
+    def assertNoSeqScan(self, func):
+        """Executa func capturando queries e valida o plano de cada SELECT nas tabelas de posts"""
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+
+        checked = 0
+        for query in ctx.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            if not any(f'"{table}"' in sql for table in self.TABLES):
+                continue
+
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0][0]['Plan']
+
+            checked += 1
+            scans = self._seq_scans(plan)
+            self.assertEqual(scans, [], f"Seq Scan em {scans}:\n{sql}")
+
+        self.assertGreater(checked, 0, 'Nenhuma query nas tabelas de posts foi verificada')
+
+    # ============================================
+    # TESTES
+    # ============================================
+
+    def test_posts_list_view(self):
+        """posts_list: paginação, filtros de status/data e feed inicial"""
+        self.assertNoSeqScan(lambda: self.client.get(reverse('posts:list')))
+        self.assertNoSeqScan(lambda: self.client.get(reverse('posts:list'), {'status': 'draft'}))
+        self.assertNoSeqScan(lambda: self.client.get(reverse('posts:list'), {'data': '2026-01-15'}))
+
+        # Primeira janela do feed embutida na página segue os mesmos filtros
+        response = self.client.get(reverse('posts:list'), {'status': 'draft'})
+        feed = json.loads(response.context['posts_json'])
+        self.assertEqual(response.context['posts_feed_total'], 10)
+        self.assertEqual(len(feed), 10)
+        self.assertEqual({post['status'] for post in feed}, {'draft'})
+
+        post = Post.objects.get(organization=self.org, title='Post 7')
+        response = self.client.get(reverse('posts:list'), {'search': str(post.id)})
+        self.assertEqual([item['id'] for item in json.loads(response.context['posts_json'])], [post.id])
+
+    def test_posts_feed_view(self):
+        """Feed JSON: janela por cursor e contagem de alterações de imagem"""
+        def walk():
+            response = self.client.get(reverse('posts:feed'), {'limit': 5})
+            cursor = response.json()['next_cursor']
+            self.client.get(reverse('posts:feed'), {'limit': 5, 'cursor': cursor, 'status': 'pending'})
+
+        self.assertNoSeqScan(walk)
+
+    @override_settings(
+        N8N_WEBHOOK_SECRET='test-secret',
+        N8N_ALLOWED_IPS='127.0.0.1',
+        N8N_RATE_LIMIT_PER_IP='1000/minute',
+    )
+    def test_n8n_callback_lookups(self):
+        """n8n_post_callback: lock do lote por id/thread_id e diff das imagens"""
+        post = Post.objects.filter(organization=self.org, thread_id='').first()
+
+        def callback():
+            response = self.client.post(
+                reverse('posts:n8n_post_callback'),
+                data=json.dumps([
+                    {
+                        'thread_id': 'thread-1',
+                        'imagens': [{'url': 'https://s3/org/1/novo.png', 's3_key': 'org/1/novo.png'}],
+                    },
+                    {'post_id': post.id, 'legenda': 'Legenda'},
+                ]),
+                content_type='application/json',
+                HTTP_X_INTERNAL_TOKEN='test-secret',
+            )
+            self.assertEqual(response.json()['processed'], 2)
+
+        self.assertNoSeqScan(callback)
+
+    def test_dashboard_stats(self):
+        """Contadores e últimas atividades do dashboard"""
+        self.assertNoSeqScan(lambda: DashboardStatsService.compute(self.org))
+
+
+@override_settings(
+    N8N_WEBHOOK_SECRET='test-secret',
+    N8N_ALLOWED_IPS='127.0.0.1',
+    N8N_RATE_LIMIT_PER_IP='1000/minute',
+)
+class N8NPostCallbackTestCase(TestCase):
+    """n8n_post_callback: lote em uma transação e diff de imagens"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organization.objects.create(name='Org Callback', slug='org-callback', is_active=True)
+        cls.user = User.objects.create_user(
+            username='callback',
+            email='callback@test.com',
+            password='test123',
+            organization=cls.org,
+        )
+        cls.post_a = Post.objects.create(
+            organization=cls.org, user=cls.user, social_network='instagram',
+            status='generating', thread_id='thread-a',
+        )
+        cls.post_b = Post.objects.create(
+            organization=cls.org, user=cls.user, social_network='instagram', status='generating',
+        )
+        cls.kept = PostImage.objects.create(post=cls.post_a, s3_key='org/a/1.png', s3_url='https://s3/org/a/1.png', order=0)
+        cls.removed = PostImage.objects.create(post=cls.post_a, s3_key='org/a/2.png', s3_url='https://s3/org/a/2.png', order=1)
+
+    def _post(self, payload):
+        return self.client.post(
+            reverse('posts:n8n_post_callback'),
+            data=json.dumps(payload),
+            content_type='application/json',
+            HTTP_X_INTERNAL_TOKEN='test-secret',
+        )
+
+    def test_batch_diffs_images(self):
+        response = self._post([
+            {
+                'thread_id': 'thread-a',
+                'titulo': 'Carrossel',
+                'imagens': [
+                    {'url': 'https://s3/org/a/3.png', 's3_key': 'org/a/3.png'},
+                    {'url': 'https://s3/org/a/1.png', 's3_key': 'org/a/1.png'},
+                ],
+            },
+            {'post_id': self.post_b.id, 'legenda': 'Legenda B'},
+            {'post_id': 999999},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['processed'], body['failed']), (2, 1))
+        self.assertEqual(body['results'][2]['error'], 'Post não encontrado')
+
+        images = list(PostImage.objects.filter(post=self.post_a).order_by('order'))
+        self.assertEqual([image.s3_key for image in images], ['org/a/3.png', 'org/a/1.png'])
+        self.assertEqual(images[1].id, self.kept.id)
+        self.assertFalse(PostImage.objects.filter(id=self.removed.id).exists())
+
+        self.post_a.refresh_from_db()
+        self.post_b.refresh_from_db()
+        self.assertEqual((self.post_a.title, self.post_a.status), ('Carrossel', 'pending'))
+        self.assertEqual(self.post_a.image_s3_key, 'org/a/3.png')
+        self.assertEqual((self.post_b.caption, self.post_b.status), ('Legenda B', 'pending'))
+
+    def test_single_object_not_found(self):
+        response = self._post({'post_id': 999999})
+        self.assertEqual(response.status_code, 404)
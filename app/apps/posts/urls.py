@@ -5,6 +5,7 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.posts_list, name='list'),
+    path('feed/', views.posts_feed, name='feed'),
     
     # Gerar Post
     path('gerar/', views_gerar.gerar_post, name='gerar'),
@@ -4,10 +4,8 @@ Funções auxiliares para posts (webhook, email, audit)
 import logging
 import requests
 from django.conf import settings
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from apps.core.emails import get_notification_emails
+from apps.core.services.email_outbox import EmailOutboxService
 
 logger = logging.getLogger(__name__)
 
@@ -101,18 +99,15 @@ def _notify_image_request_email(post, request=None):
     }
     
     try:
-        html_message = render_to_string('emails/post_image_request.html', context)
-        plain_message = strip_tags(html_message)
-        
-        send_mail(
+        EmailOutboxService.enqueue_template(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=recipient_emails,
-            html_message=html_message,
-            fail_silently=False,
+            to=recipient_emails,
+            template='emails/post_image_request.html',
+            context=context,
+            source='posts.image_request',
+            organization=post.organization,
         )
-        logger.info(f'Email de solicitação de imagem enviado para {recipient_emails}')
+        logger.info(f'Email de solicitação de imagem enfileirado para {recipient_emails}')
     except Exception as e:
         logger.error(f'Erro ao enviar email de solicitação de imagem: {e}')
         raise
@@ -160,18 +155,15 @@ def _notify_revision_request(post, message, payload=None, user=None, request=Non
     }
     
     try:
-        html_message = render_to_string('emails/post_change_request.html', context)
-        plain_message = strip_tags(html_message)
-        
-        send_mail(
+        EmailOutboxService.enqueue_template(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=recipient_emails,
-            html_message=html_message,
-            fail_silently=False,
+            to=recipient_emails,
+            template='emails/post_change_request.html',
+            context=context,
+            source='posts.revision_request',
+            organization=post.organization,
         )
-        logger.info(f'Email de solicitação de alteração enviado para {recipient_emails}')
+        logger.info(f'Email de solicitação de alteração enfileirado para {recipient_emails}')
     except Exception as e:
         logger.error(f'Erro ao enviar email de alteração: {e}')
         raise
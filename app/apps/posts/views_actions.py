@@ -9,8 +9,8 @@ from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 import json
 import logging
-import requests
 
+from apps.core.services import WebhookDispatcher
 from .models import Post
 
 logger = logging.getLogger(__name__)
@@ -169,59 +169,21 @@ def generate_image(request, post_id):
         if settings.N8N_WEBHOOK_GERAR_IMAGEM:
             try:
                 from django.urls import reverse
-                from apps.knowledge.models import KnowledgeBase
+                from apps.knowledge.services import BrandContextService
                 
                 # Usar thread_id existente (alteração) ou deixar vazio (solicitação nova)
                 # O N8N devolverá o thread_id gerado, que será salvo no post via callback
                 thread_id = post.thread_id or ''
                 
-                # Buscar KnowledgeBase da organização
-                kb = KnowledgeBase.objects.filter(
-                    organization=post.organization
-                ).first()
+                # Snapshot de contexto de marca da organização (cache versionado)
+                brand = BrandContextService.get_for_organization(post.organization_id)
                 
                 # marketing_input_summary e dados do KB
-                marketing_summary = ''
-                kb_id = ''
-                publico_alvo = ''
-                paleta = []
-                tipografia = []
-                if kb:
-                    kb_id = str(kb.id)
-                    if isinstance(kb.n8n_compilation, dict):
-                        marketing_summary = kb.n8n_compilation.get('marketing_input_summary', '')
-                    elif isinstance(kb.n8n_compilation, str):
-                        try:
-                            import json as json_lib
-                            compilation_data = json_lib.loads(kb.n8n_compilation)
-                            marketing_summary = compilation_data.get('marketing_input_summary', '')
-                        except Exception:
-                            marketing_summary = kb.n8n_compilation
-                    
-                    # Público-alvo
-                    publico_alvo = kb.publico_externo or ''
-                    
-                    # Paleta de cores
-                    for cor in kb.colors.all():
-                        paleta.append({
-                            'nome': cor.name,
-                            'hex': cor.hex_code,
-                            'tipo': cor.color_type,
-                        })
-                    
-                    # Tipografia
-                    for font in kb.typography_settings.all():
-                        font_entry = {
-                            'uso': font.usage,
-                            'origem': font.font_source,
-                        }
-                        if font.font_source == 'google':
-                            font_entry['nome'] = font.google_font_name
-                            font_entry['peso'] = font.google_font_weight
-                            font_entry['url'] = font.google_font_url
-                        elif font.custom_font:
-                            font_entry['nome'] = font.custom_font.name
-                        tipografia.append(font_entry)
+                marketing_summary = brand['marketing_input_summary'] if brand else ''
+                kb_id = str(brand['kb_id']) if brand else ''
+                publico_alvo = brand['publico_externo'] if brand else ''
+                paleta = brand['paleta'] if brand else []
+                tipografia = brand['tipografia'] if brand else []
                 
                 # Formato e aspect ratio — derivar de rede_social + formato do post
                 from apps.posts.models import PostFormat
@@ -263,22 +225,20 @@ def generate_image(request, post_id):
                 referencias = []
                 
                 # 1. Logos do KB
-                if kb:
-                    for logo in kb.logos.all():
-                        if logo.s3_url:
-                            referencias.append({
-                                'tipo': 'logotipo',
-                                'url': logo.s3_url,
-                            })
+                if brand:
+                    for logo_url in brand['logos']:
+                        referencias.append({
+                            'tipo': 'logotipo',
+                            'url': logo_url,
+                        })
                 
                 # 2. Imagens de referência do KB
-                if kb:
-                    for ref in kb.reference_images.all():
-                        if ref.s3_url:
-                            referencias.append({
-                                'tipo': 'referencia',
-                                'url': ref.s3_url,
-                            })
+                if brand:
+                    for ref_url in brand['referencias']:
+                        referencias.append({
+                            'tipo': 'referencia',
+                            'url': ref_url,
+                        })
                 
                 # 3. Imagens de referência adicionadas no modal Gerar Post
                 if post.reference_images:
@@ -319,25 +279,16 @@ def generate_image(request, post_id):
                 logger.info(f"Enviando solicitação de imagem do post {post.id} para N8N...")
                 logger.debug(f"Payload N8N imagem: {n8n_payload}")
                 
-                response = requests.post(
-                    settings.N8N_WEBHOOK_GERAR_IMAGEM,
-                    json=n8n_payload,
-                    timeout=settings.N8N_WEBHOOK_TIMEOUT,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'X-Webhook-Secret': settings.N8N_WEBHOOK_SECRET,
-                    }
+                WebhookDispatcher.enqueue(
+                    url=settings.N8N_WEBHOOK_GERAR_IMAGEM,
+                    payload=n8n_payload,
+                    source='posts.generate_image',
+                    idempotency_key=f'generate_image:{change_request.id}',
+                    organization=post.organization,
                 )
-                response.raise_for_status()
                 n8n_image_success = True
-                logger.info(f"Solicitação de imagem do post {post.id} enviada ao N8N com sucesso")
+                logger.info(f"Solicitação de imagem do post {post.id} enfileirada para envio ao N8N")
                 
-            except requests.exceptions.Timeout:
-                n8n_image_error = 'Timeout ao enviar para N8N'
-                logger.error(f"Timeout ao enviar imagem do post {post.id} para N8N")
-            except requests.exceptions.RequestException as e:
-                n8n_image_error = f'Erro ao enviar para N8N: {str(e)}'
-                logger.error(f"Erro ao enviar imagem do post {post.id} para N8N: {e}", exc_info=True)
             except Exception as e:
                 n8n_image_error = f'Erro inesperado: {str(e)}'
                 logger.error(f"Erro inesperado ao enviar imagem do post {post.id} para N8N: {e}", exc_info=True)
@@ -428,27 +379,17 @@ def request_text_change(request, post_id):
                 
                 logger.debug(f"Payload N8N (alteração): {n8n_payload}")
                 
-                # Enviar para N8N
-                response = requests.post(
-                    settings.N8N_WEBHOOK_GERAR_POST,
-                    json=n8n_payload,
-                    timeout=settings.N8N_WEBHOOK_TIMEOUT,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'X-Webhook-Secret': settings.N8N_WEBHOOK_SECRET
-                    }
+                # Enfileirar envio para N8N (worker Celery, com retentativas)
+                WebhookDispatcher.enqueue(
+                    url=settings.N8N_WEBHOOK_GERAR_POST,
+                    payload=n8n_payload,
+                    source='posts.request_text_change',
+                    idempotency_key=f'request_text_change:{post.id}:{post.revisions_remaining}',
+                    organization=post.organization,
                 )
-                
-                response.raise_for_status()
                 n8n_success = True
-                logger.info(f"Solicitação de alteração do post {post.id} enviada para N8N com sucesso")
+                logger.info(f"Solicitação de alteração do post {post.id} enfileirada para envio ao N8N")
                 
-            except requests.exceptions.Timeout:
-                n8n_error = 'Timeout ao enviar para N8N'
-                logger.error(f"Timeout ao enviar alteração do post {post.id} para N8N")
-            except requests.exceptions.RequestException as e:
-                n8n_error = f'Erro ao enviar para N8N: {str(e)}'
-                logger.error(f"Erro ao enviar alteração do post {post.id} para N8N: {e}", exc_info=True)
             except Exception as e:
                 n8n_error = f'Erro inesperado: {str(e)}'
                 logger.error(f"Erro inesperado ao enviar alteração do post {post.id} para N8N: {e}", exc_info=True)
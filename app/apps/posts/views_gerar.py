@@ -7,8 +7,8 @@ from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.conf import settings
 from apps.posts.models import Post
+from apps.core.services import WebhookDispatcher
 import json
-import requests
 import logging
 
 logger = logging.getLogger(__name__)
@@ -140,39 +140,24 @@ def gerar_post(request):
             try:
                 logger.info(f"Enviando post {post.id} para N8N...")
                 
-                # Buscar KnowledgeBase da organização
-                from apps.knowledge.models import KnowledgeBase
+                # Snapshot de contexto de marca da organização (cache versionado)
+                from apps.knowledge.services import BrandContextService
                 try:
-                    kb = KnowledgeBase.objects.filter(
-                        organization=post.organization
-                    ).first()
+                    brand = BrandContextService.get_for_organization(post.organization_id)
                     
                     knowledge_base_data = None
-                    if kb and kb.n8n_compilation:
-                        # Extrair apenas marketing_input_summary do JSON n8n_compilation
-                        marketing_summary = ''
-                        if isinstance(kb.n8n_compilation, dict):
-                            marketing_summary = kb.n8n_compilation.get('marketing_input_summary', '')
-                        elif isinstance(kb.n8n_compilation, str):
-                            try:
-                                import json as json_lib
-                                compilation_data = json_lib.loads(kb.n8n_compilation)
-                                marketing_summary = compilation_data.get('marketing_input_summary', '')
-                            except:
-                                marketing_summary = kb.n8n_compilation
-                        
-                        if marketing_summary:
-                            knowledge_base_data = {
-                                'kb_id': kb.id,
-                                'company_name': kb.nome_empresa or '',
-                                'marketing_input_summary': marketing_summary,
-                                'reference_images_analysis': ''
-                            }
-                            logger.debug(f"KnowledgeBase encontrado: {kb.id}")
-                        else:
-                            logger.warning(f"marketing_input_summary vazio no KB {kb.id}")
+                    if brand and brand['marketing_input_summary']:
+                        knowledge_base_data = {
+                            'kb_id': brand['kb_id'],
+                            'company_name': brand['nome_empresa'],
+                            'marketing_input_summary': brand['marketing_input_summary'],
+                            'reference_images_analysis': ''
+                        }
+                        logger.debug(f"KnowledgeBase encontrado: {brand['kb_id']}")
+                    elif brand:
+                        logger.warning(f"marketing_input_summary vazio no KB {brand['kb_id']}")
                     else:
-                        logger.warning(f"KnowledgeBase não encontrado ou n8n_compilation vazio para organization {post.organization.id}")
+                        logger.warning(f"KnowledgeBase não encontrado para organization {post.organization_id}")
                 except Exception as e:
                     logger.error(f"Erro ao buscar KnowledgeBase: {e}", exc_info=True)
                     knowledge_base_data = None
@@ -198,27 +183,17 @@ def gerar_post(request):
                 
                 logger.debug(f"Payload N8N: {n8n_payload}")
                 
-                # Enviar para N8N
-                response = requests.post(
-                    settings.N8N_WEBHOOK_GERAR_POST,
-                    json=n8n_payload,
-                    timeout=settings.N8N_WEBHOOK_TIMEOUT,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'X-Webhook-Secret': settings.N8N_WEBHOOK_SECRET
-                    }
+                # Enfileirar envio para N8N (worker Celery, com retentativas)
+                WebhookDispatcher.enqueue(
+                    url=settings.N8N_WEBHOOK_GERAR_POST,
+                    payload=n8n_payload,
+                    source='posts.gerar_post',
+                    idempotency_key=f'gerar_post:{post.id}',
+                    organization=post.organization,
                 )
-                
-                response.raise_for_status()
                 n8n_success = True
-                logger.info(f"Post {post.id} enviado para N8N com sucesso")
+                logger.info(f"Post {post.id} enfileirado para envio ao N8N")
                 
-            except requests.exceptions.Timeout:
-                n8n_error = 'Timeout ao enviar para N8N'
-                logger.error(f"Timeout ao enviar post {post.id} para N8N")
-            except requests.exceptions.RequestException as e:
-                n8n_error = f'Erro ao enviar para N8N: {str(e)}'
-                logger.error(f"Erro ao enviar post {post.id} para N8N: {e}", exc_info=True)
             except Exception as e:
                 n8n_error = f'Erro inesperado: {str(e)}'
                 logger.error(f"Erro inesperado ao enviar post {post.id} para N8N: {e}", exc_info=True)
@@ -0,0 +1,409 @@
+"""
+IAMKT - Cache de respostas de IA
+Chaves canônicas (digest estável dos parâmetros normalizados), single-flight
+entre workers, compressão de respostas grandes e contadores por provider
+"""
+import hashlib
+import json
+import logging
+import time
+import unicodedata
+import uuid
+import zlib
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AIResponseCache:
+    """
+    Cache Redis das respostas dos providers de IA
+
+    - Parâmetros normalizados (Unicode NFKC, espaços colapsados, casefold,
+      dicts ordenados, None/'' descartados) e digest SHA-256: a mesma
+      pergunta gera a mesma chave em qualquer worker/processo
+    - get_or_compute: só um worker chama o provider para a mesma chave;
+      os demais aguardam o resultado (lock SET NX com token)
+    - Respostas acima de IA_CACHE_COMPRESS_MIN_BYTES gravadas com zlib
+    - Contadores por provider (hits, misses, coalesced, sets, bytes)
+    - Índice por namespace (provider + organização): sorted sets de último
+      acesso e de tamanho, usados pela eviction (ver AICacheMaintenance).
+      Cada chave pertence a um único namespace (gravado junto ao valor), e
+      a leitura por qualquer organização renova o último acesso nele
+
+    Uso:
+        result = ai_cache.get_or_compute(
+            'openai', 'generate_pauta', params,
+            lambda: openai_manager.generate_pauta(...)
+        )
+        if not result.get('cached'):
+            # chamada real ao provider: registrar IAModelUsage
+    """
+
+    KEY_PREFIX = 'ai_cache'
+    STATS_KEY = 'ai_cache:stats:{provider}'
+
+    # Índice de eviction (namespace = '<provider>:<organization_id|global>')
+    INDEX_PREFIX = 'ai_cache:idx'
+    LRU_KEY = 'ai_cache:idx:lru:{namespace}'
+    SIZE_KEY = 'ai_cache:idx:size:{namespace}'
+    BYTES_KEY = 'ai_cache:idx:bytes'
+    NAMESPACES_KEY = 'ai_cache:idx:namespaces'
+
+    # Formato do valor armazenado (1º byte)
+    FORMAT_JSON = b'j'
+    FORMAT_ZLIB = b'z'
+    # Cabeçalho com o namespace dono: b'o' + namespace + b'\n' + valor (j/z)
+    FORMAT_OWNED = b'o'
+
+    POLL_INTERVAL_MIN = 0.05
+    POLL_INTERVAL_MAX = 0.5
+
+    # Libera o lock apenas se ainda pertencer a este worker
+    RELEASE_SCRIPT = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('DEL', KEYS[1])
+        end
+        return 0
+    """
+
+    # Grava valor e atualiza índice atomicamente
+    # (total de bytes do namespace desconta o tamanho anterior da chave; se
+    # a chave pertencia a outro namespace, sai do índice dele)
+    SET_SCRIPT = """
+        local old = redis.call('GET', KEYS[1])
+        if old and string.sub(old, 1, 1) == 'o' then
+            local owner = string.sub(old, 2, string.find(old, '\\n', 1, true) - 1)
+            if owner ~= ARGV[5] then
+                local lru = ARGV[6] .. ':lru:' .. owner
+                local sizes = ARGV[6] .. ':size:' .. owner
+                local size = tonumber(redis.call('ZSCORE', sizes, KEYS[1]) or '0')
+                redis.call('ZREM', lru, KEYS[1])
+                redis.call('ZREM', sizes, KEYS[1])
+                redis.call('HINCRBY', KEYS[4], owner, -size)
+            end
+        end
+        redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+        local previous = tonumber(redis.call('ZSCORE', KEYS[3], KEYS[1]) or '0')
+        redis.call('ZADD', KEYS[2], ARGV[4], KEYS[1])
+        redis.call('ZADD', KEYS[3], ARGV[3], KEYS[1])
+        redis.call('HINCRBY', KEYS[4], ARGV[5], tonumber(ARGV[3]) - previous)
+        redis.call('SADD', KEYS[5], ARGV[5])
+        return 1
+    """
+
+    @staticmethod
+    def _get_redis():
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    @staticmethod
+    def _ttl():
+        return getattr(settings, 'IA_CACHE_TTL', 2592000)
+
+    @staticmethod
+    def _lock_timeout():
+        return getattr(settings, 'IA_CACHE_LOCK_TIMEOUT', 120)
+
+    @staticmethod
+    def _compress_min_bytes():
+        return getattr(settings, 'IA_CACHE_COMPRESS_MIN_BYTES', 2048)
+
+    # ============================================
+    # CHAVES
+    # ============================================
+
+    @classmethod
+    def canonicalize(cls, value):
+        """Normaliza parâmetros para que diferenças triviais gerem a mesma chave"""
+        if isinstance(value, str):
+            return ' '.join(unicodedata.normalize('NFKC', value).split()).casefold()
+        if isinstance(value, dict):
+            return {
+                str(key): cls.canonicalize(item)
+                for key, item in value.items()
+                if item is not None and item != ''
+            }
+        if isinstance(value, (list, tuple)):
+            return [cls.canonicalize(item) for item in value]
+        if isinstance(value, (set, frozenset)):
+            return sorted(cls.canonicalize(item) for item in value)
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        return cls.canonicalize(str(value))
+
+    @classmethod
+    def digest(cls, value):
+        """Digest estável (independente de PYTHONHASHSEED e do processo)"""
+        payload = json.dumps(
+            cls.canonicalize(value),
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def make_key(cls, provider, operation, params):
+        return f"{cls.KEY_PREFIX}:{provider}:{operation}:{cls.digest(params)}"
+
+    @staticmethod
+    def namespace(provider, organization_id=None):
+        """Namespace de contabilização/eviction (a chave continua compartilhada)"""
+        return f"{provider}:{organization_id or 'global'}"
+
+    # ============================================
+    # SERIALIZAÇÃO
+    # ============================================
+
+    @classmethod
+    def encode(cls, data, namespace=None):
+        raw = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+        if len(raw) >= cls._compress_min_bytes():
+            value = cls.FORMAT_ZLIB + zlib.compress(raw, 6)
+        else:
+            value = cls.FORMAT_JSON + raw
+        if namespace:
+            value = cls.FORMAT_OWNED + namespace.encode('utf-8') + b'\n' + value
+        return value, len(raw)
+
+    @classmethod
+    def split_owner(cls, value):
+        """(namespace dono, valor sem cabeçalho); dono None em valores sem cabeçalho"""
+        if value[:1] != cls.FORMAT_OWNED:
+            return None, value
+        owner, _, value = value[1:].partition(b'\n')
+        return owner.decode('utf-8'), value
+
+    @classmethod
+    def decode(cls, value):
+        _, value = cls.split_owner(value)
+        marker, body = value[:1], value[1:]
+        if marker == cls.FORMAT_ZLIB:
+            body = zlib.decompress(body)
+        return json.loads(body.decode('utf-8'))
+
+    # ============================================
+    # MÉTRICAS
+    # ============================================
+
+    @classmethod
+    def _count(cls, conn, provider, **fields):
+        try:
+            pipe = conn.pipeline(transaction=False)
+            key = cls.STATS_KEY.format(provider=provider)
+            for field, amount in fields.items():
+                pipe.hincrby(key, field, amount)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"[AI_CACHE] Erro ao atualizar métricas de {provider}: {e}")
+
+    @classmethod
+    def stats(cls, providers=('openai', 'gemini', 'perplexity')):
+        """
+        Contadores por provider
+
+        Returns:
+            dict: {provider: {'hits', 'misses', 'coalesced', 'sets',
+                              'bytes_raw', 'bytes_stored', 'bytes_served', 'hit_rate'}}
+        """
+        conn = cls._get_redis()
+        pipe = conn.pipeline(transaction=False)
+        for provider in providers:
+            pipe.hgetall(cls.STATS_KEY.format(provider=provider))
+
+        result = {}
+        for provider, raw in zip(providers, pipe.execute()):
+            counters = {key.decode(): int(value) for key, value in raw.items()}
+            for field in ('hits', 'misses', 'coalesced', 'sets', 'bytes_raw', 'bytes_stored', 'bytes_served'):
+                counters.setdefault(field, 0)
+            # coalesced: aguardou o single-flight e recebeu a resposta sem chamar o provider
+            served = counters['hits'] + counters['coalesced']
+            lookups = served + counters['misses']
+            counters['hit_rate'] = round(served / lookups, 4) if lookups else 0.0
+            result[provider] = counters
+        return result
+
+    # ============================================
+    # LEITURA / ESCRITA
+    # ============================================
+
+    @classmethod
+    def _read(cls, conn, key, provider, namespace):
+        value = conn.get(key)
+        if value is None:
+            return None
+        cls._count(conn, provider, bytes_served=len(value))
+        owner, _ = cls.split_owner(value)
+        try:
+            # Último acesso no namespace dono da chave (quem a gravou), não no
+            # de quem lê (XX: só se ainda indexada lá)
+            conn.zadd(cls.LRU_KEY.format(namespace=owner or namespace), {key: time.time()}, xx=True)
+        except Exception as e:
+            logger.warning(f"[AI_CACHE] Erro ao atualizar último acesso de {key}: {e}")
+        return cls.decode(value)
+
+    @classmethod
+    def get(cls, provider, operation, params, organization_id=None):
+        """
+        Resposta em cache ou None
+
+        Returns:
+            dict|None: Resposta com 'cached': True
+        """
+        key = cls.make_key(provider, operation, params)
+        try:
+            conn = cls._get_redis()
+            data = cls._read(conn, key, provider, cls.namespace(provider, organization_id))
+        except Exception as e:
+            logger.error(f"[AI_CACHE] Erro ao ler {key}: {e}")
+            return None
+
+        cls._count(conn, provider, **{'hits' if data is not None else 'misses': 1})
+        return dict(data, cached=True) if data is not None else None
+
+    @classmethod
+    def set(cls, provider, operation, params, data, ttl=None, organization_id=None):
+        """Armazena resposta (apenas respostas com success=True) e indexa no namespace"""
+        if not data or not data.get('success'):
+            return False
+
+        key = cls.make_key(provider, operation, params)
+        data = {field: value for field, value in data.items() if field != 'cached'}
+        try:
+            conn = cls._get_redis()
+            namespace = cls.namespace(provider, organization_id)
+            value, raw_size = cls.encode(data, namespace)
+            conn.eval(
+                cls.SET_SCRIPT, 5,
+                key,
+                cls.LRU_KEY.format(namespace=namespace),
+                cls.SIZE_KEY.format(namespace=namespace),
+                cls.BYTES_KEY,
+                cls.NAMESPACES_KEY,
+                value, ttl or cls._ttl(), len(value), time.time(), namespace, cls.INDEX_PREFIX
+            )
+            cls._count(conn, provider, sets=1, bytes_raw=raw_size, bytes_stored=len(value))
+            return True
+        except Exception as e:
+            logger.error(f"[AI_CACHE] Erro ao gravar {key}: {e}")
+            return False
+
+    @classmethod
+    def delete(cls, provider, operation, params):
+        try:
+            return bool(cls._get_redis().delete(cls.make_key(provider, operation, params)))
+        except Exception as e:
+            logger.error(f"[AI_CACHE] Erro ao remover chave: {e}")
+            return False
+
+    # ============================================
+    # SINGLE-FLIGHT
+    # ============================================
+
+    @classmethod
+    def get_or_compute(cls, provider, operation, params, compute, ttl=None, wait_timeout=None,
+                       organization_id=None):
+        """
+        Resposta em cache ou resultado de compute(), com uma única chamada
+        ao provider por chave entre todos os workers
+
+        Quem obtém o lock chama compute(); os demais aguardam o valor
+        aparecer no cache (até wait_timeout). Se o dono do lock falhar,
+        o próximo worker assume. Sem Redis, chama compute() direto.
+
+        Args:
+            compute: Callable sem argumentos que retorna dict com 'success'
+            organization_id: Namespace de eviction (None = compartilhado)
+
+        Returns:
+            dict: Resposta ('cached': True quando veio do cache)
+        """
+        key = cls.make_key(provider, operation, params)
+        namespace = cls.namespace(provider, organization_id)
+        lock_key = f"{key}:lock"
+        lock_timeout = cls._lock_timeout()
+        deadline = time.monotonic() + (wait_timeout or lock_timeout)
+        token = uuid.uuid4().hex
+        interval = cls.POLL_INTERVAL_MIN
+        waited = False
+
+        try:
+            conn = cls._get_redis()
+            while True:
+                data = cls._read(conn, key, provider, namespace)
+                if data is not None:
+                    cls._count(conn, provider, **{'coalesced' if waited else 'hits': 1})
+                    return dict(data, cached=True)
+
+                if conn.set(lock_key, token, nx=True, ex=lock_timeout):
+                    break
+
+                if time.monotonic() >= deadline:
+                    logger.warning(f"[AI_CACHE] Timeout aguardando {key}; chamando provider")
+                    token = None
+                    break
+
+                waited = True
+                time.sleep(interval)
+                interval = min(interval * 2, cls.POLL_INTERVAL_MAX)
+        except Exception as e:
+            logger.error(f"[AI_CACHE] Redis indisponível ({e}); chamando provider sem cache")
+            return compute()
+
+        cls._count(conn, provider, misses=1)
+        try:
+            result = compute()
+            cls.set(provider, operation, params, result, ttl, organization_id)
+            return result
+        finally:
+            if token:
+                try:
+                    conn.eval(cls.RELEASE_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.warning(f"[AI_CACHE] Erro ao liberar lock {lock_key}: {e}")
+
+    # ============================================
+    # LIMPEZA
+    # ============================================
+
+    @classmethod
+    def clear(cls, provider=None, batch_size=500):
+        """
+        Remove respostas em cache e o índice do provider (SCAN em lotes, sem KEYS)
+
+        Returns:
+            int: Número de chaves removidas
+        """
+        pattern = f"{cls.KEY_PREFIX}:{provider}:*" if provider else f"{cls.KEY_PREFIX}:*"
+        internal = (f"{cls.KEY_PREFIX}:stats:".encode(), f"{cls.INDEX_PREFIX}:".encode())
+        conn = cls._get_redis()
+        removed = 0
+        batch = []
+        for key in conn.scan_iter(match=pattern, count=batch_size):
+            if key.startswith(internal):
+                continue
+            batch.append(key)
+            if len(batch) >= batch_size:
+                removed += conn.unlink(*batch)
+                batch = []
+        if batch:
+            removed += conn.unlink(*batch)
+
+        for namespace in conn.smembers(cls.NAMESPACES_KEY):
+            namespace = namespace.decode()
+            if provider and not namespace.startswith(f"{provider}:"):
+                continue
+            pipe = conn.pipeline(transaction=True)
+            pipe.unlink(cls.LRU_KEY.format(namespace=namespace), cls.SIZE_KEY.format(namespace=namespace))
+            pipe.hdel(cls.BYTES_KEY, namespace)
+            pipe.srem(cls.NAMESPACES_KEY, namespace)
+            pipe.execute()
+
+        logger.info(f"[AI_CACHE] {removed} chaves removidas ({pattern})")
+        return removed
+
+
+# Instância global
+ai_cache = AIResponseCache()
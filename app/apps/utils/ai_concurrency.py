@@ -0,0 +1,156 @@
+"""
+IAMKT - Orquestração concorrente de chamadas de IA
+Executa chamadas independentes aos providers (OpenAI, Gemini, Perplexity)
+em paralelo, com limite de concorrência e timeout por provider
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AICallOrchestrator:
+    """
+    Pool de threads limitado para chamadas de IA (I/O de rede)
+
+    - Semáforo por provider (AI_PROVIDER_CONCURRENCY)
+    - Timeout por provider (AI_PROVIDER_TIMEOUT), contado a partir do submit
+    - Falhas e timeouts viram o mesmo dict de erro retornado pelos managers
+      ({'success': False, 'error': ...}), sem exceção para o chamador
+
+    As funções executadas no pool não devem acessar o banco: cada thread
+    abriria sua própria conexão. Registros (IAModelUsage, TrendMonitor...)
+    são gravados pela thread da task após coletar os resultados.
+
+    Uso:
+        future = ai_orchestrator.submit('perplexity', perplexity_manager.research_for_pauta, theme, audience, objective)
+        ...
+        result = ai_orchestrator.result(future)
+
+        results = ai_orchestrator.map('perplexity', perplexity_manager.get_trending_topics, [
+            {'industry': keyword, 'region': 'Brasil'} for keyword in keywords
+        ])
+    """
+
+    DEFAULT_CONCURRENCY = 4
+    DEFAULT_TIMEOUT = 120
+
+    def __init__(self):
+        self._executor = None
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    # ============================================
+    # CONFIGURAÇÃO
+    # ============================================
+
+    @staticmethod
+    def get_concurrency(provider):
+        limits = getattr(settings, 'AI_PROVIDER_CONCURRENCY', {})
+        return limits.get(provider, AICallOrchestrator.DEFAULT_CONCURRENCY)
+
+    @staticmethod
+    def get_timeout(provider):
+        timeouts = getattr(settings, 'AI_PROVIDER_TIMEOUT', {})
+        return timeouts.get(provider, AICallOrchestrator.DEFAULT_TIMEOUT)
+
+    def _get_executor(self):
+        # Criado sob demanda: no worker prefork do Celery cada processo filho
+        # tem o próprio pool (threads não sobrevivem ao fork)
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'AI_FANOUT_MAX_WORKERS', 16),
+                        thread_name_prefix='ai-call'
+                    )
+        return self._executor
+
+    def _get_semaphore(self, provider):
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            with self._lock:
+                semaphore = self._semaphores.setdefault(
+                    provider, threading.BoundedSemaphore(self.get_concurrency(provider))
+                )
+        return semaphore
+
+    # ============================================
+    # EXECUÇÃO
+    # ============================================
+
+    def _run(self, provider, deadline, func, args, kwargs):
+        semaphore = self._get_semaphore(provider)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not semaphore.acquire(timeout=remaining):
+            # Chamador já desistiu (timeout na fila): não consome a API
+            return self._error(provider, 'Timeout aguardando vaga do provider')
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"[AI_FANOUT] Erro na chamada {provider}: {e}")
+            return self._error(provider, str(e))
+        finally:
+            semaphore.release()
+
+    @staticmethod
+    def _error(provider, message):
+        return {
+            'success': False,
+            'provider': provider,
+            'error': message,
+        }
+
+    def submit(self, provider, func, *args, timeout=None, **kwargs):
+        """
+        Agenda chamada no pool (não bloqueia)
+
+        Args:
+            provider: 'openai', 'gemini' ou 'perplexity' (limite e timeout)
+            func: Método do manager (retorna dict com 'success')
+            timeout: Segundos (default: AI_PROVIDER_TIMEOUT[provider])
+
+        Returns:
+            Future com atributos provider e deadline (usar em result())
+        """
+        deadline = time.monotonic() + (timeout or self.get_timeout(provider))
+        future = self._get_executor().submit(self._run, provider, deadline, func, args, kwargs)
+        future.provider = provider
+        future.deadline = deadline
+        return future
+
+    def result(self, future):
+        """
+        Aguarda resultado até o deadline do submit
+
+        Returns:
+            dict: Resultado do manager ou {'success': False, 'error': ...}
+        """
+        try:
+            return future.result(timeout=max(0, future.deadline - time.monotonic()))
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning(f"[AI_FANOUT] Timeout na chamada {future.provider}")
+            return self._error(future.provider, 'Timeout na chamada do provider')
+
+    def gather(self, futures):
+        """Resultados na mesma ordem dos futures"""
+        return [self.result(future) for future in futures]
+
+    def map(self, provider, func, kwargs_list, timeout=None):
+        """
+        Mesma função para vários argumentos, em paralelo
+
+        Returns:
+            list: Resultados na ordem de kwargs_list
+        """
+        futures = [self.submit(provider, func, timeout=timeout, **kwargs) for kwargs in kwargs_list]
+        return self.gather(futures)
+
+
+# Instância global (pool e semáforos compartilhados pelo processo)
+ai_orchestrator = AICallOrchestrator()
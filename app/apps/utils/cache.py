@@ -8,6 +8,8 @@ import json
 from django.core.cache import cache
 from django.conf import settings
 
+from apps.utils.ai_cache import ai_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -109,28 +111,42 @@ class CacheManager:
             logger.error(f"Erro ao deletar cache: {e}")
             return False
     
-    def clear_pattern(self, pattern):
+    def clear_pattern(self, pattern, batch_size=500):
         """
         Remove todas as chaves que correspondem ao padrão
         
+        Usa SCAN incremental e remove em lotes (sem KEYS nem pipeline único
+        com todas as chaves), sem bloquear o Redis compartilhado com o broker.
+        
         Args:
             pattern: Padrão de busca (ex: 'openai:*')
+            batch_size: Chaves por lote de SCAN/remoção
         
         Returns:
             int: Número de chaves removidas
         """
         try:
-            # Nota: Esta funcionalidade depende do backend Redis
             from django.core.cache import caches
             redis_cache = caches['default']
             
-            if hasattr(redis_cache, 'delete_pattern'):
-                count = redis_cache.delete_pattern(pattern)
-                logger.info(f"Cache CLEAR PATTERN: {pattern} ({count} chaves)")
-                return count
-            else:
-                logger.warning("Backend de cache não suporta delete_pattern")
+            if not hasattr(redis_cache, 'iter_keys'):
+                logger.warning("Backend de cache não suporta iter_keys")
                 return 0
+            
+            count = 0
+            batch = []
+            for key in redis_cache.iter_keys(pattern, itersize=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    redis_cache.delete_many(batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                redis_cache.delete_many(batch)
+                count += len(batch)
+            
+            logger.info(f"Cache CLEAR PATTERN: {pattern} ({count} chaves)")
+            return count
                 
         except Exception as e:
             logger.error(f"Erro ao limpar cache por padrão: {e}")
@@ -143,7 +159,7 @@ cache_manager = CacheManager()
 
 def cache_ai_response(provider, operation, params, response_data, ttl=None):
     """
-    Cache de resposta de IA
+    Cache de resposta de IA (chave canônica, ver AIResponseCache)
     
     Args:
         provider: Provedor (openai, gemini, perplexity)
@@ -155,12 +171,7 @@ def cache_ai_response(provider, operation, params, response_data, ttl=None):
     Returns:
         bool: True se cacheado com sucesso
     """
-    cache_key = cache_manager.generate_cache_key(
-        f"ai:{provider}:{operation}",
-        **params
-    )
-    
-    return cache_manager.set_cached_response(cache_key, response_data, ttl)
+    return ai_cache.set(provider, operation, params, response_data, ttl)
 
 
 def get_cached_ai_response(provider, operation, params):
@@ -175,12 +186,7 @@ def get_cached_ai_response(provider, operation, params):
     Returns:
         dict ou None: Resposta cacheada ou None
     """
-    cache_key = cache_manager.generate_cache_key(
-        f"ai:{provider}:{operation}",
-        **params
-    )
-    
-    return cache_manager.get_cached_response(cache_key)
+    return ai_cache.get(provider, operation, params)
 
 
 def clear_ai_cache(provider=None):
@@ -193,9 +199,4 @@ def clear_ai_cache(provider=None):
     Returns:
         int: Número de chaves removidas
     """
-    if provider:
-        pattern = f"ai:{provider}:*"
-    else:
-        pattern = "ai:*"
-    
-    return cache_manager.clear_pattern(pattern)
+    return ai_cache.clear(provider)
@@ -0,0 +1,298 @@
+"""
+IAMKT - Manutenção do cache de IA
+Eviction por inatividade (LRU) e por orçamento de bytes, em lotes,
+a partir do índice por namespace mantido pelo AIResponseCache
+
+O Redis é compartilhado com o broker do Celery: respostas de IA sem limite
+(TTL de 30 dias) poderiam levar o Redis ao maxmemory e à perda de mensagens.
+"""
+import logging
+import time
+
+from django.conf import settings
+
+from apps.utils.ai_cache import AIResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+class AICacheMaintenance:
+    """
+    Uso:
+        result = AICacheMaintenance.run()
+        report = AICacheMaintenance.report()
+    """
+
+    # Remove um lote de chaves (valor + índices) e desconta os bytes do namespace
+    EVICT_SCRIPT = """
+        local freed = 0
+        local removed = 0
+        for i = 4, #KEYS do
+            local size = redis.call('ZSCORE', KEYS[2], KEYS[i])
+            if size then
+                freed = freed + tonumber(size)
+            end
+            removed = removed + redis.call('UNLINK', KEYS[i])
+            redis.call('ZREM', KEYS[1], KEYS[i])
+            redis.call('ZREM', KEYS[2], KEYS[i])
+        end
+        if freed > 0 then
+            redis.call('HINCRBY', KEYS[3], ARGV[1], -freed)
+        end
+        return {removed, freed}
+    """
+
+    @staticmethod
+    def _get_redis():
+        return AIResponseCache._get_redis()
+
+    @staticmethod
+    def _batch_size():
+        return getattr(settings, 'IA_CACHE_EVICTION_BATCH_SIZE', 200)
+
+    @staticmethod
+    def _lru_key(namespace):
+        return AIResponseCache.LRU_KEY.format(namespace=namespace)
+
+    @staticmethod
+    def _size_key(namespace):
+        return AIResponseCache.SIZE_KEY.format(namespace=namespace)
+
+    @classmethod
+    def namespaces(cls, conn=None):
+        conn = conn or cls._get_redis()
+        return sorted(namespace.decode() for namespace in conn.smembers(AIResponseCache.NAMESPACES_KEY))
+
+    # ============================================
+    # EVICTION
+    # ============================================
+
+    @classmethod
+    def _evict(cls, conn, namespace, keys):
+        """Remove lote de chaves do namespace. Returns: (removidas, bytes liberados)"""
+        if not keys:
+            return 0, 0
+        removed, freed = conn.eval(
+            cls.EVICT_SCRIPT,
+            3 + len(keys),
+            cls._lru_key(namespace),
+            cls._size_key(namespace),
+            AIResponseCache.BYTES_KEY,
+            *keys,
+            namespace
+        )
+        return int(removed), int(freed)
+
+    @classmethod
+    def prune_missing(cls, conn, namespace):
+        """
+        Remove do índice chaves que já expiraram (TTL) e recalcula o total de bytes
+
+        Percorre o sorted set com ZSCAN em lotes (sem bloquear o Redis).
+
+        Returns:
+            int: Entradas órfãs removidas
+        """
+        size_key = cls._size_key(namespace)
+        batch_size = cls._batch_size()
+        pruned = 0
+        live_bytes = 0
+        batch = []
+
+        def flush(batch):
+            pipe = conn.pipeline(transaction=False)
+            for member, _ in batch:
+                pipe.exists(member)
+            missing = [member for (member, _), exists in zip(batch, pipe.execute()) if not exists]
+            if missing:
+                pipe = conn.pipeline(transaction=False)
+                pipe.zrem(cls._lru_key(namespace), *missing)
+                pipe.zrem(size_key, *missing)
+                pipe.execute()
+            missing = set(missing)
+            return len(missing), sum(int(size) for member, size in batch if member not in missing)
+
+        for member, size in conn.zscan_iter(size_key, count=batch_size):
+            batch.append((member, size))
+            if len(batch) >= batch_size:
+                count, live = flush(batch)
+                pruned += count
+                live_bytes += live
+                batch = []
+        if batch:
+            count, live = flush(batch)
+            pruned += count
+            live_bytes += live
+
+        if conn.zcard(size_key):
+            conn.hset(AIResponseCache.BYTES_KEY, namespace, live_bytes)
+        else:
+            pipe = conn.pipeline(transaction=True)
+            pipe.unlink(cls._lru_key(namespace), size_key)
+            pipe.hdel(AIResponseCache.BYTES_KEY, namespace)
+            pipe.srem(AIResponseCache.NAMESPACES_KEY, namespace)
+            pipe.execute()
+
+        return pruned
+
+    @classmethod
+    def evict_idle(cls, conn, namespace, max_idle):
+        """
+        Remove entradas sem acesso há mais de max_idle segundos
+
+        Returns:
+            tuple: (removidas, bytes liberados)
+        """
+        cutoff = time.time() - max_idle
+        batch_size = cls._batch_size()
+        removed = freed = 0
+        while True:
+            keys = conn.zrangebyscore(cls._lru_key(namespace), '-inf', cutoff, start=0, num=batch_size)
+            if not keys:
+                break
+            count, size = cls._evict(conn, namespace, keys)
+            removed += count
+            freed += size
+        return removed, freed
+
+    @classmethod
+    def _namespace_bytes(cls, conn, namespace):
+        return int(conn.hget(AIResponseCache.BYTES_KEY, namespace) or 0)
+
+    @classmethod
+    def evict_to_budget(cls, conn, namespace, max_bytes):
+        """
+        Remove entradas menos usadas até o namespace caber em max_bytes
+
+        Returns:
+            tuple: (removidas, bytes liberados)
+        """
+        batch_size = cls._batch_size()
+        removed = freed = 0
+        while cls._namespace_bytes(conn, namespace) > max_bytes:
+            keys = conn.zrange(cls._lru_key(namespace), 0, batch_size - 1)
+            if not keys:
+                break
+            count, size = cls._evict(conn, namespace, keys)
+            removed += count
+            freed += size
+        return removed, freed
+
+    @classmethod
+    def evict_global(cls, conn, max_bytes):
+        """
+        Orçamento total: remove lotes do namespace com a entrada mais antiga
+        até o cache inteiro caber em max_bytes
+
+        Returns:
+            tuple: (removidas, bytes liberados)
+        """
+        batch_size = cls._batch_size()
+        removed = freed = 0
+        while True:
+            totals = {
+                namespace.decode(): int(size)
+                for namespace, size in conn.hgetall(AIResponseCache.BYTES_KEY).items()
+            }
+            if sum(totals.values()) <= max_bytes:
+                break
+
+            pipe = conn.pipeline(transaction=False)
+            for namespace in totals:
+                pipe.zrange(cls._lru_key(namespace), 0, 0, withscores=True)
+            oldest = [
+                (head[0][1], namespace)
+                for namespace, head in zip(totals, pipe.execute())
+                if head
+            ]
+            if not oldest:
+                break
+
+            _, namespace = min(oldest)
+            keys = conn.zrange(cls._lru_key(namespace), 0, batch_size - 1)
+            count, size = cls._evict(conn, namespace, keys)
+            removed += count
+            freed += size
+        return removed, freed
+
+    # ============================================
+    # EXECUÇÃO / RELATÓRIO
+    # ============================================
+
+    @classmethod
+    def run(cls):
+        """
+        Ciclo completo: órfãos → inatividade → orçamento por namespace → orçamento total
+
+        Returns:
+            dict: {'pruned', 'evicted', 'freed_bytes', 'namespaces'}
+        """
+        conn = cls._get_redis()
+        max_idle = getattr(settings, 'IA_CACHE_MAX_IDLE_SECONDS', 1209600)
+        namespace_budget = getattr(settings, 'IA_CACHE_NAMESPACE_MAX_BYTES', 64 * 1024 * 1024)
+        global_budget = getattr(settings, 'IA_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+
+        pruned = evicted = freed = 0
+        namespaces = cls.namespaces(conn)
+        for namespace in namespaces:
+            pruned += cls.prune_missing(conn, namespace)
+
+            count, size = cls.evict_idle(conn, namespace, max_idle)
+            evicted += count
+            freed += size
+
+            count, size = cls.evict_to_budget(conn, namespace, namespace_budget)
+            evicted += count
+            freed += size
+
+        count, size = cls.evict_global(conn, global_budget)
+        evicted += count
+        freed += size
+
+        logger.info(
+            f"[AI_CACHE] Manutenção: {len(namespaces)} namespaces, {pruned} órfãos, "
+            f"{evicted} removidas, {freed} bytes liberados"
+        )
+        return {
+            'pruned': pruned,
+            'evicted': evicted,
+            'freed_bytes': freed,
+            'namespaces': len(namespaces),
+        }
+
+    @classmethod
+    def report(cls):
+        """
+        Memória usada por namespace
+
+        Returns:
+            dict: {
+                'namespaces': [{'namespace', 'entries', 'bytes'}] (maior primeiro),
+                'total_entries', 'total_bytes', 'redis_used_memory'
+            }
+        """
+        conn = cls._get_redis()
+        namespaces = cls.namespaces(conn)
+
+        pipe = conn.pipeline(transaction=False)
+        for namespace in namespaces:
+            pipe.zcard(cls._size_key(namespace))
+            pipe.hget(AIResponseCache.BYTES_KEY, namespace)
+        values = pipe.execute()
+
+        rows = [
+            {
+                'namespace': namespace,
+                'entries': int(values[i * 2]),
+                'bytes': int(values[i * 2 + 1] or 0),
+            }
+            for i, namespace in enumerate(namespaces)
+        ]
+        rows.sort(key=lambda row: row['bytes'], reverse=True)
+
+        return {
+            'namespaces': rows,
+            'total_entries': sum(row['entries'] for row in rows),
+            'total_bytes': sum(row['bytes'] for row in rows),
+            'redis_used_memory': conn.info('memory').get('used_memory'),
+        }
@@ -0,0 +1,166 @@
+"""
+IAMKT - Image Analysis Pipeline
+Decodifica a imagem uma única vez e extrai tudo que o upload precisa:
+validação, formato, dimensões, hashes, thumbnail e original comprimido
+"""
+import imagehash
+from PIL import Image
+import logging
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_ALLOWED_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP', 'BMP')
+
+# Lado mínimo da decodificação reduzida (JPEG via Image.draft) usada quando
+# não há hashes nem original comprimido a gerar (apenas thumbnail)
+DRAFT_MIN_SIDE = 256
+
+HASH_FUNCTIONS = {
+    'phash': lambda img: imagehash.phash(img, hash_size=16),
+    'ahash': lambda img: imagehash.average_hash(img, hash_size=8),
+    'dhash': lambda img: imagehash.dhash(img, hash_size=8),
+}
+
+
+class ImageAnalysisError(Exception):
+    """Imagem inválida (tamanho, formato ou conteúdo corrompido)"""
+    pass
+
+
+def _read_bytes(image_file):
+    """Lê o conteúdo do arquivo uma única vez, preservando a posição para uso posterior"""
+    if isinstance(image_file, (bytes, bytearray)):
+        return bytes(image_file)
+    if isinstance(image_file, str):
+        with open(image_file, 'rb') as f:
+            return f.read()
+    image_file.seek(0)
+    data = image_file.read()
+    image_file.seek(0)
+    return data
+
+
+def load_hash_source(image_file):
+    """
+    Decodifica imagem em resolução completa para o cálculo de hashes
+
+    Hashes perceptuais precisam da decodificação completa: a escala reduzida
+    (Image.draft) muda vários bits do pHash e quebra a comparação com os
+    hashes já gravados (limite de similaridade da deduplicação).
+
+    Args:
+        image_file: Arquivo de imagem (File, BytesIO, bytes ou path)
+
+    Returns:
+        PIL.Image: Imagem decodificada (imagehash converte para tons de cinza)
+    """
+    img = Image.open(BytesIO(_read_bytes(image_file)))
+    img.load()
+    return img
+
+
+def analyze_image(
+    image_file,
+    hashes=('phash',),
+    thumbnail=False,
+    compress=False,
+    max_size_mb=10,
+    allowed_formats=DEFAULT_ALLOWED_FORMATS,
+):
+    """
+    Analisa imagem com uma única decodificação
+
+    O cabeçalho é lido sem decodificar (formato, dimensões, validação).
+    Hashes e original comprimido usam a decodificação completa; quando só
+    o thumbnail é necessário, JPEGs são decodificados em escala reduzida via
+    Image.draft. Todas as saídas derivam do mesmo bitmap decodificado.
+
+    Args:
+        image_file: Arquivo de imagem (File, BytesIO, bytes ou path)
+        hashes: Hashes a calcular ('phash', 'ahash', 'dhash')
+        thumbnail: Se deve gerar thumbnail (ImageProcessor.THUMBNAIL_MAX_SIZE)
+        compress: Se deve gerar original comprimido
+        max_size_mb: Tamanho máximo em MB (None = sem limite)
+        allowed_formats: Formatos permitidos (padrão: JPEG, PNG, GIF, WEBP, BMP; None = qualquer)
+
+    Returns:
+        dict: {
+            'width': int,
+            'height': int,
+            'format': str,
+            'mode': str,
+            'size_bytes': int,
+            'hashes': {'phash': str, ...},
+            'thumbnail': bytes|None,
+            'original': bytes|None,   # comprimido (se compress=True)
+        }
+
+    Raises:
+        ImageAnalysisError: Se a imagem for inválida
+    """
+    from apps.core.services.image_processor import ImageProcessor
+
+    data = _read_bytes(image_file)
+    size_bytes = len(data)
+
+    # Verificar tamanho
+    if max_size_mb is not None:
+        size_mb = size_bytes / (1024 * 1024)
+        if size_mb > max_size_mb:
+            raise ImageAnalysisError(f"Arquivo muito grande ({size_mb:.1f}MB). Máximo: {max_size_mb}MB")
+
+    # Cabeçalho (sem decodificar pixels)
+    try:
+        img = Image.open(BytesIO(data))
+    except Exception as e:
+        raise ImageAnalysisError(f"Erro ao validar imagem: {str(e)}")
+
+    format_name = img.format
+    width, height = img.size
+    mode = img.mode
+
+    if allowed_formats is not None and format_name not in allowed_formats:
+        raise ImageAnalysisError(f"Formato não permitido: {format_name}. Permitidos: {', '.join(allowed_formats)}")
+
+    result = {
+        'width': width,
+        'height': height,
+        'format': format_name,
+        'mode': mode,
+        'size_bytes': size_bytes,
+        'hashes': {},
+        'thumbnail': None,
+        'original': None,
+    }
+
+    if not (hashes or thumbnail or compress):
+        return result
+
+    # Decodificação reduzida (JPEG) apenas para thumbnail: hashes precisam da
+    # resolução completa para continuarem comparáveis aos já gravados
+    if not (compress or hashes) and format_name == 'JPEG':
+        target = max(DRAFT_MIN_SIDE, *ImageProcessor.THUMBNAIL_MAX_SIZE)
+        img.draft(img.mode, (target, target))
+
+    # Única decodificação
+    try:
+        img.load()
+    except Exception as e:
+        raise ImageAnalysisError(f"Erro ao decodificar imagem: {str(e)}")
+
+    if compress:
+        result['original'] = ImageProcessor.encode(img, format_name)
+
+    if thumbnail:
+        result['thumbnail'] = ImageProcessor.encode_thumbnail(img, format_name)
+
+    for name in hashes:
+        result['hashes'][name] = str(HASH_FUNCTIONS[name](img))
+
+    logger.info(
+        f"Imagem analisada: {format_name} {width}x{height} "
+        f"({size_bytes} bytes, hashes={list(result['hashes'])})"
+    )
+    return result
@@ -3,9 +3,16 @@ IAMKT - Image Hash Utilities
 Sistema anti-repetição de imagens usando hash perceptual
 """
 import imagehash
-from PIL import Image
+import numpy as np
 import logging
-from io import BytesIO
+
+from apps.utils.image_analysis import (
+    DEFAULT_ALLOWED_FORMATS,
+    ImageAnalysisError,
+    analyze_image,
+    load_hash_source,
+)
+from apps.utils.image_hash_index import ImageHashIndex, hamming_distances, hex_hash_to_bytes
 
 logger = logging.getLogger(__name__)
 
@@ -25,17 +32,8 @@ def calculate_perceptual_hash(image_file, hash_size=16):
         Exception: Se houver erro ao processar a imagem
     """
     try:
-        # Abrir imagem
-        if isinstance(image_file, str):
-            img = Image.open(image_file)
-        else:
-            # Se for um arquivo Django, precisamos ler o conteúdo
-            if hasattr(image_file, 'read'):
-                image_file.seek(0)  # Garantir que estamos no início
-                img = Image.open(BytesIO(image_file.read()))
-                image_file.seek(0)  # Resetar para uso posterior
-            else:
-                img = Image.open(image_file)
+        # Decodificação completa (mesma base de analyze_image)
+        img = load_hash_source(image_file)
         
         # Calcular hash perceptual (pHash)
         # pHash é mais robusto que aHash para detectar imagens similares
@@ -61,15 +59,7 @@ def calculate_average_hash(image_file, hash_size=8):
         str: Hash médio em formato hexadecimal
     """
     try:
-        if isinstance(image_file, str):
-            img = Image.open(image_file)
-        else:
-            if hasattr(image_file, 'read'):
-                image_file.seek(0)
-                img = Image.open(BytesIO(image_file.read()))
-                image_file.seek(0)
-            else:
-                img = Image.open(image_file)
+        img = load_hash_source(image_file)
         
         hash_value = imagehash.average_hash(img, hash_size=hash_size)
         return str(hash_value)
@@ -91,15 +81,7 @@ def calculate_difference_hash(image_file, hash_size=8):
         str: Hash de diferença em formato hexadecimal
     """
     try:
-        if isinstance(image_file, str):
-            img = Image.open(image_file)
-        else:
-            if hasattr(image_file, 'read'):
-                image_file.seek(0)
-                img = Image.open(BytesIO(image_file.read()))
-                image_file.seek(0)
-            else:
-                img = Image.open(image_file)
+        img = load_hash_source(image_file)
         
         hash_value = imagehash.dhash(img, hash_size=hash_size)
         return str(hash_value)
@@ -232,19 +214,26 @@ def find_similar_images_in_queryset(new_image_file, queryset, threshold=10):
         # Calcular hash da nova imagem
         new_hash = calculate_perceptual_hash(new_image_file)
         
-        # Extrair hashes existentes
-        existing_hashes = list(queryset.values_list('perceptual_hash', flat=True))
+        # Extrair hashes existentes (válidos) e comparar todos de uma vez
+        ids, packed = [], []
+        for obj_id, existing_hash in queryset.values_list('id', 'perceptual_hash'):
+            value = hex_hash_to_bytes(existing_hash)
+            if value is not None:
+                ids.append(obj_id)
+                packed.append(value)
         
-        # Verificar similaridade
-        is_similar, similar_hash, min_diff = is_image_similar(
-            new_hash, 
-            existing_hashes, 
-            threshold
-        )
+        target = hex_hash_to_bytes(new_hash)
+        if not packed or target is None:
+            return False, None, None
         
-        if is_similar:
+        matrix = np.frombuffer(b''.join(packed), dtype=np.uint64).reshape(len(packed), -1)
+        distances = hamming_distances(target, matrix)
+        best = int(distances.argmin())
+        min_diff = int(distances[best])
+        
+        if min_diff <= threshold:
             # Encontrar o objeto correspondente
-            similar_obj = queryset.filter(perceptual_hash=similar_hash).first()
+            similar_obj = queryset.filter(id=ids[best]).first()
             return True, similar_obj, min_diff
         
         return False, None, min_diff
@@ -254,6 +243,43 @@ def find_similar_images_in_queryset(new_image_file, queryset, threshold=10):
         return False, None, None
 
 
+def find_similar_reference_image(new_hash, knowledge_base_id, threshold=10):
+    """
+    Busca ReferenceImage similar usando o índice vetorizado da Base de Conhecimento
+    
+    Diferente de find_similar_images_in_queryset, recebe o hash já calculado
+    (permitindo reutilizá-lo ao salvar) e não percorre o QuerySet: as distâncias
+    são calculadas no índice Redis/NumPy (ImageHashIndex).
+    
+    Args:
+        new_hash: Hash perceptual da nova imagem (hex)
+        knowledge_base_id: ID da Base de Conhecimento
+        threshold: Limite de similaridade
+    
+    Returns:
+        tuple: (bool, ReferenceImage|None, int|None)
+               - Encontrou similar?
+               - Objeto ReferenceImage mais similar
+               - Diferença
+    """
+    from apps.knowledge.models import ReferenceImage
+    
+    matches = ImageHashIndex(knowledge_base_id).search(new_hash, threshold=threshold)
+    
+    # Índice pode conter imagem removida fora dos signals: validar no banco
+    for image_id, diff in matches:
+        similar_obj = ReferenceImage.objects.filter(
+            id=image_id,
+            knowledge_base_id=knowledge_base_id
+        ).first()
+        if similar_obj:
+            logger.info(f"Imagem similar encontrada! Diferença: {diff}")
+            return True, similar_obj, diff
+        ImageHashIndex(knowledge_base_id).remove(image_id)
+    
+    return False, None, None
+
+
 def get_image_dimensions(image_file):
     """
     Retorna dimensões de uma imagem
@@ -265,17 +291,9 @@ def get_image_dimensions(image_file):
         tuple: (width, height)
     """
     try:
-        if isinstance(image_file, str):
-            img = Image.open(image_file)
-        else:
-            if hasattr(image_file, 'read'):
-                image_file.seek(0)
-                img = Image.open(BytesIO(image_file.read()))
-                image_file.seek(0)
-            else:
-                img = Image.open(image_file)
-        
-        return img.size  # (width, height)
+        # Apenas cabeçalho, sem decodificar pixels
+        info = analyze_image(image_file, hashes=(), max_size_mb=None, allowed_formats=None)
+        return info['width'], info['height']
         
     except Exception as e:
         logger.error(f"Erro ao obter dimensões da imagem: {e}")
@@ -297,27 +315,14 @@ def validate_image_file(image_file, max_size_mb=10, allowed_formats=None):
                - Mensagem de erro (se inválido)
     """
     if allowed_formats is None:
-        allowed_formats = ['JPEG', 'PNG', 'GIF', 'WEBP', 'BMP']
+        allowed_formats = DEFAULT_ALLOWED_FORMATS
     
     try:
-        # Verificar tamanho
-        if hasattr(image_file, 'size'):
-            size_mb = image_file.size / (1024 * 1024)
-            if size_mb > max_size_mb:
-                return False, f"Arquivo muito grande ({size_mb:.1f}MB). Máximo: {max_size_mb}MB"
-        
-        # Verificar formato
-        if hasattr(image_file, 'read'):
-            image_file.seek(0)
-            img = Image.open(BytesIO(image_file.read()))
-            image_file.seek(0)
-        else:
-            img = Image.open(image_file)
-        
-        if img.format not in allowed_formats:
-            return False, f"Formato não permitido: {img.format}. Permitidos: {', '.join(allowed_formats)}"
-        
+        # Tamanho e formato verificados pelo cabeçalho, sem decodificar pixels
+        analyze_image(image_file, hashes=(), max_size_mb=max_size_mb, allowed_formats=allowed_formats)
         return True, None
         
+    except ImageAnalysisError as e:
+        return False, str(e)
     except Exception as e:
         return False, f"Erro ao validar imagem: {str(e)}"
@@ -0,0 +1,216 @@
+"""
+IAMKT - Índice de similaridade de hashes perceptuais
+Busca vetorizada (NumPy) de imagens de referência similares por Base de Conhecimento
+"""
+import logging
+
+import numpy as np
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+# pHash com hash_size=16 → 256 bits → 64 caracteres hex → 32 bytes
+HASH_BYTES = 32
+
+_BUILT_MARKER = b'_built'
+
+
+def hex_hash_to_bytes(hex_hash):
+    """
+    Converte hash hexadecimal para bytes empacotados
+
+    Args:
+        hex_hash: Hash em formato hexadecimal (64 caracteres)
+
+    Returns:
+        bytes|None: 32 bytes, ou None se o hash for inválido/pendente
+    """
+    if not hex_hash or len(hex_hash) != HASH_BYTES * 2:
+        return None
+    try:
+        return bytes.fromhex(hex_hash)
+    except ValueError:
+        return None
+
+
+def hamming_distances(target, matrix):
+    """
+    Calcula distância de Hamming entre um hash e N hashes de uma só vez
+
+    Args:
+        target: bytes do hash alvo (HASH_BYTES)
+        matrix: np.ndarray uint64 de shape (N, HASH_BYTES // 8)
+
+    Returns:
+        np.ndarray: Distâncias (N,)
+    """
+    target_words = np.frombuffer(target, dtype=np.uint64)
+    xor = np.bitwise_xor(matrix, target_words)
+
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(xor).sum(axis=1, dtype=np.int64)
+
+    # NumPy < 2.0: popcount via unpackbits
+    return np.unpackbits(xor.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+class ImageHashIndex:
+    """
+    Índice de hashes perceptuais de ReferenceImage por Base de Conhecimento
+
+    Os hashes ficam num hash Redis (campo = id da imagem, valor = 32 bytes),
+    atualizado incrementalmente nos signals de ReferenceImage. A busca carrega
+    a matriz inteira com um HGETALL e calcula todas as distâncias de Hamming
+    num único passo NumPy (XOR + popcount), sem criar objetos imagehash.
+
+    Uso:
+        index = ImageHashIndex(kb.id)
+        image_id, diff = index.nearest(new_hash)
+    """
+
+    KEY_PREFIX = 'image_hash_index'
+
+    def __init__(self, knowledge_base_id):
+        self.knowledge_base_id = knowledge_base_id
+        self.key = f"{self.KEY_PREFIX}:{knowledge_base_id}"
+
+    @staticmethod
+    def _get_redis():
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    # ============================================
+    # CONSTRUÇÃO / ATUALIZAÇÃO INCREMENTAL
+    # ============================================
+
+    def rebuild(self):
+        """
+        Reconstrói o índice a partir do banco
+
+        Returns:
+            dict: {image_id: bytes}
+        """
+        from apps.knowledge.models import ReferenceImage
+
+        rows = ReferenceImage.objects.filter(
+            knowledge_base_id=self.knowledge_base_id
+        ).values_list('id', 'perceptual_hash')
+
+        entries = {}
+        for image_id, hex_hash in rows:
+            packed = hex_hash_to_bytes(hex_hash)
+            if packed is not None:
+                entries[image_id] = packed
+
+        conn = self._get_redis()
+        pipe = conn.pipeline(transaction=True)
+        pipe.delete(self.key)
+        pipe.hset(self.key, mapping={_BUILT_MARKER: b'', **{str(k): v for k, v in entries.items()}})
+        pipe.execute()
+
+        logger.info(f"Índice de hashes reconstruído: KB #{self.knowledge_base_id} ({len(entries)} imagens)")
+        return entries
+
+    def add(self, image_id, hex_hash):
+        """Adiciona/atualiza imagem no índice (ignora hashes pendentes/inválidos)"""
+        packed = hex_hash_to_bytes(hex_hash)
+        conn = self._get_redis()
+
+        if packed is None:
+            conn.hdel(self.key, str(image_id))
+            return
+
+        # Só atualiza índice já construído; caso contrário a próxima busca reconstrói
+        if conn.hexists(self.key, _BUILT_MARKER):
+            conn.hset(self.key, str(image_id), packed)
+
+    def remove(self, image_id):
+        """Remove imagem do índice"""
+        self._get_redis().hdel(self.key, str(image_id))
+
+    def _load(self):
+        """Carrega entradas do Redis, reconstruindo se necessário"""
+        raw = self._get_redis().hgetall(self.key)
+
+        if _BUILT_MARKER not in raw:
+            return self.rebuild()
+
+        return {
+            int(field): value
+            for field, value in raw.items()
+            if field != _BUILT_MARKER and len(value) == HASH_BYTES
+        }
+
+    # ============================================
+    # BUSCA
+    # ============================================
+
+    def search(self, hex_hash, threshold=10):
+        """
+        Busca imagens com distância <= threshold
+
+        Args:
+            hex_hash: Hash perceptual da nova imagem
+            threshold: Limite de diferença (mesma escala de compare_hashes)
+
+        Returns:
+            list: [(image_id, diferença)] ordenado por diferença
+        """
+        target = hex_hash_to_bytes(hex_hash)
+        if target is None:
+            return []
+
+        try:
+            entries = self._load()
+        except Exception as e:
+            logger.error(f"Erro ao carregar índice de hashes: {e}")
+            return []
+
+        if not entries:
+            return []
+
+        ids = np.fromiter(entries.keys(), dtype=np.int64, count=len(entries))
+        matrix = np.frombuffer(b''.join(entries.values()), dtype=np.uint64).reshape(len(entries), -1)
+
+        distances = hamming_distances(target, matrix)
+        mask = distances <= threshold
+        order = np.argsort(distances[mask], kind='stable')
+
+        return [
+            (int(image_id), int(diff))
+            for image_id, diff in zip(ids[mask][order], distances[mask][order])
+        ]
+
+    def nearest(self, hex_hash):
+        """
+        Retorna a imagem mais próxima
+
+        Returns:
+            tuple: (image_id|None, diferença|None)
+        """
+        results = self.search(hex_hash, threshold=HASH_BYTES * 8)
+        return results[0] if results else (None, None)
+
+
+def schedule_index_update(knowledge_base_id, image_id, hex_hash=None, removed=False):
+    """
+    Agenda atualização do índice para após o commit da transação
+
+    Args:
+        knowledge_base_id: ID da Base de Conhecimento
+        image_id: ID da ReferenceImage
+        hex_hash: Hash perceptual (para inclusão/atualização)
+        removed: True se a imagem foi removida
+    """
+    def _apply():
+        try:
+            index = ImageHashIndex(knowledge_base_id)
+            if removed:
+                index.remove(image_id)
+            else:
+                index.add(image_id, hex_hash)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar índice de hashes (KB #{knowledge_base_id}): {e}")
+
+    transaction.on_commit(_apply)
@@ -22,9 +22,33 @@ app.conf.beat_schedule = {
         'task': 'apps.content.tasks.monitor_trends_task',
         'schedule': crontab(hour=9, minute=0),  # Diariamente às 9h
     },
-    'cleanup-cache-weekly': {
+    'flush-quota-counters': {
+        'task': 'apps.core.tasks.flush_quota_counters',
+        'schedule': 60.0,  # A cada minuto
+    },
+    'flush-ia-usage': {
+        'task': 'apps.content.tasks.flush_ia_usage_task',
+        'schedule': 60.0,  # A cada minuto
+    },
+    'refresh-ia-usage-rollups': {
+        'task': 'apps.content.tasks.refresh_ia_usage_rollups_task',
+        'schedule': crontab(minute='*/15'),  # A cada 15 minutos
+    },
+    'requeue-pending-webhooks': {
+        'task': 'apps.core.tasks.requeue_pending_webhooks',
+        'schedule': 300.0,  # A cada 5 minutos
+    },
+    'send-email-outbox': {
+        'task': 'apps.core.tasks.send_email_outbox',
+        'schedule': 60.0,  # A cada minuto (retentativas da outbox de emails)
+    },
+    'check-quota-alerts-hourly': {
+        'task': 'apps.core.tasks.check_quota_alerts',
+        'schedule': crontab(minute=5),  # A cada hora
+    },
+    'cleanup-cache-hourly': {
         'task': 'apps.content.tasks.cleanup_old_cache_task',
-        'schedule': crontab(day_of_week=0, hour=2, minute=0),  # Domingos às 2h
+        'schedule': crontab(minute=30),  # A cada hora (orçamento de memória do cache de IA)
     },
 }
 
@@ -19,6 +19,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 THIRD_PARTY_APPS = [
@@ -42,6 +43,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'apps.core.middleware.RequestContextMiddleware',  # Request ID + tempos por request
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -49,6 +51,7 @@ MIDDLEWARE = [
     'apps.core.middleware.TenantMiddleware',  # Tenant detection
     'apps.core.middleware.TenantIsolationMiddleware',  # Tenant isolation
     'apps.core.middleware_onboarding.OnboardingRequiredMiddleware',  # Onboarding restriction
+    'apps.core.middleware.ProfilingMiddleware',  # Profiling amostrado (queries, cache, Server-Timing)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,7 +60,7 @@ ROOT_URLCONF = 'sistema.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'apps.core.profiling.ProfiledDjangoTemplates',  # DjangoTemplates + tempo de render
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -132,6 +135,13 @@ NOTIFICATION_EMAILS_OPERACAO = config('NOTIFICATION_EMAILS_OPERACAO', default=''
 NOTIFICATION_EMAILS_POSTS = config('NOTIFICATION_EMAILS_POSTS', default='')
 NEWUSER_NOTIFICATION_EMAILS = config('NEWUSER_NOTIFICATION_EMAILS', default='')
 
+# EMAIL OUTBOX (apps.core.services.email_outbox)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)
+EMAIL_OUTBOX_RATE_PER_MINUTE = config('EMAIL_OUTBOX_RATE_PER_MINUTE', default=120, cast=int)  # 0 = sem limite
+EMAIL_OUTBOX_MAX_RETRIES = config('EMAIL_OUTBOX_MAX_RETRIES', default=5, cast=int)
+EMAIL_OUTBOX_RETRY_DELAY = config('EMAIL_OUTBOX_RETRY_DELAY', default=60, cast=int)  # segundos (dobra a cada tentativa)
+EMAIL_OUTBOX_DEBOUNCE_SECONDS = config('EMAIL_OUTBOX_DEBOUNCE_SECONDS', default=2, cast=int)
+
 # SITE URL (for emails)
 SITE_URL = config('SITE_URL', default='https://iamkt.aisuites.com.br')
 
@@ -142,7 +152,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/1')
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'apps.core.profiling.InstrumentedRedisCache',  # RedisCache + hits/misses
         'LOCATION': REDIS_URL,
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
@@ -200,12 +210,56 @@ AWS_S3_OBJECT_PARAMETERS = {
 }
 AWS_QUERYSTRING_EXPIRE = 604800  # 7 dias
 
+# Ingestão de imagens geradas (streaming/multipart para o S3)
+AWS_S3_MAX_POOL_CONNECTIONS = config('AWS_S3_MAX_POOL_CONNECTIONS', default=20, cast=int)
+IMAGE_INGEST_PART_SIZE = config('IMAGE_INGEST_PART_SIZE', default=8388608, cast=int)  # 8 MB
+IMAGE_INGEST_MAX_BYTES = config('IMAGE_INGEST_MAX_BYTES', default=31457280, cast=int)  # 30 MB
+
 # AWS S3 - Upload com Presigned URLs (bucket único com prefixos por organização)
 AWS_REGION = config('AWS_REGION', default='us-east-1')  # Alias para compatibilidade
 AWS_BUCKET_NAME = config('AWS_BUCKET_NAME', default='vibemkt-femme-arquivos')  # Bucket único para toda aplicação
 
+# IA FAN-OUT (chamadas concorrentes por provider nas tasks)
+AI_FANOUT_MAX_WORKERS = config('AI_FANOUT_MAX_WORKERS', default=16, cast=int)
+AI_PROVIDER_CONCURRENCY = {
+    'openai': config('AI_CONCURRENCY_OPENAI', default=4, cast=int),
+    'gemini': config('AI_CONCURRENCY_GEMINI', default=4, cast=int),
+    'perplexity': config('AI_CONCURRENCY_PERPLEXITY', default=10, cast=int),
+}
+AI_PROVIDER_TIMEOUT = {
+    'openai': config('AI_TIMEOUT_OPENAI', default=120, cast=int),
+    'gemini': config('AI_TIMEOUT_GEMINI', default=90, cast=int),
+    'perplexity': config('AI_TIMEOUT_PERPLEXITY', default=60, cast=int),
+}
+
 # IA CACHE
 IA_CACHE_TTL = config('IA_CACHE_TTL', default=2592000, cast=int)  # 30 dias
+IA_CACHE_LOCK_TIMEOUT = config('IA_CACHE_LOCK_TIMEOUT', default=120, cast=int)  # single-flight
+IA_CACHE_COMPRESS_MIN_BYTES = config('IA_CACHE_COMPRESS_MIN_BYTES', default=2048, cast=int)
+# Eviction (Redis compartilhado com o broker do Celery)
+IA_CACHE_MAX_IDLE_SECONDS = config('IA_CACHE_MAX_IDLE_SECONDS', default=1209600, cast=int)  # 14 dias sem acesso
+IA_CACHE_MAX_BYTES = config('IA_CACHE_MAX_BYTES', default=268435456, cast=int)  # 256 MB total
+IA_CACHE_NAMESPACE_MAX_BYTES = config('IA_CACHE_NAMESPACE_MAX_BYTES', default=67108864, cast=int)  # 64 MB por provider/organização
+IA_CACHE_EVICTION_BATCH_SIZE = config('IA_CACHE_EVICTION_BATCH_SIZE', default=200, cast=int)
+
+# QUOTA COUNTERS (Redis → QuotaUsageDaily)
+QUOTA_COUNTER_TTL = config('QUOTA_COUNTER_TTL', default=259200, cast=int)  # 3 dias
+QUOTA_COUNTER_FLUSH_BATCH_SIZE = config('QUOTA_COUNTER_FLUSH_BATCH_SIZE', default=500, cast=int)
+QUOTA_CYCLE_ROLLUP_TTL = config('QUOTA_CYCLE_ROLLUP_TTL', default=3024000, cast=int)  # 35 dias
+
+# USO DE IA (Redis → IAModelUsage, write-behind)
+IA_USAGE_FLUSH_BATCH_SIZE = config('IA_USAGE_FLUSH_BATCH_SIZE', default=500, cast=int)
+IA_USAGE_MAX_ATTEMPTS = config('IA_USAGE_MAX_ATTEMPTS', default=3, cast=int)  # depois: ia_usage:dead
+
+# POSTS FEED (paginação por cursor)
+POSTS_FEED_PAGE_SIZE = config('POSTS_FEED_PAGE_SIZE', default=50, cast=int)
+POSTS_FEED_MAX_PAGE_SIZE = config('POSTS_FEED_MAX_PAGE_SIZE', default=200, cast=int)
+
+# TENANT STATE (organization + onboarding da KB, cache por organização)
+TENANT_STATE_CACHE_TTL = config('TENANT_STATE_CACHE_TTL', default=60, cast=int)
+
+# DASHBOARD (estatísticas por organização; invalidadas pelos signals de Post/Pauta)
+DASHBOARD_STATS_CACHE_TTL = config('DASHBOARD_STATS_CACHE_TTL', default=300, cast=int)
 
 # USAGE LIMITS
 DEFAULT_MONTHLY_GENERATION_LIMIT = config('DEFAULT_MONTHLY_GENERATION_LIMIT', default=100, cast=int)
@@ -228,4 +282,15 @@ N8N_RATE_LIMIT_PER_IP = config('N8N_RATE_LIMIT_PER_IP', default='10/minute')
 N8N_RATE_LIMIT_PER_ORG = config('N8N_RATE_LIMIT_PER_ORG', default='5/minute')
 N8N_MAX_RETRIES = config('N8N_MAX_RETRIES', default=3, cast=int)
 N8N_RETRY_DELAY = config('N8N_RETRY_DELAY', default=5, cast=int)
+N8N_HTTP_POOL_SIZE = config('N8N_HTTP_POOL_SIZE', default=10, cast=int)
 # N8N_INTERNAL_TOKEN removido - usar N8N_WEBHOOK_SECRET para autenticação
+
+# PROFILING POR VIEW (ProfilingMiddleware; página em /admin/profiling/)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_ORGANIZATIONS = config('PROFILING_ORGANIZATIONS', default='', cast=Csv(int))
+PROFILING_MAX_SAMPLES = config('PROFILING_MAX_SAMPLES', default=500, cast=int)
+PROFILING_QUERY_WARNING = config('PROFILING_QUERY_WARNING', default=50, cast=int)
+PROFILING_SLOW_MS = config('PROFILING_SLOW_MS', default=1000, cast=int)
+
+# LOGGING (JSON estruturado com request ID; ver logging_config.py)
+from .logging_config import LOGGING, LOG_DEBUG_SAMPLE_RATE  # noqa: E402
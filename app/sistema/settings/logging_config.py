@@ -1,6 +1,14 @@
 """
 Configuração de logging estruturado para Django
 Logs detalhados em desenvolvimento, logs estruturados em produção
+
+- Produção: um evento JSON por linha no stdout (request_id + campos extra=),
+  escrito por thread dedicada (AsyncStreamHandler)
+- LOG_LEVEL=DEBUG habilita payloads de debug, amostrados por request
+  (LOG_DEBUG_SAMPLE_RATE); ver apps/core/observability.py
+- LOG_DIR (opcional) habilita os arquivos rotativos
+- LOG_SQL=True loga cada query SQL (django.db.backends em DEBUG); desligado
+  por padrão, inclusive com DEBUG=True
 """
 
 import os
@@ -9,13 +17,23 @@ from decouple import config
 # Detectar ambiente
 DEBUG = config('DEBUG', default=False, cast=bool)
 
+LOG_LEVEL = config('LOG_LEVEL', default='DEBUG' if DEBUG else 'INFO')
+LOG_FORMAT = config('LOG_FORMAT', default='verbose' if DEBUG else 'json')
+LOG_DIR = config('LOG_DIR', default='')
+
+# Fração de requests cujos logs DEBUG (payloads) são emitidos
+LOG_DEBUG_SAMPLE_RATE = config('LOG_DEBUG_SAMPLE_RATE', default=1.0 if DEBUG else 0.01, cast=float)
+
+# Log de todas as queries SQL (apenas sob demanda)
+LOG_SQL = config('LOG_SQL', default=False, cast=bool)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     
     'formatters': {
         'verbose': {
-            'format': '[{levelname}] {asctime} {name} {module} {funcName} - {message}',
+            'format': '[{levelname}] {asctime} {name} {module} {funcName} [{request_id}] - {message}',
             'style': '{',
             'datefmt': '%Y-%m-%d %H:%M:%S',
         },
@@ -24,8 +42,7 @@ LOGGING = {
             'style': '{',
         },
         'json': {
-            '()': 'pythonjsonlogger.jsonlogger.JsonFormatter',
-            'format': '%(asctime)s %(name)s %(levelname)s %(message)s',
+            '()': 'apps.core.observability.JsonFormatter',
         },
     },
     
@@ -36,18 +53,26 @@ LOGGING = {
         'require_debug_true': {
             '()': 'django.utils.log.RequireDebugTrue',
         },
+        'request_id': {
+            '()': 'apps.core.observability.RequestIdFilter',
+        },
+        'debug_sampling': {
+            '()': 'apps.core.observability.DebugSamplingFilter',
+        },
     },
     
     'handlers': {
         'console': {
-            'level': 'DEBUG' if DEBUG else 'INFO',
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose' if DEBUG else 'simple',
+            'level': LOG_LEVEL,
+            'class': 'apps.core.observability.AsyncStreamHandler',
+            'formatter': LOG_FORMAT,
+            'filters': ['request_id', 'debug_sampling'],
         },
         'file': {
             'level': 'INFO',
             'class': 'logging.handlers.RotatingFileHandler',
-            'filename': 'logs/django.log',
+            'filename': os.path.join(LOG_DIR, 'django.log'),
+            'filters': ['request_id'],
             'maxBytes': 1024 * 1024 * 10,  # 10MB
             'backupCount': 5,
             'formatter': 'verbose',
@@ -55,7 +80,8 @@ LOGGING = {
         'error_file': {
             'level': 'ERROR',
             'class': 'logging.handlers.RotatingFileHandler',
-            'filename': 'logs/django_errors.log',
+            'filename': os.path.join(LOG_DIR, 'django_errors.log'),
+            'filters': ['request_id'],
             'maxBytes': 1024 * 1024 * 10,  # 10MB
             'backupCount': 5,
             'formatter': 'verbose',
@@ -63,7 +89,8 @@ LOGGING = {
         'security_file': {
             'level': 'WARNING',
             'class': 'logging.handlers.RotatingFileHandler',
-            'filename': 'logs/security.log',
+            'filename': os.path.join(LOG_DIR, 'security.log'),
+            'filters': ['request_id'],
             'maxBytes': 1024 * 1024 * 10,  # 10MB
             'backupCount': 5,
             'formatter': 'verbose',
@@ -71,7 +98,7 @@ LOGGING = {
         'mail_admins': {
             'level': 'ERROR',
             'class': 'django.utils.log.AdminEmailHandler',
-            'filters': ['require_debug_false'],
+            'filters': ['require_debug_false', 'request_id'],
             'formatter': 'verbose',
         },
     },
@@ -95,24 +122,14 @@ LOGGING = {
         },
         'django.db.backends': {
             'handlers': ['console'],
-            'level': 'DEBUG' if DEBUG else 'INFO',
+            'level': 'DEBUG' if LOG_SQL else 'INFO',
             'propagate': False,
         },
         
-        # Apps customizados
-        'apps.core': {
+        # Apps customizados (apps.core, apps.knowledge, apps.posts...)
+        'apps': {
             'handlers': ['console', 'file'],
-            'level': 'DEBUG' if DEBUG else 'INFO',
-            'propagate': False,
-        },
-        'apps.knowledge': {
-            'handlers': ['console', 'file'],
-            'level': 'DEBUG' if DEBUG else 'INFO',
-            'propagate': False,
-        },
-        'apps.content': {
-            'handlers': ['console', 'file'],
-            'level': 'DEBUG' if DEBUG else 'INFO',
+            'level': LOG_LEVEL,
             'propagate': False,
         },
         
@@ -129,3 +146,12 @@ LOGGING = {
         'level': 'INFO',
     },
 }
+
+# Sem LOG_DIR: apenas stdout (coletado pelo shipper de logs do container)
+if not LOG_DIR:
+    for name in ('file', 'error_file', 'security_file'):
+        LOGGING['handlers'].pop(name)
+    for logger_config in [*LOGGING['loggers'].values(), LOGGING['root']]:
+        logger_config['handlers'] = [
+            handler for handler in logger_config['handlers'] if handler in LOGGING['handlers']
+        ]
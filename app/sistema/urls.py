@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from apps.core.views import request_profiling
 from apps.core.views_auth import login_view, logout_view, register_view, register_success_view
 
 # Handler para página 404
@@ -15,6 +16,7 @@ urlpatterns = [
     path('register/success/', register_success_view, name='register_success'),
     
     # Admin
+    path('admin/profiling/', admin.site.admin_view(request_profiling), name='admin_request_profiling'),
     path('admin/', admin.site.urls),
     
     # Apps
@@ -2,16 +2,26 @@
  * ImagePreviewLoader - Lazy loading de imagens S3 com Presigned URLs
  * Seguindo padrão do guia Django S3
  * 
+ * Imagens que entram no viewport juntas são agrupadas em uma única
+ * requisição ao endpoint em lote (/knowledge/preview-urls/).
+ * 
  * Uso:
  *   const loader = new ImagePreviewLoader('/knowledge/preview-url/');
  *   loader.observeAll('.lazy-s3-image');
  */
 
 class ImagePreviewLoader {
-    constructor(previewUrlEndpoint) {
+    constructor(previewUrlEndpoint, batchUrlEndpoint = '/knowledge/preview-urls/') {
         this.previewUrlEndpoint = previewUrlEndpoint;
+        this.batchUrlEndpoint = batchUrlEndpoint;
         this.cache = new Map();  // Cache de URLs
         
+        // Chaves aguardando o próximo lote: s3Key → {resolve, reject, promise}
+        this.pending = new Map();
+        this.flushTimer = null;
+        this.batchDelay = 25;     // ms para agrupar imagens do mesmo scroll
+        this.batchSize = 100;     // Limite do backend (S3Service.MAX_BATCH_KEYS)
+        
         // IntersectionObserver para detectar imagens no viewport
         this.observer = new IntersectionObserver(
             this.handleIntersection.bind(this),
@@ -42,88 +52,137 @@ class ImagePreviewLoader {
      * Callback quando imagem entra/sai do viewport
      */
     async handleIntersection(entries) {
-        for (const entry of entries) {
-            if (entry.isIntersecting) {
-                const img = entry.target;
-                const s3Key = img.getAttribute('data-lazy-load');
-                
-                // Validar s3Key
-                if (!s3Key || s3Key === 'undefined' || s3Key === '#') {
-                    logger.warn('s3Key inválido:', s3Key);
-                    continue;
-                }
-                
-                // Já carregada? Pular
-                if (img.dataset.loaded === 'true') continue;
-                
-                try {
-                    // Mostrar loading
-                    img.classList.add('loading');
-                    
-                    // Obter URL do preview
-                    const previewUrl = await this.getPreviewUrl(s3Key);
-                    
-                    // Carregar imagem
-                    await this.loadImage(img, previewUrl);
-                    
-                    // Marcar como carregada
-                    img.dataset.loaded = 'true';
-                    img.classList.remove('loading');
-                    img.classList.add('loaded');
-                    
-                    // Parar de observar
-                    this.observer.unobserve(img);
-                    
-                } catch (error) {
-                    logger.error('Erro ao carregar preview:', error);
-                    img.classList.remove('loading');
-                    img.classList.add('error');
-                    
-                    // Mostrar imagem de erro
-                    img.src = '/static/images/image-error.png';
-                }
-            }
+        // Carrega em paralelo: as chaves entram no mesmo lote de URLs
+        await Promise.all(entries.map(entry => this.handleEntry(entry)));
+    }
+    
+    /**
+     * Carrega uma imagem que entrou no viewport
+     */
+    async handleEntry(entry) {
+        if (!entry.isIntersecting) return;
+        
+        const img = entry.target;
+        const s3Key = img.getAttribute('data-lazy-load');
+        
+        // Validar s3Key
+        if (!s3Key || s3Key === 'undefined' || s3Key === '#') {
+            logger.warn('s3Key inválido:', s3Key);
+            return;
+        }
+        
+        // Já carregada? Pular
+        if (img.dataset.loaded === 'true') return;
+        
+        try {
+            // Mostrar loading
+            img.classList.add('loading');
+            
+            // Obter URL do preview
+            const previewUrl = await this.getPreviewUrl(s3Key);
+            
+            // Carregar imagem
+            await this.loadImage(img, previewUrl);
+            
+            // Marcar como carregada
+            img.dataset.loaded = 'true';
+            img.classList.remove('loading');
+            img.classList.add('loaded');
+            
+            // Parar de observar
+            this.observer.unobserve(img);
+            
+        } catch (error) {
+            logger.error('Erro ao carregar preview:', error);
+            img.classList.remove('loading');
+            img.classList.add('error');
+            
+            // Mostrar imagem de erro
+            img.src = '/static/images/image-error.png';
         }
     }
     
     /**
-     * Obtém Presigned URL do backend (com cache)
+     * Obtém Presigned URL do backend (com cache, agrupada em lote)
      */
-    async getPreviewUrl(s3Key) {
+    getPreviewUrl(s3Key) {
         // Verificar cache
         if (this.cache.has(s3Key)) {
             const cached = this.cache.get(s3Key);
             
-            // URL ainda válida? (expira em 55 minutos)
-            if (Date.now() - cached.timestamp < 55 * 60 * 1000) {
-                return cached.url;
+            // URL ainda válida? (margem de 1 minuto)
+            if (Date.now() < cached.expiresAt - 60 * 1000) {
+                return Promise.resolve(cached.url);
             }
         }
         
-        // Buscar do backend
-        const response = await fetch(
-            `${this.previewUrlEndpoint}?s3_key=${encodeURIComponent(s3Key)}`,
-            {
-                headers: {
-                    'X-CSRFToken': this.getCookie('csrftoken')
-                }
-            }
-        );
-        
-        if (!response.ok) {
-            throw new Error(`Erro HTTP: ${response.status}`);
+        // Já aguardando no próximo lote
+        if (this.pending.has(s3Key)) {
+            return this.pending.get(s3Key).promise;
         }
         
-        const data = await response.json();
-        const previewUrl = data.data.previewUrl;
-        
-        // Salvar no cache
-        this.cache.set(s3Key, {
-            url: previewUrl,
-            timestamp: Date.now()
+        const request = {};
+        request.promise = new Promise((resolve, reject) => {
+            request.resolve = resolve;
+            request.reject = reject;
         });
+        this.pending.set(s3Key, request);
         
-        return previewUrl;
+        if (!this.flushTimer) {
+            this.flushTimer = setTimeout(() => this.flush(), this.batchDelay);
+        }
+        
+        return request.promise;
+    }
+    
+    /**
+     * Envia as chaves pendentes em lotes para o backend
+     */
+    async flush() {
+        this.flushTimer = null;
+        const pending = this.pending;
+        this.pending = new Map();
+        
+        const keys = Array.from(pending.keys());
+        for (let start = 0; start < keys.length; start += this.batchSize) {
+            const batch = keys.slice(start, start + this.batchSize);
+            
+            try {
+                const response = await fetch(this.batchUrlEndpoint, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'X-CSRFToken': this.getCookie('csrftoken')
+                    },
+                    body: JSON.stringify({ s3_keys: batch })
+                });
+                
+                if (!response.ok) {
+                    throw new Error(`Erro HTTP: ${response.status}`);
+                }
+                
+                const data = await response.json();
+                const urls = data.data.urls || {};
+                const errors = data.data.errors || {};
+                
+                batch.forEach(s3Key => {
+                    const entry = urls[s3Key];
+                    if (!entry) {
+                        pending.get(s3Key).reject(new Error(errors[s3Key] || 'URL não gerada'));
+                        return;
+                    }
+                    
+                    // Salvar no cache
+                    this.cache.set(s3Key, {
+                        url: entry.previewUrl,
+                        expiresAt: Date.now() + entry.expiresIn * 1000
+                    });
+                    pending.get(s3Key).resolve(entry.previewUrl);
+                });
+            } catch (error) {
+                batch.forEach(s3Key => pending.get(s3Key).reject(error));
+            }
+        }
     }
     
     /**
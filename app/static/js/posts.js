@@ -33,6 +33,8 @@
 
   // Dados iniciais (injetados pelo Django template)
   const INITIAL_POSTS = window.INITIAL_POSTS || [];
+  const POSTS_FEED_URL = window.POSTS_FEED_URL || '/posts/feed/';
+  const POSTS_FEED_PREFETCH_MARGIN = 5; // Carregar próxima janela quando faltar isso para o fim
   const CURRENT_USER = window.CURRENT_USER || '';
   const ORGANIZATION_ID = window.ORGANIZATION_ID || 0;
 
@@ -227,11 +229,16 @@
     perPage: 1,
     filters: { date: '', status: 'all', search: '' },
     selectedId: null,
-    restoredFromStorage: false
+    restoredFromStorage: false,
+    // Feed paginado por cursor (posts:feed)
+    nextCursor: window.POSTS_FEED_NEXT_CURSOR || null,
+    total: Number(window.POSTS_FEED_TOTAL) || INITIAL_POSTS.length,
+    serverFeed: Boolean(window.POSTS_FEED_NEXT_CURSOR),
+    loading: null
   };
 
   // Normalizar dados dos posts
-  postsState.items.forEach(item => {
+  function normalizePost(item) {
     if (!item) return;
     
     // Garantir serverId
@@ -250,7 +257,71 @@
     if (!item.statusLabel && item.status) {
       item.statusLabel = (statusInfo[item.status]?.label) || '';
     }
-  });
+  }
+
+  postsState.items.forEach(normalizePost);
+
+  /**
+   * Carrega janela do feed de posts (paginação por cursor)
+   *
+   * reset=true busca a primeira janela com os filtros atuais (substitui itens);
+   * caso contrário, anexa a próxima janela a partir de nextCursor.
+   */
+  function loadFeed({ reset = false, limit = null } = {}) {
+    if (postsState.loading) return postsState.loading;
+    if (!reset && !postsState.nextCursor) return Promise.resolve();
+
+    const params = new URLSearchParams();
+    if (!reset) params.set('cursor', postsState.nextCursor);
+    if (limit) params.set('limit', limit);
+    if (postsState.filters.date) params.set('data', postsState.filters.date);
+    if (postsState.filters.status && postsState.filters.status !== 'all') params.set('status', postsState.filters.status);
+    if (postsState.filters.search) params.set('search', postsState.filters.search);
+
+    postsState.loading = fetch(`${POSTS_FEED_URL}?${params.toString()}`, {
+      headers: { 'Accept': 'application/json' },
+      credentials: 'same-origin'
+    })
+      .then(response => {
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        return response.json();
+      })
+      .then(data => {
+        const results = (data.results || []);
+        results.forEach(normalizePost);
+
+        if (reset) {
+          postsState.items = results;
+        } else {
+          const known = new Set(postsState.items.map(item => item.id));
+          postsState.items.push(...results.filter(item => !known.has(item.id)));
+        }
+
+        postsState.nextCursor = data.next_cursor || null;
+        if (typeof data.total === 'number') postsState.total = data.total;
+      })
+      .catch(error => {
+        logger.error('[POSTS] Erro ao carregar feed:', error);
+        postsState.nextCursor = null;
+      })
+      .finally(() => {
+        postsState.loading = null;
+      });
+
+    return postsState.loading;
+  }
+
+  /**
+   * Reaplica filtros: no servidor quando o feed é parcial, senão localmente
+   */
+  function refreshFilters() {
+    postsState.page = 1;
+    if (postsState.serverFeed) {
+      loadFeed({ reset: true }).then(() => renderPosts(true));
+    } else {
+      renderPosts(true);
+    }
+  }
 
   // ============================================================================
   // REFERÊNCIAS DO DOM
@@ -836,28 +907,24 @@
   // Event listeners para filtros
   dom.filtroStatus?.addEventListener('change', () => {
     postsState.filters.status = dom.filtroStatus.value;
-    postsState.page = 1;
-    renderPosts(true);
+    refreshFilters();
   });
   
   dom.filtroData?.addEventListener('change', () => {
     postsState.filters.date = dom.filtroData.value;
-    postsState.page = 1;
-    renderPosts(true);
+    refreshFilters();
   });
   
   dom.btnBuscar?.addEventListener('click', () => {
     postsState.filters.search = dom.filtroBusca?.value.trim() || '';
-    postsState.page = 1;
-    renderPosts(true);
+    refreshFilters();
   });
   
   dom.filtroBusca?.addEventListener('keypress', (e) => {
     if (e.key === 'Enter') {
       e.preventDefault();
       postsState.filters.search = dom.filtroBusca.value.trim();
-      postsState.page = 1;
-      renderPosts(true);
+      refreshFilters();
     }
   });
 
@@ -870,9 +937,8 @@
     postsState.filters.status = 'all';
     postsState.filters.date = '';
     postsState.filters.search = '';
-    postsState.page = 1;
     
-    renderPosts(true);
+    refreshFilters();
   });
 
   /**
@@ -1241,7 +1307,8 @@
   function renderPosts(scrollIntoView = false) {
     console.log('[DEBUG renderPosts] Início');
     const filtered = applyFilters();
-    const total = filtered.length;
+    // Feed parcial: total vem do servidor (janelas restantes carregadas sob demanda)
+    const total = postsState.nextCursor ? Math.max(postsState.total, filtered.length) : filtered.length;
     console.log('[DEBUG renderPosts] Total filtrado:', total);
 
     if (total === 0) {
@@ -1291,6 +1358,17 @@
 
     postsState.page = Math.min(totalPages, Math.max(1, postsState.page));
     const startIndex = (postsState.page - 1) * postsState.perPage;
+
+    // Carregar próxima janela do feed ao se aproximar do fim dos itens carregados
+    if (postsState.nextCursor && startIndex >= filtered.length - POSTS_FEED_PREFETCH_MARGIN) {
+      const missing = startIndex - filtered.length + 1;
+      const pending = loadFeed({ limit: missing > 0 ? missing + POSTS_FEED_PREFETCH_MARGIN : null });
+      if (!filtered[startIndex]) {
+        pending.then(() => renderPosts(scrollIntoView));
+        return;
+      }
+    }
+
     let current = filtered[startIndex] || null;
     if (!current && filtered.length) {
       current = filtered[0];